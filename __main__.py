@@ -6,9 +6,13 @@ from underwriter import UnderwriterCLI
 from agent import AgentCLI
 from customer import CustomerCLI, Customer
 from policy_json_handler import PolicyJSONHandler  # Add import
+from schema_migrator import SchemaMigrator
+from claim_lifecycle import ClaimLifecycle
 
 class MainSystem:
     def __init__(self):
+        SchemaMigrator.migrate_all()  # One-time upgrade of old data files; a no-op once current
+        ClaimLifecycle.enable()  # Record every claim filed or decided in this session
         self.auth_manager = AuthenticationManager()
         self.auth_cli = AuthCLI()
         self.user_manager = UserManager(self.auth_manager)  # Move this up
@@ -150,6 +154,7 @@ class MainSystem:
                     print("Invalid choice. Please try again.")
             elif user_role == "claim adjuster":
                 if choice == "1":
+                    self.claim_adjuster_cli.adjuster_id = self.current_user
                     self.claim_adjuster_cli.run()
                 elif choice == "2":
                     self.logout()
@@ -4,8 +4,10 @@ from enum import Enum
 from users import User, UserManager  # Add UserManager import
 from auth import AuthenticationManager
 from policy import Policy, PolicyType, PolicyStatus
+from sqlite_storage import SQLiteStorage
 import json
 import os
+import sys
 
 class SaleStatus(Enum):
     PENDING = "PENDING"
@@ -19,15 +21,16 @@ class PerformanceLevel(Enum):
     PLATINUM = "PLATINUM"
 
 class Sale:
+    __slots__ = ("sale_id", "policy_id", "customer_id", "amount", "commission_earned", "sale_date", "status")
+
     def __init__(self, sale_id: str, policy_id: str, customer_id: str, amount: float):
         self.sale_id = sale_id
         self.policy_id = policy_id
-        self.customer_id = customer_id
+        self.customer_id = sys.intern(customer_id) if isinstance(customer_id, str) else customer_id
         self.amount = amount
         self.commission_earned = 0.0
         self.sale_date = datetime.now()
         self.status = SaleStatus.PENDING.value
-        
 
     def to_dict(self) -> Dict:
         return {
@@ -50,7 +53,7 @@ class Sale:
         )
         sale.commission_earned = data['commission_earned']
         sale.sale_date = datetime.fromisoformat(data['sale_date'])
-        sale.status = data['status']
+        sale.status = sys.intern(data['status'])
         return sale
 
 class Agent(User):
@@ -186,6 +189,7 @@ class AgentCLI:
         self.sales: Dict[str, Sale] = {}
         self.policies: Dict[str, Policy] = {}
         self.sales_data_file = "data/sales.json"
+        self.backend: Optional[SQLiteStorage] = SQLiteStorage.shared()  # Sales go here when configured
         self.user_manager = UserManager(auth_manager)  # Add UserManager instance
         self.customers: Dict[str, Dict] = {}  # Track created customers
         self.auth_manager = auth_manager
@@ -221,9 +225,11 @@ class AgentCLI:
             self.policies = {}
             self.customers = {}
             
-          # Load sales data
-            if os.path.exists('data/sales.json'):
-                with open('data/sales.json', 'r') as f:
+          # Load sales data from the SQLite backend when configured, else the sales file
+            if self.backend:
+                self.sales = {sale_id: Sale.from_dict(data) for sale_id, data in self.backend.load_sales().items()}
+            elif os.path.exists(self.sales_data_file):
+                with open(self.sales_data_file, 'r') as f:
                     sales_data = json.load(f)
                     self.sales = {
                         sale_id: Sale.from_dict(data)
@@ -243,11 +249,13 @@ class AgentCLI:
     def save_data(self):
         """Save sales data"""
         try:
-            os.makedirs('data', exist_ok=True)
             sales_data = {
                 sale_id: sale.to_dict()
                 for sale_id, sale in self.sales.items()
             }
+            if self.backend:
+                return self.backend.save_sales(list(sales_data.values()))
+            os.makedirs('data', exist_ok=True)
             with open(self.sales_data_file, 'w') as f:
                 json.dump(sales_data, f, indent=4)
             return True
@@ -0,0 +1,111 @@
+# bench_policy_codec.py
+"""Micro-benchmark: policies decoded per second, legacy if/elif loader vs PolicyCodec"""
+import argparse
+import time
+from datetime import datetime
+from policy import LifePolicy, CarPolicy, HealthPolicy, PropertyPolicy
+from policy_enums import PolicyStatus
+from policy_codec import PolicyCodec
+
+
+def make_records(count: int):
+    """Build stored policy dictionaries in the canonical format, cycling through the types"""
+    templates = [
+        {"policy_type": "LIFE", "beneficiary": "Jane", "death_benefit": 50000.0},
+        {"policy_type": "CAR", "vehicle_id": "V1", "is_comprehensive": True, "vehicle_age": 3,
+         "vehicle_model": "Myvi", "vehicle_plate_number": "QAA1234", "vehicle_condition": "GOOD"},
+        {"policy_type": "HEALTH", "deductible": 500.0, "includes_dental": False},
+        {"policy_type": "PROPERTY", "property_address": "Kuching", "property_type": "HOUSE"},
+    ]
+    records = {}
+    for i in range(count):
+        record = dict(templates[i % len(templates)])
+        record.update({
+            "policy_id": f"POL{i:06d}", "customer_id": "bench@gmail.com",
+            "coverage_amount": 10000.0 + i, "premium": 100.0 + i % 97,
+            "status": "PolicyStatus.ACTIVE", "start_date": "2025-01-01T00:00:00",
+            "end_date": "2026-01-01T00:00:00", "conditions": []
+        })
+        records[record["policy_id"]] = record
+    return records
+
+
+def legacy_decode(policies, email):
+    """The per-loader reconstruction previously copied into Customer.from_dict"""
+    decoded = []
+    for policy_id, policy_data in policies.items():
+        policy_type = policy_data["policy_type"]
+        if policy_type == "LIFE":
+            policy = LifePolicy(policy_id, email)
+            policy.set_beneficiary(policy_data.get("beneficiary", ""))
+            policy.set_death_benefit(float(policy_data.get("death_benefit", 0)))
+        elif policy_type == "CAR":
+            policy = CarPolicy(policy_id, email)
+            policy.set_vehicle_details(
+                vehicle_id=policy_data.get("vehicle_id", "N/A"),
+                is_comprehensive=policy_data.get("is_comprehensive", False),
+                vehicle_age=int(policy_data.get("vehicle_age", 0)),
+                vehicle_model=policy_data.get("vehicle_model", "N/A"),
+                vehicle_condition=policy_data.get("vehicle_condition", "N/A"),
+                vehicle_plate_number=policy_data.get("vehicle_plate_number", "UNKNOWN")
+            )
+        elif policy_type == "HEALTH":
+            policy = HealthPolicy(policy_id, email)
+            policy.set_health_details(
+                deductible=float(policy_data.get("deductible", 0.0)),
+                includes_dental=policy_data.get("includes_dental", False)
+            )
+        elif policy_type == "PROPERTY":
+            policy = PropertyPolicy(policy_id, email)
+            policy.set_property_details(
+                address=policy_data.get("property_address", "N/A"),
+                property_type=policy_data.get("property_type", "N/A")
+            )
+        else:
+            continue
+
+        policy.set_coverage_amount(float(policy_data["coverage_amount"]))
+        policy.set_premium(float(policy_data["premium"]))
+        if "status" in policy_data:
+            status_str = str(policy_data["status"])
+            try:
+                if status_str.startswith("PolicyStatus."):
+                    policy.update_status(PolicyStatus[status_str.split(".")[1]])
+                else:
+                    policy.update_status(PolicyStatus(int(status_str)))
+            except (ValueError, KeyError):
+                policy.update_status(PolicyStatus.PENDING)
+        if "start_date" in policy_data:
+            policy.set_dates(
+                datetime.strptime(policy_data["start_date"].split('T')[0], "%Y-%m-%d"),
+                datetime.strptime(policy_data["end_date"].split('T')[0], "%Y-%m-%d")
+            )
+        decoded.append(policy)
+    return decoded
+
+
+def measure(label: str, decode, records, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        decode(records)
+        best = min(best, time.perf_counter() - start)
+    rate = len(records) / best
+    print(f"{label:<10} {rate:>14,.0f} policies/s  ({best * 1000:.1f} ms for {len(records):,})")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    records = make_records(args.count)
+    before = measure("legacy", lambda r: legacy_decode(r, "bench@gmail.com"), records, args.repeats)
+    after = measure("codec", lambda r: PolicyCodec.decode_many(r, "bench@gmail.com"), records, args.repeats)
+    print(f"speedup    {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# bench_premiums_batch.py
+"""Benchmark: premiums priced per second, calculate_premium loop vs calculate_premiums_batch"""
+import argparse
+import time
+import numpy as np
+from calculations import PolicyCalculator
+from policy_enums import PolicyType
+from rating_engine import factor_spec
+
+
+def make_columns(count: int, seed: int = 0):
+    """Random policy rows as columns, cycling through every policy type"""
+    rng = np.random.default_rng(seed)
+    types = np.array([t.value for t in PolicyType])[np.arange(count) % len(PolicyType)]
+    coverages = np.round(rng.uniform(1000, 500000, count), 2)
+    terms = rng.choice([6, 12, 24, 36], count)
+    factors = {
+        'vehicle_age': rng.integers(0, 20, count),
+        'annual_mileage': rng.integers(2000, 40000, count),
+        'driving_history': rng.choice(list(factor_spec('calculations', 'CAR', 'driving_history')['table']), count),
+        'parking_location': rng.choice(list(factor_spec('calculations', 'CAR', 'parking_location')['table']), count),
+        'age': rng.integers(18, 90, count),
+        'pre_conditions': rng.integers(0, 5, count),
+        'location_risk': rng.choice(list(factor_spec('calculations', 'PROPERTY', 'location_risk')['table']), count),
+    }
+    return types, coverages, terms, factors
+
+
+def scalar_loop(types, coverages, terms, factors):
+    members = {t.value: t for t in PolicyType}
+    keys = list(factors)
+    columns = [factors[key].tolist() for key in keys]
+    result = []
+    for i, (code, coverage, term) in enumerate(zip(types.tolist(), coverages.tolist(), terms.tolist())):
+        risk_factors = {key: column[i] for key, column in zip(keys, columns)}
+        result.append(PolicyCalculator.calculate_premium.uncached(members[code], coverage, term, risk_factors))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1000000)
+    args = parser.parse_args()
+
+    columns = make_columns(args.count)
+    start = time.perf_counter()
+    expected = scalar_loop(*columns)
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = PolicyCalculator.calculate_premiums_batch(*columns)
+    batch_time = time.perf_counter() - start
+
+    print(f"scalar     {args.count / scalar_time:>14,.0f} premiums/s  ({scalar_time:.2f} s for {args.count:,})")
+    print(f"batch      {args.count / batch_time:>14,.0f} premiums/s  ({batch_time:.2f} s for {args.count:,})")
+    print(f"speedup    {scalar_time / batch_time:.1f}x")
+    print(f"identical  {batch.tolist() == expected}")
+
+
+if __name__ == "__main__":
+    main()
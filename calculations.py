@@ -1,39 +1,23 @@
 import datetime
 import typing
+import numpy as np
 from policy_enums import PolicyType, PolicyStatus
 from typing import Dict
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from policy import Policy, LifePolicy, CarPolicy, HealthPolicy, PropertyPolicy, PolicyManager
 from policy_enums import PolicyType
+from rating_engine import RatingEngine
+from quote_cache import cached_quote
 
 class PolicyCalculator:
    
     
     """Static class for policy-related calculations"""
 
-    BASE_RATES = {
-        PolicyType.LIFE: 0.005,    # 0.5% of coverage per year
-        PolicyType.CAR: 0.04,      # 4% of coverage per year
-        PolicyType.HEALTH: 0.06,   # 6% of coverage per year
-        PolicyType.PROPERTY: 0.02  # 2% of coverage per year
-    }
+    # Rates come from the "calculations" profile of the live rate tables (rating_engine)
 
-    DRIVING_HISTORY_MULTIPLIERS = {
-        "CLEAN": 1.0,
-        "MINOR_VIOLATIONS": 1.2,
-        "MAJOR_VIOLATIONS": 1.5,
-        "ACCIDENTS": 1.8
-    }
-
-    PARKING_LOCATION_MULTIPLIERS = {
-        "GARAGE": 1.0,
-        "DRIVEWAY": 1.1,
-        "STREET": 1.3,
-        "PUBLIC_PARKING": 1.4
-    }
-
-    
     @staticmethod
+    @cached_quote("calculations.premium")
     def calculate_premium(policy_type: PolicyType, coverage_amount: float, term_months: int, risk_factors: Dict) -> float:
         """
         Calculate policy premium based on type, coverage amount, term and risk factors
@@ -41,76 +25,29 @@ class PolicyCalculator:
         :param coverage_amount: Amount of coverage
         :param term_months: Term in months
         :param risk_factors: Dictionary of risk factors specific to policy type
-        :return: Calculated premium amount
+        :return: Calculated premium amount (0.0 for non-positive coverage or term)
         """
-        if coverage_amount <= 0 or term_months <= 0:
-            return 0.0
-
-        # Get base rate for policy type
-        base_rate = PolicyCalculator.BASE_RATES.get(policy_type, 0.03)  # Default 3%
-        
-        # Calculate base premium (annualized)
-        base_premium = coverage_amount * base_rate
-
-        # Adjust for policy term
-        term_years = term_months / 12
-        term_adjusted_premium = base_premium * term_years
-
-        # Apply risk factor adjustments
-        if risk_factors:
-            risk_multiplier = PolicyCalculator._calculate_risk_multiplier(policy_type, risk_factors)
-            term_adjusted_premium *= risk_multiplier
-
-        return round(term_adjusted_premium, 2)
+        return RatingEngine.quote("calculations", policy_type, coverage_amount, term_months, risk_factors)
 
     @staticmethod
-    def _calculate_risk_multiplier(policy_type: PolicyType, risk_factors: Dict) -> float:
-        """Calculate risk multiplier based on policy type and risk factors"""
-        multiplier = 1.0
-
-        if policy_type == PolicyType.CAR:
-            # Numeric factors
-            vehicle_age = float(risk_factors.get('vehicle_age', 0))
-            annual_mileage = float(risk_factors.get('annual_mileage', 12000))
-            
-            # Age-based multiplier
-            if vehicle_age > 10:
-                multiplier *= 1.4
-            elif vehicle_age > 5:
-                multiplier *= 1.2
-                
-            # Mileage-based multiplier
-            if annual_mileage > 20000:
-                multiplier *= 1.3
-            elif annual_mileage > 15000:
-                multiplier *= 1.2
-                
-            # String-based factors with lookup tables
-            driving_history = risk_factors.get('driving_history', 'CLEAN').upper()
-            multiplier *= PolicyCalculator.DRIVING_HISTORY_MULTIPLIERS.get(driving_history, 1.0)
-            
-            parking_location = risk_factors.get('parking_location', 'GARAGE').upper()
-            multiplier *= PolicyCalculator.PARKING_LOCATION_MULTIPLIERS.get(parking_location, 1.0)
-
-        elif policy_type == PolicyType.LIFE:
-            age = float(risk_factors.get('age', 30))
-            if age > 60:
-                multiplier *= 1.5
-            elif age > 40:
-                multiplier *= 1.2
-
-        elif policy_type == PolicyType.HEALTH:
-            pre_conditions = float(risk_factors.get('pre_conditions', 0))
-            multiplier *= (1 + (0.1 * pre_conditions))
-
-        elif policy_type == PolicyType.PROPERTY:
-            location_risk = risk_factors.get('location_risk', 'LOW')
-            risk_values = {'LOW': 1.0, 'MEDIUM': 1.3, 'HIGH': 1.6}
-            multiplier *= risk_values.get(location_risk.upper(), 1.0)
-
-        return multiplier
-
+    def quote_premium(policy_type: PolicyType, coverage_amount: float, term_months: int,
+                      risk_factors: Dict) -> Tuple[float, int]:
+        """calculate_premium with the version of the rate tables that priced it"""
+        return RatingEngine.quote_with_version("calculations", policy_type, coverage_amount, term_months, risk_factors)
 
+    @staticmethod
+    def calculate_premiums_batch(types, coverages, terms, risk_factor_columns: Optional[Dict] = None) -> np.ndarray:
+        """
+        Vectorised calculate_premium over many policies
+        :param types: Policy types (PolicyType members, names or values), one per row
+        :param coverages: Coverage amounts
+        :param terms: Terms in months
+        :param risk_factor_columns: Column per risk factor key (vehicle_age, annual_mileage,
+            driving_history, parking_location, age, pre_conditions, location_risk); missing
+            columns or None/NaN entries take the same defaults as the scalar path
+        :return: Premiums, equal to calculate_premium for every row
+        """
+        return RatingEngine.quote_batch("calculations", types, coverages, terms, risk_factor_columns)
 
     @staticmethod
     def calculate_policy_term(start_date: datetime, end_date: datetime) -> int:
@@ -1,8 +1,11 @@
 from datetime import datetime, date
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Union, BinaryIO
 from enum import Enum
 import json
 import os
+import sys
+from evidence_store import EvidenceStore
+from schema_migrations import canonical_claim_status
 
 class ClaimStatus(Enum):
     PENDING = "PENDING"
@@ -11,11 +14,41 @@ class ClaimStatus(Enum):
     REJECTED = "REJECTED"
     SETTLED = "SETTLED"
 
+# Claim lifecycle: the statuses each status may move to (saving a claim in its current status is always allowed)
+CLAIM_TRANSITIONS = {
+    ClaimStatus.PENDING: (ClaimStatus.REVIEWING, ClaimStatus.APPROVED, ClaimStatus.REJECTED),
+    ClaimStatus.REVIEWING: (ClaimStatus.PENDING, ClaimStatus.APPROVED, ClaimStatus.REJECTED),
+    ClaimStatus.APPROVED: (ClaimStatus.REVIEWING, ClaimStatus.SETTLED),
+    ClaimStatus.REJECTED: (ClaimStatus.REVIEWING,),
+    ClaimStatus.SETTLED: (),
+}
+
+def parse_claim_status(value) -> Optional[ClaimStatus]:
+    """Resolve a status such as APPROVE, approved or ClaimStatus.APPROVED to a ClaimStatus, or None if unknown"""
+    if isinstance(value, ClaimStatus):
+        return value
+    try:
+        return ClaimStatus(canonical_claim_status(value))
+    except ValueError:
+        return None
+
+def can_transition(current, new) -> bool:
+    """Whether a claim in status current may move to status new"""
+    old_status, new_status = parse_claim_status(current), parse_claim_status(new)
+    if new_status is None:
+        return False
+    if old_status is None or old_status == new_status:
+        return True  # Unreadable stored statuses can be corrected to any status
+    return new_status in CLAIM_TRANSITIONS[old_status]
+
 class Claim:
+    __slots__ = ("claim_id", "policy_id", "customer_id", "amount", "status",
+                 "description", "evidence_documents", "date_filed")
+
     def __init__(self, claim_id: str, policy_id: str, customer_id: str):
         self.claim_id = claim_id
         self.policy_id = policy_id
-        self.customer_id = customer_id
+        self.customer_id = sys.intern(customer_id) if isinstance(customer_id, str) else customer_id
         self.amount: float = 0.0
         self.status: str = ClaimStatus.PENDING.value
         self.description: str = ""
@@ -51,10 +84,10 @@ class Claim:
             return False
 
     def set_status(self, status: str) -> bool:
-        """Update claim status with validation"""
+        """Update claim status if the claim lifecycle allows the change"""
         try:
-            if status in [s.value for s in ClaimStatus]:
-                self.status = status
+            if can_transition(self.status, status):
+                self.status = parse_claim_status(status).value  # Share the enum's string
                 return True
             return False
         except ValueError:
@@ -70,9 +103,22 @@ class Claim:
         except Exception:
             return False
 
-    def add_evidence(self, document_id: str) -> bool:
-        """Add supporting document to claim"""
+    def add_evidence(self, document: Union[str, os.PathLike, BinaryIO]) -> bool:
+        """
+        Add supporting document to claim. A string is recorded as a document ID;
+        a path-like object (e.g. pathlib.Path) or binary stream is kept in the
+        evidence store and recorded by its SHA-256 digest. Stored files are
+        referenced once the claim is saved (see ClaimsStorageService.collect_evidence_garbage).
+        """
         try:
+            if isinstance(document, str):
+                if not document.strip():
+                    return False
+                document_id = document
+            elif isinstance(document, os.PathLike) or hasattr(document, "read"):
+                document_id = EvidenceStore.shared().put(document)
+            else:
+                return False
             if document_id not in self.evidence_documents:
                 self.evidence_documents.append(document_id)
                 return True
@@ -80,6 +126,16 @@ class Claim:
         except Exception:
             return False
 
+    def remove_evidence(self, document_id: str) -> bool:
+        """Remove a supporting document; its stored file goes once no saved claim refers to it"""
+        try:
+            if document_id not in self.evidence_documents:
+                return False
+            self.evidence_documents.remove(document_id)
+            return True
+        except Exception:
+            return False
+
     def calculate_claim(self) -> float:
         """Calculate final claim amount based on evidence and policy limits"""
         try:
@@ -165,7 +221,7 @@ class Claim:
             customer_id=data['customer_id']
         )
         claim.amount = data['amount']
-        claim.status = data['status']
+        claim.status = sys.intern(data['status'])
         claim.description = data['description']
         claim.evidence_documents = data['evidence_documents']
         claim.date_filed = datetime.fromisoformat(data['date_filed']).date()
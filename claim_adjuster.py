@@ -2,11 +2,15 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 from users import User
 from auth import AuthenticationManager
-from claim import Claim, ClaimJSONHandler
+from claim import Claim, ClaimJSONHandler, ClaimStatus
 from policy import Policy
 from enum import Enum
 from claims_storage_service import ClaimsStorageService
+from claims_work_queue import ClaimsWorkQueue
+from claim_triage import ClaimTriage
+from claim_lifecycle import ClaimLifecycle
 import json
+import os
 
 class RiskLevel(Enum):
     LOW = "LOW"
@@ -74,7 +78,8 @@ class ClaimAdjuster(User):
         """Get years of experience"""
         return self.experience_years
 
-    def assess_claim_risk(self, claim: Claim, policy: Policy) -> RiskLevel:
+    @staticmethod
+    def assess_claim_risk(claim: Claim, policy: Policy) -> RiskLevel:
         """Assess risk level of a claim"""
         try:
             # Calculate risk score based on multiple factors
@@ -187,6 +192,8 @@ class ClaimAdjusterCLI:
         self.current_user: Optional[ClaimAdjuster] = None
         self.claims: Dict[str, Claim] = {}
         self.policies: Dict[str, Policy] = {}
+        self.adjuster_id: str = f"adjuster-{os.getpid()}"  # Lease owner; set to the logged-in user's email
+        self.work_queue = ClaimsWorkQueue.enable(ClaimAdjuster.assess_claim_risk)
 
     def load_data(self):
         """Load claims and policies data"""
@@ -201,49 +208,58 @@ class ClaimAdjusterCLI:
         """Display main menu"""
         print("\n=== Claim Adjuster System ===")
         print("1. View All Claims")
-        print("2. Process Claim")
-        print("3. Generate Assessment Report")
-        print("4. Update Profile")
-        print("5. View Statistics")
-        print("6. Save Changes")
-        print("7. Logout")
+        print("2. Next Claim")
+        print("3. Process Claim")
+        print("4. Generate Assessment Report")
+        print("5. Triage Pending Claims")
+        print("6. Update Profile")
+        print("7. View Statistics")
+        print("8. Save Changes")
+        print("9. Logout")
 
     def run(self):
         """Main CLI loop"""
         self.load_data()
         while True:
             self.display_menu()
-            choice = input("\nEnter your choice (1-7): ").strip()
+            choice = input("\nEnter your choice (1-9): ").strip()
 
             if choice == "1":
                 self.view_all_claims()
             elif choice == "2":
-                self.process_claim()
+                self.next_claim()
             elif choice == "3":
-                self.generate_report()
+                self.process_claim()
             elif choice == "4":
-                self.update_profile()
+                self.generate_report()
             elif choice == "5":
-                self.view_statistics()
+                self.triage_claims()
             elif choice == "6":
-                self.save_changes()
+                self.update_profile()
             elif choice == "7":
+                self.view_statistics()
+            elif choice == "8":
+                self.save_changes()
+            elif choice == "9":
                 self.logout()
                 break
             else:
                 print("Invalid choice. Please try again.")
 
     def view_all_claims(self):
-        """Display all pending claims that need review"""
-        pending_claims = ClaimsStorageService.get_pending_claims()
-        
-        if not pending_claims:
+        """Display the open claims waiting in the work queue, most urgent first"""
+        queued = self.work_queue.queued()
+
+        if not queued:
             print("\nNo pending claims found.")
             return
 
         print("\n=== Pending Claims ===")
-        for claim_id, claim_data in pending_claims.items():
-            print(f"\nClaim ID: {claim_id}")
+        for item in queued:
+            claim_data = ClaimsStorageService.load_claim(item['claim_id'])
+            if not claim_data:
+                continue
+            print(f"\nClaim ID: {item['claim_id']} ({item['risk']} risk, {item['status']})")
             print(f"Policy ID: {claim_data['policy_id']}")
             print(f"Customer ID: {claim_data['customer_id']}")
             print(f"Amount: ${float(claim_data['amount']):,.2f}")
@@ -251,18 +267,33 @@ class ClaimAdjusterCLI:
             print(f"Date Filed: {claim_data['date_filed']}")
             print("-" * 50)
 
-    def process_claim(self):
+    def next_claim(self):
+        """Lease the most urgent open claim from the work queue and process it"""
+        item = self.work_queue.next_claim(self.adjuster_id)
+        if not item:
+            print("\nNo open claims in the queue.")
+            return
+        minutes = ClaimsWorkQueue.LEASE_SECONDS // 60
+        print(f"\nNext claim: {item['claim_id']} ({item['risk']} risk), reserved for you for {minutes} minutes")
+        self.process_claim(item['claim_id'])
+
+    def process_claim(self, claim_id: Optional[str] = None):
         """Process a specific claim"""
-        claim_id = input("\nEnter Claim ID: ").strip()
+        if claim_id is None:
+            claim_id = input("\nEnter Claim ID: ").strip()
         
-        # Load claims from storage
-        all_claims = ClaimsStorageService.load_all_claims()
-        claim_data = all_claims.get(claim_id)
+        # Load the claim from storage
+        claim_data = ClaimsStorageService.load_claim(claim_id)
         
         if not claim_data:
             print("Claim not found.")
             return
 
+        # Reserve the claim so no other adjuster processes it at the same time
+        if not self.work_queue.lease(claim_id, self.adjuster_id):
+            print(f"Claim {claim_id} is being processed by {self.work_queue.lease_holder(claim_id)}.")
+            return
+
         print(f"\nClaim Amount: ${float(claim_data['amount']):,.2f}")
         print(f"Description: {claim_data['description']}")
         
@@ -275,40 +306,35 @@ class ClaimAdjusterCLI:
         
         # Convert numeric choice to action string
         action_map = {
-            "1": "APPROVE",
-            "2": "REJECT",
-            "3": "REVIEW"
+            "1": ClaimStatus.APPROVED.value,
+            "2": ClaimStatus.REJECTED.value,
+            "3": ClaimStatus.REVIEWING.value
         }
         
         if action in action_map:
-            # Update claim status
-            claim_data['status'] = action_map[action]
-            
-            # Save the updated claim
-            all_claims[claim_id] = claim_data  # Update in the dictionary
-            
-            # Save all claims back to storage
+            # Update and save only this claim's status; the work queue follows the change
             try:
-                with open(ClaimsStorageService.CLAIMS_FILE, 'w') as f:
-                    json.dump(all_claims, f, indent=4, default=str)
+                if not ClaimsStorageService.update_claim_status(claim_id, action_map[action]):
+                    raise ValueError(f"Could not store status for claim {claim_id}")
                 print(f"Claim status updated to {action_map[action]}")
                 
                 if action == "1":  # If approved
-                    coverage_amount = float(claim_data['amount'])
-                    print(f"Recommended Payout: ${coverage_amount:,.2f}")
+                    assessment = ClaimTriage.assessment_for(claim_id, dict(claim_data, status=action_map[action]))
+                    print(f"Recommended Payout: ${assessment['recommended_payout']:,.2f}")
             except Exception as e:
                 print(f"Error saving claim: {str(e)}")
                 print("Failed to update claim status")
+                self.work_queue.release(claim_id, self.adjuster_id)
         else:
             print("Invalid choice. Please enter 1, 2, or 3.")
+            self.work_queue.release(claim_id, self.adjuster_id)
             
     def generate_report(self):
         """Generate assessment report for a claim"""
         claim_id = input("\nEnter Claim ID: ").strip()
         
-        # Load ALL claims, not just pending ones
-        all_claims = ClaimsStorageService.load_all_claims()
-        claim_data = all_claims.get(claim_id)
+        # Load the claim whatever its status, not just pending ones
+        claim_data = ClaimsStorageService.load_claim(claim_id)
         
         if not claim_data:
             print("Claim not found.")
@@ -323,22 +349,49 @@ class ClaimAdjusterCLI:
         print(f"Status: {claim_data['status']}")
         print(f"Date Filed: {claim_data['date_filed']}")
         
-        # Add risk assessment
+        # Add risk assessment from the saved triage (assessed now if the claim was never triaged)
+        assessment = ClaimTriage.assessment_for(claim_id, claim_data)
         print("\nRisk Assessment:")
-        print(f"Coverage Ratio: {(float(claim_data['amount']) / 10000.0):,.2%}")  # Assuming policy coverage is 10000
+        if assessment['policy_found']:
+            print(f"Coverage Amount: ${assessment['coverage_amount']:,.2f}")
+        else:
+            print(f"Policy {claim_data['policy_id']} not found")
+        if assessment['coverage_ratio'] is not None:
+            print(f"Coverage Ratio: {assessment['coverage_ratio']:,.2%}")
+            print(f"Days Active Before Claim: {assessment['days_active']}")
+        print(f"Risk Level: {assessment['risk_level']}")
         print(f"Claim Age: {(datetime.now() - datetime.strptime(claim_data['date_filed'], '%Y-%m-%d')).days} days")
         
         # Add recommendation based on status
         print("\nRecommendation:")
-        if claim_data['status'] == "APPROVE":
+        if claim_data['status'] == ClaimStatus.APPROVED.value:
             print("Claim has been approved for payout")
-            print(f"Recommended Payout: ${float(claim_data['amount']):,.2f}")
-        elif claim_data['status'] == "REJECT":
+            print(f"Recommended Payout: ${assessment['recommended_payout']:,.2f}")
+        elif claim_data['status'] == ClaimStatus.REJECTED.value:
             print("Claim has been rejected")
-        elif claim_data['status'] == "REVIEW":
+        elif claim_data['status'] == ClaimStatus.REVIEWING.value:
             print("Claim requires further review")
+            print(f"Recommended Payout: ${assessment['recommended_payout']:,.2f}")
         print("-" * 50)
 
+    def triage_claims(self):
+        """Assess every open claim against its policy and save the assessments for reports"""
+        triage = ClaimTriage.from_storage()
+        assessments = triage.triage()
+        if not assessments:
+            print("\nNo pending claims found.")
+            return
+
+        print(f"\n=== Triage of {len(assessments)} Open Claims ===")
+        for level in ("HIGH", "MEDIUM", "LOW"):
+            count = sum(1 for assessment in assessments.values() if assessment['risk_level'] == level)
+            print(f"{level} risk: {count}")
+        missing = sum(1 for assessment in assessments.values() if not assessment['policy_found'])
+        if missing:
+            print(f"Claims without a matching policy: {missing}")
+        total = sum(assessment['recommended_payout'] for assessment in assessments.values())
+        print(f"Total Recommended Payout: ${total:,.2f}")
+
     def update_profile(self):
         """Update adjuster's profile"""
         if not self.current_user:
@@ -388,6 +441,12 @@ class ClaimAdjusterCLI:
         print(f"Experience: {details['experience_years']} years")
         print(f"Certification: {details['certification']}")
 
+        # Claim totals come from the lifecycle counters, not a scan of every claim
+        lifecycle = ClaimLifecycle.shared()
+        print("\n=== Claims by Status ===")
+        for status in ClaimStatus:
+            print(f"{status.value}: {lifecycle.count(status)} (${lifecycle.total_amount(status):,.2f})")
+
     def save_changes(self):
         """Save current state to files"""
         try:
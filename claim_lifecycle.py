@@ -0,0 +1,355 @@
+# claim_lifecycle.py
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from claim import parse_claim_status
+from claims_storage_service import ClaimsStorageService
+from data_storage_service import DataStorageService
+from file_lock import FileLock
+from policy_book import PolicyBook
+from policy_enums import PolicyType
+
+UNKNOWN = "UNKNOWN"     # Policy type or month that could not be determined
+
+# State of one claim as the counters see it: (status, amount in cents, policy type, month filed)
+ClaimState = Tuple[str, int, str, str]
+
+
+def _cents(amount: Any) -> int:
+    try:
+        return int(round(float(amount or 0.0) * 100))
+    except (TypeError, ValueError):
+        return 0
+
+
+class ClaimLifecycle:
+    """
+    Event log of claim status changes with counters kept up to date per event.
+
+    Every stored claim save or status change (see ClaimsStorageService listeners)
+    becomes one JSON line in the event log: filed, transition or amended, with
+    the claim's status, amount, policy type and filing month afterwards. Applying
+    an event moves the claim's contribution from its old counter cells to its
+    new ones, so counts and amount sums by status, policy type and month are
+    answered from memory in O(1). Amounts are summed in integer cents so
+    repeated moves never drift. A snapshot of the state and its log offset is
+    written every SNAPSHOT_EVERY events; startup loads it and replays only the
+    tail, while replay() rebuilds everything from the full history.
+
+    Changes the storage hook never saw - made by a process that did not enable
+    recording, or lost to a failing hook - are caught up by reconciling: the
+    stored claims are compared with the counted states and an event is appended
+    for each difference. enable() and replay() reconcile, and so does the next
+    query after the hook failed.
+    """
+
+    EVENTS_FILE: Optional[str] = None   # Defaults to claim_events.jsonl next to the claims file
+    SNAPSHOT_EVERY = 500                # Events between counter snapshots
+    LOCK_TIMEOUT = 10                   # Seconds to wait for another process's lock
+    LOCK_STALE_SECONDS = 30             # A lock file older than this is considered abandoned
+
+    _shared: Optional['ClaimLifecycle'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path: str, use_snapshot: bool = True):
+        self.path = path
+        self.snapshot_path = os.path.splitext(path)[0] + "_counters.json"
+        self.lock_path = path + ".lock"
+        self._file_lock = FileLock(self.lock_path, "claim event", ClaimLifecycle.LOCK_TIMEOUT,
+                                   ClaimLifecycle.LOCK_STALE_SECONDS)
+        self._lock = threading.RLock()
+        self._stale = False     # A change was missed; reconcile before the next use
+        self._reset()
+        if use_snapshot:
+            self._load_snapshot()
+
+    def _reset(self):
+        self.states: Dict[str, ClaimState] = {}
+        self.by_status: Dict[str, List[int]] = {}               # status -> [count, cents]
+        self.by_type: Dict[str, Dict[str, List[int]]] = {}      # policy type -> status -> [count, cents]
+        self.by_month: Dict[str, Dict[str, List[int]]] = {}     # YYYY-MM -> status -> [count, cents]
+        self._file_id: Optional[Tuple[int, int]] = None
+        self._end = 0
+        self._since_snapshot = 0
+
+    @classmethod
+    def default_path(cls) -> str:
+        return cls.EVENTS_FILE or os.path.join(os.path.dirname(ClaimsStorageService.CLAIMS_FILE), "claim_events.jsonl")
+
+    @classmethod
+    def shared(cls) -> 'ClaimLifecycle':
+        """Get the process-wide lifecycle for the configured claims directory"""
+        with cls._shared_lock:
+            path = cls.default_path()
+            if cls._shared is None or cls._shared.path != path:
+                cls._shared = cls(path)
+            return cls._shared
+
+    @classmethod
+    def enable(cls) -> 'ClaimLifecycle':
+        """Catch up with the stored claims, then record every claim saved or updated in this process"""
+        lifecycle = cls.shared()
+        lifecycle.reconcile()
+        ClaimsStorageService.add_claim_listener(cls._claim_changed)
+        return lifecycle
+
+    @staticmethod
+    def _claim_changed(claim_id: str, status: str, claim: Optional[Dict]):
+        lifecycle = ClaimLifecycle.shared()
+        try:
+            lifecycle.on_claim_changed(claim_id, status, claim)
+        except Exception:
+            lifecycle._stale = True
+            raise
+
+    @classmethod
+    def replay(cls, path: Optional[str] = None) -> 'ClaimLifecycle':
+        """Rebuild state and counters from the full event history, ignoring any snapshot, and reconcile"""
+        lifecycle = cls(path or cls.default_path(), use_snapshot=False)
+        lifecycle.reconcile()
+        return lifecycle
+
+    def reconcile(self):
+        """Record the stored claims whose state the counters do not match (one full scan of the claims)"""
+        with self._locked(reconcile=True):
+            pass
+
+    # ------------------------------------------------------------------
+    # Counters
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _add(cells: Dict[str, List[int]], status: str, count: int, cents: int):
+        cell = cells.setdefault(status, [0, 0])
+        cell[0] += count
+        cell[1] += cents
+        if cell[0] == 0:
+            del cells[status]
+
+    def _count(self, state: ClaimState, sign: int):
+        status, cents, policy_type, month = state
+        self._add(self.by_status, status, sign, sign * cents)
+        self._add(self.by_type.setdefault(policy_type, {}), status, sign, sign * cents)
+        self._add(self.by_month.setdefault(month, {}), status, sign, sign * cents)
+
+    @staticmethod
+    def _state(event: Dict[str, Any]) -> ClaimState:
+        return event["to"], int(event["cents"]), event["policy_type"], event["month"]
+
+    def _apply(self, event: Dict[str, Any]):
+        if event.get("kind") == "seeded":
+            return
+        claim_id = event["claim_id"]
+        state = self._state(event)
+        previous = self.states.get(claim_id)
+        if previous is not None:
+            self._count(previous, -1)
+        self._count(state, 1)
+        self.states[claim_id] = state
+
+    # ------------------------------------------------------------------
+    # Event log and snapshots
+    # ------------------------------------------------------------------
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                snapshot = json.load(f)
+            stat = os.stat(self.path)
+            if [stat.st_dev, stat.st_ino] != snapshot["file_id"] or snapshot["offset"] > stat.st_size:
+                return  # Snapshot of another log
+            for claim_id, state in snapshot["states"].items():
+                self.states[claim_id] = tuple(state)
+                self._count(self.states[claim_id], 1)
+            self._file_id = tuple(snapshot["file_id"])
+            self._end = snapshot["offset"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self._reset()
+
+    def _save_snapshot(self):
+        snapshot = {"file_id": list(self._file_id), "offset": self._end,
+                    "states": {claim_id: list(state) for claim_id, state in self.states.items()}}
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.snapshot_path)
+        self._since_snapshot = 0
+
+    def _refresh(self):
+        """Apply events appended by any process since the last refresh"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._file_id is not None:
+                self._reset()
+            return
+        file_id = (stat.st_dev, stat.st_ino)
+        if file_id != self._file_id or stat.st_size < self._end:
+            self._reset()  # A different log - rebuild from its start
+            self._file_id = file_id
+        if stat.st_size > self._end:
+            with open(self.path, 'rb') as f:
+                f.seek(self._end)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Torn write at the tail
+                    self._end += len(line)
+                    try:
+                        self._apply(json.loads(line))
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    self._since_snapshot += 1
+
+    def _append(self, events: List[Dict[str, Any]]):
+        """Append events and apply them in log order (caller holds the locks)"""
+        if not events:
+            return
+        data = "".join(json.dumps(event) + "\n" for event in events).encode("utf-8")
+        with open(self.path, 'ab') as f:
+            if f.tell() > 0:
+                with open(self.path, 'rb') as check:
+                    check.seek(-1, os.SEEK_END)
+                    if check.read(1) != b"\n":
+                        data = b"\n" + data  # Terminate a torn tail left by a crashed writer
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._refresh()
+        if self._since_snapshot >= ClaimLifecycle.SNAPSHOT_EVERY:
+            self._save_snapshot()
+
+    @contextmanager
+    def _locked(self, reconcile: bool = False) -> Iterator[None]:
+        with self._lock:
+            self._file_lock.acquire()
+            try:
+                self._refresh()
+                if reconcile or self._stale or self._file_id is None:
+                    self._reconcile()
+                yield
+            finally:
+                self._file_lock.release()
+
+    def _reconcile(self):
+        """
+        Append an event for every stored claim whose state differs from the counted
+        one; on first use this files every stored claim. New claims are typed
+        through a policy index, built only when there are any.
+        """
+        self._stale = False
+        claims = {claim_id: claim for claim_id, claim in ClaimsStorageService.load_all_claims().items()
+                  if isinstance(claim, dict)}
+        types: Dict[str, str] = {}
+        if any(claim_id not in self.states for claim_id in claims):
+            book = PolicyBook.from_storage()
+            types = {policy_id: PolicyType(int(code)).name
+                     for policy_id, code in zip(book.policy_ids, book.type_code)}
+        now = datetime.now().isoformat()
+        events = []
+        for claim_id, claim in claims.items():
+            previous = self.states.get(claim_id)
+            policy_type = previous[2] if previous is not None else types.get(claim.get("policy_id"), UNKNOWN)
+            event = self._event(claim_id, previous, claim, policy_type, now)
+            if previous != self._state(event):
+                events.append(event)
+        if self._file_id is None:
+            events.append({"kind": "seeded", "at": now})  # Marks the log as started even with no claims
+        self._append(events)
+
+    @staticmethod
+    def _event(claim_id: str, previous: Optional[ClaimState], claim: Dict, policy_type: str,
+               at: str) -> Dict[str, Any]:
+        status = parse_claim_status(claim.get("status"))
+        to = status.value if status else str(claim.get("status"))
+        cents = _cents(claim.get("amount"))
+        if previous is None:
+            kind = "filed"
+        elif previous[0] != to:
+            kind = "transition"
+        else:
+            kind = "amended"
+        return {"kind": kind, "claim_id": claim_id, "from": previous[0] if previous else None, "to": to,
+                "cents": cents, "policy_type": policy_type,
+                "month": str(claim.get("date_filed") or "")[:7] or UNKNOWN, "at": at}
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+    def on_claim_changed(self, claim_id: str, status: str, claim: Optional[Dict] = None):
+        """Storage hook: record the claim's new state, unless nothing counted changed"""
+        if claim is None:
+            claim = ClaimsStorageService.load_claim(claim_id)
+        if claim is None:
+            return
+        claim = dict(claim, status=status)
+        with self._locked():
+            previous = self.states.get(claim_id)
+            if previous is not None:
+                policy_type = previous[2]
+            else:
+                policy_data = DataStorageService.load_policy(claim.get("customer_id"), claim.get("policy_id"))
+                policy_type = str((policy_data or {}).get("policy_type") or UNKNOWN)
+            event = self._event(claim_id, previous, claim, policy_type, datetime.now().isoformat())
+            if previous == self._state(event):
+                return
+            self._append([event])
+
+    # ------------------------------------------------------------------
+    # Dashboard queries
+    # ------------------------------------------------------------------
+    def _cells(self, policy_type: Optional[str], month: Optional[str]) -> Dict[str, List[int]]:
+        if policy_type is not None and month is not None:
+            raise ValueError("Counters are kept by policy type or by month, not both")
+        with self._locked():
+            if policy_type is not None:
+                return dict(self.by_type.get(getattr(policy_type, "name", policy_type), {}))
+            if month is not None:
+                return dict(self.by_month.get(month, {}))
+            return dict(self.by_status)
+
+    @staticmethod
+    def _status_key(status) -> str:
+        parsed = parse_claim_status(status)
+        return parsed.value if parsed else str(status)
+
+    def count(self, status=None, policy_type=None, month: Optional[str] = None) -> int:
+        """Number of claims, optionally in one status and one policy type or month (YYYY-MM)"""
+        cells = self._cells(policy_type, month)
+        if status is not None:
+            return cells.get(self._status_key(status), [0, 0])[0]
+        return sum(cell[0] for cell in cells.values())
+
+    def total_amount(self, status=None, policy_type=None, month: Optional[str] = None) -> float:
+        """Sum of claim amounts, with the same filters as count()"""
+        cells = self._cells(policy_type, month)
+        if status is not None:
+            return cells.get(self._status_key(status), [0, 0])[1] / 100
+        return sum(cell[1] for cell in cells.values()) / 100
+
+    def summary(self) -> Dict[str, Dict]:
+        """Counts and amounts by status, by policy type and by month"""
+        def table(cells: Dict[str, List[int]]) -> Dict[str, Dict[str, float]]:
+            return {status: {"count": cell[0], "amount": cell[1] / 100} for status, cell in sorted(cells.items())}
+        with self._locked():
+            return {"by_status": table(self.by_status),
+                    "by_type": {key: table(cells) for key, cells in sorted(self.by_type.items()) if cells},
+                    "by_month": {key: table(cells) for key, cells in sorted(self.by_month.items()) if cells}}
+
+    def history(self, claim_id: str) -> List[Dict[str, Any]]:
+        """Every recorded event of one claim, oldest first (reads the whole log)"""
+        events = []
+        try:
+            with open(self.path, 'r') as f:
+                for line in f:
+                    if f'"{claim_id}"' not in line:
+                        continue
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    if event.get("claim_id") == claim_id:
+                        events.append(event)
+        except FileNotFoundError:
+            pass
+        return events
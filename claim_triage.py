@@ -0,0 +1,292 @@
+# claim_triage.py
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from claims_storage_service import ClaimsStorageService
+from claims_work_queue import OPEN_STATUSES
+from data_storage_service import DataStorageService
+from file_lock import FileLock
+from policy_book import PolicyBook
+
+RISK_LEVELS = np.array(["LOW", "MEDIUM", "HIGH"], dtype=object)
+RISK_MULTIPLIERS = np.array([1.0, 0.9, 0.8])   # Payout multiplier per RISK_LEVELS entry
+
+
+def _filed_day(value) -> np.datetime64:
+    """Filing date of a stored claim, NaT when missing or unreadable"""
+    try:
+        return np.datetime64(str(value)[:10], "D") if value else np.datetime64("NaT", "D")
+    except ValueError:
+        return np.datetime64("NaT", "D")
+
+
+def _day_text(day: np.datetime64) -> Optional[str]:
+    return None if np.isnat(day) else str(day)
+
+
+class AssessmentLog:
+    """
+    Append-only JSON Lines file of claim assessments; a claim's latest line wins.
+
+    Saving appends one line per claim under a lock file shared by every
+    process, and reads parse only the lines appended since the last read. The
+    file is rewritten with one line per claim once superseded lines outnumber
+    current ones.
+    """
+
+    LOCK_TIMEOUT = 10             # Seconds to wait for another process's lock
+    LOCK_STALE_SECONDS = 30       # A lock file older than this is considered abandoned
+    COMPACT_MIN_RECORDS = 1000    # Lines needed before compacting
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file_lock = FileLock(path + ".lock", "claim assessments", AssessmentLog.LOCK_TIMEOUT,
+                                   AssessmentLog.LOCK_STALE_SECONDS)
+        self._lock = threading.RLock()
+        self._assessments: Dict[str, Dict[str, Any]] = {}
+        self._file_id: Optional[Tuple[int, int]] = None
+        self._end = 0
+        self._record_count = 0
+
+    def _refresh(self):
+        """Read the lines appended by any writer since the last read"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._assessments.clear()
+            self._file_id, self._end, self._record_count = None, 0, 0
+            return
+        file_id = (stat.st_dev, stat.st_ino)
+        if file_id != self._file_id or stat.st_size < self._end:
+            # New file (compacted or replaced) - read from scratch
+            self._assessments.clear()
+            self._file_id, self._end, self._record_count = file_id, 0, 0
+        if stat.st_size > self._end:
+            with open(self.path, 'rb') as f:
+                f.seek(self._end)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Torn write at the tail; it is skipped until rewritten
+                    self._end += len(line)
+                    try:
+                        record = json.loads(line)
+                        self._assessments[record["claim_id"]] = record["assessment"]
+                        self._record_count += 1
+                    except (ValueError, KeyError, TypeError):
+                        pass
+
+    def get(self, claim_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            return self._assessments.get(claim_id)
+
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            return dict(self._assessments)
+
+    def append(self, assessments: Dict[str, Dict[str, Any]]):
+        """Append one line per assessment in a single write, compacting when mostly superseded"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        text = "".join(json.dumps({"claim_id": claim_id, "assessment": assessment}) + "\n"
+                       for claim_id, assessment in assessments.items())
+        with self._lock, self._file_lock:
+            with open(self.path, 'ab') as f:
+                if f.tell() > 0:
+                    with open(self.path, 'rb') as check:
+                        check.seek(-1, os.SEEK_END)
+                        if check.read(1) != b"\n":
+                            text = "\n" + text  # Terminate a torn tail left by a crashed writer
+                f.write(text.encode("utf-8"))
+            self._refresh()
+            if self._record_count >= max(AssessmentLog.COMPACT_MIN_RECORDS, 2 * len(self._assessments)):
+                self._compact()
+
+    def _compact(self):
+        """Rewrite the file with each claim's latest line (caller holds the locks)"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            for claim_id, assessment in self._assessments.items():
+                f.write(json.dumps({"claim_id": claim_id, "assessment": assessment}) + "\n")
+        os.replace(tmp_path, self.path)
+        self._refresh()
+
+
+class ClaimTriage:
+    """
+    Assesses a whole claims backlog against the policy book in one pass.
+
+    The book's policy IDs are indexed once; each claim is then joined to its
+    policy with one hash lookup, and risk level, coverage ratio, days active
+    and recommended payout are computed over NumPy columns with the same rules
+    and float operations as ClaimAdjuster.assess_claim_risk and
+    calculate_claim_payout. Claims without a policy (or with an unusable one)
+    are HIGH risk with no recommended payout. Assessments are appended to
+    ASSESSMENTS_FILE (see AssessmentLog) and record the claim and policy fields
+    they were computed from, so reports reuse them until one of those changes.
+    """
+
+    ASSESSMENTS_FILE = "data/claim_assessments.jsonl"
+    # Fields that make an assessment, claim and policy inputs included; a saved one differing in any is stale
+    ASSESSMENT_FIELDS = ("status", "policy_id", "policy_found", "coverage_amount", "policy_start", "amount",
+                         "evidence_count", "date_filed", "coverage_ratio", "days_active", "risk_level",
+                         "recommended_payout")
+    _log: Optional[AssessmentLog] = None
+
+    def __init__(self, book: PolicyBook):
+        self.book = book
+        self.row_of = {policy_id: row for row, policy_id in enumerate(book.policy_ids)}
+
+    @classmethod
+    def from_storage(cls) -> 'ClaimTriage':
+        return cls(PolicyBook.from_storage())
+
+    # ------------------------------------------------------------------
+    # Assessment
+    # ------------------------------------------------------------------
+    def join(self, claims: List[Dict]) -> np.ndarray:
+        """Book row of each claim's policy, -1 when the policy is not in the book"""
+        row_of = self.row_of
+        return np.fromiter((row_of.get(claim.get("policy_id"), -1) for claim in claims),
+                           dtype=np.int64, count=len(claims))
+
+    def assess(self, claims: Dict[str, Dict]) -> Dict[str, Dict[str, Any]]:
+        """Assessment of every given claim, keyed by claim ID"""
+        claim_ids = list(claims)
+        records = [claims[claim_id] for claim_id in claim_ids]
+        rows = self.join(records)
+        amount = np.array([float(record.get("amount") or 0.0) for record in records], dtype=np.float64)
+        evidence = np.array([len(record.get("evidence_documents") or ()) for record in records], dtype=np.int64)
+        filed = np.array([_filed_day(record.get("date_filed")) for record in records], dtype="datetime64[D]")
+
+        found = rows >= 0
+        safe_rows = np.where(found, rows, 0)
+        coverage = np.where(found, self.book.coverage[safe_rows], 0.0) if len(self.book) else np.zeros(len(rows))
+        start = (np.where(found, self.book.start[safe_rows], np.datetime64("NaT", "D")) if len(self.book)
+                 else np.full(len(rows), np.datetime64("NaT", "D")))
+
+        # assess_claim_risk: any failure (no policy, zero coverage, missing dates) means HIGH risk
+        days_active = (filed - start).astype(np.int64)
+        valid = found & (coverage > 0) & ~np.isnat(filed) & ~np.isnat(start)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(coverage > 0, amount / np.where(coverage > 0, coverage, 1.0), np.nan)
+        score = np.where(ratio > 0.8, 3, np.where(ratio > 0.5, 2, 1))
+        score += np.where(evidence < 2, 2, 0)
+        score += np.where(days_active < 30, 2, np.where(days_active < 90, 1, 0))
+        level = np.where(~valid | (score >= 6), 2, np.where(score >= 4, 1, 0))
+
+        # calculate_claim_payout: min(amount, coverage) * risk multiplier * evidence bonus, capped at coverage
+        payout = np.minimum(amount, coverage) * RISK_MULTIPLIERS[level] * (1 + evidence * 0.02)
+        payout = np.where(found, np.minimum(payout, coverage), 0.0)
+
+        assessed_at = datetime.now().isoformat()
+        assessments = {}
+        for i, claim_id in enumerate(claim_ids):
+            assessments[claim_id] = {
+                "status": records[i].get("status"),
+                "policy_id": records[i].get("policy_id"),
+                "policy_found": bool(found[i]),
+                "coverage_amount": float(coverage[i]) if found[i] else None,
+                "policy_start": _day_text(start[i]),
+                "amount": float(amount[i]),
+                "evidence_count": int(evidence[i]),
+                "date_filed": _day_text(filed[i]),
+                "coverage_ratio": float(ratio[i]) if valid[i] else None,
+                "days_active": int(days_active[i]) if valid[i] else None,
+                "risk_level": RISK_LEVELS[level[i]],
+                "recommended_payout": float(payout[i]),
+                "assessed_at": assessed_at
+            }
+        return assessments
+
+    def triage(self, claims: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict[str, Any]]:
+        """Assess every open claim (all stored claims by default) and save the assessments"""
+        if claims is None:
+            claims = ClaimsStorageService.load_all_claims()
+        pending = {claim_id: claim for claim_id, claim in claims.items()
+                   if isinstance(claim, dict) and claim.get("status") in OPEN_STATUSES}
+        assessments = self.assess(pending)
+        ClaimTriage.save_assessments(assessments)
+        return assessments
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    @staticmethod
+    def get_log() -> AssessmentLog:
+        """Get the assessment log for the configured file, creating it on first use"""
+        log = ClaimTriage._log
+        if log is None or log.path != ClaimTriage.ASSESSMENTS_FILE:
+            log = ClaimTriage._log = AssessmentLog(ClaimTriage.ASSESSMENTS_FILE)
+        return log
+
+    @staticmethod
+    def load_assessments() -> Dict[str, Dict[str, Any]]:
+        """All saved assessments keyed by claim ID"""
+        try:
+            return ClaimTriage.get_log().load_all()
+        except OSError as e:
+            print(f"Error loading claim assessments: {str(e)}")
+            return {}
+
+    @staticmethod
+    def save_assessments(assessments: Dict[str, Dict[str, Any]]) -> bool:
+        """Save assessments, replacing older ones for the same claims"""
+        try:
+            ClaimTriage.get_log().append(assessments)
+            return True
+        except (OSError, TypeError, TimeoutError) as e:
+            print(f"Error saving claim assessments: {str(e)}")
+            return False
+
+    @staticmethod
+    def assessment_for(claim_id: str, claim: Dict) -> Dict[str, Any]:
+        """
+        Saved assessment of one claim, assessed against its own policy. It is saved
+        again only if never triaged or if the claim or policy changed since.
+        """
+        customer_id, policy_id = claim.get("customer_id"), claim.get("policy_id")
+        policy_data = DataStorageService.load_policy(customer_id, policy_id)
+        records = [(customer_id, {"policies": {policy_id: policy_data}})] if policy_data else []
+        assessment = ClaimTriage(PolicyBook.from_records(records)).assess({claim_id: claim})[claim_id]
+        try:
+            saved = ClaimTriage.get_log().get(claim_id)
+        except OSError as e:
+            print(f"Error loading claim assessments: {str(e)}")
+            saved = None
+        if saved and all(saved.get(field) == assessment[field] for field in ClaimTriage.ASSESSMENT_FIELDS):
+            return saved
+        ClaimTriage.save_assessments({claim_id: assessment})
+        return assessment
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Assess every open claim against its policy")
+    parser.add_argument("--top", type=int, default=10, help="Largest recommended payouts to list")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    triage = ClaimTriage.from_storage()
+    assessments = triage.triage()
+    seconds = time.perf_counter() - started
+    print(f"Assessed {len(assessments):,} open claims against {len(triage.book):,} policies in {seconds:.2f}s")
+    for level in RISK_LEVELS:
+        print(f"  {level}: {sum(1 for a in assessments.values() if a['risk_level'] == level):,}")
+    missing = sum(1 for a in assessments.values() if not a["policy_found"])
+    if missing:
+        print(f"  Claims without a matching policy: {missing:,}")
+    largest = sorted(assessments.items(), key=lambda item: -item[1]["recommended_payout"])[:args.top]
+    for claim_id, assessment in largest:
+        print(f"  {claim_id}: {assessment['risk_level']} risk, "
+              f"recommended payout ${assessment['recommended_payout']:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+# claims_journal.py
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Iterator, Tuple
+from document_cache import DocumentCache
+from file_lock import FileLock
+from schema_migrations import SCHEMA_VERSION_KEY, CURRENT_SCHEMA_VERSION, index_json_object, iter_json_object
+
+
+class ClaimsJournal:
+    """
+    Append-only JSON Lines journal of claim upserts and status events.
+
+    The claims snapshot (claims_data.json) holds the compacted state; every
+    write since the last compaction is a single appended line in the journal.
+    An in-memory index maps each claim ID to the offset of its latest journal
+    record, and another its byte range in the snapshot, so single-claim reads
+    are a few seeks and writes are one append. Writers in any process append
+    and compact under one lock file.
+    """
+
+    COMPACT_INTERVAL = 300        # Seconds between background compaction checks
+    COMPACT_MIN_RECORDS = 1000    # Journal records needed before compacting
+    LOCK_TIMEOUT = 10             # Seconds to wait for another process's lock
+    LOCK_STALE_SECONDS = 30       # A lock file older than this is considered abandoned
+    COMPACTION_STALE_SECONDS = 600  # A compaction lock older than this is ignored
+
+    def __init__(self, snapshot_path: str, journal_path: Optional[str] = None):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or os.path.join(
+            os.path.dirname(snapshot_path), "claims_journal.jsonl")
+        self.compacting_path = self.journal_path + ".compacting"
+        self.lock_path = self.journal_path + ".lock"
+        self.compaction_lock_path = self.journal_path + ".compact.lock"
+        self._file_lock = FileLock(self.lock_path, "claims journal", ClaimsJournal.LOCK_TIMEOUT,
+                                   ClaimsJournal.LOCK_STALE_SECONDS)
+        self._compaction_lock = FileLock(self.compaction_lock_path, "claims compaction", 0,
+                                         ClaimsJournal.COMPACTION_STALE_SECONDS)
+        self._lock = threading.RLock()
+        self._index: Dict[str, int] = {}
+        self._file_indexes: Dict[str, Tuple[Tuple, Dict]] = {}  # Path -> (file identity, index)
+        self._journal_id: Optional[Tuple[int, int]] = None
+        self._end = 0
+        self._record_count = 0
+        self._compactor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+    def _ensure_directory(self):
+        directory = os.path.dirname(self.journal_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+    def _iter_records(self, path: str, start: int = 0) -> Iterator[Tuple[int, int, Dict]]:
+        """Yield (offset, next_offset, record) for complete lines from start"""
+        with open(path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Torn write at the tail; it is skipped until rewritten
+                next_offset = offset + len(line)
+                try:
+                    yield offset, next_offset, json.loads(line)
+                except ValueError:
+                    pass
+                offset = next_offset
+
+    def _refresh(self):
+        """Bring the index up to date with records appended by any writer"""
+        try:
+            stat = os.stat(self.journal_path)
+        except FileNotFoundError:
+            self._index.clear()
+            self._journal_id = None
+            self._end = 0
+            self._record_count = 0
+            return
+
+        journal_id = (stat.st_dev, stat.st_ino)
+        if journal_id != self._journal_id or stat.st_size < self._end:
+            # New journal file (compaction happened) - rebuild from scratch
+            self._index.clear()
+            self._journal_id = journal_id
+            self._end = 0
+            self._record_count = 0
+
+        if stat.st_size > self._end:
+            for offset, next_offset, record in self._iter_records(self.journal_path, self._end):
+                claim_id = record.get("claim_id")
+                if claim_id:
+                    self._index[claim_id] = offset
+                self._record_count += 1
+                self._end = next_offset
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the thread and cross-process write locks, with the index up to date"""
+        with self._lock:
+            self._file_lock.acquire()
+            try:
+                self._refresh()
+                yield
+            finally:
+                self._file_lock.release()
+
+    def write_lock(self):
+        """Context manager holding the writers' lock, e.g. while a migration rewrites the files in place"""
+        return self._locked()
+
+    def _append(self, *records: Dict):
+        """Append records as one line each, in a single write (caller holds the locks)"""
+        self._ensure_directory()
+        line = "".join(json.dumps(record, default=str) + "\n" for record in records)
+        with open(self.journal_path, 'ab') as f:
+            if f.tell() > 0:
+                with open(self.journal_path, 'rb') as check:
+                    check.seek(-1, os.SEEK_END)
+                    if check.read(1) != b"\n":
+                        line = "\n" + line  # Terminate a torn tail left by a crashed writer
+            f.write(line.encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        self._refresh()
+
+    # ------------------------------------------------------------------
+    # Base state (snapshot plus any journal being compacted)
+    # ------------------------------------------------------------------
+    def _file_index(self, f, path: str) -> Dict:
+        """
+        Index of an open snapshot or compacting journal, rebuilt when the file
+        changes: claim ID -> byte range in the snapshot, or offset of the claim's
+        latest record in the journal.
+        """
+        stat = os.fstat(f.fileno())
+        file_id = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        cached = self._file_indexes.get(path)
+        if cached is not None and cached[0] == file_id:
+            return cached[1]
+        if path == self.snapshot_path:
+            index = index_json_object(f)
+            index.pop(SCHEMA_VERSION_KEY, None)
+        else:
+            index = {}
+            for offset, _, record in self._iter_records(path):
+                if record.get("claim_id"):
+                    index[record["claim_id"]] = offset
+        self._file_indexes[path] = (file_id, index)
+        return index
+
+    def _follow(self, f, offset: int, statuses: List[str]) -> Optional[Dict]:
+        """Follow a claim's records back from offset, collecting status events, to its last upsert"""
+        while offset != -1:
+            f.seek(offset)
+            record = json.loads(f.readline())
+            if record.get("op") == "upsert":
+                return dict(record["claim"])
+            statuses.append(record["status"])
+            offset = record.get("prev", -1)
+        return None
+
+    def _base_claim(self, claim_id: str, statuses: List[str]) -> Optional[Dict]:
+        """One claim as of the last compaction, read by seeking in the compacting journal and snapshot"""
+        try:
+            with open(self.compacting_path, 'rb') as f:
+                claim = self._follow(f, self._file_index(f, self.compacting_path).get(claim_id, -1), statuses)
+                if claim is not None:
+                    return claim
+        except FileNotFoundError:
+            pass
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                span = self._file_index(f, self.snapshot_path).get(claim_id)
+                if span is None:
+                    return None
+                f.seek(span[0])
+                return json.loads(f.read(span[1] - span[0]))
+        except FileNotFoundError:
+            return None
+
+    def _load_snapshot(self) -> Dict:
+        """Shallow copy of the cached snapshot; replay replaces entries, never mutates them"""
+        if os.path.exists(self.snapshot_path):
+            claims = dict(DocumentCache.shared().get(self.snapshot_path))
+            claims.pop(SCHEMA_VERSION_KEY, None)
+            return claims
+        return {}
+
+    @staticmethod
+    def apply_record(claims: Dict, record: Dict):
+        """Apply one journal record to a claim_id -> claim mapping"""
+        op = record.get("op")
+        claim_id = record.get("claim_id")
+        if op == "upsert":
+            claims[claim_id] = record["claim"]
+        elif op == "status" and claim_id in claims:
+            claim = dict(claims[claim_id])
+            claim["status"] = record["status"]
+            claims[claim_id] = claim
+
+    def _replay(self, claims: Dict, path: str) -> Dict:
+        if os.path.exists(path):
+            for _, _, record in self._iter_records(path):
+                self.apply_record(claims, record)
+        return claims
+
+    def _base_claims(self) -> Dict:
+        """Claims as of the last compaction"""
+        return self._replay(self._load_snapshot(), self.compacting_path)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def upsert(self, claim: Dict) -> bool:
+        """Record the full state of a claim"""
+        with self._locked():
+            self._append({
+                "op": "upsert",
+                "claim_id": claim["claim_id"],
+                "claim": claim,
+                "timestamp": datetime.now().isoformat()
+            })
+        return True
+
+    def record_status(self, claim_id: str, status: str,
+                      allowed: Optional[Callable[[str, Dict], bool]] = None) -> bool:
+        """Record a status change event for an existing claim (see record_statuses)"""
+        return bool(self.record_statuses({claim_id: status}, allowed))
+
+    def record_statuses(self, updates: Dict[str, str], allowed: Optional[Callable[[str, Dict], bool]] = None,
+                        prepare: Optional[Callable[[Dict[str, Dict]], Iterable[str]]] = None) -> List[str]:
+        """
+        Record status changes for many existing claims in one append; returns the
+        claim IDs updated. allowed(claim_id, claim) is asked about each claim as
+        stored, under the write lock, so no other writer can change it in between.
+        prepare(claims), still under the lock, gets the claims about to change and
+        returns the IDs to change.
+        """
+        with self._locked():
+            claims = {}
+            for claim_id in updates:
+                claim = self._read_claim(claim_id)
+                if claim is not None and (allowed is None or allowed(claim_id, claim)):
+                    claims[claim_id] = claim
+            if prepare is not None and claims:
+                keep = set(prepare(dict(claims)))
+                claims = {claim_id: claim for claim_id, claim in claims.items() if claim_id in keep}
+            timestamp = datetime.now().isoformat()
+            records = [{"op": "status", "claim_id": claim_id, "status": updates[claim_id],
+                        "prev": self._index.get(claim_id, -1), "timestamp": timestamp} for claim_id in claims]
+            if records:
+                self._append(*records)
+        return list(claims)
+
+    def _read_claim(self, claim_id: str) -> Optional[Dict]:
+        """Follow one claim's records back to the snapshot (index refreshed by the caller)"""
+        statuses: List[str] = []
+        claim = None
+        offset = self._index.get(claim_id, -1)
+        if offset != -1:
+            with open(self.journal_path, 'rb') as f:
+                claim = self._follow(f, offset, statuses)
+        if claim is None:
+            claim = self._base_claim(claim_id, statuses)
+        if claim is not None and statuses:
+            claim["status"] = statuses[0]  # Latest status event wins
+        return claim
+
+    def get(self, claim_id: str) -> Optional[Dict]:
+        """Get the current state of one claim by following its records back to the snapshot"""
+        with self._lock:
+            for attempt in range(2):
+                self._refresh()
+                try:
+                    return self._read_claim(claim_id)
+                except (OSError, ValueError, KeyError):
+                    if attempt:
+                        raise  # Files replaced by a compaction mid-read are consistent on the second try
+
+    def load_all(self) -> Dict:
+        """Materialise every claim: snapshot, then journal records in order"""
+        with self._lock:
+            return self._replay(self._base_claims(), self.journal_path)
+
+    def iter_history(self) -> Iterator[Dict]:
+        """
+        Yield the records that rebuild every claim, in replay order, without
+        materialising the claims: snapshot entries as upserts (streamed from the
+        file), then the journal being compacted and the live journal.
+        """
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r') as f:
+                for claim_id, claim in iter_json_object(f):
+                    if claim_id != SCHEMA_VERSION_KEY:
+                        yield {"op": "upsert", "claim_id": claim_id, "claim": claim}
+        for path in (self.compacting_path, self.journal_path):
+            if os.path.exists(path):
+                for _, _, record in self._iter_records(path):
+                    yield record
+
+    def record_count(self) -> int:
+        """Number of records in the live journal"""
+        with self._lock:
+            self._refresh()
+            return self._record_count
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+    def compact(self) -> bool:
+        """Fold the journal into a new snapshot and start an empty journal"""
+        try:
+            self._compaction_lock.acquire()
+        except TimeoutError:
+            return False  # Another process is compacting
+        try:
+            with self._locked():
+                # Freeze the live journal; new appends start a fresh file
+                if os.path.exists(self.journal_path) and not os.path.exists(self.compacting_path):
+                    os.replace(self.journal_path, self.compacting_path)
+            # Only the compactor touches the snapshot and the frozen journal, so writers can go on meanwhile
+            snapshot = {SCHEMA_VERSION_KEY: CURRENT_SCHEMA_VERSION}
+            snapshot.update(self._base_claims())
+            tmp_path = self.snapshot_path + ".tmp"
+            text = json.dumps(snapshot, indent=4, default=str)
+            with open(tmp_path, 'w') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            with self._locked():
+                os.replace(tmp_path, self.snapshot_path)
+                DocumentCache.shared().put(self.snapshot_path, text)
+                if os.path.exists(self.compacting_path):
+                    os.remove(self.compacting_path)
+            return True
+        finally:
+            self._compaction_lock.release()
+
+    def compact_if_needed(self) -> bool:
+        """Compact when the journal has grown past COMPACT_MIN_RECORDS"""
+        if self.record_count() >= ClaimsJournal.COMPACT_MIN_RECORDS:
+            return self.compact()
+        return False
+
+    def start_background_compaction(self, interval: Optional[float] = None):
+        """Start a daemon thread that periodically compacts the journal"""
+        with self._lock:
+            if self._compactor and self._compactor.is_alive():
+                return
+            self._stop.clear()
+            wait = interval or ClaimsJournal.COMPACT_INTERVAL
+
+            def run():
+                while not self._stop.wait(wait):
+                    try:
+                        self.compact_if_needed()
+                    except Exception as e:
+                        print(f"Error compacting claims journal: {str(e)}")
+
+            self._compactor = threading.Thread(target=run, name="claims-journal-compactor", daemon=True)
+            self._compactor.start()
+
+    def stop_background_compaction(self):
+        """Stop the background compaction thread"""
+        self._stop.set()
+        if self._compactor:
+            self._compactor.join(timeout=5)
+            self._compactor = None
@@ -1,12 +1,59 @@
 from datetime import datetime
 import json
 import os
-from typing import Dict, Optional
-from claim import Claim, ClaimStatus
+from typing import Callable, Dict, Iterable, List, Optional
+from claim import Claim, ClaimStatus, can_transition, parse_claim_status
+from sqlite_storage import SQLiteStorage
+from claims_journal import ClaimsJournal
+from evidence_store import EvidenceStore
+from id_sequence import SequenceAllocator
 
 class ClaimsStorageService:
     """Service to handle claims storage and retrieval"""
     CLAIMS_FILE = "data/claims_data.json"
+    JOURNAL_FILE = "data/claims_journal.jsonl"
+    BACKGROUND_COMPACTION = True
+    BACKEND: Optional[SQLiteStorage] = None  # Explicit backend; falls back to SQLiteStorage.shared()
+    _journal: Optional[ClaimsJournal] = None
+    _listeners: List[Callable[[str, str, Optional[Dict]], None]] = []
+
+    @staticmethod
+    def add_claim_listener(listener: Callable[[str, str, Optional[Dict]], None]):
+        """Call listener(claim_id, status, claim) with the stored claim after every claim save or status change"""
+        if listener not in ClaimsStorageService._listeners:
+            ClaimsStorageService._listeners.append(listener)
+
+    @staticmethod
+    def remove_claim_listener(listener: Callable[[str, str, Optional[Dict]], None]):
+        if listener in ClaimsStorageService._listeners:
+            ClaimsStorageService._listeners.remove(listener)
+
+    @staticmethod
+    def _notify(claim_id: str, status: str, claim: Optional[Dict] = None):
+        for listener in list(ClaimsStorageService._listeners):
+            try:
+                listener(claim_id, status, claim)
+            except Exception as e:
+                print(f"Error notifying claim listener: {str(e)}")
+
+    @staticmethod
+    def get_backend() -> Optional[SQLiteStorage]:
+        """Get the configured SQLite backend, or None to use the JSON file"""
+        return ClaimsStorageService.BACKEND or SQLiteStorage.shared()
+
+    @staticmethod
+    def get_journal() -> ClaimsJournal:
+        """Get the claims journal for the configured files, creating it on first use"""
+        journal = ClaimsStorageService._journal
+        if (journal is None or journal.snapshot_path != ClaimsStorageService.CLAIMS_FILE
+                or journal.journal_path != ClaimsStorageService.JOURNAL_FILE):
+            if journal is not None:
+                journal.stop_background_compaction()
+            journal = ClaimsJournal(ClaimsStorageService.CLAIMS_FILE, ClaimsStorageService.JOURNAL_FILE)
+            if ClaimsStorageService.BACKGROUND_COMPACTION:
+                journal.start_background_compaction()
+            ClaimsStorageService._journal = journal
+        return journal
 
     @staticmethod
     def ensure_data_directory():
@@ -19,19 +66,17 @@ class ClaimsStorageService:
     def save_claim(claim: Claim) -> bool:
         """Save a claim to the claims data file"""
         try:
-            ClaimsStorageService.ensure_data_directory()
-            
-            # Load existing claims
-            existing_claims = ClaimsStorageService.load_all_claims()
-            
-            # Add or update the new claim
-            claim_dict = claim.to_dict()
-            existing_claims[claim.get_claim_id()] = claim_dict
-            
-            # Save back to file
-            with open(ClaimsStorageService.CLAIMS_FILE, 'w') as f:
-                json.dump(existing_claims, f, indent=4, default=str)
-            
+            data = claim.to_dict()
+            backend = ClaimsStorageService.get_backend()
+            if backend:
+                if not backend.save_claim(data):
+                    return False
+            else:
+                # Append the claim's new state to the journal
+                ClaimsStorageService.ensure_data_directory()
+                ClaimsStorageService.get_journal().upsert(data)
+
+            ClaimsStorageService._notify(data["claim_id"], data["status"], data)
             return True
         except Exception as e:
             print(f"Error saving claim: {str(e)}")
@@ -41,20 +86,113 @@ class ClaimsStorageService:
     def load_all_claims() -> Dict:
         """Load all claims from the claims data file"""
         try:
-            if os.path.exists(ClaimsStorageService.CLAIMS_FILE):
-                with open(ClaimsStorageService.CLAIMS_FILE, 'r') as f:
-                    return json.load(f)
-            return {}
+            backend = ClaimsStorageService.get_backend()
+            if backend:
+                return backend.load_all_claims()
+            return ClaimsStorageService.get_journal().load_all()
         except Exception as e:
             print(f"Error loading claims: {str(e)}")
             return {}
 
+    @staticmethod
+    def load_claim(claim_id: str) -> Optional[Dict]:
+        """Load a single claim by ID"""
+        try:
+            backend = ClaimsStorageService.get_backend()
+            if backend:
+                return backend.load_claim(claim_id)
+            return ClaimsStorageService.get_journal().get(claim_id)
+        except Exception as e:
+            print(f"Error loading claim: {str(e)}")
+            return None
+
     @staticmethod
     def get_pending_claims() -> Dict:
         """Get all pending claims that need adjuster review"""
+        backend = ClaimsStorageService.get_backend()
+        if backend:
+            return backend.load_claims_by_status('PENDING')
         all_claims = ClaimsStorageService.load_all_claims()
         return {
             claim_id: claim_data 
             for claim_id, claim_data in all_claims.items() 
             if claim_data.get('status') == 'PENDING'
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def update_claim_status(claim_id: str, status: str) -> bool:
+        """Update the status of a single stored claim, if the claim lifecycle allows the change"""
+        return bool(ClaimsStorageService.update_claim_statuses([claim_id], status, report=True))
+
+    @staticmethod
+    def update_claim_statuses(claim_ids: List[str], status: str, report: bool = False,
+                              prepare: Optional[Callable[[Dict[str, Dict]], Iterable[str]]] = None) -> List[str]:
+        """
+        Move many stored claims to one status in a single write, skipping claims the
+        lifecycle does not allow to move. Each claim's status is checked as stored,
+        inside the write, so concurrent moves out of the same status cannot both
+        succeed. report prints the claims refused. prepare(claims), called inside
+        the write with the claims about to move, returns the IDs to move. Returns
+        the claim IDs updated.
+        """
+        try:
+            new_status = parse_claim_status(status)
+            if new_status is None:
+                print(f"Unknown claim status: {status}")
+                return []
+            moved: Dict[str, Dict] = {}
+
+            def allowed(claim_id: str, claim: Dict) -> bool:
+                if not can_transition(claim.get("status"), new_status):
+                    if report:
+                        print(f"Claim {claim_id} cannot move from {claim.get('status')} to {status}")
+                    return False
+                moved[claim_id] = claim
+                return True
+
+            updates = dict.fromkeys(claim_ids, new_status.value)
+            backend = ClaimsStorageService.get_backend()
+            if backend:
+                updated = backend.update_claim_statuses(updates, allowed, prepare)
+            else:
+                updated = ClaimsStorageService.get_journal().record_statuses(updates, allowed, prepare)
+            for claim_id in updated:
+                ClaimsStorageService._notify(claim_id, new_status.value, dict(moved[claim_id], status=new_status.value))
+            return updated
+        except Exception as e:
+            print(f"Error updating claim status: {str(e)}")
+            return []
+
+    @staticmethod
+    def collect_evidence_garbage(grace_seconds: Optional[float] = None) -> int:
+        """
+        Delete stored evidence files no saved claim refers to, recounting the
+        references from the stored claims. Returns the number of files removed.
+        """
+        try:
+            # Not load_all_claims(): an unreadable store must not look like one without evidence
+            backend = ClaimsStorageService.get_backend()
+            claims = backend.load_all_claims() if backend else ClaimsStorageService.get_journal().load_all()
+            referenced = [document for claim in claims.values() if isinstance(claim, dict)
+                          for document in claim.get("evidence_documents") or []
+                          if EvidenceStore.is_digest(document)]
+            return EvidenceStore.shared().collect_garbage(grace_seconds, referenced)
+        except Exception as e:
+            print(f"Error collecting evidence files: {str(e)}")
+            return 0
+
+    @staticmethod
+    def get_highest_claim_number() -> int:
+        """Get the highest claim number from all stored claims."""
+        highest_num = 0
+        for claim_id in ClaimsStorageService.load_all_claims():
+            try:
+                highest_num = max(highest_num, int(claim_id[3:]))
+            except (ValueError, IndexError):
+                continue
+        return highest_num
+
+    @staticmethod
+    def generate_claim_id() -> str:
+        """Allocate the next unique claim ID (CLMxxx) across all customers"""
+        return SequenceAllocator.shared().next_id("CLM", seed=ClaimsStorageService.get_highest_claim_number)
@@ -0,0 +1,338 @@
+# claims_work_queue.py
+import heapq
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from claim import Claim, ClaimStatus
+from claims_storage_service import ClaimsStorageService
+from data_storage_service import DataStorageService
+from file_lock import FileLock
+from policy_codec import PolicyCodec
+
+OPEN_STATUSES = (ClaimStatus.PENDING.value, ClaimStatus.REVIEWING.value)
+RISK_RANK = {"HIGH": 0, "MEDIUM": 1, "LOW": 2}
+
+
+class ClaimsWorkQueue:
+    """
+    Persistent priority queue of open (PENDING/REVIEWING) claims for adjusters.
+
+    Claims are ordered by risk level (HIGH first), then amount (largest first),
+    then filing date (oldest first). The queue lives in memory as a heap with
+    lazily dropped entries and is persisted as a JSON Lines log of put, remove,
+    lease and release events, so every operation is one O(log n) heap update
+    and one appended line. Writers hold a lock file and first replay what other
+    processes appended, so two adjusters are never handed the same claim. A
+    lease lasts LEASE_SECONDS; a claim whose lease runs out returns to the queue.
+    """
+
+    QUEUE_FILE: Optional[str] = None    # Defaults to claims_queue.jsonl next to the claims file
+    LEASE_SECONDS = 900
+    LOCK_TIMEOUT = 10                   # Seconds to wait for another process's lock
+    LOCK_STALE_SECONDS = 30             # A lock file older than this is considered abandoned
+    COMPACT_MIN_RECORDS = 1000          # Log records needed before the log is rewritten
+
+    _shared: Optional['ClaimsWorkQueue'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path: str, assess_risk: Optional[Callable] = None, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self._file_lock = FileLock(self.lock_path, "work queue", ClaimsWorkQueue.LOCK_TIMEOUT,
+                                   ClaimsWorkQueue.LOCK_STALE_SECONDS)
+        self.assess_risk = assess_risk      # assess_risk(claim, policy) -> RiskLevel
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._reset()
+        self._file_id: Optional[Tuple[int, int]] = None
+        self._end = 0
+
+    def _reset(self):
+        self._items: Dict[str, Dict[str, Any]] = {}          # Every queued claim, leased or not
+        self._entries: Dict[str, list] = {}                  # Live heap entry per claim not leased
+        self._heap: List[list] = []                          # [priority, claim_id, live]
+        self._leases: Dict[str, Tuple[str, float]] = {}      # claim_id -> (adjuster, expires)
+        self._lease_heap: List[Tuple[float, str]] = []
+        self._records = 0
+
+    @classmethod
+    def default_path(cls) -> str:
+        return cls.QUEUE_FILE or os.path.join(os.path.dirname(ClaimsStorageService.CLAIMS_FILE), "claims_queue.jsonl")
+
+    @classmethod
+    def shared(cls) -> 'ClaimsWorkQueue':
+        """Get the process-wide queue for the configured claims directory"""
+        with cls._shared_lock:
+            path = cls.default_path()
+            if cls._shared is None or cls._shared.path != path:
+                assess_risk = cls._shared.assess_risk if cls._shared else None
+                cls._shared = cls(path, assess_risk)
+            return cls._shared
+
+    @classmethod
+    def enable(cls, assess_risk: Callable) -> 'ClaimsWorkQueue':
+        """Keep the shared queue in step with every claim saved or updated in this process"""
+        queue = cls.shared()
+        queue.assess_risk = assess_risk
+        ClaimsStorageService.add_claim_listener(cls._claim_changed)
+        return queue
+
+    @staticmethod
+    def _claim_changed(claim_id: str, status: str, claim: Optional[Dict]):
+        ClaimsWorkQueue.shared().on_claim_changed(claim_id, status, claim)
+
+    # ------------------------------------------------------------------
+    # In-memory heap
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _priority(item: Dict[str, Any], claim_id: str) -> Tuple:
+        return RISK_RANK.get(item["risk"], 0), -item["amount"], item["filed"], claim_id
+
+    def _push(self, claim_id: str):
+        self._drop(claim_id)
+        entry = [self._priority(self._items[claim_id], claim_id), claim_id, True]
+        self._entries[claim_id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def _drop(self, claim_id: str):
+        entry = self._entries.pop(claim_id, None)
+        if entry is not None:
+            entry[2] = False  # Left in the heap and skipped when it surfaces
+
+    def _apply(self, event: Dict[str, Any]):
+        op, claim_id = event.get("op"), event.get("claim_id")
+        if op == "put":
+            previous = self._items.get(claim_id)
+            self._items[claim_id] = {key: event[key] for key in ("risk", "amount", "filed", "status")}
+            if previous is not None and previous["status"] != event["status"]:
+                self._leases.pop(claim_id, None)  # Status changed: the claim is triaged again
+            if claim_id not in self._leases:
+                self._push(claim_id)
+        elif op == "remove":
+            self._items.pop(claim_id, None)
+            self._leases.pop(claim_id, None)
+            self._drop(claim_id)
+        elif op == "lease" and claim_id in self._items:
+            self._drop(claim_id)
+            self._leases[claim_id] = (event["adjuster"], event["expires"])
+            heapq.heappush(self._lease_heap, (event["expires"], claim_id))
+        elif op == "release" and self._leases.pop(claim_id, None) and claim_id in self._items:
+            self._push(claim_id)
+        self._records += 1
+
+    def _expire_leases(self, now: float):
+        while self._lease_heap and self._lease_heap[0][0] <= now:
+            expires, claim_id = heapq.heappop(self._lease_heap)
+            lease = self._leases.get(claim_id)
+            if lease is not None and lease[1] == expires:  # Not renewed meanwhile
+                del self._leases[claim_id]
+                if claim_id in self._items:
+                    self._push(claim_id)
+
+    # ------------------------------------------------------------------
+    # Log and cross-process lock
+    # ------------------------------------------------------------------
+    def _refresh(self):
+        """Replay events appended by any process since the last refresh"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._reset()
+            self._file_id = None
+            self._end = 0
+            return
+        file_id = (stat.st_dev, stat.st_ino)
+        if file_id != self._file_id or stat.st_size < self._end:
+            self._reset()  # New log file (rewritten by compaction) - rebuild from scratch
+            self._file_id = file_id
+            self._end = 0
+        if stat.st_size > self._end:
+            with open(self.path, 'rb') as f:
+                f.seek(self._end)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Torn write at the tail
+                    self._end += len(line)
+                    try:
+                        self._apply(json.loads(line))
+                    except (ValueError, KeyError):
+                        pass
+
+    def _write(self, events: List[Dict[str, Any]], mode: str = 'ab', path: Optional[str] = None) -> int:
+        """Write events as complete lines; returns the file's new end offset"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        path = path or self.path
+        data = "".join(json.dumps(event) + "\n" for event in events).encode("utf-8")
+        with open(path, mode) as f:
+            if mode == 'ab' and f.tell() > 0:
+                with open(path, 'rb') as check:
+                    check.seek(-1, os.SEEK_END)
+                    if check.read(1) != b"\n":
+                        data = b"\n" + data  # Terminate a torn tail left by a crashed writer
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell()
+
+    def _commit(self, *events: Dict[str, Any]):
+        """Append events to the log and apply them (caller holds the locks)"""
+        self._end = self._write(list(events))
+        if self._file_id is None:
+            stat = os.stat(self.path)
+            self._file_id = (stat.st_dev, stat.st_ino)
+        for event in events:
+            self._apply(event)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._lock:
+            self._file_lock.acquire()
+            try:
+                self._refresh()
+                if self._file_id is None:
+                    self._seed()
+                yield
+                self._compact_if_needed()
+            finally:
+                self._file_lock.release()
+
+    def _seed(self):
+        """First use: queue every open claim already stored (one full scan)"""
+        events = [self._put_event(claim_id, claim) for claim_id, claim in ClaimsStorageService.load_all_claims().items()
+                  if isinstance(claim, dict) and claim.get("status") in OPEN_STATUSES]
+        self._commit(*[event for event in events if event], {"op": "seeded", "at": datetime.now().isoformat()})
+
+    def _compact_if_needed(self):
+        live = len(self._items) + len(self._leases)
+        if self._records < ClaimsWorkQueue.COMPACT_MIN_RECORDS or self._records < 2 * live:
+            return
+        events = [dict(op="put", claim_id=claim_id, **item) for claim_id, item in self._items.items()]
+        events += [{"op": "lease", "claim_id": claim_id, "adjuster": adjuster, "expires": expires}
+                   for claim_id, (adjuster, expires) in self._leases.items()]
+        tmp_path = self.path + ".tmp"
+        self._write(events, 'wb', tmp_path)
+        os.replace(tmp_path, self.path)
+        self._file_id = None
+        self._refresh()
+
+    # ------------------------------------------------------------------
+    # Queue operations
+    # ------------------------------------------------------------------
+    def _risk(self, claim: Dict) -> str:
+        if self.assess_risk is None:
+            return "MEDIUM"
+        try:
+            policy_data = DataStorageService.load_policy(claim.get("customer_id"), claim.get("policy_id"))
+            policy = PolicyCodec.decode(policy_data, claim.get("policy_id"), claim.get("customer_id")) \
+                if policy_data else None
+            risk = self.assess_risk(Claim.from_dict(claim), policy)
+        except Exception:
+            return "HIGH"  # Unreadable claims get looked at first, as assess_claim_risk does
+        return getattr(risk, "value", risk)
+
+    def _put_event(self, claim_id: str, claim: Dict) -> Optional[Dict[str, Any]]:
+        try:
+            amount = float(claim.get("amount") or 0.0)
+        except (TypeError, ValueError):
+            return None
+        return {"op": "put", "claim_id": claim_id, "risk": self._risk(claim), "amount": amount,
+                "filed": str(claim.get("date_filed") or ""), "status": claim.get("status")}
+
+    def put(self, claim: Dict) -> bool:
+        """Queue or re-prioritise an open claim; a claim that is no longer open is removed"""
+        claim_id = claim.get("claim_id")
+        if not claim_id:
+            return False
+        if claim.get("status") not in OPEN_STATUSES:
+            return self.remove(claim_id)
+        event = self._put_event(claim_id, claim)
+        if event is None:
+            return False
+        with self._locked():
+            self._commit(event)
+        return True
+
+    def remove(self, claim_id: str) -> bool:
+        with self._locked():
+            if claim_id not in self._items:
+                return False
+            self._commit({"op": "remove", "claim_id": claim_id})
+            return True
+
+    def on_claim_changed(self, claim_id: str, status: str, claim: Optional[Dict] = None):
+        """Storage hook: re-queue claims that are still open, drop the rest"""
+        if status not in OPEN_STATUSES:
+            self.remove(claim_id)
+            return
+        if claim is None:
+            claim = ClaimsStorageService.load_claim(claim_id)
+        if claim is not None:
+            self.put(dict(claim, status=status))
+
+    def next_claim(self, adjuster: str, lease_seconds: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Lease the most urgent open claim to adjuster and return it.
+        An adjuster who already holds a lease gets that claim back, renewed.
+        """
+        with self._locked():
+            now = self._clock()
+            self._expire_leases(now)
+            held = [claim_id for claim_id, (holder, _) in self._leases.items() if holder == adjuster]
+            if held:
+                claim_id = min(held, key=lambda c: self._priority(self._items[c], c))
+            else:
+                while self._heap and not self._heap[0][2]:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    return None
+                claim_id = self._heap[0][1]
+            expires = now + (lease_seconds or ClaimsWorkQueue.LEASE_SECONDS)
+            self._commit({"op": "lease", "claim_id": claim_id, "adjuster": adjuster, "expires": expires})
+            return dict(self._items[claim_id], claim_id=claim_id, lease_expires=expires)
+
+    def lease(self, claim_id: str, adjuster: str, lease_seconds: Optional[float] = None) -> bool:
+        """Lease a particular claim; False while another adjuster holds it. Claims not queued need no lease."""
+        with self._locked():
+            now = self._clock()
+            self._expire_leases(now)
+            if claim_id not in self._items:
+                return True
+            holder = self._leases.get(claim_id)
+            if holder is not None and holder[0] != adjuster:
+                return False
+            expires = now + (lease_seconds or ClaimsWorkQueue.LEASE_SECONDS)
+            self._commit({"op": "lease", "claim_id": claim_id, "adjuster": adjuster, "expires": expires})
+            return True
+
+    def release(self, claim_id: str, adjuster: str) -> bool:
+        """Give a leased claim back to the queue"""
+        with self._locked():
+            self._expire_leases(self._clock())
+            holder = self._leases.get(claim_id)
+            if holder is None or holder[0] != adjuster:
+                return False
+            self._commit({"op": "release", "claim_id": claim_id})
+            return True
+
+    def lease_holder(self, claim_id: str) -> Optional[str]:
+        with self._locked():
+            self._expire_leases(self._clock())
+            lease = self._leases.get(claim_id)
+            return lease[0] if lease else None
+
+    def queued(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Open claims not leased, most urgent first"""
+        with self._locked():
+            self._expire_leases(self._clock())
+            entries = heapq.nsmallest(limit or len(self._entries), self._entries.values())
+            return [dict(self._items[entry[1]], claim_id=entry[1]) for entry in entries]
+
+    def __len__(self) -> int:
+        with self._locked():
+            return len(self._items)
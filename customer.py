@@ -2,6 +2,7 @@ from datetime import datetime, date
 from typing import List, Dict, Optional
 from users import User
 from policy import Policy, LifePolicy, CarPolicy, HealthPolicy, PropertyPolicy, PolicyManager
+from policy_codec import PolicyCodec
 from claim import Claim
 from policy_enums import PolicyStatus, PolicyType
 from serialization_handler import SerializationHandler
@@ -47,65 +48,10 @@ class Customer(User):
             )
 
             # Add policies if present
-            if "policies" in data:
-                for policy_id, policy_data in data["policies"].items():
-                    policy_type = policy_data["policy_type"]
-                    if policy_type == "LIFE":
-                        policy = LifePolicy(policy_id, customer_info["email"])
-                        policy.set_beneficiary(policy_data.get("beneficiary", ""))
-                        policy.set_death_benefit(float(policy_data.get("death_benefit", 0)))
-                    elif policy_type == "CAR":
-                        policy = CarPolicy(policy_id, customer_info["email"])
-                        # Handle potential missing vehicle_plate_number in old data
-                        vehicle_details = {
-                            "vehicle_id": policy_data.get("vehicle_id", "N/A"),
-                            "is_comprehensive": policy_data.get("is_comprehensive", False),
-                            "vehicle_age": int(policy_data.get("vehicle_age", 0)),
-                            "vehicle_model": policy_data.get("vehicle_model", "N/A"),
-                            "vehicle_condition": policy_data.get("vehicle_condition", "N/A"),
-                            "vehicle_plate_number": policy_data.get("vehicle_plate_number", "UNKNOWN")
-                        }
-                        policy.set_vehicle_details(**vehicle_details)
-                    elif policy_type == "HEALTH":
-                        policy = HealthPolicy(policy_id, customer_info["email"])
-                        policy.set_health_details(
-                            deductible=float(policy_data.get("deductible", 0.0)),
-                            includes_dental=policy_data.get("includes_dental", False)
-                        )
-                    elif policy_type == "PROPERTY":
-                        policy = PropertyPolicy(policy_id, customer_info["email"])
-                        policy.set_property_details(
-                            address=policy_data.get("property_address", "N/A"),
-                            property_type=policy_data.get("property_type", "N/A")
-                        )
-                    else:
-                        continue
-
-                    policy.set_coverage_amount(float(policy_data["coverage_amount"]))
-                    policy.set_premium(float(policy_data["premium"]))
-                    if "status" in policy_data:
-                        status_str = str(policy_data["status"])
-                        try:
-                            if status_str.startswith("PolicyStatus."):
-                                status_name = status_str.split(".")[1]
-                                policy.update_status(PolicyStatus[status_name])
-                            else:
-                                # Handle numeric or plain string status
-                                policy.update_status(PolicyStatus(int(status_str)))
-                        except (ValueError, KeyError):
-                            # If conversion fails, set to default PENDING status
-                            policy.update_status(PolicyStatus.PENDING)
-
-                    if "start_date" in policy_data:
-                        policy.set_dates(
-                            datetime.strptime(policy_data["start_date"].split('T')[0], "%Y-%m-%d"),
-                            datetime.strptime(policy_data["end_date"].split('T')[0], "%Y-%m-%d")
-                        )
-                    customer.add_policy(policy)
-                    
-                    
-
-                return customer
+            policies = PolicyCodec.decode_many(data.get("policies", {}), customer_info["email"])
+            for policy in policies.values():
+                customer.add_policy(policy)
+
             return customer
         except Exception as e:
             print(f"Error creating customer from dict: {str(e)}")
@@ -185,7 +131,7 @@ class Customer(User):
                     "credit_score": self.credit_score
                 },
                 "policies": {
-                    policy.get_policy_id(): policy.to_dict()
+                    policy.get_policy_id(): PolicyCodec.encode(policy)
                     for policy in self.policies
                 }
             }
@@ -202,65 +148,7 @@ class Customer(User):
             if not data or "customer_info" not in data:
                 raise ValueError("Invalid customer data format")
 
-            # Create customer instance
-            customer_info = data["customer_info"]
-            customer = cls(
-                email=customer_info["email"],
-                name=customer_info["name"],
-                password="",  # Password should be handled separately
-                contact_number=customer_info["contact_number"],
-                address=customer_info["address"],
-                birth_date=datetime.strptime(customer_info["birth_date"], "%Y-%m-%d"),
-                credit_score=float(customer_info["credit_score"])
-            )
-
-            # Add policies if present
-            if "policies" in data:
-                for policy_id, policy_data in data["policies"].items():
-                    policy_type = policy_data["policy_type"]
-                    if policy_type == "LIFE":
-                        policy = LifePolicy(policy_id, customer_info["email"])
-                    elif policy_type == "CAR":
-                        policy = CarPolicy(policy_id, customer_info["email"])
-                    elif policy_type == "HEALTH":
-                        policy = HealthPolicy(policy_id, customer_info["email"])
-                    elif policy_type == "PROPERTY":
-                        policy = PropertyPolicy(policy_id, customer_info["email"])
-                    else:
-                        continue
-
-                    policy.set_coverage_amount(float(policy_data["coverage_amount"]))
-                    policy.set_premium(float(policy_data["premium"]))
-                    if "status" in policy_data:
-                        policy.update_status(PolicyStatus[policy_data["status"]])
-
-                    # Set additional details based on policy type
-                    if isinstance(policy, LifePolicy):
-                        policy.set_beneficiary(policy_data.get("beneficiary", "N/A"))
-                        policy.set_death_benefit(float(policy_data.get("death_benefit", 0.0)))
-                    elif isinstance(policy, CarPolicy):
-                        policy.set_vehicle_details(
-                            vehicle_id=policy_data.get("vehicle_id", "N/A"),
-                            is_comprehensive=policy_data.get("is_comprehensive", False),
-                            vehicle_age=int(policy_data.get("vehicle_age", 0)),
-                            vehicle_model=policy_data.get("vehicle_model", "N/A"),
-                            vehicle_plate_number=policy_data.get("vehicle_plate_number", "N/A"),
-                            vehicle_condition=policy_data.get("vehicle_condition", "N/A")
-                        )
-                    elif isinstance(policy, HealthPolicy):
-                        policy.set_health_details(
-                            deductible=float(policy_data.get("deductible", 0.0)),
-                            includes_dental=policy_data.get("includes_dental", False)
-                        )
-                    elif isinstance(policy, PropertyPolicy):
-                        policy.set_property_details(
-                            address=policy_data.get("property_address", "N/A"),
-                            property_type=policy_data.get("property_type", "N/A")
-                        )
-
-                    customer.add_policy(policy)
-
-            return customer
+            return cls.from_dict(data)
         except Exception as e:
             print(f"Error loading customer data: {str(e)}")
             return None
@@ -269,20 +157,9 @@ class CustomerCLI:
     def __init__(self, customer: Customer):
         self.customer = customer
         self.policy_manager = PolicyManager()
-        self._policy_counter = 1
-        self._claim_counter = 1
-        self._policy_counter = DataStorageService.get_highest_policy_number() + 1
-        self._claim_counter = 1
-        self._update_counters()  # Initialize counters based on existing policies/claims
-        self.customer = customer
-        self.policy_manager = PolicyManager()
-       
-        
+
         # Load existing policies at initialization
         self.load_data()
-        
-        # Update counters based on existing policies
-        self._update_counters()
 
     def load_data(self):
         """Load customer data including policies"""
@@ -329,34 +206,13 @@ class CustomerCLI:
                 print(f"Property Type: {policy.get('property_type', 'N/A')}")
             print("-" * 50)
             
-    def _update_counters(self):
-        """Update the counters based on existing policies and claims"""
-        # Update policy counter
-        for policy in self.customer.policies:
-            try:
-                policy_num = int(policy.policy_id[3:])  # Extract number from POLxxx
-                self._policy_counter = max(self._policy_counter, policy_num + 1)
-            except (ValueError, IndexError):
-                continue
-
-        # Update claim counter
-        for claim in self.customer.claims:
-            try:
-                claim_num = int(claim.claim_id[3:])  # Extract number from CLMxxx
-                self._claim_counter = max(self._claim_counter, claim_num + 1)
-            except (ValueError, IndexError):
-                continue
     def _generate_policy_id(self) -> str:
         """Generate a unique policy ID"""
-        policy_id = f"POL{self._policy_counter:03d}"
-        self._policy_counter += 1
-        return policy_id
+        return DataStorageService.generate_policy_id()
 
     def _generate_claim_id(self) -> str:
         """Generate a unique claim ID"""
-        claim_id = f"CLM{self._claim_counter:03d}"
-        self._claim_counter += 1
-        return claim_id
+        return ClaimsStorageService.generate_claim_id()
 
 
     def request_new_policy(self):
@@ -483,18 +339,19 @@ class CustomerCLI:
 
             # Calculate premium
             term_months = PolicyCalculator.calculate_policy_term(start_date, end_date)
-            premium = PolicyCalculator.calculate_premium(
+            premium, version = PolicyCalculator.quote_premium(
                 PolicyType[policy_type],
                 coverage_amount,
                 term_months,
                 {"base_score": risk_score.base_score}  # Example risk_factors dict
             )
             policy.set_premium(premium)
+            policy.set_rate_table_version(version)
 
             if self.customer.add_policy(policy):
                 self.policy_manager.add_policy(policy)  # Ensure PolicyManager also adds the policy
                 print(f"\nPolicy {policy_id} created successfully!")
-                print(f"Calculated Premium: ${premium:,.2f}")
+                print(f"Calculated Premium: ${premium:,.2f} (rate tables v{policy.rate_table_version})")
 
                 # Save policy immediately
                 self.save_data()
@@ -647,7 +504,6 @@ class CustomerCLI:
             loaded_customer = Customer.from_dict(customer_data)
             if loaded_customer:
                 self.customer = loaded_customer
-                self._update_counters()  # Make sure counters are updated based on loaded data
                 print("Data loaded successfully!")
             else:
                 print("Failed to parse customer data.")
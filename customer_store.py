@@ -0,0 +1,288 @@
+# customer_store.py
+import argparse
+import json
+import os
+import shutil
+import zlib
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from document_cache import DocumentCache
+from file_lock import FileLock
+from schema_migrations import SCHEMA_VERSION_KEY, CURRENT_SCHEMA_VERSION
+
+
+class PartitionedCustomerStore:
+    """
+    Customer records (customer_info + policies) split across N shard files.
+
+    A customer's shard is chosen by a stable CRC32 hash of their email, so
+    reading or saving one customer touches a single shard. manifest.json
+    records the shard count; resharding rewrites the shards and the manifest.
+    Each shard starts with a schema_version entry, which is not a customer.
+    Every shard rewrite holds that shard's lock file, so concurrent sessions
+    saving customers in one shard do not drop each other's changes.
+    """
+
+    DEFAULT_SHARD_COUNT = 16
+    MANIFEST_FILE = "manifest.json"
+    FORMAT = "partitioned-customers"
+    FORMAT_VERSION = 1
+    LOCK_TIMEOUT = 10           # Seconds to wait for another process's lock
+    LOCK_STALE_SECONDS = 30     # A lock file older than this is considered abandoned
+
+    def __init__(self, store_dir: str, legacy_file: Optional[str] = None,
+                 shard_count: int = DEFAULT_SHARD_COUNT):
+        self.store_dir = store_dir
+        self.legacy_file = legacy_file
+        self._default_shard_count = shard_count
+        self._manifest: Optional[Dict] = None
+
+    # ------------------------------------------------------------------
+    # Manifest and shard layout
+    # ------------------------------------------------------------------
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.store_dir, PartitionedCustomerStore.MANIFEST_FILE)
+
+    @staticmethod
+    def shard_index(email: str, shard_count: int) -> int:
+        """Stable shard number for an email"""
+        return zlib.crc32(email.encode("utf-8")) % shard_count
+
+    @staticmethod
+    def _shard_name(index: int) -> str:
+        return f"shard_{index:03d}.json"
+
+    def _shard_path(self, index: int, store_dir: Optional[str] = None) -> str:
+        return os.path.join(store_dir or self.store_dir, self._shard_name(index))
+
+    def _shard_lock(self, index: int, store_dir: Optional[str] = None) -> FileLock:
+        """Lock held around every read-modify-write of one shard"""
+        return FileLock(self._shard_path(index, store_dir) + ".lock", "customer shard",
+                        PartitionedCustomerStore.LOCK_TIMEOUT, PartitionedCustomerStore.LOCK_STALE_SECONDS)
+
+    @staticmethod
+    def _new_shard() -> Dict:
+        return {SCHEMA_VERSION_KEY: CURRENT_SCHEMA_VERSION}
+
+    @staticmethod
+    def _write_json(path: str, data: Dict):
+        """Write a JSON file atomically and refresh its cache entry"""
+        tmp_path = path + ".tmp"
+        text = json.dumps(data, indent=4)
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        DocumentCache.shared().put(path, text)
+
+    def _load_manifest(self) -> Dict:
+        """Read the manifest, creating the store (and importing legacy data) if needed"""
+        if os.path.exists(self.manifest_path):
+            self._manifest = DocumentCache.shared().get(self.manifest_path)
+            return self._manifest
+        self._initialize()
+        return self._manifest
+
+    def _initialize(self):
+        os.makedirs(self.store_dir, exist_ok=True)
+        legacy = {}
+        if self.legacy_file and os.path.exists(self.legacy_file):
+            with open(self.legacy_file, 'r') as f:
+                legacy = json.load(f)
+        legacy.pop(SCHEMA_VERSION_KEY, None)
+        self._write_shards(self.store_dir, self._default_shard_count, legacy.items())
+        print(f"Customer store initialised in {self.store_dir} "
+              f"({self._default_shard_count} shards, {len(legacy)} customers imported)")
+
+    def _write_shards(self, store_dir: str, shard_count: int, records) -> Dict:
+        """Write all shards and then the manifest for a stream of (email, record)"""
+        shards = [self._new_shard() for _ in range(shard_count)]
+        for email, record in records:
+            shards[self.shard_index(email, shard_count)][email] = record
+        for index, shard in enumerate(shards):
+            with self._shard_lock(index, store_dir):
+                self._write_json(self._shard_path(index, store_dir), shard)
+        manifest = {
+            "format": PartitionedCustomerStore.FORMAT,
+            "version": PartitionedCustomerStore.FORMAT_VERSION,
+            "shard_count": shard_count,
+            "hash": "crc32"
+        }
+        self._write_json(os.path.join(store_dir, PartitionedCustomerStore.MANIFEST_FILE), manifest)
+        if store_dir == self.store_dir:
+            self._manifest = manifest
+        return manifest
+
+    @property
+    def shard_count(self) -> int:
+        return int(self._load_manifest()["shard_count"])
+
+    def _read_shard(self, index: int) -> Dict:
+        path = self._shard_path(index)
+        if not os.path.exists(path):
+            return {}
+        return DocumentCache.shared().get(path)
+
+    # ------------------------------------------------------------------
+    # Customer access
+    # ------------------------------------------------------------------
+    def load_customer(self, email: str) -> Optional[Dict]:
+        """Load one customer's record from its shard"""
+        return self._read_shard(self.shard_index(email, self.shard_count)).get(email)
+
+    def save_customer(self, record: Dict, replace_policies: bool = False) -> bool:
+        """Write one customer's record into its shard, merging policies unless replace_policies"""
+        email = record["customer_info"]["email"]
+        index = self.shard_index(email, self.shard_count)
+        with self._shard_lock(index):
+            shard = dict(self._read_shard(index))  # Copy: the cached shard is shared
+            existing = shard.get(email)
+            if not replace_policies and isinstance(existing, dict) and existing.get("policies"):
+                merged_policies = dict(existing["policies"])
+                merged_policies.update(record.get("policies", {}))
+                record = {"customer_info": record["customer_info"], "policies": merged_policies}
+            shard[email] = record
+            self._write_json(self._shard_path(index), shard)
+        return True
+
+    def delete_customer(self, email: str) -> bool:
+        """Remove one customer from its shard"""
+        index = self.shard_index(email, self.shard_count)
+        with self._shard_lock(index):
+            shard = dict(self._read_shard(index))
+            if shard.pop(email, None) is None:
+                return False
+            self._write_json(self._shard_path(index), shard)
+        return True
+
+    def iter_shards(self, start: int = 0) -> Iterator[Dict]:
+        """Yield shard dictionaries one at a time, from shard number start"""
+        for index in range(start, self.shard_count):
+            yield self._read_shard(index)
+
+    def update_policies(self, updates: Dict[str, Dict[str, Dict]]) -> int:
+        """Set fields on stored policies (email -> policy_id -> fields), writing each touched shard once"""
+        by_shard: Dict[int, Dict[str, Dict[str, Dict]]] = {}
+        shard_count = self.shard_count
+        for email, policies in updates.items():
+            by_shard.setdefault(self.shard_index(email, shard_count), {})[email] = policies
+        updated = 0
+        for index, shard_updates in by_shard.items():
+            with self._shard_lock(index):
+                shard = dict(self._read_shard(index))  # Copy: the cached shard is shared
+                for email, policies in shard_updates.items():
+                    record = shard.get(email)
+                    if not isinstance(record, dict) or not isinstance(record.get("policies"), dict):
+                        continue
+                    stored = dict(record["policies"])
+                    for policy_id, fields in policies.items():
+                        if policy_id in stored:
+                            stored[policy_id] = dict(stored[policy_id], **fields)
+                            updated += 1
+                    shard[email] = dict(record, policies=stored)
+                self._write_json(self._shard_path(index), shard)
+        return updated
+
+    def rewrite_shards(self, rewrite: Callable[[str], bool]) -> List[str]:
+        """Call rewrite(path) on every shard file while holding its lock; returns the paths it rewrote"""
+        if not os.path.exists(self.manifest_path):
+            return []  # No store yet; nothing to rewrite
+        rewritten = []
+        for index in range(self.shard_count):
+            path = self._shard_path(index)
+            with self._shard_lock(index):
+                if os.path.exists(path) and rewrite(path):
+                    rewritten.append(path)
+        return rewritten
+
+    def iter_customers(self) -> Iterator[Tuple[str, Dict]]:
+        """Lazily yield (email, record) across all shards"""
+        for shard in self.iter_shards():
+            for email, record in shard.items():
+                if email != SCHEMA_VERSION_KEY:
+                    yield email, record
+
+    def load_all(self) -> Dict[str, Dict]:
+        """Load every customer into one email -> record dictionary"""
+        return dict(self.iter_customers())
+
+    def replace_all(self, data: Dict[str, Dict]) -> bool:
+        """Replace the whole store with the given email -> record mapping"""
+        self._write_shards(self.store_dir, self.shard_count, data.items())
+        return True
+
+    # ------------------------------------------------------------------
+    # Resharding
+    # ------------------------------------------------------------------
+    def reshard(self, new_shard_count: int) -> bool:
+        """Redistribute all customers over new_shard_count shards, one old shard at a time"""
+        if new_shard_count < 1:
+            raise ValueError("Shard count must be at least 1")
+        old_count = self.shard_count
+        if new_shard_count == old_count:
+            return True
+
+        staging_dir = self.store_dir.rstrip(os.sep) + ".reshard"
+        old_dir = self.store_dir.rstrip(os.sep) + ".old"
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+
+        # Spill records to per-target line files so memory holds one shard at a time
+        spill_paths = [os.path.join(staging_dir, f"spill_{i:03d}.jsonl") for i in range(new_shard_count)]
+        spills = [open(path, 'w') for path in spill_paths]
+        try:
+            for email, record in self.iter_customers():
+                target = self.shard_index(email, new_shard_count)
+                spills[target].write(json.dumps([email, record]) + "\n")
+        finally:
+            for spill in spills:
+                spill.close()
+
+        for index, spill_path in enumerate(spill_paths):
+            shard = self._new_shard()
+            with open(spill_path, 'r') as f:
+                for line in f:
+                    email, record = json.loads(line)
+                    shard[email] = record
+            with self._shard_lock(index, staging_dir):
+                self._write_json(self._shard_path(index, staging_dir), shard)
+            os.remove(spill_path)
+        self._write_json(os.path.join(staging_dir, PartitionedCustomerStore.MANIFEST_FILE), {
+            "format": PartitionedCustomerStore.FORMAT,
+            "version": PartitionedCustomerStore.FORMAT_VERSION,
+            "shard_count": new_shard_count,
+            "hash": "crc32"
+        })
+
+        # Swap the staged store into place
+        shutil.rmtree(old_dir, ignore_errors=True)
+        os.replace(self.store_dir, old_dir)
+        os.replace(staging_dir, self.store_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        self._manifest = None
+        print(f"Resharded {self.store_dir} from {old_count} to {new_shard_count} shards")
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partitioned customer store tools")
+    parser.add_argument("--store-dir", default=os.path.join("data", "customers"),
+                        help="Directory holding the manifest and shard files")
+    parser.add_argument("--legacy-file", default=os.path.join("data", "customer_data.json"),
+                        help="Monolithic customer file imported when the store is first created")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    reshard = subparsers.add_parser("reshard", help="Change the number of shards")
+    reshard.add_argument("shard_count", type=int)
+    subparsers.add_parser("info", help="Show the shard layout")
+    args = parser.parse_args()
+
+    store = PartitionedCustomerStore(args.store_dir, legacy_file=args.legacy_file)
+    if args.command == "reshard":
+        store.reshard(args.shard_count)
+    elif args.command == "info":
+        print(f"Shards: {store.shard_count}")
+        for index, shard in enumerate(store.iter_shards()):
+            print(f"  {PartitionedCustomerStore._shard_name(index)}: {len(shard)} customers")
+
+
+if __name__ == "__main__":
+    main()
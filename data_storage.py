@@ -8,20 +8,26 @@ from dataclasses import asdict
 
 from datetime import datetime
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from policy_enums import PolicyType
 
+from sqlite_storage import SQLiteStorage
+
+from document_cache import DocumentCache
+
 
 
 class DataStorage:
 
-    def __init__(self, storage_dir: str = "data"):
+    def __init__(self, storage_dir: str = "data", backend: Optional[SQLiteStorage] = None):
 
-        """Initialize data storage with a directory for storing files"""
+        """Initialize data storage with a directory for storing files and an optional SQLite backend"""
 
         self.storage_dir = storage_dir
 
+        self.backend = backend or SQLiteStorage.shared()
+
         self._ensure_storage_exists()
 
 
@@ -50,19 +56,27 @@ class DataStorage:
 
     def save_data(self, filename: str, data: Dict) -> bool:
 
-        """Save data to a JSON file"""
+        """Save data to a JSON file, or to the SQLite backend when one is configured"""
 
         try:
 
+            if self.backend:
+
+                return self.backend.save_document(filename, data)
+
             file_path = os.path.join(self.storage_dir, f"{filename}.json")
 
             # print(f"Saving data to: {file_path}")  # Debug print
 
             # print(f"Data being saved: {data}")     # Debug print
 
+            text = json.dumps(data, default=self._serialize_datetime, indent=4)
+
             with open(file_path, 'w') as f:
 
-                json.dump(data, f, default=self._serialize_datetime, indent=4)
+                f.write(text)
+
+            DocumentCache.shared().put(file_path, text)
 
             return True
 
@@ -76,17 +90,19 @@ class DataStorage:
 
     def load_data(self, filename: str) -> Dict:
 
-        """Load data from a JSON file"""
+        """Load data from a JSON file, or from the SQLite backend when one is configured"""
 
         try:
 
+            if self.backend:
+
+                return self.backend.load_document(filename)
+
             file_path = os.path.join(self.storage_dir, f"{filename}.json")
 
             if os.path.exists(file_path):
 
-                with open(file_path, 'r') as f:
-
-                    return json.load(f)
+                return DocumentCache.shared().get(file_path)
 
             return {}
 
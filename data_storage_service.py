@@ -4,10 +4,35 @@ import os
 from datetime import datetime
 from typing import Dict, Optional, Any
 from policy_enums import PolicyType
+from sqlite_storage import SQLiteStorage
+from customer_store import PartitionedCustomerStore
+from id_sequence import SequenceAllocator
+from policy_codec import PolicyCodec
 
 class DataStorageService:
     DATA_DIR = "data"
     DATA_FILE = os.path.join(DATA_DIR, "customer_data.json")
+    CUSTOMER_STORE_DIR = os.path.join(DATA_DIR, "customers")
+    SHARD_COUNT = PartitionedCustomerStore.DEFAULT_SHARD_COUNT  # Used when the store is first created
+    BACKEND: Optional[SQLiteStorage] = None  # Explicit backend; falls back to SQLiteStorage.shared()
+    _store: Optional[PartitionedCustomerStore] = None
+
+    @staticmethod
+    def get_backend() -> Optional[SQLiteStorage]:
+        """Get the configured SQLite backend, or None to use the JSON file"""
+        return DataStorageService.BACKEND or SQLiteStorage.shared()
+
+    @staticmethod
+    def get_store() -> PartitionedCustomerStore:
+        """Get the sharded JSON customer store, importing DATA_FILE on first use"""
+        store = DataStorageService._store
+        if (store is None or store.store_dir != DataStorageService.CUSTOMER_STORE_DIR
+                or store.legacy_file != DataStorageService.DATA_FILE):
+            store = PartitionedCustomerStore(DataStorageService.CUSTOMER_STORE_DIR,
+                                             legacy_file=DataStorageService.DATA_FILE,
+                                             shard_count=DataStorageService.SHARD_COUNT)
+            DataStorageService._store = store
+        return store
 
     @staticmethod
     def _serialize_datetime(obj: Any) -> Any:
@@ -23,25 +48,27 @@ class DataStorageService:
 
     @staticmethod
     def load_data() -> Dict:
-        """Load all data from the JSON file."""
+        """Load all data from the customer store."""
         try:
+            backend = DataStorageService.get_backend()
+            if backend:
+                return backend.load_all_customers()
             DataStorageService._ensure_storage_exists()
-            if os.path.exists(DataStorageService.DATA_FILE):
-                with open(DataStorageService.DATA_FILE, 'r') as f:
-                    return json.load(f)
-            return {}
+            return DataStorageService.get_store().load_all()
         except Exception as e:
             print(f"Error loading data: {str(e)}")
             return {}
 
     @staticmethod
     def save_data(data: Dict) -> bool:
-        """Save data to the JSON file."""
+        """Replace all data in the customer store."""
         try:
+            backend = DataStorageService.get_backend()
+            if backend:
+                return backend.replace_all_customers(data)
             DataStorageService._ensure_storage_exists()
-            with open(DataStorageService.DATA_FILE, 'w') as f:
-                json.dump(data, f, default=DataStorageService._serialize_datetime, indent=4)
-            return True
+            data = json.loads(json.dumps(data, default=DataStorageService._serialize_datetime))
+            return DataStorageService.get_store().replace_all(data)
         except Exception as e:
             print(f"Error saving data: {str(e)}")
             return False
@@ -66,46 +93,68 @@ class DataStorageService:
             print(f"Error cleaning data: {str(e)}")
             return data
 
+    @staticmethod
+    def build_customer_record(customer: Any) -> Dict:
+        """Build the stored record (customer_info + policies) for a customer object."""
+        record = {
+            "customer_info": {
+                "email": customer.email,
+                "name": customer.name,
+                "contact_number": customer._contact_number,
+                "address": customer.address,
+                "birth_date": customer.birth_date.strftime("%Y-%m-%d"),
+                "credit_score": customer.credit_score
+            },
+            "policies": {}
+        }
+        for policy in customer.policies:
+            record["policies"][policy.get_policy_id()] = PolicyCodec.encode(policy)
+        return record
+
+    @staticmethod
+    def _read_customer(email: str) -> Optional[Dict]:
+        """Read one stored customer record without any cleaning."""
+        backend = DataStorageService.get_backend()
+        if backend:
+            return backend.load_customer(email)
+        DataStorageService._ensure_storage_exists()
+        return DataStorageService.get_store().load_customer(email)
+
+    @staticmethod
+    def load_policy(email: str, policy_id: str) -> Optional[Dict]:
+        """Stored dictionary of one customer's policy, or None"""
+        record = DataStorageService._read_customer(email) if email else None
+        policies = record.get("policies") if isinstance(record, dict) else None
+        return policies.get(policy_id) if isinstance(policies, dict) else None
+
+    @staticmethod
+    def _write_customer(record: Dict, replace_policies: bool = False) -> bool:
+        """Write one customer record, merging policies unless replace_policies is set."""
+        backend = DataStorageService.get_backend()
+        if backend:
+            return backend.save_customer(record, replace_policies=replace_policies)
+
+        # Only the customer's own shard is read and rewritten
+        DataStorageService._ensure_storage_exists()
+        return DataStorageService.get_store().save_customer(record, replace_policies=replace_policies)
+
+    @staticmethod
+    def update_policies(updates: Dict[str, Dict[str, Dict]]) -> int:
+        """Set fields on stored policies (email -> policy_id -> fields) in one batch; returns the count updated"""
+        backend = DataStorageService.get_backend()
+        if backend:
+            return backend.update_policies(updates)
+        DataStorageService._ensure_storage_exists()
+        return DataStorageService.get_store().update_policies(updates)
+
     @staticmethod
     def save_customer_data(customer: Any) -> bool:
         """Save customer data while preserving existing data."""
         try:
-            # Load and clean existing data
-            existing_data = DataStorageService.load_data()
-            cleaned_data = DataStorageService.clean_customer_data(existing_data)
-            
-            # Create new customer data
-            customer_data = {
-                "customer_info": {
-                    "email": customer.email,
-                    "name": customer.name,
-                    "contact_number": customer._contact_number,
-                    "address": customer.address,
-                    "birth_date": customer.birth_date.strftime("%Y-%m-%d"),
-                    "credit_score": customer.credit_score
-                },
-                "policies": {}
-            }
-
-            # If customer exists, preserve existing policies
-            if customer.email in cleaned_data:
-                customer_data["policies"] = cleaned_data[customer.email]["policies"]
-
-            # Update with new policies
-            for policy in customer.policies:
-                policy_id = policy.get_policy_id()
-                policy_dict = policy.to_dict()
-                # Ensure status is converted to string if it's an enum
-                if 'status' in policy_dict:
-                    policy_dict['status'] = str(policy_dict['status'])
-                customer_data["policies"][policy_id] = policy_dict
-
-            # Update the data
-            cleaned_data[customer.email] = customer_data
-
-            # Save to file
-            if DataStorageService.save_data(cleaned_data):
-                print(f"Data saved successfully to {DataStorageService.DATA_FILE}")
+            # Existing policies are preserved and updated with the customer's current ones
+            record = DataStorageService.build_customer_record(customer)
+            if DataStorageService._write_customer(record):
+                print(f"Data saved successfully to {DataStorageService.CUSTOMER_STORE_DIR}")
                 return True
             return False
         except Exception as e:
@@ -116,8 +165,8 @@ class DataStorageService:
     def load_customer_data(email: str) -> Optional[Dict]:
         """Load customer data for a specific email."""
         try:
-            data = DataStorageService.load_data()
-            cleaned_data = DataStorageService.clean_customer_data(data)
+            record = DataStorageService._read_customer(email)
+            cleaned_data = DataStorageService.clean_customer_data({email: record} if record else {})
             if email in cleaned_data:
                 print(f"Found data for {email}")
                 return cleaned_data[email]
@@ -131,10 +180,13 @@ class DataStorageService:
     def get_highest_policy_number() -> int:
         """Get the highest policy number from all existing policies."""
         try:
-            data = DataStorageService.load_data()
+            backend = DataStorageService.get_backend()
+            if backend:
+                return backend.get_highest_policy_number()
+            DataStorageService._ensure_storage_exists()
             highest_num = 0
-            
-            for customer_data in data.values():
+
+            for _, customer_data in DataStorageService.get_store().iter_customers():
                 policies = customer_data.get("policies", {})
                 for policy_id in policies.keys():
                     try:
@@ -146,4 +198,9 @@ class DataStorageService:
             return highest_num
         except Exception as e:
             print(f"Error getting highest policy number: {str(e)}")
-            return 0
\ No newline at end of file
+            return 0
+
+    @staticmethod
+    def generate_policy_id() -> str:
+        """Allocate the next unique policy ID (POLxxx); the stored policies are only scanned once to seed it"""
+        return SequenceAllocator.shared().next_id("POL", seed=DataStorageService.get_highest_policy_number)
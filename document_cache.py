@@ -0,0 +1,128 @@
+# document_cache.py
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+class DocumentCache:
+    """
+    Process-wide cache of parsed JSON documents keyed by file path.
+
+    Entries are revalidated with os.stat (mtime_ns + size) on every read, so a
+    file changed by another process or session is re-parsed. Writers record the
+    JSON text they saved, which is parsed into a fresh copy of their document. Cached documents are shared between callers:
+    treat them as read-only unless the modified document is written back.
+    """
+
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # Budget measured in bytes of JSON source
+    MAX_BYTES_ENV_VAR = "INSURANCE_CACHE_MAX_BYTES"
+
+    _shared: Optional['DocumentCache'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes if max_bytes is not None else DocumentCache.DEFAULT_MAX_BYTES
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()  # path -> (mtime_ns, size, document)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def shared(cls) -> 'DocumentCache':
+        """Get the process-wide cache, sized from INSURANCE_CACHE_MAX_BYTES if set"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                max_bytes = os.environ.get(cls.MAX_BYTES_ENV_VAR)
+                cls._shared = cls(int(max_bytes) if max_bytes else None)
+            return cls._shared
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.abspath(path)
+
+    def _store(self, key: str, mtime_ns: int, size: int, document: Any):
+        """Insert or replace an entry and evict least recently used ones over budget"""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._total_bytes -= old[1]
+        if size > self.max_bytes:
+            return  # Too big to cache at all
+        self._entries[key] = (mtime_ns, size, document)
+        self._total_bytes += size
+        while self._total_bytes > self.max_bytes and self._entries:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._total_bytes -= evicted_size
+            self.evictions += 1
+
+    def get(self, path: str, loader: Callable[[Any], Any] = json.load) -> Any:
+        """Get the parsed document at path, re-parsing only if the file changed"""
+        key = self._key(path)
+        stat = os.stat(path)  # Let FileNotFoundError reach the caller like open() would
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        with open(path, 'r') as f:
+            document = loader(f)
+        with self._lock:
+            self._store(key, stat.st_mtime_ns, stat.st_size, document)
+        return document
+
+    def put(self, path: str, text: str, loader: Callable[[str], Any] = json.loads):
+        """Record the JSON text that was just written to path, parsed as a later read would be"""
+        key = self._key(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.invalidate(path)
+            return
+        document = loader(text)  # Not the writer's object, which it may go on changing
+        with self._lock:
+            self._store(key, stat.st_mtime_ns, stat.st_size, document)
+
+    def invalidate(self, path: Optional[str] = None):
+        """Drop one path, or every entry when no path is given"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._total_bytes = 0
+                return
+            entry = self._entries.pop(self._key(path), None)
+            if entry is not None:
+                self._total_bytes -= entry[1]
+
+    def resize(self, max_bytes: int):
+        """Change the memory budget, evicting entries if needed"""
+        with self._lock:
+            self.max_bytes = max_bytes
+            while self._total_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+                self.evictions += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes
+            }
+
+    def reset_stats(self):
+        """Reset the hit/miss counters"""
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
@@ -0,0 +1,239 @@
+# evidence_store.py
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional, Union
+from file_lock import FileLock
+
+Source = Union[str, os.PathLike, BinaryIO]
+
+
+class EvidenceStore:
+    """
+    Content-addressed store for claim evidence files.
+
+    A file is streamed in CHUNK_SIZE pieces into a temporary file and hashed
+    (SHA-256) as it is written; the finished file is renamed to its digest, so
+    identical uploads are kept once. Blobs live in a fan-out tree
+    (objects/ab/cd/<digest>) so no directory grows too large, and are read
+    through mmap without copying. Each blob has a reference count in refs.json,
+    updated under a lock file; collect_garbage() deletes blobs nothing refers to,
+    recounting the references from stored records when it is given them.
+    """
+
+    STORE_DIR = os.path.join("data", "evidence")
+    CHUNK_SIZE = 1024 * 1024
+    FAN_OUT_LEVELS = 2          # Directory levels of two hex digits each
+    GC_GRACE_SECONDS = 3600     # Unreferenced blobs younger than this may be about to get their reference
+    LOCK_TIMEOUT = 10           # Seconds to wait for another process's lock
+    LOCK_STALE_SECONDS = 30     # A lock file older than this is considered abandoned
+
+    _shared: Optional['EvidenceStore'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or EvidenceStore.STORE_DIR
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        self.refs_path = os.path.join(self.root, "refs.json")
+        self.lock_path = self.refs_path + ".lock"
+        self._file_lock = FileLock(self.lock_path, "evidence", EvidenceStore.LOCK_TIMEOUT,
+                                   EvidenceStore.LOCK_STALE_SECONDS)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> 'EvidenceStore':
+        """Get the process-wide store for STORE_DIR"""
+        with cls._shared_lock:
+            if cls._shared is None or cls._shared.root != cls.STORE_DIR:
+                cls._shared = cls(cls.STORE_DIR)
+            return cls._shared
+
+    @staticmethod
+    def is_digest(value) -> bool:
+        """Whether value looks like a SHA-256 hex digest"""
+        if not isinstance(value, str) or len(value) != 64:
+            return False
+        try:
+            int(value, 16)
+            return value == value.lower()
+        except ValueError:
+            return False
+
+    def blob_path(self, digest: str) -> str:
+        if not EvidenceStore.is_digest(digest):
+            raise ValueError(f"Not a SHA-256 digest: {digest!r}")
+        parts = [digest[2 * level:2 * level + 2] for level in range(EvidenceStore.FAN_OUT_LEVELS)]
+        return os.path.join(self.objects_dir, *parts, digest)
+
+    def contains(self, digest: str) -> bool:
+        return EvidenceStore.is_digest(digest) and os.path.exists(self.blob_path(digest))
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    def put(self, source: Source) -> str:
+        """Store a file path or binary stream and return its digest; content already stored is not written again"""
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb', buffering=0) as f:
+                return self._put_stream(f)
+        return self._put_stream(source)
+
+    def _put_stream(self, stream: BinaryIO) -> str:
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        digest = hashlib.sha256()
+        buffer = bytearray(EvidenceStore.CHUNK_SIZE)
+        view = memoryview(buffer)
+        readinto = getattr(stream, "readinto", None)
+        try:
+            with open(fd, 'wb', buffering=0) as out:
+                while True:
+                    if readinto is not None:
+                        count = readinto(buffer)
+                        chunk = view[:count] if count else b""
+                    else:
+                        chunk = stream.read(EvidenceStore.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+                os.fsync(out.fileno())
+            name = digest.hexdigest()
+            path = self.blob_path(name)
+            if os.path.exists(path):
+                os.remove(tmp_path)  # Duplicate upload
+                os.utime(path)       # Restart the garbage collection grace period
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.chmod(tmp_path, 0o444)
+                os.replace(tmp_path, path)
+            return name
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        finally:
+            view.release()
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    @contextmanager
+    def view(self, digest: str) -> Iterator[memoryview]:
+        """
+        Zero-copy, read-only view of a blob's bytes through mmap. The view (and
+        any slice of it) is only valid inside the with block.
+        """
+        with open(self.blob_path(digest), 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield memoryview(b"")  # mmap cannot map an empty file
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    yield view
+                finally:
+                    view.release()
+
+    def read_bytes(self, digest: str) -> bytes:
+        """A copy of a blob's bytes"""
+        with self.view(digest) as data:
+            return bytes(data)
+
+    def verify(self, digest: str) -> bool:
+        """Whether the stored blob still hashes to its name"""
+        try:
+            with self.view(digest) as data:
+                hasher = hashlib.sha256()
+                for offset in range(0, len(data), EvidenceStore.CHUNK_SIZE):
+                    hasher.update(data[offset:offset + EvidenceStore.CHUNK_SIZE])
+                return hasher.hexdigest() == digest
+        except (OSError, ValueError):
+            return False
+
+    # ------------------------------------------------------------------
+    # Reference counts
+    # ------------------------------------------------------------------
+    @contextmanager
+    def _refs(self) -> Iterator[Dict[str, int]]:
+        """Reference counts, written back when the block exits normally (locks held throughout)"""
+        with self._lock:
+            self._file_lock.acquire()
+            try:
+                refs: Dict[str, int] = {}
+                if os.path.exists(self.refs_path):
+                    with open(self.refs_path, 'r') as f:
+                        refs = json.load(f)
+                before = dict(refs)
+                yield refs
+                if refs != before:
+                    tmp_path = self.refs_path + ".tmp"
+                    with open(tmp_path, 'w') as f:
+                        json.dump(refs, f, indent=4, sort_keys=True)
+                    os.replace(tmp_path, self.refs_path)
+            finally:
+                self._file_lock.release()
+
+    def add_ref(self, digest: str) -> int:
+        """Count one more reference to a stored blob; returns the new count"""
+        if not self.contains(digest):
+            raise KeyError(f"No evidence blob {digest}")
+        with self._refs() as refs:
+            refs[digest] = refs.get(digest, 0) + 1
+            return refs[digest]
+
+    def release(self, digest: str) -> int:
+        """Drop one reference; returns the remaining count (the blob goes at the next collect_garbage)"""
+        with self._refs() as refs:
+            count = max(refs.get(digest, 0) - 1, 0)
+            if count:
+                refs[digest] = count
+            else:
+                refs.pop(digest, None)
+            return count
+
+    def refcount(self, digest: str) -> int:
+        with self._refs() as refs:
+            return refs.get(digest, 0)
+
+    def collect_garbage(self, grace_seconds: Optional[float] = None,
+                        referenced: Optional[Iterable[str]] = None) -> int:
+        """
+        Delete unreferenced blobs and abandoned temporary files older than the
+        grace period. Given the digests every stored record refers to (once per
+        reference), the counts are first rebuilt from them.
+        """
+        grace = EvidenceStore.GC_GRACE_SECONDS if grace_seconds is None else grace_seconds
+        cutoff = time.time() - grace
+        removed = 0
+        with self._refs() as refs:
+            if referenced is not None:
+                refs.clear()
+                for digest in referenced:
+                    refs[digest] = refs.get(digest, 0) + 1
+            for directory, _, names in os.walk(self.objects_dir):
+                for name in names:
+                    path = os.path.join(directory, name)
+                    try:
+                        if refs.get(name, 0) <= 0 and os.path.getmtime(path) <= cutoff:
+                            os.remove(path)
+                            removed += 1
+                    except OSError:
+                        continue
+            if os.path.isdir(self.tmp_dir):
+                for name in os.listdir(self.tmp_dir):
+                    path = os.path.join(self.tmp_dir, name)
+                    try:
+                        if os.path.getmtime(path) <= cutoff:
+                            os.remove(path)
+                    except OSError:
+                        continue
+        return removed
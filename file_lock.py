@@ -0,0 +1,52 @@
+# file_lock.py
+import os
+import time
+
+
+class FileLock:
+    """
+    Cross-process lock held by creating a lock file exclusively. A lock file
+    older than stale_seconds was left by a crashed process and is taken over.
+    Not reentrant: pair it with a threading lock inside one process.
+    """
+
+    def __init__(self, path: str, name: str = "file", timeout: float = 10, stale_seconds: float = 30):
+        self.path = path
+        self.name = name                    # Named in the timeout error
+        self.timeout = timeout              # Seconds to wait for another process's lock
+        self.stale_seconds = stale_seconds
+
+    def acquire(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode())
+                os.close(fd)
+                return
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.path) > self.stale_seconds:
+                        os.remove(self.path)
+                        continue
+                except OSError:
+                    continue  # Lock released between the checks
+                if time.time() > deadline:
+                    raise TimeoutError(f"Timed out waiting for {self.name} lock {self.path}")
+                time.sleep(0.01)
+
+    def release(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
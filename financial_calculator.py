@@ -1,29 +1,22 @@
 # financial_calculator.py
 from datetime import date
-from typing import List, Dict
+from typing import List, Dict, Tuple
+from rating_engine import RatingEngine
+from quote_cache import cached_quote
 
 
 class FinancialCalculator:
     @staticmethod
+    @cached_quote("financial.premium")
     def calculate_premium(policy_type: str, coverage_amount: float, risk_factors: Dict[str, float]) -> float:
         """Calculate insurance premium based on policy type, coverage amount and risk factors"""
-        base_premium = coverage_amount * 0.1  # Basic rate of 10%
+        return RatingEngine.quote("financial", policy_type, coverage_amount, risk_factors=risk_factors)
 
-        policy_multipliers = {
-            "LIFE": 1.5,
-            "CAR": 1.2,
-            "HEALTH": 1.3,
-            "PROPERTY": 1.1
-        }
-
-        multiplier = policy_multipliers.get(policy_type, 1.0)
-        premium = base_premium * multiplier
-
-        # Apply risk factor adjustments
-        for factor, value in risk_factors.items():
-            premium *= (1 + value)
-
-        return round(premium, 2)
+    @staticmethod
+    @cached_quote("financial.quote")
+    def quote_premium(policy_type: str, coverage_amount: float, risk_factors: Dict[str, float]) -> Tuple[float, int]:
+        """calculate_premium with the version of the rate tables that priced it"""
+        return RatingEngine.quote_with_version("financial", policy_type, coverage_amount, risk_factors=risk_factors)
 
     @staticmethod
     def calculate_claim_payout(claim_amount: float, coverage_amount: float, deductible: float) -> float:
@@ -0,0 +1,91 @@
+# id_sequence.py
+import json
+import os
+import threading
+from typing import Callable, Dict, Optional, Tuple
+from file_lock import FileLock
+
+
+class SequenceAllocator:
+    """
+    Durable named sequences handed out in pre-reserved blocks (hi/lo).
+
+    The sequence file records, per name, the first value not yet reserved by
+    any process. A process reserves BLOCK_SIZE values at a time under a lock
+    file and then serves IDs from memory. The file is advanced before any ID
+    from a block is used, so a crash can leave gaps but never duplicates.
+    """
+
+    SEQUENCE_FILE = os.path.join("data", "sequences.json")
+    BLOCK_SIZE = 20
+    LOCK_TIMEOUT = 10           # Seconds to wait for another process's lock
+    LOCK_STALE_SECONDS = 30     # A lock file older than this is considered abandoned
+
+    _shared: Optional['SequenceAllocator'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path: Optional[str] = None, block_size: Optional[int] = None):
+        self.path = path or SequenceAllocator.SEQUENCE_FILE
+        self.lock_path = self.path + ".lock"
+        self._file_lock = FileLock(self.lock_path, "sequence", SequenceAllocator.LOCK_TIMEOUT,
+                                   SequenceAllocator.LOCK_STALE_SECONDS)
+        self.block_size = block_size or SequenceAllocator.BLOCK_SIZE
+        self._blocks: Dict[str, Tuple[int, int]] = {}  # name -> (next value, end of block)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> 'SequenceAllocator':
+        """Get the process-wide allocator for SEQUENCE_FILE"""
+        with cls._shared_lock:
+            if cls._shared is None or cls._shared.path != cls.SEQUENCE_FILE:
+                cls._shared = cls(cls.SEQUENCE_FILE)
+            return cls._shared
+
+    # ------------------------------------------------------------------
+    # Block reservation
+    # ------------------------------------------------------------------
+    def _read_sequences(self) -> Dict[str, int]:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def _write_sequences(self, sequences: Dict[str, int]):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(sequences, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _reserve_block(self, name: str, seed: Optional[Callable[[], int]]) -> Tuple[int, int]:
+        """Reserve the next block for name; seed() gives the highest value already in use"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file_lock.acquire()
+        try:
+            sequences = self._read_sequences()
+            start = sequences.get(name)
+            if start is None:
+                # First use: continue after the highest ID already stored
+                start = (seed() if seed else 0) + 1
+            end = start + self.block_size
+            sequences[name] = end
+            self._write_sequences(sequences)
+            return start, end
+        finally:
+            self._file_lock.release()
+
+    def next_value(self, name: str, seed: Optional[Callable[[], int]] = None) -> int:
+        """Get the next value of a named sequence"""
+        with self._lock:
+            value, end = self._blocks.get(name, (0, 0))
+            if value >= end:
+                value, end = self._reserve_block(name, seed)
+            self._blocks[name] = (value + 1, end)
+            return value
+
+    def next_id(self, prefix: str, seed: Optional[Callable[[], int]] = None, width: int = 3) -> str:
+        """Get the next ID such as POL004 for a prefix-named sequence"""
+        return f"{prefix}{self.next_value(prefix, seed):0{width}d}"
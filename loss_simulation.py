@@ -0,0 +1,263 @@
+# loss_simulation.py
+import argparse
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from claim import ClaimStatus
+from claims_storage_service import ClaimsStorageService
+from policy_book import PolicyBook
+from policy_enums import PolicyType, PolicyStatus
+
+# (policy type index, annual claim frequency, severity mu, severity sigma, coverage per policy)
+Segment = Tuple[int, float, float, float, np.ndarray]
+
+_worker_segments: Optional[List[Segment]] = None
+
+
+class FrequencySeverity:
+    """
+    Claim model of one policy type: claims per policy-year are Poisson(frequency)
+    and each claim costs coverage * min(1, X) with X lognormal(mu, sigma), i.e.
+    severity is fitted as a share of the policy's coverage and capped at it.
+    """
+
+    __slots__ = ("policy_type", "frequency", "mu", "sigma", "claims", "exposure_years", "source")
+
+    def __init__(self, policy_type: PolicyType, frequency: float, mu: float, sigma: float,
+                 claims: int = 0, exposure_years: float = 0.0, source: str = "default"):
+        self.policy_type = policy_type
+        self.frequency = frequency
+        self.mu = mu
+        self.sigma = sigma
+        self.claims = claims
+        self.exposure_years = exposure_years
+        self.source = source
+
+    def expected_severity_share(self) -> float:
+        """Mean of the uncapped severity share, exp(mu + sigma^2 / 2)"""
+        return math.exp(self.mu + self.sigma ** 2 / 2)
+
+
+class LossModel:
+    """Frequency/severity models per PolicyType fitted from the claims history"""
+
+    MIN_CLAIMS = 5                  # Claims a type needs for its own fit; fewer falls back to the pooled fit
+    DEFAULT_FREQUENCY = 0.05        # Claims per policy-year with no usable history
+    DEFAULT_MU = math.log(0.05)     # Median claim of 5% of coverage
+    DEFAULT_SIGMA = 1.0
+
+    def __init__(self, models: Dict[PolicyType, FrequencySeverity]):
+        self.models = models
+
+    @staticmethod
+    def _fit(claims: int, exposure: float, log_shares: np.ndarray) -> Optional[Tuple[float, float, float]]:
+        if claims < LossModel.MIN_CLAIMS or exposure <= 0 or len(log_shares) < LossModel.MIN_CLAIMS:
+            return None
+        return claims / exposure, float(log_shares.mean()), float(max(log_shares.std(), 1e-6))
+
+    @classmethod
+    def fit(cls, book: PolicyBook, claims: Dict[str, Dict]) -> 'LossModel':
+        """Fit every type from claims joined to the book by policy ID; rejected claims are ignored"""
+        terms = book.term_months()
+        exposure = np.where(terms > 0, terms, 12) / 12.0   # Policy-years, one year when the term is unknown
+        row_of = {policy_id: row for row, policy_id in enumerate(book.policy_ids)}
+        counts = dict.fromkeys(PolicyType, 0)
+        shares: Dict[PolicyType, List[float]] = {policy_type: [] for policy_type in PolicyType}
+        for claim in claims.values():
+            row = row_of.get(claim.get("policy_id"))
+            if row is None or claim.get("status") == ClaimStatus.REJECTED.value:
+                continue
+            policy_type = PolicyType(int(book.type_code[row]))
+            counts[policy_type] += 1
+            amount, coverage = float(claim.get("amount") or 0.0), float(book.coverage[row])
+            if amount > 0 and coverage > 0:
+                shares[policy_type].append(math.log(min(amount / coverage, 1.0)))
+
+        exposure_by_type = {policy_type: float(exposure[book.type_code == policy_type.value].sum())
+                            for policy_type in PolicyType}
+        pooled = cls._fit(sum(counts.values()), sum(exposure_by_type.values()),
+                          np.array([share for values in shares.values() for share in values]))
+        models = {}
+        for policy_type in PolicyType:
+            fitted = cls._fit(counts[policy_type], exposure_by_type[policy_type], np.array(shares[policy_type]))
+            source = "type" if fitted else "pooled" if pooled else "default"
+            frequency, mu, sigma = fitted or pooled or (cls.DEFAULT_FREQUENCY, cls.DEFAULT_MU, cls.DEFAULT_SIGMA)
+            models[policy_type] = FrequencySeverity(policy_type, frequency, mu, sigma, counts[policy_type],
+                                                    exposure_by_type[policy_type], source)
+        return cls(models)
+
+    @classmethod
+    def from_storage(cls, book: Optional[PolicyBook] = None) -> 'LossModel':
+        return cls.fit(book if book is not None else PolicyBook.from_storage(), ClaimsStorageService.load_all_claims())
+
+
+def _init_worker(segments: List[Segment]):
+    """Keep the portfolio in each worker process so blocks only carry their seeds"""
+    global _worker_segments
+    _worker_segments = segments
+
+
+def simulate_block(seed: np.random.SeedSequence, trials: int,
+                   segments: Optional[List[Segment]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Annual losses for a block of trials: (trials x PolicyType aggregate loss, largest single claim per trial).
+    A type's claim count per trial is Poisson(frequency * policies); each claim hits a
+    uniformly drawn policy, so the work grows with the number of claims, not policies x trials.
+    """
+    if segments is None:
+        segments = _worker_segments
+    rng = np.random.default_rng(seed)
+    by_type = np.zeros((trials, len(PolicyType)))
+    largest = np.zeros(trials)
+    for type_index, frequency, mu, sigma, coverage in segments:
+        counts = rng.poisson(frequency * len(coverage), size=trials)
+        total = int(counts.sum())
+        if not total:
+            continue
+        trial = np.repeat(np.arange(trials), counts)
+        policy = rng.integers(0, len(coverage), size=total)
+        losses = coverage[policy] * np.minimum(rng.lognormal(mu, sigma, size=total), 1.0)
+        by_type[:, type_index] = np.bincount(trial, weights=losses, minlength=trials)
+        hit = counts > 0    # Claims are grouped by trial, so each trial's largest is one reduceat segment
+        starts = np.cumsum(counts) - counts
+        largest[hit] = np.maximum(largest[hit], np.maximum.reduceat(losses, starts[hit]))
+    return by_type, largest
+
+
+class SimulationResult:
+    """Simulated annual losses: by_type is trials x PolicyType, largest the biggest single claim per trial"""
+
+    VAR_LEVELS = (0.95, 0.99, 0.995)
+    RETURN_PERIODS = (100, 250)
+
+    def __init__(self, by_type: np.ndarray, largest: np.ndarray, seconds: float = 0.0):
+        self.by_type = by_type
+        self.largest = largest
+        self.aggregate = by_type.sum(axis=1)
+        self.seconds = seconds
+
+    def __len__(self) -> int:
+        return len(self.aggregate)
+
+    def var(self, level: float, losses: Optional[np.ndarray] = None) -> float:
+        """Value at risk: the level quantile of annual aggregate loss"""
+        losses = self.aggregate if losses is None else losses
+        return float(np.quantile(losses, level, method="higher"))
+
+    def tvar(self, level: float, losses: Optional[np.ndarray] = None) -> float:
+        """Tail value at risk: mean annual loss in the trials at or above the VaR"""
+        losses = self.aggregate if losses is None else losses
+        return float(losses[losses >= self.var(level, losses)].mean())
+
+    def pml(self, return_period: float, occurrence: bool = True) -> float:
+        """Probable maximum loss for a 1-in-return_period year, from the largest claim (or the aggregate)"""
+        return self.var(1 - 1 / return_period, self.largest if occurrence else self.aggregate)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "trials": len(self),
+            "mean": float(self.aggregate.mean()),
+            "std": float(self.aggregate.std()),
+            "var": {level: self.var(level) for level in SimulationResult.VAR_LEVELS},
+            "tvar": {level: self.tvar(level) for level in SimulationResult.VAR_LEVELS},
+            "pml": {period: self.pml(period) for period in SimulationResult.RETURN_PERIODS},
+            "aggregate_pml": {period: self.pml(period, occurrence=False) for period in SimulationResult.RETURN_PERIODS},
+            "mean_by_type": {t.name: float(self.by_type[:, i].mean()) for i, t in enumerate(PolicyType)},
+            "var_99_by_type": {t.name: self.var(0.99, self.by_type[:, i]) for i, t in enumerate(PolicyType)},
+        }
+
+    def print_report(self):
+        summary = self.summary()
+        print(f"\n=== Annual Loss Simulation ({summary['trials']:,} trials, {self.seconds:.1f}s) ===")
+        print(f"Expected loss: ${summary['mean']:,.2f} (std ${summary['std']:,.2f})")
+        for level in SimulationResult.VAR_LEVELS:
+            print(f"VaR {level:.1%}: ${summary['var'][level]:,.2f}   TVaR {level:.1%}: ${summary['tvar'][level]:,.2f}")
+        for period in SimulationResult.RETURN_PERIODS:
+            print(f"PML 1-in-{period}: ${summary['pml'][period]:,.2f} single claim, "
+                  f"${summary['aggregate_pml'][period]:,.2f} aggregate")
+        for name, mean in summary["mean_by_type"].items():
+            print(f"  {name}: expected ${mean:,.2f}, VaR 99% ${summary['var_99_by_type'][name]:,.2f}")
+
+
+class LossSimulation:
+    """
+    Monte Carlo annual aggregate loss of a policy book under a LossModel.
+
+    Trials run in blocks sized so that a block draws about MAX_CLAIMS_PER_BLOCK
+    claims, which bounds memory whatever the book size and trial count; only the
+    per-trial totals are kept. Each block gets its own child of the seed's
+    SeedSequence, so for a fixed seed the result does not depend on how many
+    worker processes (if any) the blocks are spread over.
+    """
+
+    DEFAULT_TRIALS = 10000
+    MAX_CLAIMS_PER_BLOCK = 1000000
+
+    def __init__(self, book: PolicyBook, model: LossModel, trials: int = DEFAULT_TRIALS,
+                 seed: Optional[int] = 0, workers: int = 1):
+        insured = book.coverage > 0
+        self.segments: List[Segment] = []
+        for type_index, policy_type in enumerate(PolicyType):
+            coverage = book.coverage[insured & (book.type_code == policy_type.value)]
+            fitted = model.models[policy_type]
+            if len(coverage) and fitted.frequency > 0:
+                self.segments.append((type_index, fitted.frequency, fitted.mu, fitted.sigma, coverage))
+        self.trials = trials
+        self.seed = seed
+        self.workers = workers
+
+    def blocks(self) -> List[Tuple[np.random.SeedSequence, int]]:
+        """(seed, trials) per block of trials"""
+        claims_per_trial = sum(frequency * len(coverage) for _, frequency, _, _, coverage in self.segments)
+        block = max(1, min(self.trials, int(LossSimulation.MAX_CLAIMS_PER_BLOCK / max(claims_per_trial, 1.0))))
+        sizes = [min(block, self.trials - first) for first in range(0, self.trials, block)]
+        return list(zip(np.random.SeedSequence(self.seed).spawn(len(sizes)), sizes))
+
+    def run(self) -> SimulationResult:
+        started = time.perf_counter()
+        by_type = np.zeros((self.trials, len(PolicyType)))
+        largest = np.zeros(self.trials)
+        blocks = self.blocks()
+        if self.workers > 1:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(self.segments,)) as pool:
+                results = pool.map(simulate_block, *zip(*blocks))
+                self._collect(results, blocks, by_type, largest)
+        else:
+            results = (simulate_block(seed, trials, self.segments) for seed, trials in blocks)
+            self._collect(results, blocks, by_type, largest)
+        return SimulationResult(by_type, largest, time.perf_counter() - started)
+
+    @staticmethod
+    def _collect(results, blocks, by_type: np.ndarray, largest: np.ndarray):
+        first = 0
+        for (block_by_type, block_largest), (_, trials) in zip(results, blocks):
+            by_type[first:first + trials] = block_by_type
+            largest[first:first + trials] = block_largest
+            first += trials
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo annual loss of the stored policy book")
+    parser.add_argument("--trials", type=int, default=LossSimulation.DEFAULT_TRIALS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (1 runs in this process)")
+    parser.add_argument("--status", choices=[status.name for status in PolicyStatus],
+                        help="Only simulate policies with this status")
+    args = parser.parse_args()
+
+    book = PolicyBook.from_storage()
+    model = LossModel.from_storage(book)
+    if args.status:
+        book = book.where(status=PolicyStatus[args.status])
+    print(f"Simulating {len(book):,} policies")
+    for fitted in model.models.values():
+        print(f"  {fitted.policy_type.name}: {fitted.frequency:.4f} claims/policy-year, severity share "
+              f"{fitted.expected_severity_share():.2%} of coverage ({fitted.source}, {fitted.claims} claims)")
+    LossSimulation(book, model, args.trials, args.seed, args.workers).run().print_report()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 # payment.py
+import sys
 from datetime import date
 from typing import Dict
 
 class Payment:
+    __slots__ = ("payment_id", "policy_id", "amount", "payment_date", "payment_status",
+                 "payment_method", "transaction_id")
+
     def __init__(self, payment_id: str, policy_id: str):
         self.payment_id: str = payment_id
         self.policy_id: str = policy_id
@@ -33,7 +37,7 @@ class Payment:
     def set_status(self, status: str) -> bool:
         valid_statuses = ["PENDING", "COMPLETED", "FAILED"]
         if status in valid_statuses:
-            self.payment_status = status
+            self.payment_status = sys.intern(status)
             return True
         return False
 
@@ -82,6 +86,27 @@ class Payment:
             self.transaction_id
         ])
 
+    def to_dict(self) -> Dict:
+        return {
+            "payment_id": self.payment_id,
+            "policy_id": self.policy_id,
+            "amount": self.amount,
+            "payment_date": self.payment_date.isoformat(),
+            "payment_status": self.payment_status,
+            "payment_method": self.payment_method,
+            "transaction_id": self.transaction_id
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Payment':
+        payment = cls(data["payment_id"], data.get("policy_id", ""))
+        payment.amount = float(data.get("amount", 0.0) or 0.0)
+        payment.payment_date = date.fromisoformat(str(data.get("payment_date") or date.today().isoformat())[:10])
+        payment.payment_status = sys.intern(data.get("payment_status", "PENDING"))
+        payment.payment_method = data.get("payment_method", "")
+        payment.transaction_id = data.get("transaction_id", "")
+        return payment
+
     def get_transaction_details(self) -> Dict:
         return {
             "transaction_id": self.transaction_id,
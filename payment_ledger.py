@@ -0,0 +1,263 @@
+# payment_ledger.py
+import bisect
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from file_lock import FileLock
+
+
+class PaymentLedger:
+    """
+    Append-only journal of payment state changes with in-memory indexes.
+
+    Every change (created, updated, processed, refunded, ...) is one JSON line
+    holding the payment's full state afterwards. Replaying the journal builds a
+    payment ID -> payment map for O(1) lookups plus secondary indexes by policy
+    ID, status and payment date; each change moves the payment between index
+    entries. A checkpoint of the state and its journal offset is written every
+    CHECKPOINT_EVERY records, so startup loads the checkpoint and replays only
+    the records after it. Writers hold a lock file and apply what other
+    processes appended before adding their own records, all in one write.
+    """
+
+    CHECKPOINT_EVERY = 1000       # Journal records between checkpoints
+    LOCK_TIMEOUT = 10             # Seconds to wait for another process's lock
+    LOCK_STALE_SECONDS = 30       # A lock file older than this is considered abandoned
+
+    def __init__(self, journal_path: str, checkpoint_path: Optional[str] = None):
+        self.journal_path = journal_path
+        self.checkpoint_path = checkpoint_path or os.path.splitext(journal_path)[0] + "_checkpoint.json"
+        self.lock_path = journal_path + ".lock"
+        self._file_lock = FileLock(self.lock_path, "payment ledger", PaymentLedger.LOCK_TIMEOUT,
+                                   PaymentLedger.LOCK_STALE_SECONDS)
+        self._lock = threading.RLock()
+        self._reset()
+        self._load_checkpoint()
+
+    def _reset(self):
+        self._payments: Dict[str, Dict[str, Any]] = {}
+        self._by_policy: Dict[str, Set[str]] = {}
+        self._by_status: Dict[str, Set[str]] = {}
+        self._by_date: Dict[str, Set[str]] = {}
+        self._dates: Optional[List[str]] = None     # Sorted date keys, rebuilt when a new date appears
+        self._journal_id: Optional[Tuple[int, int]] = None
+        self._end = 0
+        self._since_checkpoint = 0
+
+    # ------------------------------------------------------------------
+    # Indexes
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _keys(payment: Dict[str, Any]) -> Tuple[str, str, str]:
+        return (str(payment.get("policy_id", "")), str(payment.get("payment_status", "")),
+                str(payment.get("payment_date") or "")[:10])
+
+    def _index(self, payment_id: str, payment: Dict[str, Any]):
+        policy_id, status, day = self._keys(payment)
+        self._by_policy.setdefault(policy_id, set()).add(payment_id)
+        self._by_status.setdefault(status, set()).add(payment_id)
+        if day not in self._by_date:
+            self._dates = None
+        self._by_date.setdefault(day, set()).add(payment_id)
+
+    def _unindex(self, payment_id: str, payment: Dict[str, Any]):
+        for index, key in zip((self._by_policy, self._by_status, self._by_date), self._keys(payment)):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(payment_id)
+                if not ids:
+                    del index[key]
+                    if index is self._by_date:
+                        self._dates = None
+
+    def _apply(self, record: Dict[str, Any]):
+        payment = record["payment"]
+        payment_id = payment["payment_id"]
+        previous = self._payments.get(payment_id)
+        if previous is not None:
+            self._unindex(payment_id, previous)
+        self._payments[payment_id] = payment
+        self._index(payment_id, payment)
+
+    # ------------------------------------------------------------------
+    # Journal, checkpoints and locking
+    # ------------------------------------------------------------------
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                checkpoint = json.load(f)
+            stat = os.stat(self.journal_path)
+            if [stat.st_dev, stat.st_ino] != checkpoint["journal_id"] or checkpoint["offset"] > stat.st_size:
+                return  # Checkpoint of another journal
+            for payment_id, payment in checkpoint["payments"].items():
+                self._payments[payment_id] = payment
+                self._index(payment_id, payment)
+            self._journal_id = tuple(checkpoint["journal_id"])
+            self._end = checkpoint["offset"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self._reset()
+
+    def checkpoint(self):
+        """Write the current state and journal offset so the next startup replays only newer records"""
+        with self._lock:
+            if self._journal_id is None:
+                return
+            checkpoint = {"journal_id": list(self._journal_id), "offset": self._end, "payments": self._payments}
+            tmp_path = self.checkpoint_path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(checkpoint, f)
+            os.replace(tmp_path, self.checkpoint_path)
+            self._since_checkpoint = 0
+
+    def _refresh(self):
+        """Apply records appended by any process since the last refresh"""
+        try:
+            stat = os.stat(self.journal_path)
+        except FileNotFoundError:
+            if self._journal_id is not None:
+                self._reset()
+            return
+        journal_id = (stat.st_dev, stat.st_ino)
+        if journal_id != self._journal_id or stat.st_size < self._end:
+            self._reset()  # A different journal - rebuild from its start
+            self._journal_id = journal_id
+        if stat.st_size > self._end:
+            with open(self.journal_path, 'rb') as f:
+                f.seek(self._end)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Torn write at the tail
+                    self._end += len(line)
+                    try:
+                        self._apply(json.loads(line))
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    self._since_checkpoint += 1
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._lock:
+            self._file_lock.acquire()
+            try:
+                self._refresh()
+                yield
+            finally:
+                self._file_lock.release()
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    def record(self, payments: List[Dict[str, Any]], event: Optional[str] = None) -> List[str]:
+        """
+        Append the new state of each payment in one write. event names the change
+        (processed, refunded, ...); by default payments not yet in the ledger are
+        "created" and the rest "updated". Returns the payment IDs recorded.
+        """
+        if not payments:
+            return []
+        with self._locked():
+            self._append(payments, event)
+        return [payment["payment_id"] for payment in payments]
+
+    def create(self, payments: List[Dict[str, Any]]) -> List[str]:
+        """Record payments whose IDs are not in the ledger yet, in one write; returns the IDs created"""
+        with self._locked():
+            new = [payment for payment in payments if payment["payment_id"] not in self._payments]
+            if new:
+                self._append(new, "created")
+        return [payment["payment_id"] for payment in new]
+
+    def _append(self, payments: List[Dict[str, Any]], event: Optional[str]):
+        """Write one record per payment and apply them (caller holds the locks)"""
+        at = datetime.now().isoformat()
+        lines = []
+        for payment in payments:
+            change = event or ("updated" if payment["payment_id"] in self._payments else "created")
+            lines.append(json.dumps({"event": change, "at": at, "payment": payment}, default=str) + "\n")
+        data = "".join(lines)
+        with open(self.journal_path, 'ab') as f:
+            if f.tell() > 0:
+                with open(self.journal_path, 'rb') as check:
+                    check.seek(-1, os.SEEK_END)
+                    if check.read(1) != b"\n":
+                        data = "\n" + data  # Terminate a torn tail left by a crashed writer
+            f.write(data.encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        self._refresh()
+        if self._since_checkpoint >= PaymentLedger.CHECKPOINT_EVERY:
+            self.checkpoint()
+
+    def import_if_empty(self, payments: List[Dict[str, Any]]) -> bool:
+        """Record payments kept elsewhere (e.g. the old payments file) as the ledger's first records"""
+        with self._locked():
+            if self._journal_id is not None or not payments:
+                return False
+            self._append(payments, "imported")
+            return True
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    def _select(self, ids) -> Dict[str, Dict[str, Any]]:
+        return {payment_id: dict(self._payments[payment_id]) for payment_id in sorted(ids)}
+
+    def get(self, payment_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            payment = self._payments.get(payment_id)
+            return dict(payment) if payment is not None else None
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            return self._select(self._payments)
+
+    def by_status(self, status: str) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            return self._select(self._by_status.get(status, ()))
+
+    def by_policy(self, policy_id: str) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            return self._select(self._by_policy.get(policy_id, ()))
+
+    def by_date(self, start: str, end: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Payments dated from start to end inclusive (YYYY-MM-DD; end defaults to start)"""
+        end = end or start
+        with self._lock:
+            self._refresh()
+            if self._dates is None:
+                self._dates = sorted(self._by_date)
+            first = bisect.bisect_left(self._dates, start[:10])
+            last = bisect.bisect_right(self._dates, end[:10])
+            ids = set()
+            for day in self._dates[first:last]:
+                ids |= self._by_date[day]
+            return self._select(ids)
+
+    def history(self, payment_id: str) -> List[Dict[str, Any]]:
+        """Every recorded change of one payment, oldest first (reads the whole journal)"""
+        return [record for record in PaymentLedger.iter_journal(self.journal_path)
+                if record.get("payment", {}).get("payment_id") == payment_id]
+
+    @staticmethod
+    def iter_journal(journal_path: str) -> Iterator[Dict[str, Any]]:
+        """Yield every complete journal record in order, one line at a time"""
+        try:
+            with open(journal_path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Torn write at the tail
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(record, dict) and isinstance(record.get("payment"), dict):
+                        yield record
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,219 @@
+# payment_processor.py
+import argparse
+import hashlib
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from payment import Payment
+from payment_storage_service import PaymentStorageService
+
+
+class GatewayError(Exception):
+    """A gateway call that did not charge the payment; retryable errors may succeed on a later attempt"""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class PaymentGateway(ABC):
+    @abstractmethod
+    def charge(self, payment: Dict, idempotency_key: str) -> str:
+        """
+        Charge a payment and return the gateway's transaction ID, or raise GatewayError.
+        A repeated idempotency key must return the first charge's transaction ID
+        instead of charging again.
+        """
+        pass
+
+
+class SimulatedGateway(PaymentGateway):
+    """
+    Local stand-in for a payment provider. Every call waits `latency` seconds.
+    With probability failure_rate the call fails with a retryable error, half of
+    the time after the charge went through (a lost response); with probability
+    decline_rate a new charge is declined for good.
+    """
+
+    def __init__(self, latency: float = 0.05, failure_rate: float = 0.0, decline_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.decline_rate = decline_rate
+        self.transactions: Dict[str, str] = {}   # Idempotency key -> transaction ID
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def charge(self, payment: Dict, idempotency_key: str) -> str:
+        with self._lock:
+            self.calls += 1
+            fails, after_charge, declined = (self._random.random() < self.failure_rate,
+                                             self._random.random() < 0.5,
+                                             self._random.random() < self.decline_rate)
+        if self.latency:
+            time.sleep(self.latency)
+        if fails and not after_charge:
+            raise GatewayError("Gateway timeout")
+        with self._lock:
+            transaction_id = self.transactions.get(idempotency_key)
+            if transaction_id is None:
+                if declined:
+                    raise GatewayError("Payment declined", retryable=False)
+                transaction_id = f"TXN_{len(self.transactions) + 1:08d}"
+                self.transactions[idempotency_key] = transaction_id
+        if fails:
+            raise GatewayError("Connection lost after charge")
+        return transaction_id
+
+
+class ProcessingReport:
+    """Outcome and throughput of one payment processing run"""
+
+    __slots__ = ("selected", "completed", "declined", "retry_exhausted", "invalid", "attempts",
+                 "total_charged", "seconds")
+
+    def __init__(self):
+        self.selected = 0
+        self.completed = 0
+        self.declined: List[str] = []          # Marked FAILED
+        self.retry_exhausted: List[str] = []   # Left PENDING for the next run
+        self.invalid: List[str] = []           # No positive amount or no payment method
+        self.attempts = 0
+        self.total_charged = 0.0
+        self.seconds = 0.0
+
+    def payments_per_minute(self) -> float:
+        return self.selected * 60 / self.seconds if self.seconds > 0 else 0.0
+
+    def print_report(self):
+        print("\n=== Payment Processing Run ===")
+        print(f"Pending payments selected: {self.selected:,}")
+        print(f"Completed: {self.completed:,} (${self.total_charged:,.2f})")
+        if self.declined:
+            print(f"Declined: {len(self.declined):,}")
+        if self.retry_exhausted:
+            print(f"Still pending after retries: {len(self.retry_exhausted):,}")
+        if self.invalid:
+            print(f"Not processable (amount or method missing): {len(self.invalid):,}")
+        print(f"Gateway attempts: {self.attempts:,}")
+        print(f"Throughput: {self.payments_per_minute():,.0f} payments/min over {self.seconds:.2f}s")
+
+
+class PaymentProcessor:
+    """
+    Charges pending payments through a gateway on a bounded thread pool.
+
+    Gateway calls wait on the network, so threads overlap their latency. Each
+    payment is charged under an idempotency key derived from its ID, policy and
+    amount, so retries - in this run after a timeout, or in a later run after a
+    crash before the result was stored - return the original charge instead of
+    charging twice. Retryable errors back off exponentially with jitter; payments
+    still failing stay PENDING, declined ones become FAILED. Results are stored
+    a chunk at a time in one ledger write.
+    """
+
+    DEFAULT_WORKERS = 16
+    DEFAULT_CHUNK_SIZE = 500
+    MAX_ATTEMPTS = 4
+    BACKOFF_BASE = 0.1     # Seconds before the first retry; doubles on each attempt
+    BACKOFF_CAP = 5.0
+
+    def __init__(self, gateway: Optional[PaymentGateway] = None, max_workers: Optional[int] = None,
+                 chunk_size: Optional[int] = None, max_attempts: Optional[int] = None,
+                 backoff_base: Optional[float] = None):
+        self.gateway = gateway if gateway is not None else SimulatedGateway()
+        self.max_workers = max(1, max_workers or PaymentProcessor.DEFAULT_WORKERS)
+        self.chunk_size = max(1, chunk_size or PaymentProcessor.DEFAULT_CHUNK_SIZE)
+        self.max_attempts = max(1, max_attempts or PaymentProcessor.MAX_ATTEMPTS)
+        self.backoff_base = PaymentProcessor.BACKOFF_BASE if backoff_base is None else backoff_base
+
+    @staticmethod
+    def idempotency_key(payment: Dict) -> str:
+        cents = round(float(payment.get("amount") or 0.0) * 100)
+        data = f"{payment['payment_id']}|{payment.get('policy_id', '')}|{cents}"
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()[:32]
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(PaymentProcessor.BACKOFF_CAP, self.backoff_base * 2 ** attempt))
+
+    def _charge(self, payment: Dict) -> Tuple[Dict, Optional[str], int]:
+        """Charge one payment with retries; returns (payment, outcome, attempts), outcome None once retries run out"""
+        key = PaymentProcessor.idempotency_key(payment)
+        for attempt in range(self.max_attempts):
+            try:
+                transaction_id = self.gateway.charge(payment, key)
+            except GatewayError as e:
+                if not e.retryable:
+                    return payment, "declined", attempt + 1
+                if attempt + 1 < self.max_attempts:
+                    time.sleep(self._backoff(attempt))
+                continue
+            processed = Payment.from_dict(payment)
+            processed.set_status("COMPLETED")
+            processed.transaction_id = transaction_id
+            return processed.to_dict(), "completed", attempt + 1
+        return payment, None, self.max_attempts
+
+    def run(self, payments: Optional[Dict[str, Dict]] = None) -> ProcessingReport:
+        """Process the given pending payments (all stored PENDING payments by default)"""
+        started = time.perf_counter()
+        report = ProcessingReport()
+        if payments is None:
+            payments = PaymentStorageService.load_payments("PENDING")
+        report.selected = len(payments)
+        processable = []
+        for payment_id in sorted(payments):
+            payment = payments[payment_id]
+            if float(payment.get("amount") or 0.0) > 0 and payment.get("payment_method"):
+                processable.append(payment)
+            else:
+                report.invalid.append(payment_id)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for start in range(0, len(processable), self.chunk_size):
+                results = list(executor.map(self._charge, processable[start:start + self.chunk_size]))
+                self._store(results, report)
+        report.seconds = time.perf_counter() - started
+        return report
+
+    @staticmethod
+    def _store(results: List[Tuple[Dict, Optional[str], int]], report: ProcessingReport):
+        completed, declined = [], []
+        for payment, outcome, attempts in results:
+            report.attempts += attempts
+            if outcome == "completed":
+                completed.append(payment)
+            elif outcome == "declined":
+                declined.append(dict(payment, payment_status="FAILED"))
+            else:
+                report.retry_exhausted.append(payment["payment_id"])
+        # Charges that cannot be stored stay PENDING; their keys make the next run reuse them
+        if completed and PaymentStorageService.save_payments(completed, "processed"):
+            report.completed += len(completed)
+            report.total_charged += sum(payment["amount"] for payment in completed)
+        elif completed:
+            report.retry_exhausted.extend(payment["payment_id"] for payment in completed)
+        if declined and PaymentStorageService.save_payments(declined, "declined"):
+            report.declined.extend(payment["payment_id"] for payment in declined)
+        elif declined:
+            report.retry_exhausted.extend(payment["payment_id"] for payment in declined)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Charge every pending payment through the payment gateway")
+    parser.add_argument("--workers", type=int, default=PaymentProcessor.DEFAULT_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=PaymentProcessor.DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated gateway latency in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Simulated transient failure rate")
+    parser.add_argument("--decline-rate", type=float, default=0.0, help="Simulated decline rate")
+    args = parser.parse_args()
+    gateway = SimulatedGateway(args.latency, args.failure_rate, args.decline_rate)
+    PaymentProcessor(gateway, max_workers=args.workers, chunk_size=args.chunk_size).run().print_report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# payment_storage_service.py
+import json
+import os
+from typing import Dict, List, Optional
+from sqlite_storage import SQLiteStorage
+from payment_ledger import PaymentLedger
+
+
+class PaymentStorageService:
+    """Service to handle payment storage and retrieval"""
+    LEDGER_FILE = os.path.join("data", "payment_ledger.jsonl")
+    PAYMENTS_FILE = os.path.join("data", "payments.json")  # Older single-file store, imported into the ledger
+    BACKEND: Optional[SQLiteStorage] = None  # Explicit backend; falls back to SQLiteStorage.shared()
+    _ledger: Optional[PaymentLedger] = None
+
+    @staticmethod
+    def get_backend() -> Optional[SQLiteStorage]:
+        """Get the configured SQLite backend, or None to use the payment ledger"""
+        return PaymentStorageService.BACKEND or SQLiteStorage.shared()
+
+    @staticmethod
+    def get_ledger() -> PaymentLedger:
+        """Get the payment ledger for LEDGER_FILE, importing PAYMENTS_FILE on first use"""
+        ledger = PaymentStorageService._ledger
+        if ledger is None or ledger.journal_path != PaymentStorageService.LEDGER_FILE:
+            ledger = PaymentLedger(PaymentStorageService.LEDGER_FILE)
+            if not os.path.exists(ledger.journal_path) and os.path.exists(PaymentStorageService.PAYMENTS_FILE):
+                with open(PaymentStorageService.PAYMENTS_FILE, 'r') as f:
+                    ledger.import_if_empty(list(json.load(f).values()))
+            PaymentStorageService._ledger = ledger
+        return ledger
+
+    @staticmethod
+    def save_payments(payments: List[Dict], event: Optional[str] = None) -> bool:
+        """
+        Store payments all together: either every payment is stored or none is.
+        event names the change for the ledger (created, processed, refunded, ...).
+        """
+        try:
+            backend = PaymentStorageService.get_backend()
+            if backend:
+                return backend.save_payments(payments)
+            PaymentStorageService.get_ledger().record(payments, event)
+            return True
+        except Exception as e:
+            print(f"Error saving payments: {str(e)}")
+            return False
+
+    @staticmethod
+    def create_payments(payments: List[Dict]) -> Optional[List[str]]:
+        """
+        Store new payments all together, leaving any payment ID already stored as
+        it is. Returns the payment IDs created, or None if they could not be stored.
+        """
+        try:
+            backend = PaymentStorageService.get_backend()
+            if backend:
+                return backend.create_payments(payments)
+            return PaymentStorageService.get_ledger().create(payments)
+        except Exception as e:
+            print(f"Error saving payments: {str(e)}")
+            return None
+
+    @staticmethod
+    def save_payment(payment: Dict, event: Optional[str] = None) -> bool:
+        """Store one payment's new state"""
+        return PaymentStorageService.save_payments([payment], event)
+
+    @staticmethod
+    def load_payments(status: Optional[str] = None, policy_id: Optional[str] = None) -> Dict[str, Dict]:
+        """Load payments keyed by payment ID, optionally only those with a given status and/or policy"""
+        try:
+            backend = PaymentStorageService.get_backend()
+            if backend:
+                return backend.load_payments(status, policy_id=policy_id)
+            ledger = PaymentStorageService.get_ledger()
+            if policy_id is not None:
+                payments = ledger.by_policy(policy_id)
+                if status is not None:
+                    payments = {payment_id: payment for payment_id, payment in payments.items()
+                                if payment.get("payment_status") == status}
+                return payments
+            return ledger.by_status(status) if status is not None else ledger.all()
+        except Exception as e:
+            print(f"Error loading payments: {str(e)}")
+            return {}
+
+    @staticmethod
+    def load_payments_by_date(start: str, end: Optional[str] = None) -> Dict[str, Dict]:
+        """Load payments dated from start to end inclusive (YYYY-MM-DD)"""
+        try:
+            backend = PaymentStorageService.get_backend()
+            if backend:
+                return backend.load_payments(start_date=start, end_date=end or start)
+            return PaymentStorageService.get_ledger().by_date(start, end)
+        except Exception as e:
+            print(f"Error loading payments: {str(e)}")
+            return {}
+
+    @staticmethod
+    def load_payment(payment_id: str) -> Optional[Dict]:
+        """Load a single payment by ID"""
+        try:
+            backend = PaymentStorageService.get_backend()
+            if backend:
+                return backend.load_payment(payment_id)
+            return PaymentStorageService.get_ledger().get(payment_id)
+        except Exception as e:
+            print(f"Error loading payment: {str(e)}")
+            return None
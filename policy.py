@@ -1,26 +1,27 @@
 # policy.py
+import sys
 from datetime import datetime
 from typing import List, Dict, Optional
 from policy_enums import PolicyType, PolicyStatus
 from policy_calculator import PolicyCalculator
-from typing import Dict, Optional
-from policy_enums import PolicyType, PolicyStatus
 
 class Policy:
+    # Slotted to keep large in-memory policy books compact
+    __slots__ = ("policy_id", "customer_id", "policy_type", "coverage_amount", "premium",
+                 "_status", "start_date", "end_date", "conditions", "rate_table_version")
+
     def __init__(self, policy_id: str, customer_id: str, policy_type: PolicyType):
-        self.policy_id = policy_id
-        self.customer_id = customer_id
-        self.policy_type = policy_type
         self.policy_id: str = policy_id
-        self.customer_id: str = customer_id
+        # Customer emails repeat across many policies; share one string object
+        self.customer_id: str = sys.intern(customer_id) if isinstance(customer_id, str) else customer_id
         self.policy_type: PolicyType = policy_type
         self.coverage_amount: float = 0.0
         self.premium: float = 0.0
-        self.status: PolicyStatus = PolicyStatus.PENDING
+        self._status: PolicyStatus = PolicyStatus.PENDING
         self.start_date: Optional[datetime] = None
         self.end_date: Optional[datetime] = None
         self.conditions: List[str] = []
-        
+        self.rate_table_version: Optional[int] = None  # Rate tables the premium was quoted with
 
     def get_policy_id(self) -> str:
         return self.policy_id
@@ -31,9 +32,6 @@ class Policy:
     def get_policy_type(self) -> PolicyType:
         return self.policy_type
 
-    def get_status(self) -> PolicyStatus:
-        return self.status
-
     def get_coverage_amount(self) -> float:
         return self.coverage_amount
 
@@ -54,6 +52,10 @@ class Policy:
             return True
         return False
 
+    def set_rate_table_version(self, version: Optional[int]):
+        """Record which rate table version the premium was quoted with"""
+        self.rate_table_version = version
+
     def set_dates(self, start_date: datetime, end_date: datetime) -> bool:
         """Set policy start and end dates with validation"""
         if start_date and end_date and end_date > start_date:
@@ -95,21 +97,13 @@ class Policy:
         """
         return self._status
 
-    def to_dict(self) -> dict:
-        """Convert policy to dictionary for JSON serialization"""
-        return {
-            "policy_id": self.policy_id,
-            "customer_id": self.customer_id,
-            "policy_type": self.policy_type.name,
-            "coverage_amount": self.coverage_amount,
-            "premium": self.premium,
-            # Store status in consistent format
-            "status": f"PolicyStatus.{self._status.name}",
-            "start_date": self.start_date.isoformat() if self.start_date else None,
-            "end_date": self.end_date.isoformat() if self.end_date else None,
-            "conditions": self.conditions
-            # Add other policy-specific fields as needed
-        }
+    @property
+    def status(self) -> PolicyStatus:
+        return self._status
+
+    @status.setter
+    def status(self, new_status: PolicyStatus):
+        self.update_status(new_status)
 
     def add_condition(self, condition: str) -> bool:
         """Add policy condition"""
@@ -123,13 +117,14 @@ class Policy:
         if self.coverage_amount <= 0:
             return 0.0
             
-        premium = PolicyCalculator.calculate_premium(
+        premium, version = PolicyCalculator.quote_premium(
             self.policy_type,
             self.coverage_amount,
             PolicyCalculator.calculate_policy_term(self.start_date, self.end_date),
             risk_factors
         )
         self.premium = premium
+        self.rate_table_version = version
         return premium
 
     def get_policy_term(self) -> int:
@@ -160,12 +155,16 @@ class Policy:
             'policy_type': self.policy_type.name,  # Use .name instead of .value
             'coverage_amount': self.coverage_amount,
             'premium': self.premium,
-            "status": f"PolicyStatus.{self._status.name}",  # This will show "PolicyStatus.ACTIVE"            'start_date': self.start_date.isoformat() if self.start_date else None,
+            "status": f"PolicyStatus.{self._status.name}",  # This will show "PolicyStatus.ACTIVE"
+            'start_date': self.start_date.isoformat() if self.start_date else None,
             'end_date': self.end_date.isoformat() if self.end_date else None,
-            'conditions': self.conditions
+            'conditions': self.conditions,
+            'rate_table_version': self.rate_table_version
         }
 
 class LifePolicy(Policy):
+    __slots__ = ("beneficiary", "death_benefit")
+
     def __init__(self, policy_id: str, customer_id: str):
         super().__init__(policy_id, customer_id, PolicyType.LIFE)
         self.beneficiary: str = ""
@@ -192,6 +191,9 @@ class LifePolicy(Policy):
         return data
 
 class CarPolicy(Policy):
+    __slots__ = ("vehicle_id", "is_comprehensive", "vehicle_age", "vehicle_model",
+                 "vehicle_plate_number", "vehicle_condition")
+
     def __init__(self, policy_id: str, customer_id: str):
         super().__init__(policy_id, customer_id, PolicyType.CAR)
         self.vehicle_id: str = ""
@@ -225,6 +227,8 @@ class CarPolicy(Policy):
         return data
 
 class HealthPolicy(Policy):
+    __slots__ = ("deductible", "includes_dental")
+
     def __init__(self, policy_id: str, customer_id: str):
         super().__init__(policy_id, customer_id, PolicyType.HEALTH)  # Make sure to pass PolicyType.HEALTH
         self.deductible: float = 0.0
@@ -248,6 +252,8 @@ class HealthPolicy(Policy):
         return data
     
 class PropertyPolicy(Policy):
+    __slots__ = ("property_address", "property_type")
+
     def __init__(self, policy_id: str, customer_id: str):
         super().__init__(policy_id, customer_id, PolicyType.PROPERTY)
         self.property_address: str = ""
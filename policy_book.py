@@ -0,0 +1,198 @@
+# policy_book.py
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import numpy as np
+from policy import Policy
+from policy_enums import PolicyType, PolicyStatus
+from policy_codec import PolicyCodec
+from schema_migrations import parse_status
+from data_storage_service import DataStorageService
+
+_TYPE_CODES = {policy_type.name: policy_type.value for policy_type in PolicyType}
+_STATUS_CODES = {f"PolicyStatus.{status.name}": status.value for status in PolicyStatus}
+
+
+def _day(value) -> str:
+    """YYYY-MM-DD part of a stored date, or NaT when missing"""
+    return str(value)[:10] if value else "NaT"
+
+
+class PolicyBook:
+    """
+    Struct-of-arrays view of a policy portfolio.
+
+    Each policy is one row across typed NumPy columns: type and status codes
+    (PolicyType/PolicyStatus values), coverage, premium, start/end dates as
+    datetime64[D] and an index into the customer email list. The book is built
+    from stored records without creating Policy objects; to_policies() decodes
+    objects only for the rows asked for.
+    """
+
+    def __init__(self, policy_ids: np.ndarray, customers: List[str], customer_index: np.ndarray,
+                 type_code: np.ndarray, status_code: np.ndarray, coverage: np.ndarray,
+                 premium: np.ndarray, start: np.ndarray, end: np.ndarray, records: np.ndarray):
+        self.policy_ids = policy_ids
+        self.customers = customers
+        self.customer_index = customer_index
+        self.type_code = type_code
+        self.status_code = status_code
+        self.coverage = coverage
+        self.premium = premium
+        self.start = start
+        self.end = end
+        self._records = records  # Raw stored dictionaries, for on-demand decoding
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_records(cls, customers: Iterable[Tuple[str, Dict]]) -> 'PolicyBook':
+        """Build a book from (email, stored customer record) pairs"""
+        emails: List[str] = []
+        policy_ids, customer_index, type_code, status_code = [], [], [], []
+        coverage, premium, start, end, records = [], [], [], [], []
+        for email, record in customers:
+            policies = record.get("policies") if isinstance(record, dict) else None
+            if not policies:
+                continue
+            index = len(emails)
+            emails.append(email)
+            for policy_id, data in policies.items():
+                code = _TYPE_CODES.get(data.get("policy_type"))
+                if code is None:
+                    continue
+                status = data.get("status")
+                status_value = _STATUS_CODES.get(status)
+                if status_value is None:
+                    member = parse_status(status)
+                    status_value = member.value if member else PolicyStatus.PENDING.value
+                policy_ids.append(policy_id)
+                customer_index.append(index)
+                type_code.append(code)
+                status_code.append(status_value)
+                coverage.append(data.get("coverage_amount") or 0.0)
+                premium.append(data.get("premium") or 0.0)
+                start.append(_day(data.get("start_date")))
+                end.append(_day(data.get("end_date")))
+                records.append(data)
+
+        stored = np.empty(len(records), dtype=object)
+        stored[:] = records
+        return cls(
+            policy_ids=np.array(policy_ids, dtype=object),
+            customers=emails,
+            customer_index=np.array(customer_index, dtype=np.int32),
+            type_code=np.array(type_code, dtype=np.int8),
+            status_code=np.array(status_code, dtype=np.int8),
+            coverage=np.array(coverage, dtype=np.float64),
+            premium=np.array(premium, dtype=np.float64),
+            start=np.array(start, dtype="datetime64[D]"),
+            end=np.array(end, dtype="datetime64[D]"),
+            records=stored
+        )
+
+    @classmethod
+    def from_storage(cls) -> 'PolicyBook':
+        """Build a book from every stored customer, shard by shard"""
+        backend = DataStorageService.get_backend()
+        if backend:
+            return cls.from_records(backend.load_all_customers().items())
+        return cls.from_records(DataStorageService.get_store().iter_customers())
+
+    def __len__(self) -> int:
+        return len(self.policy_ids)
+
+    def term_months(self) -> np.ndarray:
+        """Policy term per row, as PolicyCalculator.calculate_policy_term (0 when dates are missing or reversed)"""
+        start_month = self.start.astype("datetime64[M]")
+        end_month = self.end.astype("datetime64[M]")
+        months = (end_month - start_month).astype(np.int64)
+        months -= (self.end - end_month) < (self.start - start_month)  # End day of month before start day
+        valid = ~np.isnat(self.start) & ~np.isnat(self.end) & (self.end > self.start)
+        return np.where(valid, np.maximum(months, 1), 0)
+
+    # ------------------------------------------------------------------
+    # Filters
+    # ------------------------------------------------------------------
+    def mask(self, policy_type: Optional[PolicyType] = None, status: Optional[PolicyStatus] = None,
+             customer: Optional[str] = None, active_on: Optional[Union[str, np.datetime64]] = None,
+             min_coverage: Optional[float] = None) -> np.ndarray:
+        """Boolean row mask combining the given conditions"""
+        selected = np.ones(len(self), dtype=bool)
+        if policy_type is not None:
+            selected &= self.type_code == policy_type.value
+        if status is not None:
+            selected &= self.status_code == status.value
+        if customer is not None:
+            try:
+                selected &= self.customer_index == self.customers.index(customer)
+            except ValueError:
+                selected[:] = False
+        if active_on is not None:
+            day = np.datetime64(active_on, "D")
+            selected &= (self.start <= day) & (day < self.end)
+        if min_coverage is not None:
+            selected &= self.coverage >= min_coverage
+        return selected
+
+    def select(self, rows: np.ndarray) -> 'PolicyBook':
+        """Sub-book for a boolean mask or an array of row numbers"""
+        return PolicyBook(self.policy_ids[rows], self.customers, self.customer_index[rows],
+                          self.type_code[rows], self.status_code[rows], self.coverage[rows],
+                          self.premium[rows], self.start[rows], self.end[rows], self._records[rows])
+
+    def where(self, **conditions) -> 'PolicyBook':
+        """Sub-book of the rows matching mask(**conditions)"""
+        return self.select(self.mask(**conditions))
+
+    # ------------------------------------------------------------------
+    # Group-bys
+    # ------------------------------------------------------------------
+    def _column(self, column: str) -> np.ndarray:
+        if column not in ("coverage", "premium"):
+            raise ValueError(f"Unknown numeric column: {column}")
+        return getattr(self, column)
+
+    def total_by_type(self, column: str = "coverage") -> Dict[str, float]:
+        """Sum of a column per policy type"""
+        sums = np.bincount(self.type_code, weights=self._column(column), minlength=len(PolicyType) + 1)
+        return {policy_type.name: float(sums[policy_type.value]) for policy_type in PolicyType}
+
+    def total_by_status(self, column: str = "premium") -> Dict[str, float]:
+        """Sum of a column per policy status"""
+        sums = np.bincount(self.status_code, weights=self._column(column), minlength=len(PolicyStatus) + 1)
+        return {status.name: float(sums[status.value]) for status in PolicyStatus}
+
+    def count_by_type(self) -> Dict[str, int]:
+        """Number of policies per policy type"""
+        counts = np.bincount(self.type_code, minlength=len(PolicyType) + 1)
+        return {policy_type.name: int(counts[policy_type.value]) for policy_type in PolicyType}
+
+    def total_by_customer(self, column: str = "premium") -> Dict[str, float]:
+        """Sum of a column per customer email, e.g. every customer's total premium"""
+        sums = np.bincount(self.customer_index, weights=self._column(column), minlength=len(self.customers))
+        present = np.unique(self.customer_index)
+        return {self.customers[i]: float(sums[i]) for i in present}
+
+    # ------------------------------------------------------------------
+    # Objects on demand
+    # ------------------------------------------------------------------
+    def to_policies(self, rows: Optional[np.ndarray] = None) -> List[Policy]:
+        """Decode Policy objects for the selected rows (all rows by default)"""
+        if rows is None:
+            rows = np.arange(len(self))
+        elif rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        policies = []
+        for row in rows:
+            policy = self.policy(row)
+            if policy is not None:
+                policies.append(policy)
+        return policies
+
+    def policy(self, row: int) -> Optional[Policy]:
+        """
+        Decode the Policy object of one row, or None for an unknown policy type.
+        A malformed record raises like PolicyCodec.decode (KeyError, ValueError,
+        TypeError or AttributeError).
+        """
+        return PolicyCodec.decode(self._records[row], self.policy_ids[row], self.customers[self.customer_index[row]])
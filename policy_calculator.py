@@ -1,10 +1,13 @@
 #policy_calculator.py
-from typing import Dict
+from typing import Dict, Optional, Tuple
 from datetime import datetime
+import numpy as np
 from auth import AuthenticationManager
 from policy_enums import PolicyType, PolicyStatus
 from claim import Claim
 from payment import Payment
+from rating_engine import RatingEngine, _numeric_column
+from quote_cache import cached_quote
 
 class RiskScore:
     def __init__(self, base_score: float, confidence: float = 0.95):
@@ -15,15 +18,45 @@ class RiskScore:
     def add_factor(self, name: str, value: float):
         self.factors[name] = value
 
+
+class RiskScoreBatch:
+    """
+    Risk scores for many applicants as arrays: scores and confidence hold one
+    value per row, factors is a rows x len(factor_names) matrix in the order of
+    factor_names. Built by the calculate_*_risk_scores batch functions.
+    """
+
+    __slots__ = ("scores", "confidence", "factors", "factor_names")
+
+    def __init__(self, scores: np.ndarray, factors: np.ndarray, factor_names: Tuple[str, ...],
+                 confidence: Optional[np.ndarray] = None):
+        self.scores = scores
+        self.confidence = confidence if confidence is not None else np.full(len(scores), 0.95)
+        self.factors = factors
+        self.factor_names = factor_names
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def factor(self, name: str) -> np.ndarray:
+        """Column of one named factor"""
+        return self.factors[:, self.factor_names.index(name)]
+
+    def to_risk_score(self, row: int) -> RiskScore:
+        """RiskScore object for a single row"""
+        risk_score = RiskScore(float(self.scores[row]), float(self.confidence[row]))
+        for name, value in zip(self.factor_names, self.factors[row]):
+            risk_score.add_factor(name, float(value))
+        return risk_score
+
+
+def _floats(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
 class PolicyCalculator:
     """Static class for policy-related calculations"""
 
-    BASE_RATES = {
-        PolicyType.LIFE: 0.005,    # 0.5% of coverage per year
-        PolicyType.CAR: 0.04,      # 4% of coverage per year
-        PolicyType.HEALTH: 0.06,   # 6% of coverage per year
-        PolicyType.PROPERTY: 0.02  # 2% of coverage per year
-    }
+    # Rates come from the "policy_calculator" profile of the live rate tables (rating_engine)
 
     RISK_FACTOR_MAPPINGS = {
         "driving_history": {
@@ -45,53 +78,21 @@ class PolicyCalculator:
     }
 
     @staticmethod
+    @cached_quote("policy_calculator.premium")
     def calculate_premium(policy_type: PolicyType, coverage_amount: float, term_months: int, risk_factors: Dict) -> float:
         """Calculate premium based on policy type, coverage, term and risk factors"""
-        if coverage_amount <= 0 or term_months <= 0:
-            raise ValueError("Coverage amount and term must be positive numbers.")
-    
-        # Get base rate for policy type
-        base_rate = PolicyCalculator.BASE_RATES.get(policy_type, 0.03)
-    
-        # Calculate base premium (annualized)
-        base_premium = coverage_amount * base_rate
-    
-        # Adjust for policy term
-        term_years = term_months / 12
-        term_adjusted_premium = base_premium * term_years
-    
-        # Apply risk factor adjustments
-        if risk_factors:
-            multiplier = PolicyCalculator._calculate_risk_multiplier(policy_type, risk_factors)
-            term_adjusted_premium *= multiplier
-    
-        return round(term_adjusted_premium, 2)
+        return RatingEngine.quote("policy_calculator", policy_type, coverage_amount, term_months, risk_factors)
 
     @staticmethod
-    def _calculate_risk_multiplier(policy_type: PolicyType, risk_factors: Dict) -> float:
-        """Calculate risk multiplier based on policy type and risk factors"""
-        multiplier = 1.0
-    
-        if policy_type == PolicyType.CAR:
-            driver_age = risk_factors.get("age", 30)
-            base_score = risk_factors.get("base_score", 1.0)
-            multiplier += base_score  # Simple example adjustment
-    
-        elif policy_type == PolicyType.LIFE:
-            age = risk_factors.get("age", 30)
-            multiplier += 0.01 * age  # Example adjustment based on age
-    
-        elif policy_type == PolicyType.HEALTH:
-            health_score = risk_factors.get("health_score", 0.5)
-            multiplier += health_score  # Example adjustment based on health
-    
-        elif policy_type == PolicyType.PROPERTY:
-            location_risk = risk_factors.get("location_risk", 0.5)
-            multiplier += location_risk  # Example adjustment based on location risk
-    
-        return multiplier
+    @cached_quote("policy_calculator.quote")
+    def quote_premium(policy_type: PolicyType, coverage_amount: float, term_months: int,
+                      risk_factors: Dict) -> Tuple[float, int]:
+        """calculate_premium with the version of the rate tables that priced it"""
+        return RatingEngine.quote_with_version("policy_calculator", policy_type, coverage_amount, term_months,
+                                               risk_factors)
 
     @staticmethod
+    @cached_quote("car_risk_score")
     def calculate_car_risk_score(driver_age: int, vehicle_score: float, accident_history: list, location_risk: float) -> RiskScore:
         """Calculate risk score for car insurance"""
         base_score = 0.0
@@ -123,6 +124,7 @@ class PolicyCalculator:
         return risk_score
 
     @staticmethod
+    @cached_quote("health_risk_score")
     def calculate_health_risk_score(age: int, medical_history: dict, lifestyle_score: float, occupation_risk: float) -> RiskScore:
         """Calculate risk score for health insurance"""
         base_score = 0.0
@@ -151,6 +153,7 @@ class PolicyCalculator:
         return risk_score
 
     @staticmethod
+    @cached_quote("property_risk_score")
     def calculate_property_risk_score(location_data: dict, property_details: dict, security_score: float, building_age: int) -> RiskScore:
         """Calculate risk score for property insurance"""
         base_score = 0.0
@@ -184,6 +187,7 @@ class PolicyCalculator:
         return risk_score
 
     @staticmethod
+    @cached_quote("life_risk_score")
     def calculate_life_risk_score(age: int, health_score: float, lifestyle_factors: dict, family_history: list) -> RiskScore:
         """
         Calculate risk score for life insurance based on various factors.
@@ -218,6 +222,96 @@ class PolicyCalculator:
         
         return risk_score
 
+    @staticmethod
+    def calculate_car_risk_scores(driver_ages, vehicle_scores, accident_counts, location_risks) -> RiskScoreBatch:
+        """
+        Vectorised calculate_car_risk_score
+        :param accident_counts: Number of accidents per driver (len(accident_history))
+        :return: Scores with factors ("age", "vehicle", "accidents", "location")
+        """
+        ages = _floats(driver_ages)
+        vehicle = _floats(vehicle_scores)
+        accidents = _floats(accident_counts)
+        location = _floats(location_risks)
+
+        base_score = np.where((ages < 25) | (ages > 70), 0.3, np.where((ages < 30) | (ages > 60), 0.2, 0.0))
+        base_score = base_score + vehicle
+        base_score = base_score + accidents * 0.2
+        base_score = base_score + location
+        base_score = np.minimum(1.0, base_score)
+
+        factors = np.column_stack((ages, vehicle, accidents, location))
+        return RiskScoreBatch(base_score, factors, ("age", "vehicle", "accidents", "location"))
+
+    @staticmethod
+    def calculate_health_risk_scores(ages, current_health, lifestyle_scores, occupation_risks) -> RiskScoreBatch:
+        """
+        Vectorised calculate_health_risk_score
+        :param current_health: medical_history["current_health"] per applicant; None/NaN takes 0.5
+        :return: Scores with factors ("age", "medical", "lifestyle", "occupation")
+        """
+        age_factor = _floats(ages) * 0.01
+        medical = _numeric_column({"current_health": current_health}, "current_health", 0.5, len(age_factor))
+        lifestyle = _floats(lifestyle_scores)
+        occupation = _floats(occupation_risks)
+
+        base_score = np.minimum(1.0, (age_factor + medical + lifestyle + occupation) / 4)
+
+        factors = np.column_stack((age_factor, medical, lifestyle, occupation))
+        return RiskScoreBatch(base_score, factors, ("age", "medical", "lifestyle", "occupation"))
+
+    @staticmethod
+    def calculate_property_risk_scores(location_columns: Dict, property_columns: Dict, security_scores,
+                                       building_ages) -> RiskScoreBatch:
+        """
+        Vectorised calculate_property_risk_score
+        :param location_columns: Column per location_data key (natural_disaster, crime_rate)
+        :param property_columns: Column per property_details key (construction_quality,
+            maintenance, utilities_condition); missing columns or None/NaN entries take
+            the same defaults as the scalar path
+        :return: Scores with factors ("location", "age", "security", "condition")
+        """
+        security = _floats(security_scores)
+        size = len(security)
+        disaster = _numeric_column(location_columns, "natural_disaster", 0.0, size)
+        crime = _numeric_column(location_columns, "crime_rate", 0.0, size)
+        age_factor = np.minimum(1.0, _floats(building_ages) * 0.02)
+        condition_score = (_numeric_column(property_columns, "construction_quality", 0.5, size) +
+                           _numeric_column(property_columns, "maintenance", 0.5, size) +
+                           _numeric_column(property_columns, "utilities_condition", 0.5, size)) / 3
+
+        base_score = disaster + crime + age_factor - security + condition_score
+        base_score = np.maximum(0.0, np.minimum(1.0, base_score))
+
+        factors = np.column_stack(((disaster + crime) / 2, age_factor, security, condition_score))
+        return RiskScoreBatch(base_score, factors, ("location", "age", "security", "condition"))
+
+    @staticmethod
+    def calculate_life_risk_scores(ages, health_scores, lifestyle_risks, family_history_counts) -> RiskScoreBatch:
+        """
+        Vectorised calculate_life_risk_score
+        :param lifestyle_risks: sum(lifestyle_factors.values()) per applicant; None/NaN when
+            no lifestyle information was given (lowers confidence like an empty dict)
+        :param family_history_counts: Number of family history items (len(family_history))
+        :return: Scores and confidence with factors ("age", "health", "lifestyle", "family_history")
+        """
+        age_factor = 0.01 * _floats(ages)
+        health = _floats(health_scores)
+        lifestyle = _numeric_column({"lifestyle": lifestyle_risks}, "lifestyle", np.nan, len(age_factor))
+        missing_lifestyle = np.isnan(lifestyle)
+        lifestyle = np.where(missing_lifestyle, 0.0, lifestyle)
+        family_counts = _floats(family_history_counts)
+        family_risk = 0.1 * family_counts
+
+        base_score = np.minimum(1.0, (age_factor + health + lifestyle + family_risk) / 4)
+
+        confidence = np.full(len(base_score), 0.95)
+        confidence = np.where(missing_lifestyle, confidence * 0.9, confidence)
+        confidence = np.where(family_counts == 0, confidence * 0.95, confidence)
+
+        factors = np.column_stack((age_factor, health, lifestyle, family_risk))
+        return RiskScoreBatch(base_score, factors, ("age", "health", "lifestyle", "family_history"), confidence)
+
     @staticmethod
     def calculate_policy_term(start_date: datetime, end_date: datetime) -> int:
         """Calculate policy term in months"""
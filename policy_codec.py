@@ -0,0 +1,185 @@
+# policy_codec.py
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+from policy import Policy, LifePolicy, CarPolicy, HealthPolicy, PropertyPolicy
+from policy_enums import PolicyStatus
+from schema_migrations import parse_status
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes", "y")
+    return bool(value)
+
+
+_DATE_CACHE: Dict[str, datetime] = {}
+_DATE_CACHE_MAX = 8192
+
+
+def _to_date(value: Any) -> Optional[datetime]:
+    """Parse a stored date; only the YYYY-MM-DD part is significant"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value
+    day = str(value)[:10]
+    parsed = _DATE_CACHE.get(day)
+    if parsed is None:
+        # datetimes are immutable, so policies sharing a date share one object
+        if len(_DATE_CACHE) >= _DATE_CACHE_MAX:
+            _DATE_CACHE.clear()
+        parsed = _DATE_CACHE[day] = datetime.fromisoformat(day)
+    return parsed
+
+
+def _date_to_str(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+_STATUS_NAMES: Dict[PolicyStatus, str] = {status: f"PolicyStatus.{status.name}" for status in PolicyStatus}
+# Migrated data (schema v2) only uses the canonical "PolicyStatus.NAME" form
+_CANONICAL_STATUS: Dict[str, PolicyStatus] = {name: status for status, name in _STATUS_NAMES.items()}
+
+
+class PolicyCodec:
+    """
+    Registry of compiled policy decoders and encoders.
+
+    Each policy class is registered with a field schema: the setters to call
+    and the (key, converter, default) arguments each setter takes, plus the
+    attributes written when encoding. Registration compiles the schema into a
+    specialised decode/encode function pair, so loading a policy is a fixed
+    sequence of dictionary lookups and setter calls with no type dispatch.
+    """
+
+    # Common fields shared by every policy type: setter -> arguments
+    COMMON_SETTERS: Tuple[Tuple[str, Tuple[Tuple[str, Callable, Any], ...]], ...] = (
+        ("set_coverage_amount", (("coverage_amount", float, 0.0),)),
+        ("set_premium", (("premium", float, 0.0),)),
+        ("set_rate_table_version", (("rate_table_version", int, None),)),
+    )
+
+    _decoders: Dict[str, Callable[..., Policy]] = {}
+    _encoders: Dict[Type[Policy], Callable[[Policy], Dict]] = {}
+
+    @classmethod
+    def register(cls, policy_type: str, policy_class: Type[Policy],
+                 setters: Tuple[Tuple[str, Tuple[Tuple[str, Callable, Any], ...]], ...],
+                 fields: Tuple[str, ...]):
+        """Compile and register the decoder/encoder for one policy class"""
+        compiled = tuple(
+            (getattr(policy_class, setter_name), args)
+            for setter_name, args in PolicyCodec.COMMON_SETTERS + setters
+        )
+
+        def decode(data: Dict, policy_id: Optional[str] = None, customer_id: Optional[str] = None) -> Policy:
+            get = data.get
+            policy = policy_class(policy_id or data["policy_id"], customer_id or get("customer_id"))
+            for setter, args in compiled:
+                values = []
+                for key, convert, default in args:
+                    value = get(key)
+                    values.append(default if value is None else convert(value))
+                setter(policy, *values)
+
+            status = get("status")
+            if status is not None:
+                policy._status = (_CANONICAL_STATUS.get(status) or parse_status(status)
+                                  or PolicyStatus.PENDING)
+
+            start_date, end_date = get("start_date"), get("end_date")
+            if start_date and end_date:
+                policy.set_dates(_to_date(start_date), _to_date(end_date))
+
+            conditions = get("conditions")
+            if conditions:
+                for condition in conditions:
+                    policy.add_condition(condition)
+            return policy
+
+        def encode(policy: Policy) -> Dict:
+            data = {
+                "policy_id": policy.policy_id,
+                "customer_id": policy.customer_id,
+                "policy_type": policy_type,
+                "coverage_amount": policy.coverage_amount,
+                "premium": policy.premium,
+                "status": _STATUS_NAMES[policy._status],
+                "start_date": _date_to_str(policy.start_date),
+                "end_date": _date_to_str(policy.end_date),
+                "conditions": list(policy.conditions),
+                "rate_table_version": policy.rate_table_version
+            }
+            for field in fields:
+                data[field] = getattr(policy, field)
+            return data
+
+        cls._decoders[policy_type] = decode
+        cls._encoders[policy_class] = encode
+
+    @classmethod
+    def decode(cls, data: Dict, policy_id: Optional[str] = None,
+               customer_id: Optional[str] = None) -> Optional[Policy]:
+        """Build a policy object from its stored dictionary, or None for an unknown type"""
+        decoder = cls._decoders.get(data.get("policy_type"))
+        if decoder is None:
+            return None
+        return decoder(data, policy_id, customer_id)
+
+    @classmethod
+    def decode_many(cls, policies: Dict[str, Dict], customer_id: Optional[str] = None) -> Dict[str, Policy]:
+        """Decode a policy_id -> data mapping, skipping unknown or malformed entries"""
+        decoded = {}
+        for policy_id, data in policies.items():
+            try:
+                policy = cls.decode(data, policy_id, customer_id)
+            except (KeyError, ValueError, TypeError, AttributeError) as e:
+                print(f"Error loading policy {policy_id}: {str(e)}")
+                continue
+            if policy is not None:
+                decoded[policy_id] = policy
+        return decoded
+
+    @classmethod
+    def encode(cls, policy: Policy) -> Dict:
+        """Convert a policy object to its stored dictionary"""
+        return cls._encoders[type(policy)](policy)
+
+
+PolicyCodec.register(
+    "LIFE", LifePolicy,
+    setters=(
+        ("set_beneficiary", (("beneficiary", str, ""),)),
+        ("set_death_benefit", (("death_benefit", float, 0.0),)),
+    ),
+    fields=("beneficiary", "death_benefit")
+)
+PolicyCodec.register(
+    "CAR", CarPolicy,
+    setters=(
+        ("set_vehicle_details", (
+            ("vehicle_id", str, "N/A"),
+            ("is_comprehensive", _to_bool, False),
+            ("vehicle_age", int, 0),
+            ("vehicle_model", str, "N/A"),
+            ("vehicle_plate_number", str, "UNKNOWN"),
+            ("vehicle_condition", str, "N/A"),
+        )),
+    ),
+    fields=("vehicle_id", "is_comprehensive", "vehicle_age", "vehicle_model",
+            "vehicle_plate_number", "vehicle_condition")
+)
+PolicyCodec.register(
+    "HEALTH", HealthPolicy,
+    setters=(
+        ("set_health_details", (("deductible", float, 0.0), ("includes_dental", _to_bool, False))),
+    ),
+    fields=("deductible", "includes_dental")
+)
+PolicyCodec.register(
+    "PROPERTY", PropertyPolicy,
+    setters=(
+        ("set_property_details", (("property_address", str, "N/A"), ("property_type", str, "N/A"))),
+    ),
+    fields=("property_address", "property_type")
+)
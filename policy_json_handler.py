@@ -6,6 +6,7 @@ from policy import LifePolicy, CarPolicy, HealthPolicy, PropertyPolicy, PolicySt
 from policy_enums import PolicyType
 from calculations import PolicyCalculator
 from customer import Customer
+from data_storage_service import DataStorageService
 
 
 class PolicyJSONHandler:
@@ -23,87 +24,10 @@ class PolicyJSONHandler:
     def load_policies_from_json(email: str) -> Optional[Customer]:
         """Load policies and customer data for a specific email from the JSON file."""
         try:
-            if os.path.exists(PolicyJSONHandler.DATA_FILE):
-                with open(PolicyJSONHandler.DATA_FILE, 'r') as f:
-                    data = json.load(f)
-
-                if email in data:
-                    customer_data = data[email]
-                    customer = Customer(
-                        email=customer_data["customer_info"]["email"],
-                        name=customer_data["customer_info"]["name"],
-                        password="",  # Password handling is separate
-                        contact_number=customer_data["customer_info"]["contact_number"],
-                        address=customer_data["customer_info"]["address"],
-                        birth_date=datetime.strptime(customer_data["customer_info"]["birth_date"], "%Y-%m-%d"),
-                        credit_score=customer_data["customer_info"]["credit_score"]
-                    )
-
-                    # Reconstruct policies
-                    for policy_id, policy_info in customer_data.get("policies", {}).items():
-                        # Recreate policy instances based on type
-                        if policy_info["policy_type"] == "LIFE":
-                            policy = LifePolicy(policy_id, email)
-                            policy.set_beneficiary(policy_info.get("beneficiary", ""))
-                            policy.set_death_benefit(float(policy_info.get("death_benefit", 0)))
-                        elif policy_info["policy_type"] == "CAR":
-                            policy = CarPolicy(policy_id, email)
-                            policy.set_vehicle_details(
-                                vehicle_id=policy_info.get("vehicle_id", "N/A"),
-                                is_comprehensive=policy_info.get("is_comprehensive", False),
-                                vehicle_age=int(policy_info.get("vehicle_age", 0)),
-                                vehicle_model=policy_info.get("vehicle_model", "N/A"),
-                                vehicle_condition=policy_info.get("vehicle_condition", "N/A"),
-                                vehicle_plate_number=policy_info.get("vehicle_plate_number", "UNKNOWN")
-                            )
-                        elif policy_info["policy_type"] == "HEALTH":
-                            policy = HealthPolicy(policy_id, email)
-                            policy.set_health_details(
-                                deductible=float(policy_info.get("deductible", 0.0)),
-                                includes_dental=policy_info.get("includes_dental", False)
-                            )
-                        elif policy_info["policy_type"] == "PROPERTY":
-                            policy = PropertyPolicy(policy_id, email)
-                            policy.set_property_details(
-                                address=policy_info.get("property_address", "N/A"),
-                                property_type=policy_info.get("property_type", "N/A")
-                            )
-                        else:
-                            continue
-
-                        # Set common policy attributes
-                        policy.set_coverage_amount(float(policy_info["coverage_amount"]))
-                        policy.set_premium(float(policy_info["premium"]))
-                        
-                        if "status" in policy_info:
-                            status_val = str(policy_info["status"])  # force everything to string
-                            if status_val.startswith("PolicyStatus."):
-                                # e.g. "PolicyStatus.ACTIVE" => parse name after the dot
-                                name_part = status_val.split(".")[1]  # ACTIVE
-                                policy.update_status(PolicyStatus[name_part])
-                            elif status_val.startswith("PolicyStatus("):
-                                # e.g. "PolicyStatus(4)" => parse numeric inside parentheses
-                                # Remove "PolicyStatus(" and the trailing ")"
-                                digit_part = status_val.replace("PolicyStatus(", "").replace(")", "")
-                                policy.update_status(PolicyStatus(int(digit_part)))
-                            elif status_val.isdigit():
-                                # If it’s just a plain digit, e.g. "4"
-                                policy.update_status(PolicyStatus(int(status_val)))
-                            else:
-                                # Otherwise assume it's the direct enum name: "ACTIVE", "PENDING", etc.
-                                policy.update_status(PolicyStatus[status_val])
-
-                        
-                        # Set dates if available
-                        if "start_date" in policy_info and "end_date" in policy_info:
-                            policy.set_dates(
-                                datetime.strptime(policy_info["start_date"].split('T')[0], "%Y-%m-%d"),
-                                datetime.strptime(policy_info["end_date"].split('T')[0], "%Y-%m-%d")
-                            )
-                            
-                        customer.add_policy(policy)
-
-                    return customer
+            customer_data = DataStorageService._read_customer(email)
+            if customer_data:
+                # Customer and policies are rebuilt by the shared policy codec
+                return Customer.from_dict(customer_data)
             print(f"No data found for email: {email}")
             return None
         except Exception as e:
@@ -117,42 +41,14 @@ class PolicyJSONHandler:
         try:
             PolicyJSONHandler.ensure_data_directory()
 
-            # Load existing data from the file
-            existing_data = {}
-            if os.path.exists(PolicyJSONHandler.DATA_FILE):
-                with open(PolicyJSONHandler.DATA_FILE, 'r') as f:
-                    existing_data = json.load(f)
+            # Create new customer data (policies encoded with status as "PolicyStatus.NAME")
+            customer_data = DataStorageService.build_customer_record(customer)
 
-            # Create new customer data
-            customer_data = {
-                "customer_info": {
-                    "email": customer.email,
-                    "name": customer.name,
-                    "contact_number": customer._contact_number,
-                    "address": customer.address,
-                    "birth_date": customer.birth_date.strftime("%Y-%m-%d"),
-                    "credit_score": customer.credit_score
-                },
-                "policies": {}
-            }
+            # Replace only this customer's record; the policies saved are exactly the customer's
+            if not DataStorageService._write_customer(customer_data, replace_policies=True):
+                return False
 
-            # Update with policies
-            for policy in customer.policies:
-                policy_id = policy.get_policy_id()
-                policy_dict = policy.to_dict()
-                # Ensure status is converted to string if it's an enum
-                if 'status' in policy_dict:
-                    policy_dict['status'] = f"PolicyStatus.{policy.get_status().name}"
-                customer_data["policies"][policy_id] = policy_dict
-
-            # Update the customer data in the existing data
-            existing_data[customer.email] = customer_data
-
-            # Save the updated data back to the file
-            with open(PolicyJSONHandler.DATA_FILE, 'w') as f:
-                json.dump(existing_data, f, indent=4)
-
-            print(f"Policies saved to {PolicyJSONHandler.DATA_FILE}")
+            print(f"Policies saved to {DataStorageService.CUSTOMER_STORE_DIR}")
             return True
         except Exception as e:
             print(f"Error saving to JSON: {str(e)}")
@@ -161,8 +57,7 @@ class PolicyJSONHandler:
     @staticmethod
     def _generate_policy_id() -> str:
         """Generate a unique policy ID"""
-        timestamp = int(datetime.now().timestamp())
-        return f"POL{timestamp}"
+        return DataStorageService.generate_policy_id()
 
     @staticmethod
     def create_policy_from_request(customer: Customer) -> Optional[Dict]:
@@ -283,7 +178,7 @@ class PolicyJSONHandler:
             policy.set_coverage_amount(coverage_amount)
 
             # Calculate premium
-            premium = PolicyCalculator.calculate_premium(
+            premium, version = PolicyCalculator.quote_premium(
                 PolicyType[policy_type],
                 coverage_amount,
                 PolicyCalculator.calculate_policy_term(start_date, end_date),  # Calculate term
@@ -293,11 +188,12 @@ class PolicyJSONHandler:
                 }
             )
             policy.set_premium(premium)
-        
+            policy.set_rate_table_version(version)
+
 
             if customer.add_policy(policy):
                 print(f"\nPolicy {policy_id} created successfully!")
-                print(f"Calculated Premium: ${premium:,.2f}")
+                print(f"Calculated Premium: ${premium:,.2f} (rate tables v{policy.rate_table_version})")
                 return policy
             else:
                 print("Failed to add policy to customer.")
@@ -0,0 +1,172 @@
+# quote_cache.py
+import copy
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from rating_engine import RatingEngine
+
+_MISSING = object()
+
+
+class QuoteCache:
+    """
+    Process-wide LRU cache of premiums and risk scores keyed by normalised inputs.
+
+    Keys are built by canonical(): enum members become names, dictionaries
+    become sorted item tuples, coverage amounts are rounded to the cent and
+    other numbers to FACTOR_DECIMALS places, so near-identical requests share
+    an entry. Entries expire after ttl seconds, and the whole cache is dropped
+    when the live rate table version changes. Cached objects are copied on the
+    way out.
+    """
+
+    DEFAULT_MAX_ENTRIES = 10000
+    DEFAULT_TTL = 300.0          # Seconds
+    FACTOR_DECIMALS = 6
+    MAX_ENTRIES_ENV_VAR = "INSURANCE_QUOTE_CACHE_MAX_ENTRIES"
+    TTL_ENV_VAR = "INSURANCE_QUOTE_CACHE_TTL"
+
+    _shared: Optional['QuoteCache'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries if max_entries is not None else QuoteCache.DEFAULT_MAX_ENTRIES
+        self.ttl = ttl if ttl is not None else QuoteCache.DEFAULT_TTL
+        self._clock = clock
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self._version = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def shared(cls) -> 'QuoteCache':
+        """Get the process-wide cache, sized from the environment if set"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                max_entries = os.environ.get(cls.MAX_ENTRIES_ENV_VAR)
+                ttl = os.environ.get(cls.TTL_ENV_VAR)
+                cls._shared = cls(int(max_entries) if max_entries else None, float(ttl) if ttl else None)
+            return cls._shared
+
+    @staticmethod
+    def canonical(value: Any, decimals: int = FACTOR_DECIMALS) -> Hashable:
+        """Hashable normal form of a quote input"""
+        if isinstance(value, Enum):
+            return value.name
+        if isinstance(value, bool) or value is None or isinstance(value, str):
+            return value
+        if isinstance(value, (int, float)):
+            return round(float(value), decimals) + 0.0  # + 0.0 folds -0.0 into 0.0
+        if isinstance(value, dict):
+            return tuple(sorted((str(k), QuoteCache.canonical(v, decimals)) for k, v in value.items()))
+        if isinstance(value, (list, tuple)):
+            return tuple(QuoteCache.canonical(v, decimals) for v in value)
+        return repr(value)
+
+    def get(self, key: Hashable) -> Any:
+        """Cached result for key, or _MISSING when absent, expired or made stale by new rate tables"""
+        now = self._clock()
+        version = RatingEngine.current_version()
+        with self._lock:
+            self._sync(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return _MISSING
+            if entry[0] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def _sync(self, version: int):
+        """Drop every entry when the rate tables moved to another version (caller holds the lock)"""
+        if self._version != version:
+            self._entries.clear()
+            self._version = version
+
+    def put(self, key: Hashable, value: Any, version: Optional[int] = None):
+        """
+        Store a result priced under rate table version (the live one by default)
+        and evict least recently used entries over max_entries.
+        """
+        live = RatingEngine.current_version()
+        if version is not None and version != live:
+            return  # Priced with tables that were replaced meanwhile
+        with self._lock:
+            self._sync(live)
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Cached result for key, computing and storing it on a miss"""
+        version = RatingEngine.current_version()
+        value = self.get(key)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value, version)
+        return value if isinstance(value, (int, float, str)) else copy.deepcopy(value)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "rate_table_version": self._version
+            }
+
+    def reset_stats(self):
+        """Reset the hit/miss counters"""
+        with self._lock:
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+
+def cached_quote(name: str, cents: Tuple[str, ...] = ("coverage_amount",)):
+    """
+    Memoise a pricing or risk scoring function in the shared QuoteCache.
+    Arguments are bound to the signature first, so positional and keyword calls
+    share entries; parameters listed in cents are rounded to 2 decimal places.
+    """
+    def decorate(function: Callable) -> Callable:
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (name,) + tuple(
+                QuoteCache.canonical(value, 2 if param in cents else QuoteCache.FACTOR_DECIMALS)
+                for param, value in bound.arguments.items())
+            return QuoteCache.shared().get_or_compute(key, lambda: function(*args, **kwargs))
+
+        wrapper.uncached = function
+        return wrapper
+
+    return decorate
@@ -0,0 +1,349 @@
+# reconciliation.py
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+import zlib
+from contextlib import ExitStack
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from claim import ClaimStatus
+from claims_journal import ClaimsJournal
+from claims_storage_service import ClaimsStorageService
+from data_storage_service import DataStorageService
+from financial_calculator import FinancialCalculator
+from payment_ledger import PaymentLedger
+from payment_storage_service import PaymentStorageService
+from policy_book import PolicyBook
+from settlement_job import SettlementJob
+
+# Flags written to the report, one row per finding
+AMOUNT_MISMATCH = "AMOUNT_MISMATCH"              # Paid amount differs from the claim's payout
+DUPLICATE_PAYMENT = "DUPLICATE_PAYMENT"          # Claim paid more than once
+DUPLICATE_TRANSACTION = "DUPLICATE_TRANSACTION"  # Gateway transaction recorded on more than one payment
+ORPHAN_PAYMENT = "ORPHAN_PAYMENT"                # Payment without a claim on its policy
+PREMIUM_MISMATCH = "PREMIUM_MISMATCH"            # Premium paid on a policy differs from its billed premium
+CLAIM_NOT_APPROVED = "CLAIM_NOT_APPROVED"        # Payment for a claim that is neither approved nor settled
+UNKNOWN_POLICY = "UNKNOWN_POLICY"                # Claim's or premium's policy is not stored or unreadable
+UNPAID_CLAIM = "UNPAID_CLAIM"                    # Settled claim with a payout but no payment
+OVER_COVERAGE = "OVER_COVERAGE"                  # Policy paid more than its coverage in total
+
+REPORT_COLUMNS = ["flag", "policy_id", "claim_id", "payment_id", "expected", "paid", "detail"]
+INACTIVE_PAYMENT_STATUSES = ("FAILED", "REFUNDED")
+PAYABLE_CLAIM_STATUSES = (ClaimStatus.APPROVED.value, ClaimStatus.SETTLED.value)
+
+
+class ReconciliationReport:
+    """Totals of one reconciliation run; the findings themselves are in the CSV file"""
+
+    __slots__ = ("payments_read", "claims_read", "policies_read", "matched", "flags", "total_paid",
+                 "total_expected", "premiums_billed", "premiums_paid", "partitions", "seconds", "output_path")
+
+    def __init__(self, output_path: str, partitions: int):
+        self.payments_read = 0
+        self.claims_read = 0
+        self.policies_read = 0
+        self.matched = 0                 # Payments that agree with their claim's payout or policy's premium
+        self.flags: Dict[str, int] = {}
+        self.total_paid = 0.0            # Active claim payments
+        self.total_expected = 0.0        # Payouts of approved and settled claims
+        self.premiums_billed = 0.0
+        self.premiums_paid = 0.0         # Active premium payments
+        self.partitions = partitions
+        self.seconds = 0.0
+        self.output_path = output_path
+
+    def findings(self) -> int:
+        return sum(self.flags.values())
+
+    def rows_per_second(self) -> float:
+        rows = self.payments_read + self.claims_read + self.policies_read
+        return rows / self.seconds if self.seconds > 0 else 0.0
+
+    def print_report(self):
+        print("\n=== Payment Reconciliation ===")
+        print(f"Payments read: {self.payments_read:,}  Claims read: {self.claims_read:,}  "
+              f"Policies read: {self.policies_read:,}")
+        print(f"Payments matched: {self.matched:,}")
+        print(f"Total paid: ${self.total_paid:,.2f}  Expected payouts: ${self.total_expected:,.2f}")
+        if self.premiums_billed > 0:
+            print(f"Premiums billed: ${self.premiums_billed:,.2f}  Premiums paid: ${self.premiums_paid:,.2f} "
+                  f"(claims paid/billed {self.total_paid / self.premiums_billed:.1%})")
+        for flag, count in sorted(self.flags.items()):
+            print(f"{flag}: {count:,}")
+        print(f"Findings written to {self.output_path}: {self.findings():,}")
+        print(f"Throughput: {self.rows_per_second():,.0f} rows/s over {self.seconds:.2f}s "
+              f"in {self.partitions} partitions")
+
+
+class ReconciliationEngine:
+    """
+    Month-end reconciliation of payments against claims and policies.
+
+    Payments, claims and policies are streamed once into temporary JSON-lines
+    partitions by a hash of their policy ID, so a policy, its claims and its
+    payments always land in the same partition (a payment naming another
+    policy than its claim is reported as an orphan). Each partition is then
+    joined on its own: its policies become a small policy book, its claims go
+    into a hash table by claim ID and its payments probe it, matched through
+    the PAY_<claim ID> payment ID. Payouts are priced as the settlement job
+    prices them. Any other payment pays its policy's premium: the premium
+    payments of a policy are summed and matched against its billed premium.
+    Payments are also partitioned by transaction ID to find transactions
+    recorded twice across policies.
+
+    Stored rows are streamed from SQLite pages, or with the file backends from
+    the customer shards, the ledger journal and the claims snapshot and journal;
+    payment and claim change records are first partitioned by payment or claim
+    ID and replayed a partition at a time. Memory holds one partition, and
+    findings are streamed to the CSV report as each partition finishes.
+    """
+
+    DEFAULT_PARTITIONS = 64
+    REPORT_FILE = os.path.join("data", "reconciliation_report.csv")
+
+    def __init__(self, partitions: Optional[int] = None):
+        self.partitions = max(1, partitions or ReconciliationEngine.DEFAULT_PARTITIONS)
+
+    @staticmethod
+    def claim_reference(payment_id: str) -> str:
+        """Claim ID a payment pays (payments are named PAY_<claim ID>)"""
+        return payment_id[4:] if payment_id.startswith("PAY_") else payment_id
+
+    @staticmethod
+    def is_claim_payment(payment_id: str) -> bool:
+        """Whether a payment pays a claim (PAY_<claim ID>) rather than its policy's premium"""
+        return payment_id.startswith("PAY_")
+
+    @staticmethod
+    def stored_policies() -> Iterator[Dict]:
+        """Every stored policy as {"email", "policy_id", "policy"}, streamed from SQLite pages or customer shards"""
+        backend = DataStorageService.get_backend()
+        if backend:
+            customers = (item for page in backend.iter_customer_pages() for item in page.items())
+        else:
+            customers = DataStorageService.get_store().iter_customers()
+        for email, record in customers:
+            policies = record.get("policies") if isinstance(record, dict) else None
+            if not isinstance(policies, dict):
+                continue
+            for policy_id, data in policies.items():
+                if isinstance(data, dict):
+                    yield {"email": email, "policy_id": policy_id, "policy": data}
+
+    def stored_payments(self, directory: str) -> Iterable[Dict]:
+        """Every stored payment, streamed from SQLite pages or resolved from the ledger journal"""
+        backend = PaymentStorageService.get_backend()
+        if backend:
+            return backend.iter_payments()
+        journal_path = PaymentStorageService.LEDGER_FILE
+        if not os.path.exists(journal_path):
+            return PaymentStorageService.load_payments().values()   # Imports the old payments file first
+        changes = (record["payment"] for record in PaymentLedger.iter_journal(journal_path))
+        return self._latest(changes, directory, "ledger", "payment_id", ReconciliationEngine._keep_last)
+
+    def stored_claims(self, directory: str) -> Iterable[Dict]:
+        """Every stored claim, streamed from SQLite pages or resolved from the claims snapshot and journal"""
+        backend = ClaimsStorageService.get_backend()
+        if backend:
+            return backend.iter_claims()
+        records = (record for record in ClaimsStorageService.get_journal().iter_history()
+                   if isinstance(record, dict) and record.get("claim_id"))
+        return (claim for claim in self._latest(records, directory, "claim_records", "claim_id",
+                                                ClaimsJournal.apply_record) if isinstance(claim, dict))
+
+    @staticmethod
+    def _keep_last(latest: Dict[str, Dict], payment: Dict):
+        latest[payment["payment_id"]] = payment
+
+    def _latest(self, records: Iterable[Dict], directory: str, prefix: str, key: str,
+                apply: Callable[[Dict[str, Dict], Dict], None]) -> Iterator[Dict]:
+        """
+        Final state of every key from an ordered stream of change records. The
+        records are spilled by key, so each key's records share a partition in
+        their original order, and replayed one partition at a time.
+        """
+        self._spill(records, directory, prefix, key)
+        for n in range(self.partitions):
+            latest: Dict[str, Dict] = {}
+            for record in self._read(os.path.join(directory, f"{prefix}_{n}.jsonl")):
+                apply(latest, record)
+            yield from latest.values()
+
+    def _partition_of(self, key: str) -> int:
+        return zlib.crc32(key.encode("utf-8")) % self.partitions
+
+    def _spill(self, rows: Iterable[Dict], directory: str, prefix: str, key: str = "policy_id",
+               transaction_prefix: Optional[str] = None) -> int:
+        """
+        Write rows to one JSON-lines file per partition of their key field, and
+        rows with a transaction ID also to transaction_prefix files partitioned by
+        that ID. Returns the number of rows.
+        """
+        count = 0
+        with ExitStack() as stack:
+            files = [stack.enter_context(open(os.path.join(directory, f"{prefix}_{n}.jsonl"), 'w'))
+                     for n in range(self.partitions)]
+            by_transaction = [stack.enter_context(open(os.path.join(directory, f"{transaction_prefix}_{n}.jsonl"), 'w'))
+                              for n in range(self.partitions)] if transaction_prefix else None
+            for row in rows:
+                line = json.dumps(row, default=str) + "\n"
+                files[self._partition_of(str(row.get(key, "")))].write(line)
+                if by_transaction and row.get("transaction_id"):
+                    by_transaction[self._partition_of(str(row["transaction_id"]))].write(line)
+                count += 1
+        return count
+
+    @staticmethod
+    def _read(path: str) -> Iterable[Dict]:
+        with open(path, 'r') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def run(self, output_path: Optional[str] = None, payments: Optional[Iterable[Dict]] = None,
+            claims: Optional[Iterable[Dict]] = None,
+            policies: Optional[Iterable[Dict]] = None) -> ReconciliationReport:
+        """
+        Reconcile the given payments, claims and policies (as stored_policies()
+        yields them; everything stored by default) and write the report
+        """
+        started = time.perf_counter()
+        output_path = output_path or ReconciliationEngine.REPORT_FILE
+        report = ReconciliationReport(output_path, self.partitions)
+        directory = os.path.dirname(output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with tempfile.TemporaryDirectory(prefix="reconciliation_") as spill_dir:
+            report.payments_read = self._spill(
+                payments if payments is not None else self.stored_payments(spill_dir),
+                spill_dir, "payments", transaction_prefix="transactions")
+            report.claims_read = self._spill(
+                claims if claims is not None else self.stored_claims(spill_dir), spill_dir, "claims")
+            report.policies_read = self._spill(
+                policies if policies is not None else self.stored_policies(), spill_dir, "policies")
+            with open(output_path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(REPORT_COLUMNS)
+                for n in range(self.partitions):
+                    findings = self._join(os.path.join(spill_dir, f"policies_{n}.jsonl"),
+                                          os.path.join(spill_dir, f"claims_{n}.jsonl"),
+                                          os.path.join(spill_dir, f"payments_{n}.jsonl"), report)
+                    findings += self._duplicate_transactions(os.path.join(spill_dir, f"transactions_{n}.jsonl"))
+                    for finding in findings:
+                        report.flags[finding[0]] = report.flags.get(finding[0], 0) + 1
+                    writer.writerows(findings)
+        report.seconds = time.perf_counter() - started
+        return report
+
+    def _book(self, policies_path: str) -> PolicyBook:
+        """Policy book of one partition's policies"""
+        customers: Dict[str, Dict] = {}
+        for row in self._read(policies_path):
+            customers.setdefault(row["email"], {"policies": {}})["policies"][row["policy_id"]] = row["policy"]
+        return PolicyBook.from_records(customers.items())
+
+    def _join(self, policies_path: str, claims_path: str, payments_path: str,
+              report: ReconciliationReport) -> List[Tuple]:
+        """Reconcile one partition; returns its report rows"""
+        book = self._book(policies_path)
+        pricing = SettlementJob(book)
+        report.premiums_billed += float(book.premium.sum())
+        claims = {claim["claim_id"]: claim for claim in self._read(claims_path) if "claim_id" in claim}
+        payouts: Dict[str, Optional[float]] = {}
+        for claim_id, claim in claims.items():
+            if claim.get("status") in PAYABLE_CLAIM_STATUSES:
+                payouts[claim_id] = pricing.payout(claim)
+                report.total_expected += payouts[claim_id] or 0.0
+
+        findings: List[Tuple] = []
+        paid_by_claim: Dict[str, str] = {}       # Claim ID -> first active payment ID
+        paid_by_policy: Dict[str, float] = {}
+        premiums: Dict[str, List] = {}          # Policy ID -> [premium paid, payment IDs]
+        payments = sorted(self._read(payments_path), key=lambda payment: str(payment.get("payment_id", "")))
+        for payment in payments:
+            payment_id = str(payment.get("payment_id", ""))
+            policy_id = str(payment.get("policy_id", ""))
+            claim_id = ReconciliationEngine.claim_reference(payment_id)
+            if payment.get("payment_status") in INACTIVE_PAYMENT_STATUSES:
+                continue
+            amount = float(payment.get("amount") or 0.0)
+            if not ReconciliationEngine.is_claim_payment(payment_id):
+                premium = premiums.setdefault(policy_id, [0.0, []])
+                premium[0] += amount
+                premium[1].append(payment_id)
+                report.premiums_paid += amount
+                continue
+            report.total_paid += amount
+            paid_by_policy[policy_id] = paid_by_policy.get(policy_id, 0.0) + amount
+
+            claim = claims.get(claim_id)
+            if claim_id in paid_by_claim:
+                flag = (DUPLICATE_PAYMENT, f"Claim already paid by {paid_by_claim[claim_id]}")
+            elif claim is None or claim.get("policy_id") != policy_id:
+                flag = (ORPHAN_PAYMENT, "No claim with this ID on this policy")
+            elif claim_id not in payouts:
+                flag = (CLAIM_NOT_APPROVED, f"Claim status is {claim.get('status')}")
+            elif payouts[claim_id] is None:
+                flag = (UNKNOWN_POLICY, "Policy not in the policy book or unreadable")
+            elif not FinancialCalculator.validate_payment_amount(amount, payouts[claim_id]):
+                flag = (AMOUNT_MISMATCH, f"Difference {amount - payouts[claim_id]:+.2f}")
+            else:
+                flag = None
+                report.matched += 1
+            paid_by_claim.setdefault(claim_id, payment_id)
+            if flag:
+                expected = "" if payouts.get(claim_id) is None else f"{payouts[claim_id]:.2f}"
+                findings.append((flag[0], policy_id, claim_id, payment_id, expected, f"{amount:.2f}", flag[1]))
+
+        for claim_id, payout in sorted(payouts.items()):
+            claim = claims[claim_id]
+            if claim_id not in paid_by_claim and claim.get("status") == ClaimStatus.SETTLED.value and payout:
+                findings.append((UNPAID_CLAIM, claim.get("policy_id", ""), claim_id, "", f"{payout:.2f}", "",
+                                 "Settled without a payment"))
+        for policy_id, paid in sorted(paid_by_policy.items()):
+            row = pricing.row_of.get(policy_id)
+            if row is not None and paid - float(book.coverage[row]) >= 0.01:
+                findings.append((OVER_COVERAGE, policy_id, "", "", f"{book.coverage[row]:.2f}", f"{paid:.2f}",
+                                 "Total paid exceeds coverage"))
+        for policy_id, (paid, payment_ids) in sorted(premiums.items()):
+            row = pricing.row_of.get(policy_id)
+            if row is None:
+                findings.append((UNKNOWN_POLICY, policy_id, "", " ".join(payment_ids), "", f"{paid:.2f}",
+                                 "Premium paid on a policy not in the policy book"))
+            elif FinancialCalculator.validate_payment_amount(paid, float(book.premium[row])):
+                report.matched += len(payment_ids)
+            else:
+                findings.append((PREMIUM_MISMATCH, policy_id, "", " ".join(payment_ids), f"{book.premium[row]:.2f}",
+                                 f"{paid:.2f}", f"Difference {paid - float(book.premium[row]):+.2f}"))
+        return findings
+
+    def _duplicate_transactions(self, transactions_path: str) -> List[Tuple]:
+        """Report rows for active payments sharing a gateway transaction ID with an earlier payment"""
+        payment_of_transaction: Dict[str, str] = {}
+        findings: List[Tuple] = []
+        payments = sorted(self._read(transactions_path), key=lambda payment: str(payment.get("payment_id", "")))
+        for payment in payments:
+            if payment.get("payment_status") in INACTIVE_PAYMENT_STATUSES:
+                continue
+            payment_id = str(payment.get("payment_id", ""))
+            transaction_id = str(payment["transaction_id"])
+            first = payment_of_transaction.setdefault(transaction_id, payment_id)
+            if first != payment_id:
+                findings.append((DUPLICATE_TRANSACTION, str(payment.get("policy_id", "")),
+                                 ReconciliationEngine.claim_reference(payment_id), payment_id, "",
+                                 f"{float(payment.get('amount') or 0.0):.2f}", f"{transaction_id} also on {first}"))
+        return findings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile payments against claims and policies")
+    parser.add_argument("--output", default=ReconciliationEngine.REPORT_FILE)
+    parser.add_argument("--partitions", type=int, default=ReconciliationEngine.DEFAULT_PARTITIONS)
+    args = parser.parse_args()
+    ReconciliationEngine(partitions=args.partitions).run(args.output).print_report()
+
+
+if __name__ == "__main__":
+    main()
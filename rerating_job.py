@@ -0,0 +1,296 @@
+# rerating_job.py
+import argparse
+import csv
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from data_storage_service import DataStorageService
+from policy_calculator import PolicyCalculator
+from rating_engine import RatingEngine, RatePlan, round_cents, save_tables
+
+# Row sent to a worker: (email, policy_id, policy_type, coverage, term_months, premium, risk factors)
+Row = Tuple[str, str, str, float, int, float, Dict[str, Any]]
+
+_worker_plans: Optional[Tuple[RatePlan, RatePlan]] = None
+
+
+def _init_worker(profile: str, baseline_tables: Dict, current_tables: Dict):
+    """Compile the baseline and current plans once per worker process"""
+    global _worker_plans
+    _worker_plans = (RatePlan(profile, baseline_tables["profiles"][profile]),
+                     RatePlan(profile, current_tables["profiles"][profile]))
+
+
+def rerate_rows(rows: List[Row], baseline: Optional[RatePlan] = None,
+                current: Optional[RatePlan] = None) -> List[float]:
+    """
+    New premium per row: the stored premium scaled by current quote / baseline quote.
+    Scaling keeps whatever the original quote included beyond the stored fields
+    (risk scores, manual adjustments); rows that cannot be quoted keep their premium.
+    """
+    if baseline is None:
+        baseline, current = _worker_plans
+    types = [row[2] for row in rows]
+    coverages = np.array([row[3] for row in rows], dtype=np.float64)
+    terms = np.array([row[4] for row in rows], dtype=np.float64)
+    premiums = np.array([row[5] for row in rows], dtype=np.float64)
+    keys = sorted({key for row in rows for key in row[6]})
+    columns = {key: [row[6].get(key) for row in rows] for key in keys}
+
+    quotable = (coverages > 0) & (terms > 0)
+    old_quotes = np.zeros(len(rows))
+    new_quotes = np.zeros(len(rows))
+    if quotable.any():
+        selected = np.flatnonzero(quotable)
+        sub_columns = {key: [column[i] for i in selected] for key, column in columns.items()}
+        sub_types = [types[i] for i in selected]
+        old_quotes[selected] = baseline.quote_batch(sub_types, coverages[selected], terms[selected], sub_columns)
+        new_quotes[selected] = current.quote_batch(sub_types, coverages[selected], terms[selected], sub_columns)
+    scale = np.divide(new_quotes, old_quotes, out=np.ones(len(rows)), where=old_quotes > 0)
+    return round_cents(premiums * scale).tolist()
+
+
+def _term_months(record: Dict) -> int:
+    try:
+        start = datetime.fromisoformat(str(record["start_date"])[:10])
+        end = datetime.fromisoformat(str(record["end_date"])[:10])
+    except (KeyError, TypeError, ValueError):
+        return 0
+    return PolicyCalculator.calculate_policy_term(start, end)
+
+
+class RerateJob:
+    """
+    Reprices every stored policy after the rate tables change.
+
+    Customers are read one unit at a time (a store shard, or a page of customers
+    with the SQLite backend). Each unit's policies are split into chunks priced
+    by a process pool. The unit's new premiums are then written back in one batch
+    and appended to the CSV diff report, and a checkpoint records the unit.
+    Every rewritten policy keeps a "rerating" marker with the job fingerprint and
+    its previous premium, so a resumed run reports it without pricing it twice.
+    """
+
+    CHECKPOINT_FILE = os.path.join("data", "rerating_checkpoint.json")
+    REPORT_FILE = os.path.join("data", "rerating_report.csv")
+    BASELINE_FILE = os.path.join("data", "rate_tables_baseline.json")
+    CHUNK_SIZE = 2000
+    PAGE_SIZE = 500                 # Customers per unit with the SQLite backend
+    REPORT_FIELDS = ["policy_id", "customer_email", "policy_type", "old_premium", "new_premium", "change", "change_pct"]
+
+    def __init__(self, baseline_tables: Dict, current_tables: Optional[Dict] = None,
+                 profile: str = "policy_calculator", workers: Optional[int] = None,
+                 chunk_size: int = CHUNK_SIZE, checkpoint_path: Optional[str] = None,
+                 report_path: Optional[str] = None, dry_run: bool = False):
+        self.baseline_tables = baseline_tables
+        self.current_tables = current_tables if current_tables is not None else RatingEngine.tables()
+        self.profile = profile
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.checkpoint_path = checkpoint_path or RerateJob.CHECKPOINT_FILE
+        self.report_path = report_path or RerateJob.REPORT_FILE
+        self.dry_run = dry_run
+        self.fingerprint = hashlib.sha256(json.dumps(
+            [profile, baseline_tables["profiles"].get(profile), self.current_tables["profiles"].get(profile)],
+            sort_keys=True
+        ).encode()).hexdigest()[:16]
+        self.factor_keys = {factor.key for factors in RatingEngine.compile(self.current_tables)[profile].factors.values()
+                            for factor in factors}
+
+    # ------------------------------------------------------------------
+    # Checkpoint
+    # ------------------------------------------------------------------
+    def _load_checkpoint(self) -> Optional[Dict]:
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if checkpoint.get("fingerprint") != self.fingerprint or checkpoint.get("dry_run") != self.dry_run:
+            print("Ignoring checkpoint from a different re-rating job")
+            return None
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint: Dict):
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+    # ------------------------------------------------------------------
+    # Streaming
+    # ------------------------------------------------------------------
+    def _units(self, cursor: Any) -> Iterator[Tuple[Any, Dict[str, Dict]]]:
+        """Yield (cursor after the unit, {email: record}) from the storage backend"""
+        backend = DataStorageService.get_backend()
+        if backend:
+            for page in backend.iter_customer_pages(RerateJob.PAGE_SIZE, after=cursor):
+                yield max(page), page
+            return
+        store = DataStorageService.get_store()
+        start = cursor or 0
+        for index, shard in enumerate(store.iter_shards(start), start):
+            yield index + 1, shard
+
+    def _rows(self, customers: Dict[str, Dict]) -> Tuple[List[Row], List[Tuple[Row, float]]]:
+        """
+        Rows to price, and rows not to price with their previous premium: those
+        this job already rewrote, and those already quoted with the current tables
+        """
+        pending, done = [], []
+        current_version = self.current_tables.get("version")
+        for email, record in customers.items():
+            policies = record.get("policies") if isinstance(record, dict) else None
+            if not isinstance(policies, dict):
+                continue
+            for policy_id, data in policies.items():
+                if not isinstance(data, dict):
+                    continue
+                factors = {key: data[key] for key in self.factor_keys if key in data}
+                row = (email, policy_id, str(data.get("policy_type", "")), float(data.get("coverage_amount") or 0.0),
+                       _term_months(data), float(data.get("premium") or 0.0), factors)
+                marker = data.get("rerating")
+                if isinstance(marker, dict) and marker.get("job") == self.fingerprint:
+                    done.append((row, float(marker.get("previous_premium", row[5]))))
+                elif current_version is not None and data.get("rate_table_version") == current_version:
+                    done.append((row, row[5]))  # Priced after the table change; scaling again would double it
+                else:
+                    pending.append(row)
+        return pending, done
+
+    # ------------------------------------------------------------------
+    # Run
+    # ------------------------------------------------------------------
+    def run(self, restart: bool = False) -> Dict[str, Any]:
+        """Re-rate the whole book, resuming from the checkpoint unless restart is set"""
+        checkpoint = None if restart else self._load_checkpoint()
+        if checkpoint is None:
+            checkpoint = {"fingerprint": self.fingerprint, "dry_run": self.dry_run, "cursor": None,
+                          "report_bytes": 0, "policies": 0, "changed": 0, "old_total": 0.0, "new_total": 0.0}
+        else:
+            print(f"Resuming re-rating job {self.fingerprint} after {checkpoint['policies']} policies")
+
+        if not os.path.exists(self.report_path):
+            checkpoint["report_bytes"] = 0
+        mode = 'r+' if checkpoint["report_bytes"] else 'w'
+        report_dir = os.path.dirname(self.report_path)
+        if report_dir:
+            os.makedirs(report_dir, exist_ok=True)
+        started = time.perf_counter()
+        priced = 0
+        with open(self.report_path, mode, newline='') as report, ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker,
+                initargs=(self.profile, self.baseline_tables, self.current_tables)) as pool:
+            # Drop report rows written after the last checkpoint; they are rewritten below
+            report.seek(checkpoint["report_bytes"])
+            report.truncate()
+            writer = csv.writer(report)
+            if not checkpoint["report_bytes"]:
+                writer.writerow(RerateJob.REPORT_FIELDS)
+
+            # Keep a few units in flight so every worker stays busy; finish them in order
+            in_flight = deque()
+            units = self._units(checkpoint["cursor"])
+            while True:
+                while len(in_flight) < 2 * self.workers:
+                    unit = next(units, None)
+                    if unit is None:
+                        break
+                    cursor, customers = unit
+                    pending, done = self._rows(customers)
+                    futures = [pool.submit(rerate_rows, pending[i:i + self.chunk_size])
+                               for i in range(0, len(pending), self.chunk_size)]
+                    in_flight.append((cursor, pending, done, futures))
+                if not in_flight:
+                    break
+                cursor, pending, done, futures = in_flight.popleft()
+                new_premiums = [premium for future in futures for premium in future.result()]
+                self._finish_unit(checkpoint, writer, report, cursor, pending, new_premiums, done)
+                priced += len(pending)
+
+        elapsed = time.perf_counter() - started
+        summary = dict(checkpoint, seconds=round(elapsed, 2),
+                       policies_per_second=round(priced / elapsed, 1) if elapsed else 0.0)
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        return summary
+
+    def _finish_unit(self, checkpoint: Dict, writer, report, cursor: Any, pending: List[Row],
+                     new_premiums: List[float], done: List[Tuple[Row, float]]):
+        """Write one unit back in a batch, report it and advance the checkpoint"""
+        updates: Dict[str, Dict[str, Dict]] = {}
+        diffs = [(row, previous, row[5]) for row, previous in done]
+        for row, new_premium in zip(pending, new_premiums):
+            diffs.append((row, row[5], new_premium))
+            if new_premium != row[5]:
+                updates.setdefault(row[0], {})[row[1]] = {
+                    "premium": new_premium,
+                    "rate_table_version": self.current_tables["version"],
+                    "rerating": {"job": self.fingerprint, "previous_premium": row[5]}
+                }
+        if updates and not self.dry_run:
+            DataStorageService.update_policies(updates)
+
+        for row, old, new in diffs:
+            change = round(new - old, 2)
+            writer.writerow([row[1], row[0], row[2], f"{old:.2f}", f"{new:.2f}", f"{change:.2f}",
+                             f"{change / old * 100:.2f}" if old else ""])
+            checkpoint["policies"] += 1
+            checkpoint["changed"] += 1 if change else 0
+            checkpoint["old_total"] = round(checkpoint["old_total"] + old, 2)
+            checkpoint["new_total"] = round(checkpoint["new_total"] + new, 2)
+        report.flush()
+        os.fsync(report.fileno())
+        checkpoint["cursor"] = cursor
+        checkpoint["report_bytes"] = report.tell()
+        self._save_checkpoint(checkpoint)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reprice stored policies after a rate table change")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    snapshot = subparsers.add_parser("snapshot", help="Record the current rate tables as the baseline")
+    snapshot.add_argument("--baseline", default=RerateJob.BASELINE_FILE)
+    run = subparsers.add_parser("run", help="Re-rate the book from the baseline to the current tables")
+    run.add_argument("--baseline", default=RerateJob.BASELINE_FILE,
+                     help="Rate tables the stored premiums were priced with")
+    run.add_argument("--profile", default="policy_calculator", help="Rate table profile used for policies")
+    run.add_argument("--workers", type=int, default=None)
+    run.add_argument("--chunk-size", type=int, default=RerateJob.CHUNK_SIZE)
+    run.add_argument("--report", default=RerateJob.REPORT_FILE)
+    run.add_argument("--dry-run", action="store_true", help="Write the report without changing premiums")
+    run.add_argument("--restart", action="store_true", help="Ignore any checkpoint and start over")
+    args = parser.parse_args()
+
+    if args.command == "snapshot":
+        save_tables(args.baseline, RatingEngine.tables())
+        print(f"Baseline rate tables written to {args.baseline}")
+        return
+
+    try:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Cannot read baseline rate tables {args.baseline}: {e}")
+        return
+    job = RerateJob(baseline, profile=args.profile, workers=args.workers, chunk_size=args.chunk_size,
+                    report_path=args.report, dry_run=args.dry_run)
+    summary = job.run(restart=args.restart)
+    print(f"Re-rated {summary['policies']} policies ({summary['changed']} changed) "
+          f"in {summary['seconds']}s, {summary['policies_per_second']} policies/s")
+    print(f"Premium total {summary['old_total']:,.2f} -> {summary['new_total']:,.2f}; report: {args.report}")
+    if not args.dry_run:
+        # The book is now priced with the current tables
+        save_tables(args.baseline, job.current_tables)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+# scenario_engine.py
+import argparse
+import json
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from policy_book import PolicyBook
+from policy_enums import PolicyType, PolicyStatus
+from rating_engine import RatingEngine, RatePlan, RateFactor, round_cents, _numeric_column
+
+
+class Perturbation:
+    """
+    One axis of a what-if grid: a rate table parameter and the values to try.
+
+    target is a policy type name. Without key the axis changes that type's base
+    rate; with key it changes a risk factor of the type, either one entry (a
+    table name such as "STREET", or a band number) or the whole factor. mode
+    "scale" multiplies the current value by each value, "set" replaces it.
+    """
+
+    __slots__ = ("target", "values", "key", "entry", "mode")
+
+    def __init__(self, target: str, values: Sequence[float], key: Optional[str] = None,
+                 entry: Any = None, mode: str = "scale"):
+        if target not in PolicyType.__members__:
+            raise ValueError(f"Unknown policy type: {target}")
+        if mode not in ("scale", "set"):
+            raise ValueError(f"Unknown perturbation mode: {mode}")
+        if mode == "set" and key is not None and entry is None:
+            raise ValueError("Setting a risk factor needs an entry")
+        if len(values) == 0:
+            raise ValueError("A perturbation needs at least one value")
+        self.target = target
+        self.values = np.asarray(values, dtype=np.float64)
+        self.key = key
+        self.entry = entry.upper() if isinstance(entry, str) else entry
+        self.mode = mode
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> 'Perturbation':
+        """Axis from {"type": "CAR", "key": ..., "entry": ..., "scale": [...]} (or "set": [...])"""
+        mode = "set" if "set" in data else "scale"
+        return Perturbation(str(data["type"]).upper(), data[mode], data.get("key"), data.get("entry"), mode)
+
+    def label(self, value: float) -> str:
+        name = f"{self.target} base rate" if self.key is None else f"{self.target} {self.key}"
+        if self.entry is not None:
+            name += f"[{self.entry}]"
+        return f"{name} {'x' if self.mode == 'scale' else '='}{value:g}"
+
+    def apply(self, current: np.ndarray, values: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """current with this axis applied, broadcasting values (scenarios x 1) over current (1 x policies)"""
+        changed = current * values if self.mode == "scale" else np.broadcast_to(values, np.broadcast(current, values).shape)
+        return changed if rows is None else np.where(rows, changed, current)
+
+
+class _FactorColumn:
+    """A risk factor priced for one policy type in the base case, with its table entry or band per row"""
+
+    __slots__ = ("factor", "base", "entries")
+
+    def __init__(self, factor: RateFactor, columns: Dict, size: int):
+        self.factor = factor
+        self.base = factor.column(columns, size)
+        self.entries = None
+        if factor.kind == "table":
+            values = columns.get(factor.key, [None] * size)
+            self.entries = np.array([str(factor.default if value is None else value).upper() for value in values],
+                                    dtype=object)
+        elif factor.kind == "bands":
+            raw = _numeric_column(columns, factor.key, float(factor.default), size)
+            self.entries = np.searchsorted(factor.bounds, raw, side="left")
+
+    def rows(self, entry: Any) -> np.ndarray:
+        """Mask of the rows priced by one table entry or band"""
+        return self.entries == entry
+
+
+class _TypeGroup:
+    """Base-case intermediates for the quotable policies of one type, computed once per engine"""
+
+    def __init__(self, plan: RatePlan, policy_type: PolicyType, rows: np.ndarray, book: PolicyBook,
+                 terms: np.ndarray, columns: Dict, has_factors: np.ndarray):
+        self.policy_type = policy_type
+        self.rows = rows
+        self.coverage = book.coverage[rows]
+        self.stored = book.premium[rows]
+        self.status_code = book.status_code[rows]
+        self.base_rate = plan.base_rates.get(policy_type, plan.default_base_rate)
+        self.type_multiplier = plan.type_multipliers.get(policy_type, 1.0) if plan.type_multipliers is not None else None
+        self.term_ratio = terms[rows] / plan.months_per_year if plan.months_per_year else None
+        self.has_factors = has_factors[rows]
+        self.factors: List[_FactorColumn] = []
+        if plan.combine != "each" and self.has_factors.any():
+            sub_columns = {key: [column[i] for i in rows] for key, column in columns.items()}
+            self.factors = [_FactorColumn(factor, sub_columns, len(rows)) for factor in plan.factors.get(policy_type, ())]
+        self.base_quote = None
+
+
+class ScenarioResult:
+    """Projected premium totals per scenario: by_type is scenarios x PolicyType, by_status scenarios x PolicyStatus"""
+
+    def __init__(self, labels: List[str], by_type: np.ndarray, by_status: np.ndarray,
+                 base_by_type: np.ndarray, base_by_status: np.ndarray):
+        self.labels = labels
+        self.by_type = by_type
+        self.by_status = by_status
+        self.base_by_type = base_by_type
+        self.base_by_status = base_by_status
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @property
+    def totals(self) -> np.ndarray:
+        return self.by_type.sum(axis=1)
+
+    @property
+    def base_total(self) -> float:
+        return float(self.base_by_type.sum())
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """One dictionary per scenario with totals by type and status and the change from the book"""
+        rows = []
+        for i, label in enumerate(self.labels):
+            total = float(self.totals[i])
+            rows.append({
+                "scenario": label,
+                "total_premium": round(total, 2),
+                "change": round(total - self.base_total, 2),
+                "change_pct": round((total / self.base_total - 1) * 100, 2) if self.base_total else 0.0,
+                "by_type": {t.name: round(float(self.by_type[i, j]), 2) for j, t in enumerate(PolicyType)},
+                "by_status": {s.name: round(float(self.by_status[i, j]), 2) for j, s in enumerate(PolicyStatus)},
+            })
+        return rows
+
+    def print_report(self):
+        print(f"\nCurrent book: {self.base_total:,.2f}")
+        for row in self.to_rows():
+            print(f"\n{row['scenario']}")
+            print(f"    Total premium: {row['total_premium']:,.2f} ({row['change']:+,.2f}, {row['change_pct']:+.2f}%)")
+            print("    " + ", ".join(f"{name}: {value:,.2f}" for name, value in row["by_type"].items() if value))
+
+
+class ScenarioEngine:
+    """
+    What-if pricing of a whole policy book under a grid of rate table changes.
+
+    The book is priced once with the current tables: per type, the coverage,
+    term ratio and every risk factor column are computed up front, together with
+    the table entry or band each policy falls in. A grid of Perturbation axes is
+    then evaluated for all scenarios at once by broadcasting a scenarios x
+    policies array over those base-case columns, a block of scenarios at a time.
+    Each policy's projected premium is its stored premium scaled by scenario
+    quote / base quote, as in the re-rating job, so totals move from the book as
+    it stands; policies that cannot be quoted keep their premium.
+    """
+
+    MAX_CELLS = 2000000         # Scenario x policy cells evaluated per block
+
+    def __init__(self, book: PolicyBook, profile: str = "calculations", tables: Optional[Dict] = None):
+        tables = tables if tables is not None else RatingEngine.tables()
+        self.plan = RatePlan(profile, tables["profiles"][profile])
+        self.book = book
+        terms = book.term_months().astype(np.float64)
+        quotable = book.coverage > 0
+        if self.plan.months_per_year:
+            quotable &= terms > 0
+
+        # Risk factors stored on each policy, keyed like the quote inputs
+        keys = sorted({factor.key for factors in self.plan.factors.values() for factor in factors})
+        columns = {key: [record.get(key) for record in book._records] for key in keys}
+        has_factors = np.array([any(key in record for key in keys) for record in book._records], dtype=bool)
+
+        self.groups: List[_TypeGroup] = []
+        fixed = np.ones(len(book), dtype=bool)
+        for policy_type in PolicyType:
+            rows = np.flatnonzero(quotable & (book.type_code == policy_type.value))
+            if len(rows):
+                group = _TypeGroup(self.plan, policy_type, rows, book, terms, columns, has_factors)
+                group.base_quote = self._quote(group, [], None)[0]
+                self.groups.append(group)
+                fixed[rows] = False
+
+        # Stored premiums of the policies no scenario can change
+        self.fixed_by_type = self._sum_by(book.type_code[fixed], book.premium[fixed], PolicyType)
+        self.fixed_by_status = self._sum_by(book.status_code[fixed], book.premium[fixed], PolicyStatus)
+        self.base_by_type = self._sum_by(book.type_code, book.premium, PolicyType)
+        self.base_by_status = self._sum_by(book.status_code, book.premium, PolicyStatus)
+
+    @classmethod
+    def from_storage(cls, profile: str = "calculations") -> 'ScenarioEngine':
+        return cls(PolicyBook.from_storage(), profile)
+
+    @staticmethod
+    def _sum_by(codes: np.ndarray, values: np.ndarray, members) -> np.ndarray:
+        sums = np.bincount(codes, weights=values, minlength=len(members) + 1)
+        return np.array([sums[member.value] for member in members], dtype=np.float64)
+
+    def _check(self, axis: Perturbation):
+        """Raise ValueError for an axis this plan cannot apply"""
+        if axis.key is None:
+            return
+        if self.plan.combine == "each":
+            raise ValueError(f"Profile {self.plan.name} has no per-type risk factors to perturb")
+        factors = {factor.key: factor for factor in self.plan.factors.get(PolicyType[axis.target], ())}
+        factor = factors.get(axis.key)
+        if factor is None:
+            raise ValueError(f"No {axis.key} factor for {axis.target} in profile {self.plan.name}")
+        if axis.entry is None:
+            return
+        if factor.kind == "table" and axis.entry not in factor.table:
+            raise ValueError(f"{axis.key} has no entry {axis.entry}")
+        if factor.kind == "bands" and (not isinstance(axis.entry, int) or not 0 <= axis.entry < len(factor.values)):
+            raise ValueError(f"{axis.key} has no band {axis.entry}")
+        if factor.kind == "linear":
+            raise ValueError(f"{axis.key} is linear; scale the whole factor instead")
+
+    def _quote(self, group: _TypeGroup, axes: List[Perturbation], values: Optional[List[np.ndarray]]) -> np.ndarray:
+        """Quotes (scenarios x policies) for one group, in the operation order of RatePlan.quote"""
+        name = group.policy_type.name
+        rate = np.array([[group.base_rate]])
+        for axis, axis_values in zip(axes, values or []):
+            if axis.target == name and axis.key is None:
+                rate = axis.apply(rate, axis_values)
+
+        premium = group.coverage[None, :] * rate
+        if group.type_multiplier is not None:
+            premium = premium * group.type_multiplier
+        if group.term_ratio is not None:
+            premium = premium * group.term_ratio[None, :]
+
+        if group.factors:
+            multiplier = np.ones((1, len(group.rows)))
+            for column in group.factors:
+                factor = column.base[None, :]
+                for axis, axis_values in zip(axes, values or []):
+                    if axis.target == name and axis.key == column.factor.key:
+                        rows = None if axis.entry is None else column.rows(axis.entry)[None, :]
+                        factor = axis.apply(factor, axis_values, rows)
+                if self.plan.combine == "product":
+                    multiplier = multiplier * factor
+                else:
+                    multiplier = multiplier + factor
+            premium = np.where(group.has_factors[None, :], premium * multiplier, premium)
+
+        return round_cents(premium.ravel()).reshape(premium.shape)
+
+    def evaluate(self, axes: List[Perturbation]) -> ScenarioResult:
+        """Totals by type and status for every combination of the axis values"""
+        for axis in axes:
+            self._check(axis)
+        shape = tuple(len(axis.values) for axis in axes)
+        grid = np.indices(shape).reshape(len(axes), -1)
+        count = grid.shape[1]
+        labels = [", ".join(axis.label(axis.values[grid[a, s]]) for a, axis in enumerate(axes)) or "No change"
+                  for s in range(count)]
+
+        by_type = np.tile(self.fixed_by_type, (count, 1))
+        by_status = np.tile(self.fixed_by_status, (count, 1))
+        status_index = {status.value: j for j, status in enumerate(PolicyStatus)}
+        for group in self.groups:
+            type_index = list(PolicyType).index(group.policy_type)
+            statuses = np.zeros((len(group.rows), len(PolicyStatus)))
+            statuses[np.arange(len(group.rows)), [status_index[code] for code in group.status_code]] = 1.0
+            block = max(1, ScenarioEngine.MAX_CELLS // len(group.rows))
+            for first in range(0, count, block):
+                scenarios = slice(first, min(first + block, count))
+                values = [axis.values[grid[a, scenarios]][:, None] for a, axis in enumerate(axes)]
+                quotes = self._quote(group, axes, values)
+                scale = np.divide(quotes, group.base_quote, out=np.ones(quotes.shape), where=group.base_quote > 0)
+                projected = group.stored * scale
+                projected = round_cents(projected.ravel()).reshape(projected.shape)
+                by_type[scenarios, type_index] += projected.sum(axis=1)
+                by_status[scenarios] += projected @ statuses
+        return ScenarioResult(labels, by_type, by_status, self.base_by_type, self.base_by_status)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="What-if premiums for the stored policy book")
+    parser.add_argument("grid", help='JSON file: {"profile": ..., "axes": [{"type": "CAR", "scale": [1.0, 1.1]}, ...]}')
+    args = parser.parse_args()
+    try:
+        with open(args.grid, 'r') as f:
+            grid = json.load(f)
+        axes = [Perturbation.from_dict(axis) for axis in grid.get("axes", [])]
+        result = ScenarioEngine.from_storage(grid.get("profile", "calculations")).evaluate(axes)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Cannot run scenarios from {args.grid}: {e}")
+        return
+    result.print_report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# schema_migrations.py
+import io
+import json
+import os
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from policy_enums import PolicyStatus
+
+SCHEMA_VERSION_KEY = "schema_version"   # Reserved top-level key in versioned data files
+CURRENT_SCHEMA_VERSION = 2              # Files without the key are version 1
+_CLAIM_STATUS_ALIASES = {"APPROVE": "APPROVED", "REJECT": "REJECTED", "REVIEW": "REVIEWING", "SETTLE": "SETTLED"}
+
+
+# Every spelling of a policy status found in version 1 data, resolved once
+_STATUS_LOOKUP: Dict[Any, PolicyStatus] = {}
+for _status in PolicyStatus:
+    for _key in (f"PolicyStatus.{_status.name}", _status.name, f"PolicyStatus({_status.value})",
+                 str(_status.value), _status.value, _status):
+        _STATUS_LOOKUP[_key] = _status
+
+
+def parse_status(value: Any) -> Optional[PolicyStatus]:
+    """Resolve any stored policy status representation to a PolicyStatus, or None if unknown"""
+    status = _STATUS_LOOKUP.get(value)
+    if status is None and isinstance(value, str):
+        status = _STATUS_LOOKUP.get(value.strip().upper().replace("POLICYSTATUS.", "PolicyStatus."))
+    return status
+
+
+def canonical_claim_status(status: Any) -> Any:
+    """Map a stored claim status such as APPROVE or approved to its ClaimStatus value"""
+    if not isinstance(status, str):
+        return status
+    name = status.strip().upper()
+    if name.startswith("CLAIMSTATUS."):
+        name = name.split(".", 1)[1]
+    return _CLAIM_STATUS_ALIASES.get(name, name)
+
+
+def canonical_policy_status(status: Any) -> Any:
+    """Map any stored policy status spelling to "PolicyStatus.NAME" """
+    member = parse_status(status)
+    return f"PolicyStatus.{member.name}" if member else status
+
+
+# ----------------------------------------------------------------------
+# Streaming JSON object reader/writer
+# ----------------------------------------------------------------------
+def iter_json_object(f, chunk_size: int = 1 << 16) -> Iterator[Tuple[str, Any]]:
+    """Yield (key, value) pairs of a top-level JSON object, holding one value at a time"""
+    for key, value, _, _ in _scan_json_object(f, chunk_size):
+        yield key, value
+
+
+def index_json_object(f) -> Dict[str, Tuple[int, int]]:
+    """
+    Byte range (start, end) of every value in a top-level JSON object read from
+    a binary file, so one value can later be read with a single seek.
+    """
+    # Latin-1 maps each byte to one character, so text positions are byte offsets
+    text = io.TextIOWrapper(f, encoding="latin-1", newline="")
+    try:
+        return {key: (start, end) for key, _, start, end in _scan_json_object(text)}
+    finally:
+        text.detach()
+
+
+def _scan_json_object(f, chunk_size: int = 1 << 16) -> Iterator[Tuple[str, Any, int, int]]:
+    """Yield (key, value, start, end) with each value's position in the stream"""
+    decoder = json.JSONDecoder()
+    buf = ""
+    base = 0    # Stream position of buf[0]
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buf, base, pos, eof
+        if eof:
+            return False
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buf = buf[pos:] + chunk
+        base += pos
+        pos = 0
+        return True
+
+    def skip_whitespace() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not fill():
+                raise ValueError("Unexpected end of JSON object")
+
+    def decode_value() -> Any:
+        nonlocal pos
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                # A value touching the end of the buffer may be a truncated number
+                if end < len(buf) or eof:
+                    pos = end
+                    return value
+            except ValueError:
+                if eof:
+                    raise
+            fill()
+
+    if skip_whitespace() != "{":
+        raise ValueError("Expected a JSON object")
+    pos += 1
+    if skip_whitespace() == "}":
+        return
+    while True:
+        if skip_whitespace() != '"':
+            raise ValueError("Expected a string key in JSON object")
+        key = decode_value()
+        if skip_whitespace() != ":":
+            raise ValueError("Expected ':' after object key")
+        pos += 1
+        skip_whitespace()
+        start = base + pos
+        value = decode_value()
+        yield key, value, start, base + pos
+        separator = skip_whitespace()
+        pos += 1
+        if separator == "}":
+            return
+        if separator != ",":
+            raise ValueError("Expected ',' or '}' in JSON object")
+
+
+def read_schema_version(path: str) -> int:
+    """Read a file's schema version; versioned writers always put the key first"""
+    try:
+        with open(path, 'r') as f:
+            for key, value in iter_json_object(f):
+                if key == SCHEMA_VERSION_KEY:
+                    return int(value)
+                return 1
+    except (OSError, ValueError):
+        return 1
+    return 1
+
+
+def rewrite_json_object(path: str, migrate: Callable[[str, Any], Any]) -> int:
+    """Stream a JSON object file through migrate(key, value) into a versioned copy"""
+    tmp_path = path + ".migrating"
+    count = 0
+    with open(path, 'r') as src, open(tmp_path, 'w') as dst:
+        dst.write("{\n    " + json.dumps(SCHEMA_VERSION_KEY) + ": " + str(CURRENT_SCHEMA_VERSION))
+        for key, value in iter_json_object(src):
+            if key == SCHEMA_VERSION_KEY:
+                continue
+            body = json.dumps(migrate(key, value), indent=4).replace("\n", "\n    ")
+            dst.write(",\n    " + json.dumps(key) + ": " + body)
+            count += 1
+        dst.write("\n}")
+        dst.flush()
+        os.fsync(dst.fileno())
+    os.replace(tmp_path, path)
+    return count
+
+
+# ----------------------------------------------------------------------
+# Record migrations, registered in MIGRATIONS by the version they upgrade from
+# ----------------------------------------------------------------------
+def customer_v1_to_v2(key: str, record: Any) -> Any:
+    """Store every policy status as "PolicyStatus.NAME" """
+    if isinstance(record, dict) and isinstance(record.get("policies"), dict):
+        for policy in record["policies"].values():
+            if isinstance(policy, dict) and "status" in policy:
+                policy["status"] = canonical_policy_status(policy["status"])
+    return record
+
+
+def claim_v1_to_v2(key: str, record: Any) -> Any:
+    """Store every claim status as its ClaimStatus value"""
+    if isinstance(record, dict) and "status" in record:
+        record["status"] = canonical_claim_status(record["status"])
+    return record
+
+
+MIGRATIONS: Dict[str, Dict[int, Callable[[str, Any], Any]]] = {
+    "customers": {1: customer_v1_to_v2},
+    "claims": {1: claim_v1_to_v2},
+}
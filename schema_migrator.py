@@ -0,0 +1,91 @@
+# schema_migrator.py
+import argparse
+import json
+import os
+from typing import Any, List
+from claims_storage_service import ClaimsStorageService
+from data_storage_service import DataStorageService
+from schema_migrations import (CURRENT_SCHEMA_VERSION, MIGRATIONS, canonical_claim_status, claim_v1_to_v2,
+                               read_schema_version, rewrite_json_object)
+
+
+class SchemaMigrator:
+    """
+    Upgrades data files to CURRENT_SCHEMA_VERSION one record at a time.
+
+    Files are found where the storage services are configured to keep them,
+    and each is rewritten under the lock its writers hold, so a session saving
+    a customer or claim meanwhile waits instead of being overwritten.
+    """
+
+    @staticmethod
+    def migrate_file(path: str, kind: str) -> bool:
+        """Migrate one JSON object file in place; returns True if it was rewritten"""
+        if not os.path.exists(path):
+            return False
+        version = read_schema_version(path)
+        if version >= CURRENT_SCHEMA_VERSION:
+            return False
+        steps = [MIGRATIONS[kind].get(v) for v in range(version, CURRENT_SCHEMA_VERSION)]
+        steps = [step for step in steps if step]
+
+        def migrate(key: str, value: Any) -> Any:
+            for step in steps:
+                value = step(key, value)
+            return value
+
+        count = rewrite_json_object(path, migrate)
+        print(f"Migrated {path} from schema v{version} to v{CURRENT_SCHEMA_VERSION} ({count} records)")
+        return True
+
+    @staticmethod
+    def migrate_claims_journal(path: str) -> bool:
+        """Rewrite claim statuses in the claims journal line by line (caller holds the journal's lock)"""
+        if not os.path.exists(path):
+            return False
+        tmp_path = path + ".migrating"
+        with open(path, 'r') as src, open(tmp_path, 'w') as dst:
+            for line in src:
+                if not line.endswith("\n"):
+                    break  # Drop a torn tail, as readers do
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("op") == "status":
+                    record["status"] = canonical_claim_status(record.get("status"))
+                elif record.get("op") == "upsert":
+                    claim_v1_to_v2(record.get("claim_id"), record.get("claim"))
+                dst.write(json.dumps(record, default=str) + "\n")
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp_path, path)
+        return True
+
+    @staticmethod
+    def migrate_all() -> List[str]:
+        """Bring the configured customer and claims files up to date; returns rewritten paths"""
+        migrated = DataStorageService.get_store().rewrite_shards(
+            lambda path: SchemaMigrator.migrate_file(path, "customers"))
+        if SchemaMigrator.migrate_file(DataStorageService.DATA_FILE, "customers"):
+            migrated.append(DataStorageService.DATA_FILE)
+
+        journal = ClaimsStorageService.get_journal()
+        with journal.write_lock():
+            if SchemaMigrator.migrate_file(journal.snapshot_path, "claims"):
+                migrated.append(journal.snapshot_path)
+                # Journal records written by older versions may hold the same old statuses
+                if SchemaMigrator.migrate_claims_journal(journal.journal_path):
+                    migrated.append(journal.journal_path)
+        return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upgrade the configured data files to the current schema version")
+    parser.parse_args()
+    migrated = SchemaMigrator.migrate_all()
+    print(f"{len(migrated)} file(s) migrated to schema v{CURRENT_SCHEMA_VERSION}")
+
+
+if __name__ == "__main__":
+    main()
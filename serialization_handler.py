@@ -3,6 +3,7 @@ import json
 import os
 from datetime import datetime
 from typing import Dict
+from document_cache import DocumentCache
 
 class SerializationHandler:
     """Handles JSON serialization/deserialization for the application"""
@@ -28,8 +29,10 @@ class SerializationHandler:
         """Save data to a JSON file"""
         try:
             file_path = SerializationHandler.get_file_path(filename)
+            text = json.dumps(data, indent=4)
             with open(file_path, 'w') as f:
-                json.dump(data, f, indent=4)
+                f.write(text)
+            DocumentCache.shared().put(file_path, text)
             return True
         except Exception as e:
             print(f"Error saving to JSON: {str(e)}")
@@ -40,8 +43,7 @@ class SerializationHandler:
         """Load data from a JSON file"""
         try:
             file_path = SerializationHandler.get_file_path(filename)
-            with open(file_path, 'r') as f:
-                return json.load(f)
+            return DocumentCache.shared().get(file_path)
         except Exception as e:
             print(f"Error loading from JSON: {str(e)}")
             return {}
\ No newline at end of file
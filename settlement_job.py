@@ -0,0 +1,175 @@
+# settlement_job.py
+import argparse
+import time
+from typing import Dict, List, Optional
+from claim import ClaimStatus
+from claim_lifecycle import ClaimLifecycle
+from claims_storage_service import ClaimsStorageService
+from financial_calculator import FinancialCalculator
+from payment import Payment
+from payment_storage_service import PaymentStorageService
+from policy import HealthPolicy
+from policy_book import PolicyBook
+from policy_enums import PolicyType
+
+
+class SettlementReport:
+    """Outcome and throughput of one settlement run"""
+
+    __slots__ = ("selected", "settled", "payments_created", "payments_reused", "zero_payout",
+                 "skipped", "changed", "failed", "total_paid", "chunks", "seconds")
+
+    def __init__(self):
+        self.selected = 0
+        self.settled = 0
+        self.payments_created = 0
+        self.payments_reused = 0       # Payment already stored by an earlier, interrupted run
+        self.zero_payout = 0           # Claim within the deductible: settled with nothing to pay
+        self.skipped: List[str] = []   # Claims whose policy could not be found or read
+        self.changed: List[str] = []   # Claims no longer approved when their chunk was settled
+        self.failed: List[str] = []    # Claims in chunks whose payments could not be stored
+        self.total_paid = 0.0
+        self.chunks = 0
+        self.seconds = 0.0
+
+    def claims_per_second(self) -> float:
+        return self.selected / self.seconds if self.seconds > 0 else 0.0
+
+    def print_report(self):
+        print("\n=== Settlement Run ===")
+        print(f"Approved claims selected: {self.selected:,} in {self.chunks:,} chunks")
+        print(f"Claims settled: {self.settled:,}")
+        print(f"Payments created: {self.payments_created:,} (${self.total_paid:,.2f})")
+        if self.payments_reused:
+            print(f"Payments already stored by an earlier run: {self.payments_reused:,}")
+        if self.zero_payout:
+            print(f"Settled with no payout (within deductible): {self.zero_payout:,}")
+        if self.skipped:
+            print(f"Skipped, policy not found or unreadable: {len(self.skipped):,}")
+        if self.changed:
+            print(f"Skipped, no longer approved: {len(self.changed):,}")
+        if self.failed:
+            print(f"Failed, payments not stored: {len(self.failed):,}")
+        print(f"Throughput: {self.claims_per_second():,.0f} claims/s over {self.seconds:.2f}s")
+
+
+class SettlementJob:
+    """
+    Turns every approved claim into a stored payment and marks it SETTLED.
+
+    Claims are joined to their policies through a policy-ID index over the
+    policy book and paid FinancialCalculator.calculate_claim_payout of the claim
+    amount, the policy's coverage and, for health policies, its deductible.
+    Each chunk is settled in one claims write: the claims are read again inside
+    it, and only those still APPROVED are paid and marked SETTLED. Payments are
+    created only if their ID, PAY_<claim ID>, is not stored yet, so a claim is
+    never paid twice and a payment already processed is never reset: a run that
+    stopped between storing payments and settling claims is finished by the
+    next run, which finds the stored payment and only settles the claim.
+    """
+
+    DEFAULT_CHUNK_SIZE = 500
+    PAYMENT_METHOD = "BANK_TRANSFER"
+
+    def __init__(self, book: Optional[PolicyBook] = None, chunk_size: Optional[int] = None,
+                 payment_method: Optional[str] = None):
+        self.book = book if book is not None else PolicyBook.from_storage()
+        self.row_of = {policy_id: row for row, policy_id in enumerate(self.book.policy_ids)}
+        self.chunk_size = max(1, chunk_size or SettlementJob.DEFAULT_CHUNK_SIZE)
+        self.payment_method = payment_method or SettlementJob.PAYMENT_METHOD
+
+    @staticmethod
+    def payment_id(claim_id: str) -> str:
+        return f"PAY_{claim_id}"
+
+    @staticmethod
+    def select_claims() -> Dict[str, Dict]:
+        """Every stored claim that is approved and not yet settled"""
+        backend = ClaimsStorageService.get_backend()
+        if backend:
+            return backend.load_claims_by_status(ClaimStatus.APPROVED.value)
+        return {claim_id: claim for claim_id, claim in ClaimsStorageService.load_all_claims().items()
+                if isinstance(claim, dict) and claim.get("status") == ClaimStatus.APPROVED.value}
+
+    def payout(self, claim: Dict) -> Optional[float]:
+        """Amount payable for a claim, or None if its policy is not in the book or cannot be read"""
+        row = self.row_of.get(claim.get("policy_id"))
+        if row is None:
+            return None
+        deductible = 0.0
+        if self.book.type_code[row] == PolicyType.HEALTH.value:
+            try:
+                policy = self.book.policy(row)
+            except (KeyError, ValueError, TypeError, AttributeError) as e:
+                print(f"Error loading policy {claim.get('policy_id')}: {str(e)}")
+                return None
+            deductible = policy.deductible if isinstance(policy, HealthPolicy) else 0.0
+        return FinancialCalculator.calculate_claim_payout(float(claim.get("amount") or 0.0),
+                                                          float(self.book.coverage[row]), deductible)
+
+    def run(self, claims: Optional[Dict[str, Dict]] = None) -> SettlementReport:
+        """Settle the given approved claims (all of them by default), chunk by chunk"""
+        started = time.perf_counter()
+        report = SettlementReport()
+        if claims is None:
+            claims = SettlementJob.select_claims()
+        report.selected = len(claims)
+        claim_ids = sorted(claims)
+        for start in range(0, len(claim_ids), self.chunk_size):
+            self._settle_chunk(claim_ids[start:start + self.chunk_size], report)
+            report.chunks += 1
+        report.seconds = time.perf_counter() - started
+        return report
+
+    def _settle_chunk(self, claim_ids: List[str], report: SettlementReport):
+        def pay(claims: Dict[str, Dict]) -> List[str]:
+            """Pay the claims still approved as stored (inside the claims write); returns those to settle"""
+            payments: List[Dict] = []
+            to_settle: List[str] = []
+            zero_payout = 0
+            for claim_id, claim in claims.items():
+                if claim.get("status") != ClaimStatus.APPROVED.value:
+                    continue
+                amount = self.payout(claim)
+                if amount is None:
+                    report.skipped.append(claim_id)
+                    continue
+                to_settle.append(claim_id)
+                if amount <= 0:
+                    zero_payout += 1
+                    continue
+                payment = Payment(SettlementJob.payment_id(claim_id), claim.get("policy_id", ""))
+                payment.set_amount(amount)
+                payment.set_payment_method(self.payment_method)
+                payments.append(payment.to_dict())
+
+            created = PaymentStorageService.create_payments(payments) if payments else []
+            if created is None:
+                report.failed.extend(to_settle)
+                return []
+            created_ids = set(created)
+            report.payments_created += len(created_ids)
+            report.payments_reused += len(payments) - len(created_ids)
+            report.zero_payout += zero_payout
+            report.total_paid += sum(payment["amount"] for payment in payments
+                                     if payment["payment_id"] in created_ids)
+            return to_settle
+
+        settled = ClaimsStorageService.update_claim_statuses(claim_ids, ClaimStatus.SETTLED.value, prepare=pay)
+        report.settled += len(settled)
+        done = set(settled).union(report.skipped, report.failed)
+        report.changed.extend(claim_id for claim_id in claim_ids if claim_id not in done)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pay and settle every approved claim")
+    parser.add_argument("--chunk-size", type=int, default=SettlementJob.DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--method", default=SettlementJob.PAYMENT_METHOD,
+                        choices=["BANK_TRANSFER", "CREDIT_CARD", "CHECK"])
+    args = parser.parse_args()
+    ClaimLifecycle.enable()  # Record the settlements like any other claim change
+    SettlementJob(chunk_size=args.chunk_size, payment_method=args.method).run().print_report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,572 @@
+# sqlite_storage.py
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from claims_journal import ClaimsJournal
+from customer_store import PartitionedCustomerStore
+
+
+class SQLiteStorage:
+    """Embedded SQLite backend for users, customers, policies, claims, sales and payments"""
+
+    DB_FILE = os.path.join("data", "insurance.db")
+    BACKEND_ENV_VAR = "INSURANCE_STORAGE_BACKEND"
+    DB_PATH_ENV_VAR = "INSURANCE_DB_PATH"
+
+    _shared: Optional['SQLiteStorage'] = None
+    _shared_lock = threading.Lock()
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            email TEXT PRIMARY KEY,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL,
+            name TEXT NOT NULL DEFAULT ''
+        );
+        CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);
+
+        CREATE TABLE IF NOT EXISTS customers (
+            email TEXT PRIMARY KEY,
+            name TEXT NOT NULL DEFAULT '',
+            contact_number TEXT NOT NULL DEFAULT '',
+            address TEXT NOT NULL DEFAULT '',
+            birth_date TEXT,
+            credit_score REAL NOT NULL DEFAULT 0.0
+        );
+
+        CREATE TABLE IF NOT EXISTS policies (
+            policy_id TEXT PRIMARY KEY,
+            customer_email TEXT NOT NULL,
+            policy_type TEXT NOT NULL,
+            status TEXT,
+            coverage_amount REAL NOT NULL DEFAULT 0.0,
+            premium REAL NOT NULL DEFAULT 0.0,
+            start_date TEXT,
+            end_date TEXT,
+            body TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_policies_customer ON policies(customer_email);
+        CREATE INDEX IF NOT EXISTS idx_policies_type_status ON policies(policy_type, status);
+
+        CREATE TABLE IF NOT EXISTS claims (
+            claim_id TEXT PRIMARY KEY,
+            policy_id TEXT NOT NULL,
+            customer_id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            amount REAL NOT NULL DEFAULT 0.0,
+            date_filed TEXT,
+            body TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_claims_status ON claims(status);
+        CREATE INDEX IF NOT EXISTS idx_claims_policy ON claims(policy_id);
+        CREATE INDEX IF NOT EXISTS idx_claims_customer ON claims(customer_id);
+
+        CREATE TABLE IF NOT EXISTS sales (
+            sale_id TEXT PRIMARY KEY,
+            policy_id TEXT NOT NULL,
+            customer_id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            amount REAL NOT NULL DEFAULT 0.0,
+            sale_date TEXT,
+            body TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_sales_customer ON sales(customer_id);
+        CREATE INDEX IF NOT EXISTS idx_sales_status ON sales(status);
+
+        CREATE TABLE IF NOT EXISTS payments (
+            payment_id TEXT PRIMARY KEY,
+            policy_id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            amount REAL NOT NULL DEFAULT 0.0,
+            payment_date TEXT,
+            body TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_payments_policy ON payments(policy_id);
+        CREATE INDEX IF NOT EXISTS idx_payments_status ON payments(status);
+
+        CREATE TABLE IF NOT EXISTS documents (
+            name TEXT PRIMARY KEY,
+            body TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """Open (and create if needed) the SQLite database in WAL mode"""
+        self.db_path = db_path or SQLiteStorage.DB_FILE
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SQLiteStorage.SCHEMA)
+
+    @classmethod
+    def shared(cls) -> Optional['SQLiteStorage']:
+        """Return the process-wide backend if INSURANCE_STORAGE_BACKEND=sqlite, else None"""
+        if os.environ.get(cls.BACKEND_ENV_VAR, "json").lower() != "sqlite":
+            return None
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(os.environ.get(cls.DB_PATH_ENV_VAR) or cls.DB_FILE)
+            return cls._shared
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Write transaction on this thread's connection, holding the database write
+        lock from its first read (BEGIN IMMEDIATE). A nested call joins the
+        transaction already open.
+        """
+        conn = self._connect()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @staticmethod
+    def _serialize_datetime(obj: Any) -> Any:
+        """Handle datetime serialization for JSON"""
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        return str(obj)
+
+    @staticmethod
+    def _dumps(data: Dict) -> str:
+        return json.dumps(data, default=SQLiteStorage._serialize_datetime)
+
+    # ------------------------------------------------------------------
+    # Users
+    # ------------------------------------------------------------------
+    def save_users(self, users: Dict[str, Dict]) -> bool:
+        """Replace the user table with the given email -> credentials mapping"""
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO users (email, password, role, name) VALUES (?, ?, ?, ?)",
+                [(email, u.get("password", ""), u.get("role", ""), u.get("name", "") or "")
+                 for email, u in users.items()]
+            )
+            existing = {row["email"] for row in conn.execute("SELECT email FROM users")}
+            removed = existing - set(users)
+            if removed:
+                conn.executemany("DELETE FROM users WHERE email = ?", [(e,) for e in removed])
+        return True
+
+    def load_users(self) -> Dict[str, Dict]:
+        """Load all users keyed by email"""
+        rows = self._connect().execute("SELECT email, password, role, name FROM users")
+        return {row["email"]: dict(row) for row in rows}
+
+    # ------------------------------------------------------------------
+    # Generic documents (anything DataStorage stores that has no table)
+    # ------------------------------------------------------------------
+    def save_document(self, name: str, data: Dict) -> bool:
+        """Store a whole JSON document under a name"""
+        if name == "users":
+            return self.save_users(data)
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO documents (name, body) VALUES (?, ?)",
+                         (name, self._dumps(data)))
+        return True
+
+    def load_document(self, name: str) -> Dict:
+        """Load a JSON document stored under a name"""
+        if name == "users":
+            return self.load_users()
+        row = self._connect().execute("SELECT body FROM documents WHERE name = ?", (name,)).fetchone()
+        return json.loads(row["body"]) if row else {}
+
+    # ------------------------------------------------------------------
+    # Customers and policies
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _policy_row(email: str, policy_id: str, policy: Dict) -> tuple:
+        return (
+            policy_id,
+            email,
+            str(policy.get("policy_type", "")),
+            str(policy.get("status")) if policy.get("status") is not None else None,
+            float(policy.get("coverage_amount", 0.0) or 0.0),
+            float(policy.get("premium", 0.0) or 0.0),
+            policy.get("start_date"),
+            policy.get("end_date"),
+            SQLiteStorage._dumps(policy)
+        )
+
+    def save_customer(self, record: Dict, replace_policies: bool = False) -> bool:
+        """Upsert one customer row and its policy rows in a single transaction"""
+        with self._connect() as conn:
+            self._write_customer(conn, record, replace_policies)
+        return True
+
+    def _write_customer(self, conn: sqlite3.Connection, record: Dict, replace_policies: bool):
+        info = record["customer_info"]
+        email = info["email"]
+        policies = record.get("policies", {})
+        conn.execute(
+            "INSERT OR REPLACE INTO customers (email, name, contact_number, address, birth_date, credit_score) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (email, info.get("name", ""), info.get("contact_number", ""), info.get("address", ""),
+             info.get("birth_date"), float(info.get("credit_score", 0.0) or 0.0))
+        )
+        if replace_policies:
+            conn.execute("DELETE FROM policies WHERE customer_email = ?", (email,))
+        conn.executemany(
+            "INSERT OR REPLACE INTO policies (policy_id, customer_email, policy_type, status, "
+            "coverage_amount, premium, start_date, end_date, body) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [self._policy_row(email, policy_id, policy) for policy_id, policy in policies.items()]
+        )
+
+    def _customer_from_row(self, row: sqlite3.Row, policies: Dict[str, Dict]) -> Dict:
+        return {
+            "customer_info": {
+                "email": row["email"],
+                "name": row["name"],
+                "contact_number": row["contact_number"],
+                "address": row["address"],
+                "birth_date": row["birth_date"],
+                "credit_score": row["credit_score"]
+            },
+            "policies": policies
+        }
+
+    def load_customer(self, email: str) -> Optional[Dict]:
+        """Load one customer and their policies using the primary key and customer index"""
+        conn = self._connect()
+        row = conn.execute("SELECT * FROM customers WHERE email = ?", (email,)).fetchone()
+        if row is None:
+            return None
+        policies = {
+            p["policy_id"]: json.loads(p["body"])
+            for p in conn.execute(
+                "SELECT policy_id, body FROM policies WHERE customer_email = ? ORDER BY policy_id", (email,))
+        }
+        return self._customer_from_row(row, policies)
+
+    def load_all_customers(self) -> Dict[str, Dict]:
+        """Load every customer with their policies, keyed by email"""
+        conn = self._connect()
+        policies_by_customer: Dict[str, Dict[str, Dict]] = {}
+        for p in conn.execute("SELECT policy_id, customer_email, body FROM policies ORDER BY policy_id"):
+            policies_by_customer.setdefault(p["customer_email"], {})[p["policy_id"]] = json.loads(p["body"])
+        return {
+            row["email"]: self._customer_from_row(row, policies_by_customer.get(row["email"], {}))
+            for row in conn.execute("SELECT * FROM customers ORDER BY email")
+        }
+
+    def iter_customer_pages(self, page_size: int = 500, after: Optional[str] = None) -> Iterator[Dict[str, Dict]]:
+        """Yield customers with their policies in email order, page_size customers at a time"""
+        conn = self._connect()
+        while True:
+            rows = conn.execute("SELECT * FROM customers WHERE email > ? ORDER BY email LIMIT ?",
+                                (after or "", page_size)).fetchall()
+            if not rows:
+                return
+            emails = [row["email"] for row in rows]
+            policies_by_customer: Dict[str, Dict[str, Dict]] = {}
+            placeholders = ",".join("?" * len(emails))
+            for p in conn.execute(f"SELECT policy_id, customer_email, body FROM policies "
+                                  f"WHERE customer_email IN ({placeholders}) ORDER BY policy_id", emails):
+                policies_by_customer.setdefault(p["customer_email"], {})[p["policy_id"]] = json.loads(p["body"])
+            yield {row["email"]: self._customer_from_row(row, policies_by_customer.get(row["email"], {}))
+                   for row in rows}
+            after = emails[-1]
+
+    def update_policies(self, updates: Dict[str, Dict[str, Dict]]) -> int:
+        """Set fields on stored policies (email -> policy_id -> fields) in one transaction"""
+        ids = {policy_id: (email, fields) for email, policies in updates.items() for policy_id, fields in policies.items()}
+        if not ids:
+            return 0
+        policy_ids = list(ids)
+        rows = []
+        with self._connect() as conn:
+            for start in range(0, len(policy_ids), 500):
+                batch = policy_ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for p in conn.execute(f"SELECT policy_id, body FROM policies WHERE policy_id IN ({placeholders})",
+                                      batch):
+                    email, fields = ids[p["policy_id"]]
+                    body = json.loads(p["body"])
+                    body.update(fields)
+                    rows.append(self._policy_row(email, p["policy_id"], body))
+            conn.executemany(
+                "INSERT OR REPLACE INTO policies (policy_id, customer_email, policy_type, status, "
+                "coverage_amount, premium, start_date, end_date, body) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def replace_all_customers(self, data: Dict[str, Dict]) -> bool:
+        """Replace the customer and policy tables with a full email -> record mapping"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM policies")
+            conn.execute("DELETE FROM customers")
+            for record in data.values():
+                if isinstance(record, dict) and "customer_info" in record:
+                    self._write_customer(conn, record, replace_policies=False)
+        return True
+
+    def get_highest_policy_number(self) -> int:
+        """Get the highest numeric suffix of POLxxx policy IDs"""
+        row = self._connect().execute(
+            "SELECT MAX(CAST(SUBSTR(policy_id, 4) AS INTEGER)) AS highest FROM policies "
+            "WHERE policy_id GLOB 'POL[0-9]*'"
+        ).fetchone()
+        return int(row["highest"] or 0)
+
+    # ------------------------------------------------------------------
+    # Claims
+    # ------------------------------------------------------------------
+    def save_claim(self, claim: Dict) -> bool:
+        """Upsert one claim row"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO claims (claim_id, policy_id, customer_id, status, amount, date_filed, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (claim["claim_id"], claim.get("policy_id", ""), claim.get("customer_id", ""),
+                 claim.get("status", "PENDING"), float(claim.get("amount", 0.0) or 0.0),
+                 str(claim.get("date_filed")) if claim.get("date_filed") else None, self._dumps(claim))
+            )
+        return True
+
+    def update_claim_status(self, claim_id: str, status: str,
+                            allowed: Optional[Callable[[str, Dict], bool]] = None) -> bool:
+        """Update the status of a single claim in place (see update_claim_statuses)"""
+        return bool(self.update_claim_statuses({claim_id: status}, allowed))
+
+    def update_claim_statuses(self, updates: Dict[str, str], allowed: Optional[Callable[[str, Dict], bool]] = None,
+                              prepare: Optional[Callable[[Dict[str, Dict]], Iterable[str]]] = None) -> List[str]:
+        """
+        Update the status of many claims in one transaction; returns the claim IDs
+        updated. allowed(claim_id, claim) is asked about each claim as stored,
+        inside the write transaction, so no other writer can change it in between.
+        prepare(claims), still inside it, gets the claims about to change and
+        returns the IDs to change; its own writes to this database join the
+        transaction.
+        """
+        ids = list(updates)
+        claims = {}
+        with self._transaction() as conn:
+            for start in range(0, len(ids), 500):   # Stay under SQLite's bound-parameter limit
+                batch = ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(f"SELECT claim_id, body FROM claims WHERE claim_id IN ({placeholders})", batch)
+                for row in rows.fetchall():
+                    claim = json.loads(row["body"])
+                    if allowed is None or allowed(row["claim_id"], claim):
+                        claims[row["claim_id"]] = claim
+            if prepare is not None and claims:
+                keep = set(prepare(dict(claims)))
+                claims = {claim_id: claim for claim_id, claim in claims.items() if claim_id in keep}
+            changes = []
+            for claim_id, claim in claims.items():
+                claim = dict(claim, status=updates[claim_id])
+                changes.append((claim["status"], self._dumps(claim), claim_id))
+            conn.executemany("UPDATE claims SET status = ?, body = ? WHERE claim_id = ?", changes)
+        return list(claims)
+
+    def load_claim(self, claim_id: str) -> Optional[Dict]:
+        """Load a single claim by ID"""
+        row = self._connect().execute("SELECT body FROM claims WHERE claim_id = ?", (claim_id,)).fetchone()
+        return json.loads(row["body"]) if row else None
+
+    def load_all_claims(self) -> Dict[str, Dict]:
+        """Load all claims keyed by claim ID"""
+        rows = self._connect().execute("SELECT claim_id, body FROM claims ORDER BY claim_id")
+        return {row["claim_id"]: json.loads(row["body"]) for row in rows}
+
+    def load_claims_by_status(self, status: str) -> Dict[str, Dict]:
+        """Load claims with a given status using the status index"""
+        rows = self._connect().execute(
+            "SELECT claim_id, body FROM claims WHERE status = ? ORDER BY claim_id", (status,))
+        return {row["claim_id"]: json.loads(row["body"]) for row in rows}
+
+    def iter_claims(self, page_size: int = 1000) -> Iterator[Dict]:
+        """Yield every claim in claim ID order, reading page_size rows at a time"""
+        return self._iter_bodies("claims", "claim_id", page_size)
+
+    # ------------------------------------------------------------------
+    # Sales and payments
+    # ------------------------------------------------------------------
+    def save_sales(self, sales: List[Dict]) -> bool:
+        """Upsert sale rows in a single transaction"""
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO sales (sale_id, policy_id, customer_id, status, amount, sale_date, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(s["sale_id"], s.get("policy_id", ""), s.get("customer_id", ""), s.get("status", "PENDING"),
+                  float(s.get("amount", 0.0) or 0.0), s.get("sale_date"), self._dumps(s)) for s in sales]
+            )
+        return True
+
+    def load_sales(self) -> Dict[str, Dict]:
+        """Load all sales keyed by sale ID"""
+        rows = self._connect().execute("SELECT sale_id, body FROM sales ORDER BY sale_id")
+        return {row["sale_id"]: json.loads(row["body"]) for row in rows}
+
+    def _payment_row(self, p: Dict) -> tuple:
+        return (p["payment_id"], p.get("policy_id", ""), p.get("payment_status", p.get("status", "PENDING")),
+                float(p.get("amount", 0.0) or 0.0), str(p.get("payment_date", p.get("date", ""))), self._dumps(p))
+
+    def save_payments(self, payments: List[Dict]) -> bool:
+        """Upsert payment rows in a single transaction"""
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO payments (payment_id, policy_id, status, amount, payment_date, body) "
+                "VALUES (?, ?, ?, ?, ?, ?)", [self._payment_row(p) for p in payments])
+        return True
+
+    def create_payments(self, payments: List[Dict]) -> List[str]:
+        """Insert payments whose IDs are not stored yet, in a single transaction; returns the IDs inserted"""
+        created = []
+        with self._transaction() as conn:
+            for p in payments:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO payments (payment_id, policy_id, status, amount, payment_date, body) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", self._payment_row(p))
+                if cursor.rowcount:
+                    created.append(p["payment_id"])
+        return created
+
+    def load_payments(self, status: Optional[str] = None, policy_id: Optional[str] = None,
+                      start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Dict]:
+        """Load payments keyed by payment ID, optionally filtered by status, policy and date range (inclusive)"""
+        conditions, params = [], []
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status)
+        if policy_id is not None:
+            conditions.append("policy_id = ?")
+            params.append(policy_id)
+        if start_date is not None:
+            conditions.append("substr(payment_date, 1, 10) >= ?")
+            params.append(start_date[:10])
+        if end_date is not None:
+            conditions.append("substr(payment_date, 1, 10) <= ?")
+            params.append(end_date[:10])
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._connect().execute(f"SELECT payment_id, body FROM payments{where} ORDER BY payment_id", params)
+        return {row["payment_id"]: json.loads(row["body"]) for row in rows}
+
+    def iter_payments(self, page_size: int = 1000) -> Iterator[Dict]:
+        """Yield every payment in payment ID order, reading page_size rows at a time"""
+        return self._iter_bodies("payments", "payment_id", page_size)
+
+    def _iter_bodies(self, table: str, key: str, page_size: int) -> Iterator[Dict]:
+        conn = self._connect()
+        after = ""
+        while True:
+            rows = conn.execute(f"SELECT {key}, body FROM {table} WHERE {key} > ? ORDER BY {key} LIMIT ?",
+                                (after, page_size)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield json.loads(row["body"])
+            after = rows[-1][key]
+
+    def load_payment(self, payment_id: str) -> Optional[Dict]:
+        """Load a single payment by ID"""
+        row = self._connect().execute("SELECT body FROM payments WHERE payment_id = ?", (payment_id,)).fetchone()
+        return json.loads(row["body"]) if row else None
+
+    # ------------------------------------------------------------------
+    # Migration
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _read_json(path: str) -> Dict:
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def migrate_from_json(self, data_dir: str = "data") -> Dict[str, int]:
+        """Import the existing data/*.json files into the database"""
+        counts = {}
+
+        users = self._read_json(os.path.join(data_dir, "users.json"))
+        self.save_users(users)
+        counts["users"] = len(users)
+
+        # The partitioned customer store if it exists, otherwise the monolithic file
+        store = PartitionedCustomerStore(os.path.join(data_dir, "customers"))
+        if os.path.exists(store.manifest_path):
+            customers = store.iter_customers()
+        else:
+            customers = self._read_json(os.path.join(data_dir, "customer_data.json")).items()
+        customer_count = policy_count = 0
+        for _, record in customers:
+            if isinstance(record, dict) and "customer_info" in record:
+                self.save_customer(record)
+                customer_count += 1
+                policy_count += len(record.get("policies", {}))
+        counts["customers"] = customer_count
+        counts["policies"] = policy_count
+
+        # The claims snapshot plus any journal records not yet compacted into it
+        claims = ClaimsJournal(os.path.join(data_dir, "claims_data.json")).load_all()
+        for claim in claims.values():
+            self.save_claim(claim)
+        counts["claims"] = len(claims)
+
+        sales = self._read_json(os.path.join(data_dir, "sales.json"))
+        self.save_sales(list(sales.values()))
+        counts["sales"] = len(sales)
+
+        payments = self._read_json(os.path.join(data_dir, "payments.json"))
+        self.save_payments(list(payments.values()))
+        counts["payments"] = len(payments)
+
+        # Agent-side customer profiles have no table of their own
+        agent_customers = self._read_json(os.path.join(data_dir, "customers.json"))
+        if agent_customers:
+            self.save_document("customers", agent_customers)
+        counts["documents"] = 1 if agent_customers else 0
+
+        return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite storage backend tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate = subparsers.add_parser("migrate", help="Import data/*.json files into the SQLite database")
+    migrate.add_argument("--data-dir", default="data", help="Directory containing the JSON data files")
+    migrate.add_argument("--db", default=SQLiteStorage.DB_FILE, help="Path of the SQLite database file")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        storage = SQLiteStorage(args.db)
+        counts = storage.migrate_from_json(args.data_dir)
+        print(f"Migrated {args.data_dir} into {args.db}:")
+        for table, count in counts.items():
+            print(f"  {table}: {count}")
+        print(f"Set {SQLiteStorage.BACKEND_ENV_VAR}=sqlite to use the database.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# storage_fixtures.py
+import os
+import shutil
+import tempfile
+from typing import Dict
+from claims_storage_service import ClaimsStorageService
+from data_storage_service import DataStorageService
+from payment_storage_service import PaymentStorageService
+
+
+def life_and_health_customer(email: str = "jane@gmail.com") -> Dict:
+    """A stored customer record with an active LIFE policy POL001 and HEALTH policy POL002"""
+    return {"customer_info": {"email": email}, "policies": {
+        "POL001": {"policy_id": "POL001", "policy_type": "LIFE", "coverage_amount": 1000.0,
+                   "premium": 10.0, "status": "PolicyStatus.ACTIVE"},
+        "POL002": {"policy_id": "POL002", "policy_type": "HEALTH", "coverage_amount": 5000.0,
+                   "premium": 20.0, "status": "PolicyStatus.ACTIVE", "deductible": 200.0,
+                   "includes_dental": False}}}
+
+
+class TemporaryStorageMixin:
+    """
+    Test case mixin pointing the claims, payment and customer storage services
+    at a temporary directory (self.tmp_dir) using the JSON files, restored after each test.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self._saved_storage = (ClaimsStorageService.CLAIMS_FILE, ClaimsStorageService.JOURNAL_FILE,
+                               ClaimsStorageService.BACKGROUND_COMPACTION, ClaimsStorageService.BACKEND,
+                               list(ClaimsStorageService._listeners), PaymentStorageService.PAYMENTS_FILE,
+                               PaymentStorageService.LEDGER_FILE, PaymentStorageService.BACKEND,
+                               PaymentStorageService._ledger, DataStorageService.CUSTOMER_STORE_DIR,
+                               DataStorageService.DATA_FILE, DataStorageService.BACKEND, DataStorageService._store)
+        ClaimsStorageService.CLAIMS_FILE = os.path.join(self.tmp_dir, "claims_data.json")
+        ClaimsStorageService.JOURNAL_FILE = os.path.join(self.tmp_dir, "claims_journal.jsonl")
+        ClaimsStorageService.BACKGROUND_COMPACTION = False
+        ClaimsStorageService.BACKEND = None
+        ClaimsStorageService._listeners[:] = []
+        PaymentStorageService.PAYMENTS_FILE = os.path.join(self.tmp_dir, "payments.json")
+        PaymentStorageService.LEDGER_FILE = os.path.join(self.tmp_dir, "payment_ledger.jsonl")
+        PaymentStorageService.BACKEND = None
+        PaymentStorageService._ledger = None
+        DataStorageService.CUSTOMER_STORE_DIR = os.path.join(self.tmp_dir, "customers")
+        DataStorageService.DATA_FILE = os.path.join(self.tmp_dir, "customer_data.json")
+        DataStorageService.BACKEND = None
+
+    def tearDown(self):
+        (ClaimsStorageService.CLAIMS_FILE, ClaimsStorageService.JOURNAL_FILE,
+         ClaimsStorageService.BACKGROUND_COMPACTION, ClaimsStorageService.BACKEND,
+         ClaimsStorageService._listeners[:], PaymentStorageService.PAYMENTS_FILE,
+         PaymentStorageService.LEDGER_FILE, PaymentStorageService.BACKEND,
+         PaymentStorageService._ledger, DataStorageService.CUSTOMER_STORE_DIR,
+         DataStorageService.DATA_FILE, DataStorageService.BACKEND, DataStorageService._store) = self._saved_storage
+        ClaimsStorageService._journal = None
+        shutil.rmtree(self.tmp_dir)
+        super().tearDown()
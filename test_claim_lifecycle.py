@@ -0,0 +1,136 @@
+import json
+import os
+import unittest
+from claim import Claim, can_transition
+from claim_lifecycle import ClaimLifecycle
+from claims_storage_service import ClaimsStorageService
+from data_storage_service import DataStorageService
+from storage_fixtures import TemporaryStorageMixin, life_and_health_customer
+
+
+class TestClaimLifecycle(TemporaryStorageMixin, unittest.TestCase):
+    def setUp(self):
+        """Temporary claims and customer storage with a LIFE and a HEALTH policy and four claims"""
+        super().setUp()
+        self.saved = (ClaimLifecycle._shared, ClaimLifecycle.SNAPSHOT_EVERY)
+        ClaimLifecycle._shared = None
+        DataStorageService.get_store().replace_all({"jane@gmail.com": life_and_health_customer()})
+        claims = {
+            "CLM001": self._claim("CLM001", "POL001", "PENDING", 100.0, "2025-01-05"),
+            "CLM002": self._claim("CLM002", "POL002", "APPROVED", 250.5, "2025-02-10"),
+            "CLM003": self._claim("CLM003", "POL001", "REJECTED", 40.0, "2025-02-01"),
+            "CLM004": self._claim("CLM004", "POL002", "APPROVE", 0.1, "2025-02-11"),
+        }
+        with open(ClaimsStorageService.CLAIMS_FILE, 'w') as f:
+            json.dump(claims, f)
+        self.lifecycle = ClaimLifecycle.enable()
+
+    def tearDown(self):
+        ClaimLifecycle._shared, ClaimLifecycle.SNAPSHOT_EVERY = self.saved
+        super().tearDown()
+
+    @staticmethod
+    def _claim(claim_id, policy_id, status, amount, filed):
+        return {"claim_id": claim_id, "policy_id": policy_id, "customer_id": "jane@gmail.com", "amount": amount,
+                "status": status, "description": "Claim", "evidence_documents": [], "date_filed": filed}
+
+    def test_state_machine(self):
+        """Test allowed transitions, status aliases and rejected moves in claims and storage"""
+        self.assertTrue(can_transition("PENDING", "APPROVED"))
+        self.assertTrue(can_transition("APPROVED", "SETTLED"))
+        self.assertFalse(can_transition("SETTLED", "REVIEWING"))
+        self.assertFalse(can_transition("REJECTED", "APPROVED"))
+        self.assertFalse(can_transition("PENDING", "APPROVE_IT"))
+
+        claim = Claim("CLM009", "POL001", "jane@gmail.com")
+        self.assertTrue(claim.set_status("approve"))
+        self.assertEqual(claim.get_status(), "APPROVED")
+        self.assertTrue(claim.set_status("SETTLED"))
+        self.assertFalse(claim.set_status("PENDING"))
+
+        self.assertFalse(ClaimsStorageService.update_claim_status("CLM003", "APPROVED"))
+        self.assertFalse(ClaimsStorageService.update_claim_status("CLM001", "DONE"))
+        self.assertTrue(ClaimsStorageService.update_claim_status("CLM001", "REVIEW"))
+        self.assertEqual(ClaimsStorageService.load_claim("CLM001")["status"], "REVIEWING")
+
+    def test_seeded_counters(self):
+        """Test the first use counts every stored claim by status, policy type and month"""
+        self.assertEqual(self.lifecycle.count(), 4)
+        self.assertEqual(self.lifecycle.count("APPROVED"), 2)
+        self.assertEqual(self.lifecycle.total_amount("APPROVED"), 250.6)
+        self.assertEqual(self.lifecycle.count(policy_type="LIFE"), 2)
+        self.assertEqual(self.lifecycle.count("APPROVED", month="2025-02"), 2)
+        self.assertEqual(self.lifecycle.total_amount(month="2025-02"), 290.6)
+
+    def test_events_update_counters(self):
+        """Test saves and status changes move counts between cells and are kept as history"""
+        self.assertTrue(ClaimsStorageService.update_claim_status("CLM001", "APPROVED"))
+        self.assertEqual(self.lifecycle.count("PENDING"), 0)
+        self.assertEqual(self.lifecycle.count("APPROVED", policy_type="LIFE"), 1)
+
+        claim = Claim("CLM005", "POL002", "jane@gmail.com")
+        claim.set_amount(60.0)
+        self.assertTrue(ClaimsStorageService.save_claim(claim))
+        self.assertEqual(self.lifecycle.count("PENDING", policy_type="HEALTH"), 1)
+        claim.set_amount(75.0)
+        ClaimsStorageService.save_claim(claim)
+        self.assertEqual(self.lifecycle.total_amount("PENDING"), 75.0)
+        self.assertEqual([event["kind"] for event in self.lifecycle.history("CLM005")], ["filed", "amended"])
+        self.assertEqual([(event["from"], event["to"]) for event in self.lifecycle.history("CLM001")],
+                         [(None, "PENDING"), ("PENDING", "APPROVED")])
+
+        # Another process sees the events on its next query
+        other = ClaimLifecycle(self.lifecycle.path)
+        self.assertEqual(other.summary(), self.lifecycle.summary())
+
+    def test_event_after_torn_tail(self):
+        """Test an event appended after a crashed writer's partial line is counted here and on replay"""
+        with open(self.lifecycle.path, 'ab') as f:
+            f.write(b'{"claim_id": "CLM0')
+        self.assertTrue(ClaimsStorageService.update_claim_status("CLM001", "APPROVED"))
+        self.assertEqual(self.lifecycle.count("APPROVED"), 3)
+        self.assertEqual(ClaimLifecycle.replay(self.lifecycle.path).summary(), self.lifecycle.summary())
+
+    def test_changes_made_without_recording_are_reconciled(self):
+        """Test claims changed by a process that did not record them are counted on enable and replay"""
+        ClaimsStorageService._listeners[:] = []
+        self.assertTrue(ClaimsStorageService.update_claim_status("CLM001", "APPROVED"))
+        claim = Claim("CLM005", "POL002", "jane@gmail.com")
+        claim.set_amount(60.0)
+        self.assertTrue(ClaimsStorageService.save_claim(claim))
+        self.assertEqual(self.lifecycle.count("APPROVED"), 2)
+
+        self.assertEqual(ClaimLifecycle.replay(self.lifecycle.path).count("APPROVED"), 3)
+        lifecycle = ClaimLifecycle.enable()
+        self.assertEqual(lifecycle.count("APPROVED"), 3)
+        self.assertEqual(lifecycle.count("PENDING", policy_type="HEALTH"), 1)
+        self.assertEqual([event["kind"] for event in lifecycle.history("CLM001")], ["filed", "transition"])
+
+    def test_failed_hook_is_reconciled_on_next_query(self):
+        """Test a change the storage hook failed to record is counted by the next query"""
+        append = self.lifecycle._append
+
+        def fail(events):
+            raise OSError("disk full")
+
+        self.lifecycle._append = fail
+        self.assertTrue(ClaimsStorageService.update_claim_status("CLM001", "APPROVED"))
+        self.lifecycle._append = append
+        self.assertEqual(self.lifecycle.count("APPROVED"), 3)
+
+    def test_snapshot_and_replay(self):
+        """Test restarting from a snapshot and replaying the full history give the same counters"""
+        ClaimLifecycle.SNAPSHOT_EVERY = 2
+        for claim_id, status in (("CLM001", "REVIEWING"), ("CLM001", "APPROVED"), ("CLM002", "SETTLED")):
+            self.assertTrue(ClaimsStorageService.update_claim_status(claim_id, status))
+        self.assertTrue(os.path.exists(self.lifecycle.snapshot_path))
+
+        restarted = ClaimLifecycle(self.lifecycle.path)
+        self.assertGreater(restarted._end, 0)
+        self.assertEqual(restarted.summary(), self.lifecycle.summary())
+        self.assertEqual(ClaimLifecycle.replay(self.lifecycle.path).summary(), self.lifecycle.summary())
+        self.assertEqual(self.lifecycle.summary()["by_status"]["SETTLED"], {"count": 1, "amount": 250.5})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from claim import Claim
+from claim_adjuster import ClaimAdjuster
+from claim_triage import ClaimTriage
+from data_storage_service import DataStorageService
+from policy_book import PolicyBook
+
+
+class TestClaimTriage(unittest.TestCase):
+    def setUp(self):
+        """A small book, a backlog of random claims against it and a temporary assessments file"""
+        rng = random.Random(7)
+        policies = {}
+        for i in range(20):
+            policies[f"POL{i:03d}"] = {"policy_id": f"POL{i:03d}", "customer_id": "jane@gmail.com",
+                                       "policy_type": "LIFE", "status": "PolicyStatus.ACTIVE",
+                                       "coverage_amount": 0.0 if i == 19 else 1000.0 * (1 + i % 5),
+                                       "premium": 10.0, "start_date": f"2025-0{1 + i % 6}-1{i % 10}T00:00:00",
+                                       "end_date": "2027-01-01T00:00:00", "beneficiary": "John",
+                                       "death_benefit": 500.0}
+        self.book = PolicyBook.from_records([("jane@gmail.com", {"policies": policies})])
+        self.claims = {}
+        for n in range(200):
+            self.claims[f"CLM{n:03d}"] = {
+                "claim_id": f"CLM{n:03d}", "policy_id": f"POL{rng.randrange(20):03d}",
+                "customer_id": "jane@gmail.com", "amount": round(rng.uniform(10, 6000), 2),
+                "status": rng.choice(["PENDING", "REVIEWING", "APPROVED"]), "description": "Claim",
+                "evidence_documents": [f"DOC{k}" for k in range(rng.randrange(4))],
+                "date_filed": f"2025-0{rng.randrange(1, 10)}-{rng.randrange(10, 29)}"}
+        self.claims["CLM_ORPHAN"] = dict(self.claims["CLM000"], claim_id="CLM_ORPHAN", policy_id="POL999",
+                                         status="PENDING")
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.saved = (ClaimTriage.ASSESSMENTS_FILE, DataStorageService.CUSTOMER_STORE_DIR,
+                      DataStorageService.DATA_FILE, DataStorageService.BACKEND, DataStorageService._store)
+        ClaimTriage.ASSESSMENTS_FILE = os.path.join(self.tmp_dir, "claim_assessments.jsonl")
+        DataStorageService.CUSTOMER_STORE_DIR = os.path.join(self.tmp_dir, "customers")
+        DataStorageService.DATA_FILE = os.path.join(self.tmp_dir, "customer_data.json")
+        DataStorageService.BACKEND = None
+
+    def tearDown(self):
+        (ClaimTriage.ASSESSMENTS_FILE, DataStorageService.CUSTOMER_STORE_DIR,
+         DataStorageService.DATA_FILE, DataStorageService.BACKEND, DataStorageService._store) = self.saved
+        shutil.rmtree(self.tmp_dir)
+
+    def test_matches_adjuster_rules(self):
+        """Test every assessment equals ClaimAdjuster's per-claim risk and payout exactly"""
+        adjuster = ClaimAdjuster.__new__(ClaimAdjuster)  # calculate_claim_payout uses no instance state
+        policies = {policy.get_policy_id(): policy for policy in self.book.to_policies()}
+        assessments = ClaimTriage(self.book).assess(self.claims)
+        for claim_id, data in self.claims.items():
+            assessment = assessments[claim_id]
+            policy = policies.get(data["policy_id"])
+            if policy is None:
+                self.assertFalse(assessment["policy_found"])
+                self.assertEqual((assessment["risk_level"], assessment["recommended_payout"]), ("HIGH", 0.0))
+                continue
+            claim = Claim.from_dict(data)
+            self.assertEqual(assessment["risk_level"], ClaimAdjuster.assess_claim_risk(claim, policy).value, claim_id)
+            self.assertEqual(assessment["recommended_payout"], adjuster.calculate_claim_payout(claim, policy))
+            if policy.get_coverage_amount() > 0:
+                self.assertEqual(assessment["coverage_ratio"], claim.get_amount() / policy.get_coverage_amount())
+                self.assertEqual(assessment["days_active"], (claim.date_filed - policy.start_date.date()).days)
+            else:
+                self.assertIsNone(assessment["coverage_ratio"])
+
+    def test_triage_saves_open_claims(self):
+        """Test triage assesses only open claims and reports read the saved assessments"""
+        assessments = ClaimTriage(self.book).triage(self.claims)
+        open_ids = {claim_id for claim_id, data in self.claims.items() if data["status"] != "APPROVED"}
+        self.assertEqual(set(assessments), open_ids)
+        self.assertEqual(set(ClaimTriage.load_assessments()), open_ids)
+        self.assertEqual(ClaimTriage.assessment_for("CLM_ORPHAN", self.claims["CLM_ORPHAN"]),
+                         assessments["CLM_ORPHAN"])
+
+    def test_stale_assessment_is_recomputed(self):
+        """Test a claim changed since triage is assessed again rather than read from the file"""
+        ClaimTriage.save_assessments(ClaimTriage(self.book).assess({"CLM_ORPHAN": self.claims["CLM_ORPHAN"]}))
+        changed = dict(self.claims["CLM_ORPHAN"], amount=1.0)
+        assessment = ClaimTriage.assessment_for("CLM_ORPHAN", changed)
+        self.assertEqual(assessment["amount"], 1.0)
+        self.assertEqual(ClaimTriage.load_assessments()["CLM_ORPHAN"]["amount"], 1.0)
+
+    def test_policy_or_status_change_reassesses_by_appending(self):
+        """Test a changed policy or claim status makes a new assessment, appended after the old ones"""
+        claim = self.claims["CLM000"]
+        policy_id = claim["policy_id"]
+        records = {policy_id: {"policy_id": policy_id, "customer_id": "jane@gmail.com", "policy_type": "LIFE",
+                               "status": "PolicyStatus.ACTIVE", "coverage_amount": 10000.0, "premium": 10.0,
+                               "start_date": "2025-01-01T00:00:00", "end_date": "2027-01-01T00:00:00"}}
+        DataStorageService.get_store().replace_all({"jane@gmail.com": {
+            "customer_info": {"email": "jane@gmail.com"}, "policies": records}})
+        first = ClaimTriage.assessment_for("CLM000", claim)
+        self.assertEqual(first["coverage_amount"], 10000.0)
+        with open(ClaimTriage.ASSESSMENTS_FILE, 'rb') as f:
+            saved = f.read()
+        self.assertEqual(ClaimTriage.assessment_for("CLM000", claim), first)
+        with open(ClaimTriage.ASSESSMENTS_FILE, 'rb') as f:
+            self.assertEqual(f.read(), saved)  # Unchanged claim and policy: nothing written
+
+        DataStorageService.update_policies({"jane@gmail.com": {policy_id: {"coverage_amount": 500.0}}})
+        self.assertEqual(ClaimTriage.assessment_for("CLM000", claim)["coverage_amount"], 500.0)
+        approved = ClaimTriage.assessment_for("CLM000", dict(claim, status="APPROVED"))
+        self.assertEqual(approved["status"], "APPROVED")
+        self.assertEqual(ClaimTriage.load_assessments()["CLM000"], approved)
+        with open(ClaimTriage.ASSESSMENTS_FILE, 'rb') as f:
+            lines = f.read()
+        self.assertTrue(lines.startswith(saved))
+        self.assertEqual(lines.count(b"\n"), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
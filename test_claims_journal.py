@@ -0,0 +1,114 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from claims_journal import ClaimsJournal
+
+
+class TestClaimsJournal(unittest.TestCase):
+    def setUp(self):
+        """Create a snapshot with one existing claim"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.snapshot = os.path.join(self.tmp_dir, "claims_data.json")
+        with open(self.snapshot, 'w') as f:
+            json.dump({"CLM001": self._claim("CLM001", "PENDING")}, f)
+        self.journal = ClaimsJournal(self.snapshot)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @staticmethod
+    def _claim(claim_id, status, amount=100.0):
+        return {"claim_id": claim_id, "policy_id": "POL001", "customer_id": "a@gmail.com",
+                "amount": amount, "status": status, "description": "Test",
+                "evidence_documents": [], "date_filed": "2025-01-02"}
+
+    def test_writes_append_without_touching_snapshot(self):
+        """Test upserts and status events are appended, not rewritten"""
+        before = os.path.getmtime(self.snapshot)
+        self.journal.upsert(self._claim("CLM002", "PENDING"))
+        self.assertTrue(self.journal.record_status("CLM001", "APPROVED"))
+        self.assertTrue(self.journal.record_status("CLM002", "REVIEWING"))
+        self.assertEqual(os.path.getmtime(self.snapshot), before)
+        self.assertEqual(self.journal.record_count(), 3)
+
+        self.assertEqual(self.journal.get("CLM001")["status"], "APPROVED")
+        self.assertEqual(self.journal.get("CLM002")["status"], "REVIEWING")
+        self.assertIsNone(self.journal.get("CLM404"))
+        self.assertFalse(self.journal.record_status("CLM404", "APPROVED"))
+
+        all_claims = self.journal.load_all()
+        self.assertEqual(all_claims["CLM001"]["status"], "APPROVED")
+        self.assertEqual(all_claims["CLM002"]["status"], "REVIEWING")
+
+    def test_index_rebuilt_and_shared_between_writers(self):
+        """Test a second journal instance sees records written by the first"""
+        self.journal.upsert(self._claim("CLM002", "PENDING", amount=5.0))
+        other = ClaimsJournal(self.snapshot)
+        self.assertEqual(other.get("CLM002")["amount"], 5.0)
+        other.record_status("CLM002", "APPROVED")
+        self.assertEqual(self.journal.get("CLM002")["status"], "APPROVED")
+
+    def test_compaction_folds_journal_into_snapshot(self):
+        """Test compaction writes a snapshot and empties the journal"""
+        self.journal.upsert(self._claim("CLM002", "PENDING"))
+        self.journal.record_status("CLM002", "REJECTED")
+        self.assertTrue(self.journal.compact())
+        self.assertEqual(self.journal.record_count(), 0)
+        with open(self.snapshot) as f:
+            snapshot = json.load(f)
+        self.assertEqual(snapshot["CLM002"]["status"], "REJECTED")
+
+        self.journal.record_status("CLM002", "APPROVED")
+        self.assertEqual(self.journal.get("CLM002")["status"], "APPROVED")
+
+    def test_torn_tail_is_ignored(self):
+        """Test a partially written last line does not break later appends"""
+        self.journal.upsert(self._claim("CLM002", "PENDING"))
+        with open(self.journal.journal_path, 'ab') as f:
+            f.write(b'{"op": "upsert", "claim_id": "CLM0')
+        self.journal.upsert(self._claim("CLM003", "PENDING"))
+        self.assertEqual(sorted(ClaimsJournal(self.snapshot).load_all()), ["CLM001", "CLM002", "CLM003"])
+
+
+    def test_snapshot_claims_read_by_seeking(self):
+        """Test single-claim reads and status writes seek into the snapshot and frozen journal, not load them"""
+        self.journal.upsert(self._claim("CLM002", "PENDING", amount=5.0))
+        self.assertTrue(self.journal.compact())
+        self.journal.record_status("CLM002", "REVIEWING")
+        os.replace(self.journal.journal_path, self.journal.compacting_path)  # As if a compaction were running
+
+        def fail():
+            raise AssertionError("whole snapshot loaded")
+        self.journal._load_snapshot = fail
+        self.assertEqual(self.journal.get("CLM001")["status"], "PENDING")
+        self.assertEqual(self.journal.get("CLM002")["status"], "REVIEWING")
+        self.assertEqual(self.journal.get("CLM002")["amount"], 5.0)
+        self.assertTrue(self.journal.record_status("CLM002", "APPROVED"))
+        self.assertEqual(self.journal.record_statuses({"CLM001": "APPROVED", "CLM404": "APPROVED"}), ["CLM001"])
+        self.assertEqual(self.journal.get("CLM002")["status"], "APPROVED")
+        self.assertEqual(self.journal.get("CLM001")["status"], "APPROVED")
+        self.assertIsNone(self.journal.get("CLM404"))
+
+    def test_writers_and_compaction_share_the_lock(self):
+        """Test appends and compaction wait for a write lock held by another process"""
+        saved = ClaimsJournal.LOCK_TIMEOUT
+        ClaimsJournal.LOCK_TIMEOUT = 0.05
+        try:
+            journal = ClaimsJournal(self.snapshot)
+            journal.upsert(self._claim("CLM002", "PENDING"))
+            open(journal.lock_path, 'w').close()  # Held by another writer
+            with self.assertRaises(TimeoutError):
+                journal.record_status("CLM002", "APPROVED")
+            with self.assertRaises(TimeoutError):
+                journal.compact()
+            self.assertFalse(os.path.exists(journal.compacting_path))
+            os.remove(journal.lock_path)
+            self.assertTrue(journal.compact())
+        finally:
+            ClaimsJournal.LOCK_TIMEOUT = saved
+        self.assertEqual(self.journal.get("CLM002")["status"], "PENDING")
+
+if __name__ == '__main__':
+    unittest.main()
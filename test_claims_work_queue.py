@@ -0,0 +1,135 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from claims_storage_service import ClaimsStorageService
+from claims_work_queue import ClaimsWorkQueue
+from data_storage_service import DataStorageService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestClaimsWorkQueue(unittest.TestCase):
+    def setUp(self):
+        """Point claims and customer storage at a temporary directory holding a few open and closed claims"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.saved = (ClaimsStorageService.CLAIMS_FILE, ClaimsStorageService.JOURNAL_FILE,
+                      ClaimsStorageService.BACKGROUND_COMPACTION, ClaimsStorageService.BACKEND,
+                      list(ClaimsStorageService._listeners), ClaimsWorkQueue._shared,
+                      DataStorageService.CUSTOMER_STORE_DIR, DataStorageService.DATA_FILE,
+                      DataStorageService.BACKEND, DataStorageService._store)
+        ClaimsStorageService.CLAIMS_FILE = os.path.join(self.tmp_dir, "claims_data.json")
+        ClaimsStorageService.JOURNAL_FILE = os.path.join(self.tmp_dir, "claims_journal.jsonl")
+        ClaimsStorageService.BACKGROUND_COMPACTION = False
+        ClaimsStorageService.BACKEND = None
+        ClaimsWorkQueue._shared = None
+        DataStorageService.CUSTOMER_STORE_DIR = os.path.join(self.tmp_dir, "customers")
+        DataStorageService.DATA_FILE = os.path.join(self.tmp_dir, "customer_data.json")
+        DataStorageService.BACKEND = None
+        claims = {
+            "CLM001": self._claim("CLM001", "PENDING", 100.0, "2025-01-05"),
+            "CLM002": self._claim("CLM002", "PENDING", 900.0, "2025-01-03", risk="HIGH"),
+            "CLM003": self._claim("CLM003", "REVIEWING", 100.0, "2025-01-01"),
+            "CLM004": self._claim("CLM004", "APPROVED", 5000.0, "2025-01-01"),
+        }
+        with open(ClaimsStorageService.CLAIMS_FILE, 'w') as f:
+            json.dump(claims, f)
+        self.clock = FakeClock()
+        self.queue = self._queue()
+
+    def tearDown(self):
+        (ClaimsStorageService.CLAIMS_FILE, ClaimsStorageService.JOURNAL_FILE,
+         ClaimsStorageService.BACKGROUND_COMPACTION, ClaimsStorageService.BACKEND,
+         ClaimsStorageService._listeners[:], ClaimsWorkQueue._shared,
+         DataStorageService.CUSTOMER_STORE_DIR, DataStorageService.DATA_FILE,
+         DataStorageService.BACKEND, DataStorageService._store) = self.saved
+        ClaimsStorageService._journal = None
+        shutil.rmtree(self.tmp_dir)
+
+    def _queue(self):
+        """A queue instance as another process would have it, sharing the same log"""
+        return ClaimsWorkQueue(ClaimsWorkQueue.default_path(), lambda claim, policy: claim.description,
+                               clock=self.clock)
+
+    @staticmethod
+    def _claim(claim_id, status, amount, filed, risk="LOW"):
+        return {"claim_id": claim_id, "policy_id": "POL001", "customer_id": "a@gmail.com", "amount": amount,
+                "status": status, "description": risk, "evidence_documents": [], "date_filed": filed}
+
+    def test_seeded_in_priority_order(self):
+        """Test open claims are queued by risk, then amount, then age"""
+        order = [item["claim_id"] for item in self.queue.queued()]
+        self.assertEqual(order, ["CLM002", "CLM003", "CLM001"])
+        self.assertEqual(len(self.queue), 3)
+
+    def test_leases_are_exclusive_across_instances(self):
+        """Test two adjusters on separate queue instances never get the same claim"""
+        other = self._queue()
+        first = self.queue.next_claim("ann")
+        second = other.next_claim("bob")
+        self.assertEqual((first["claim_id"], second["claim_id"]), ("CLM002", "CLM003"))
+        self.assertFalse(other.lease("CLM002", "bob"))
+        self.assertEqual(other.lease_holder("CLM002"), "ann")
+        # Asking again returns the claim already held
+        self.assertEqual(self.queue.next_claim("ann")["claim_id"], "CLM002")
+
+    def test_lease_timeout_and_release(self):
+        """Test an expired lease puts the claim back, and released claims are queued again"""
+        self.queue.next_claim("ann", lease_seconds=60)
+        self.clock.now += 61
+        other = self._queue()
+        self.assertEqual(other.next_claim("bob")["claim_id"], "CLM002")
+        self.assertFalse(self.queue.release("CLM002", "ann"))
+        self.assertTrue(self.queue.release("CLM002", "bob"))
+        self.assertEqual(self.queue.queued(1)[0]["claim_id"], "CLM002")
+
+    def test_status_changes_update_queue(self):
+        """Test the storage hook removes decided claims and queues new ones"""
+        ClaimsWorkQueue._shared = self.queue
+        ClaimsStorageService.add_claim_listener(ClaimsWorkQueue._claim_changed)
+        self.queue.next_claim("ann")
+        self.assertTrue(ClaimsStorageService.update_claim_status("CLM002", "APPROVED"))
+        self.assertIsNone(self.queue.lease_holder("CLM002"))
+        self.assertNotIn("CLM002", [item["claim_id"] for item in self.queue.queued()])
+
+        ClaimsStorageService.update_claim_status("CLM004", "REVIEWING")
+        self.assertEqual(self.queue.queued(1)[0]["claim_id"], "CLM004")
+        self.assertEqual(len(self._queue()), 3)
+
+    def test_lease_after_torn_tail(self):
+        """Test events appended after a crashed writer's partial line are kept and seen by this and other queues"""
+        self.assertEqual(len(self.queue), 3)
+        with open(self.queue.path, 'ab') as f:
+            f.write(b'{"op": "lease", "claim_id": "CLM0')
+        self.assertTrue(self.queue.lease("CLM001", "ann"))
+        self.assertTrue(self.queue.lease("CLM003", "ann"))
+        self.assertEqual(self.queue._end, os.path.getsize(self.queue.path))
+        other = self._queue()
+        self.assertEqual((other.lease_holder("CLM001"), other.lease_holder("CLM003")), ("ann", "ann"))
+        self.assertEqual(other.next_claim("bob")["claim_id"], "CLM002")
+
+    def test_compaction_keeps_state(self):
+        """Test rewriting a long log keeps queued claims and leases"""
+        saved = ClaimsWorkQueue.COMPACT_MIN_RECORDS
+        ClaimsWorkQueue.COMPACT_MIN_RECORDS = 10
+        try:
+            for _ in range(10):
+                self.queue.lease("CLM001", "ann")
+        finally:
+            ClaimsWorkQueue.COMPACT_MIN_RECORDS = saved
+        with open(self.queue.path) as f:
+            self.assertLess(len(f.readlines()), 10)
+        other = self._queue()
+        self.assertEqual(other.lease_holder("CLM001"), "ann")
+        self.assertEqual([item["claim_id"] for item in other.queued()], ["CLM002", "CLM003"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from customer_store import PartitionedCustomerStore
+
+
+def _record(email, *policy_ids):
+    return {
+        "customer_info": {"email": email, "name": email.split("@")[0], "contact_number": "",
+                          "address": "", "birth_date": "1990-01-01", "credit_score": 0.0},
+        "policies": {pid: {"policy_id": pid, "customer_id": email, "policy_type": "LIFE"} for pid in policy_ids}
+    }
+
+
+def _save_many(store_dir, first, count):
+    store = PartitionedCustomerStore(store_dir)
+    for i in range(first, first + count):
+        store.save_customer(_record(f"new{i}@gmail.com", f"POL{100 + i:03d}"))
+
+
+class TestPartitionedCustomerStore(unittest.TestCase):
+    def setUp(self):
+        """Create a legacy customer file with a few customers"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.legacy_file = os.path.join(self.tmp_dir, "customer_data.json")
+        self.customers = {f"user{i}@gmail.com": _record(f"user{i}@gmail.com", f"POL{i:03d}") for i in range(20)}
+        with open(self.legacy_file, 'w') as f:
+            json.dump(self.customers, f)
+        self.store_dir = os.path.join(self.tmp_dir, "customers")
+        self.store = PartitionedCustomerStore(self.store_dir, legacy_file=self.legacy_file, shard_count=4)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_imports_legacy_file(self):
+        """Test the monolithic file is split into shards on first use"""
+        self.assertEqual(self.store.shard_count, 4)
+        self.assertEqual(self.store.load_all(), self.customers)
+        with open(os.path.join(self.store_dir, "manifest.json")) as f:
+            self.assertEqual(json.load(f)["shard_count"], 4)
+
+    def test_save_touches_one_shard(self):
+        """Test saving a customer rewrites only that customer's shard"""
+        self.store.shard_count  # Initialise the store
+        email = "user3@gmail.com"
+        target = PartitionedCustomerStore.shard_index(email, 4)
+        before = {i: os.stat(self.store._shard_path(i)).st_mtime_ns for i in range(4)}
+        os.utime(self.store._shard_path(target), ns=(0, 0))
+
+        self.assertTrue(self.store.save_customer(_record(email, "POL100")))
+        for i in range(4):
+            if i != target:
+                self.assertEqual(os.stat(self.store._shard_path(i)).st_mtime_ns, before[i])
+        self.assertEqual(sorted(self.store.load_customer(email)["policies"]), ["POL003", "POL100"])
+
+        self.store.save_customer(_record(email, "POL100"), replace_policies=True)
+        self.assertEqual(list(self.store.load_customer(email)["policies"]), ["POL100"])
+
+    def test_reshard(self):
+        """Test resharding keeps every customer and updates the manifest"""
+        self.assertTrue(self.store.reshard(7))
+        self.assertEqual(self.store.shard_count, 7)
+        self.assertEqual(self.store.load_all(), self.customers)
+        self.assertEqual(self.store.load_customer("user5@gmail.com"), self.customers["user5@gmail.com"])
+        self.assertFalse(os.path.exists(self.store_dir + ".reshard"))
+
+    def test_concurrent_saves_keep_every_customer(self):
+        """Test processes saving customers into the same shard do not drop each other's records"""
+        store = PartitionedCustomerStore(self.store_dir, legacy_file=self.legacy_file, shard_count=1)
+        store.shard_count  # Initialise the store
+        with ProcessPoolExecutor(max_workers=4) as pool:
+            list(pool.map(_save_many, [self.store_dir] * 4, range(0, 40, 10), [10] * 4))
+        stored = store.load_all()
+        self.assertEqual(len(stored), 60)
+        self.assertTrue(all(f"new{i}@gmail.com" in stored for i in range(40)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from document_cache import DocumentCache
+
+
+class TestDocumentCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = DocumentCache(max_bytes=1024)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write(self, name, data):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        return path
+
+    def test_hit_and_revalidation(self):
+        """Test repeated reads hit and a changed file is re-parsed"""
+        path = self._write("a.json", {"x": 1})
+        self.assertEqual(self.cache.get(path), {"x": 1})
+        self.assertEqual(self.cache.get(path), {"x": 1})
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+        self._write("a.json", {"x": 22})
+        self.assertEqual(self.cache.get(path), {"x": 22})
+        self.assertEqual(self.cache.get_stats()["misses"], 2)
+
+    def test_put_after_write(self):
+        """Test writers update the entry in place with a copy of what they wrote"""
+        path = self._write("a.json", {"x": 1})
+        self.cache.get(path)
+        data = {"x": 2}
+        text = json.dumps(data)
+        with open(path, 'w') as f:
+            f.write(text)
+        self.cache.put(path, text)
+        data["x"] = 3  # The writer keeps using its dict
+        self.assertEqual(self.cache.get(path), {"x": 2})
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_lru_eviction(self):
+        """Test the memory cap evicts the least recently used document"""
+        a = self._write("a.json", {"x": "a" * 400})
+        b = self._write("b.json", {"x": "b" * 400})
+        c = self._write("c.json", {"x": "c" * 400})
+        self.cache.get(a)
+        self.cache.get(b)
+        self.cache.get(a)  # a is now most recently used
+        self.cache.get(c)
+        stats = self.cache.get_stats()
+        self.assertEqual(stats["evictions"], 1)
+        self.assertLessEqual(stats["bytes"], 1024)
+        self.cache.get(a)
+        self.assertEqual(self.cache.hits, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
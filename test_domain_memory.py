@@ -0,0 +1,55 @@
+import gc
+import tracemalloc
+import unittest
+from policy import LifePolicy, CarPolicy, HealthPolicy, PropertyPolicy
+from policy_codec import PolicyCodec
+from claim import Claim
+from payment import Payment
+from agent import Sale
+
+
+def _policy_records(count):
+    types = ["LIFE", "CAR", "HEALTH", "PROPERTY"]
+    return {
+        f"POL{i:06d}": {
+            "policy_id": f"POL{i:06d}", "customer_id": f"customer{i % 50}@gmail.com",
+            "policy_type": types[i % 4], "coverage_amount": 10000.0, "premium": 100.0,
+            "status": "PolicyStatus.ACTIVE", "start_date": "2025-01-01T00:00:00",
+            "end_date": "2026-01-01T00:00:00", "conditions": []
+        }
+        for i in range(count)
+    }
+
+
+class TestDomainMemory(unittest.TestCase):
+    def test_domain_objects_have_no_instance_dict(self):
+        """Test the domain classes are fully slotted"""
+        objects = [LifePolicy("P1", "a@gmail.com"), CarPolicy("P2", "a@gmail.com"),
+                   HealthPolicy("P3", "a@gmail.com"), PropertyPolicy("P4", "a@gmail.com"),
+                   Claim("C1", "P1", "a@gmail.com"), Payment("PAY1", "P1"), Sale("S1", "P1", "a@gmail.com", 1.0)]
+        for obj in objects:
+            self.assertFalse(hasattr(obj, "__dict__"), type(obj).__name__)
+
+    def test_bytes_per_loaded_policy(self):
+        """Test policies decoded from storage stay small and share their customer emails"""
+        count = 5000
+        records = _policy_records(count)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            policies = PolicyCodec.decode_many(records)
+            after = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        bytes_per_policy = (after - before) / count
+        self.assertEqual(len(policies), count)
+        # Slotted policies with shared dates and interned emails stay well under 400 bytes
+        self.assertLess(bytes_per_policy, 400)
+
+        emails = {id(p.customer_id) for p in policies.values()}
+        self.assertEqual(len(emails), 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
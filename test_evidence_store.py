@@ -0,0 +1,126 @@
+import hashlib
+import io
+import os
+import pathlib
+import shutil
+import tempfile
+import unittest
+from claim import Claim
+from claims_storage_service import ClaimsStorageService
+from evidence_store import EvidenceStore
+
+
+class TestEvidenceStore(unittest.TestCase):
+    def setUp(self):
+        """Point the evidence store and claims storage at a temporary directory, with a small chunk size"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.saved = (EvidenceStore.STORE_DIR, EvidenceStore.CHUNK_SIZE, EvidenceStore._shared,
+                      ClaimsStorageService.CLAIMS_FILE, ClaimsStorageService.JOURNAL_FILE,
+                      ClaimsStorageService.BACKGROUND_COMPACTION, ClaimsStorageService.BACKEND,
+                      list(ClaimsStorageService._listeners))
+        EvidenceStore.STORE_DIR = os.path.join(self.tmp_dir, "evidence")
+        EvidenceStore.CHUNK_SIZE = 1000
+        EvidenceStore._shared = None
+        ClaimsStorageService.CLAIMS_FILE = os.path.join(self.tmp_dir, "claims_data.json")
+        ClaimsStorageService.JOURNAL_FILE = os.path.join(self.tmp_dir, "claims_journal.jsonl")
+        ClaimsStorageService.BACKGROUND_COMPACTION = False
+        ClaimsStorageService.BACKEND = None
+        ClaimsStorageService._listeners[:] = []
+        self.store = EvidenceStore.shared()
+        self.content = os.urandom(4567)
+        self.digest = hashlib.sha256(self.content).hexdigest()
+        self.path = os.path.join(self.tmp_dir, "photo.jpg")
+        with open(self.path, 'wb') as f:
+            f.write(self.content)
+
+    def tearDown(self):
+        (EvidenceStore.STORE_DIR, EvidenceStore.CHUNK_SIZE, EvidenceStore._shared,
+         ClaimsStorageService.CLAIMS_FILE, ClaimsStorageService.JOURNAL_FILE,
+         ClaimsStorageService.BACKGROUND_COMPACTION, ClaimsStorageService.BACKEND,
+         ClaimsStorageService._listeners[:]) = self.saved
+        ClaimsStorageService._journal = None
+        shutil.rmtree(self.tmp_dir)
+
+    def test_put_streams_and_deduplicates(self):
+        """Test paths and streams hash to the same fan-out blob, stored once"""
+        self.assertEqual(self.store.put(self.path), self.digest)
+        self.assertEqual(self.store.put(io.BytesIO(self.content)), self.digest)
+        path = self.store.blob_path(self.digest)
+        self.assertEqual(os.path.relpath(path, self.store.objects_dir),
+                         os.path.join(self.digest[:2], self.digest[2:4], self.digest))
+        blobs = [name for _, _, names in os.walk(self.store.objects_dir) for name in names]
+        self.assertEqual(blobs, [self.digest])
+        self.assertEqual(os.listdir(self.store.tmp_dir), [])
+
+    def test_mmap_view(self):
+        """Test blobs are read through a memory-mapped view, including empty ones"""
+        self.store.put(self.path)
+        with self.store.view(self.digest) as data:
+            self.assertIsInstance(data, memoryview)
+            self.assertEqual(data[100:200].tobytes(), self.content[100:200])
+        self.assertEqual(self.store.read_bytes(self.digest), self.content)
+        self.assertTrue(self.store.verify(self.digest))
+
+        empty = self.store.put(io.BytesIO(b""))
+        self.assertEqual(self.store.read_bytes(empty), b"")
+        with self.assertRaises(ValueError):
+            self.store.blob_path("../../etc/passwd")
+
+    def test_reference_counts_and_garbage_collection(self):
+        """Test only blobs without references are collected"""
+        other = self.store.put(io.BytesIO(b"other evidence"))
+        self.store.put(self.path)
+        self.assertEqual(self.store.add_ref(self.digest), 1)
+        self.assertEqual(self.store.add_ref(self.digest), 2)
+        self.assertEqual(self.store.release(self.digest), 1)
+        self.assertEqual(self.store.collect_garbage(grace_seconds=60), 0)   # Too recent to collect
+        self.assertEqual(self.store.collect_garbage(grace_seconds=0), 1)
+        self.assertFalse(self.store.contains(other))
+        self.assertTrue(self.store.contains(self.digest))
+        self.assertEqual(self.store.release(self.digest), 0)
+        self.store.collect_garbage(grace_seconds=0)
+        self.assertFalse(self.store.contains(self.digest))
+        with self.assertRaises(KeyError):
+            self.store.add_ref(self.digest)
+
+    def test_claim_evidence(self):
+        """Test claims record digests of stored files and keep strings as document IDs"""
+        claim = Claim("CLM001", "POL001", "jane@gmail.com")
+        self.assertTrue(claim.add_evidence(pathlib.Path(self.path)))
+        self.assertFalse(claim.add_evidence(io.BytesIO(self.content)))  # Same file again
+        self.assertTrue(claim.add_evidence("DOC001"))
+        self.assertTrue(claim.add_evidence(self.path))                   # A string is never read as a file
+        self.assertFalse(claim.add_evidence(""))
+        self.assertEqual(claim.evidence_documents, [self.digest, "DOC001", self.path])
+        self.assertEqual(self.store.refcount(self.digest), 0)            # Not referenced until saved
+        self.assertTrue(claim.remove_evidence(self.path))
+        self.assertFalse(hasattr(claim, "__dict__"))
+
+    def test_garbage_collection_counts_saved_claims(self):
+        """Test collection keeps files of saved claims and removes those only unsaved or discarded claims used"""
+        saved = Claim("CLM001", "POL001", "jane@gmail.com")
+        saved.add_evidence(pathlib.Path(self.path))
+        self.assertTrue(ClaimsStorageService.save_claim(saved))
+        second = Claim("CLM002", "POL001", "jane@gmail.com")
+        second.add_evidence(io.BytesIO(self.content))
+        self.assertTrue(ClaimsStorageService.save_claim(second))
+        discarded = Claim("CLM003", "POL001", "jane@gmail.com")
+        discarded.add_evidence(io.BytesIO(b"never saved"))
+        unsaved = hashlib.sha256(b"never saved").hexdigest()
+
+        self.assertEqual(ClaimsStorageService.collect_evidence_garbage(grace_seconds=60), 0)  # Too recent
+        self.assertEqual(ClaimsStorageService.collect_evidence_garbage(grace_seconds=0), 1)
+        self.assertFalse(self.store.contains(unsaved))
+        self.assertEqual(self.store.refcount(self.digest), 2)
+
+        saved.remove_evidence(self.digest)
+        ClaimsStorageService.save_claim(saved)
+        ClaimsStorageService.collect_evidence_garbage(grace_seconds=0)
+        self.assertEqual(self.store.refcount(self.digest), 1)
+        second.remove_evidence(self.digest)
+        ClaimsStorageService.save_claim(second)
+        self.assertEqual(ClaimsStorageService.collect_evidence_garbage(grace_seconds=0), 1)
+        self.assertFalse(self.store.contains(self.digest))
+
+if __name__ == '__main__':
+    unittest.main()
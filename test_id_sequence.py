@@ -0,0 +1,46 @@
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from id_sequence import SequenceAllocator
+
+
+def _allocate_many(path, count):
+    allocator = SequenceAllocator(path, block_size=5)
+    return [allocator.next_id("CLM") for _ in range(count)]
+
+
+class TestSequenceAllocator(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "sequences.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_seeded_from_existing_ids(self):
+        """Test a new sequence continues after the highest stored ID"""
+        allocator = SequenceAllocator(self.path, block_size=3)
+        self.assertEqual(allocator.next_id("POL", seed=lambda: 41), "POL042")
+        self.assertEqual(allocator.next_id("POL", seed=lambda: 0), "POL043")
+        self.assertEqual(allocator.next_id("CLM"), "CLM001")
+
+    def test_restart_skips_reserved_block(self):
+        """Test a restarted allocator never reuses values from a reserved block"""
+        first = SequenceAllocator(self.path, block_size=10)
+        self.assertEqual(first.next_value("POL"), 1)
+        second = SequenceAllocator(self.path, block_size=10)
+        self.assertEqual(second.next_value("POL"), 11)
+        self.assertEqual(first.next_value("POL"), 2)
+
+    def test_unique_across_processes(self):
+        """Test concurrent processes never receive the same ID"""
+        with ProcessPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(_allocate_many, [self.path] * 4, [25] * 4))
+        ids = [claim_id for batch in results for claim_id in batch]
+        self.assertEqual(len(ids), len(set(ids)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import math
+import unittest
+import numpy as np
+from policy_book import PolicyBook
+from policy_enums import PolicyType
+from loss_simulation import LossModel, LossSimulation, FrequencySeverity
+
+
+class TestLossSimulation(unittest.TestCase):
+    def setUp(self):
+        """A synthetic book with one-year policies and claims drawn from a known model"""
+        rng = np.random.default_rng(3)
+        policies = {}
+        for i in range(4000):
+            policies[f"POL{i:05d}"] = {"policy_type": ["CAR", "LIFE", "HEALTH", "PROPERTY"][i % 4],
+                                       "status": "PolicyStatus.ACTIVE", "coverage_amount": 10000.0 * (1 + i % 7),
+                                       "premium": 100.0, "start_date": "2024-01-01", "end_date": "2025-01-01"}
+        self.book = PolicyBook.from_records([("owner@example.com", {"policies": policies})])
+
+        # CAR claims at 0.2 per policy-year, a tenth of coverage on average; one LIFE claim only
+        self.claims = {}
+        car_ids = [policy_id for i, policy_id in enumerate(policies) if i % 4 == 0]
+        for n, policy_id in enumerate(rng.choice(car_ids, size=200)):
+            share = min(rng.lognormal(math.log(0.1), 0.5), 1.0)
+            self.claims[f"CLM{n}"] = {"policy_id": policy_id, "status": "APPROVED",
+                                      "amount": policies[policy_id]["coverage_amount"] * share}
+        self.claims["CLM_LIFE"] = {"policy_id": "POL00001", "status": "PENDING", "amount": 5000.0}
+        self.claims["CLM_REJECTED"] = {"policy_id": "POL00002", "status": "REJECTED", "amount": 9000.0}
+        self.claims["CLM_UNKNOWN"] = {"policy_id": "POL99999", "status": "APPROVED", "amount": 100.0}
+
+    def test_fit(self):
+        """Test per-type fits, pooled fallback for sparse types and ignored claims"""
+        model = LossModel.fit(self.book, self.claims)
+        car = model.models[PolicyType.CAR]
+        self.assertEqual((car.source, car.claims), ("type", 200))
+        self.assertAlmostEqual(car.frequency, 0.2)
+        self.assertAlmostEqual(car.mu, math.log(0.1), delta=0.1)
+        self.assertAlmostEqual(car.sigma, 0.5, delta=0.1)
+        life = model.models[PolicyType.LIFE]
+        self.assertEqual((life.source, life.claims), ("pooled", 1))
+        self.assertEqual(model.models[PolicyType.HEALTH].claims, 0)
+
+        empty = LossModel.fit(self.book, {})
+        self.assertEqual(empty.models[PolicyType.CAR].frequency, LossModel.DEFAULT_FREQUENCY)
+
+    def test_mean_matches_model(self):
+        """Test the simulated mean loss is close to frequency x policies x mean claim"""
+        model = LossModel({t: FrequencySeverity(t, 0.1, math.log(0.05), 0.3) for t in PolicyType})
+        result = LossSimulation(self.book, model, trials=2000, seed=1).run()
+        expected = 0.1 * self.book.coverage.sum() * math.exp(math.log(0.05) + 0.3 ** 2 / 2)
+        self.assertAlmostEqual(result.aggregate.mean() / expected, 1.0, delta=0.02)
+        self.assertLessEqual(result.largest.max(), self.book.coverage.max())
+
+    def test_risk_measures(self):
+        """Test VaR, TVaR and PML are ordered and computed from the simulated trials"""
+        result = LossSimulation(self.book, LossModel.fit(self.book, self.claims), trials=1000, seed=5).run()
+        summary = result.summary()
+        self.assertLess(summary["var"][0.95], summary["var"][0.99])
+        for level in result.VAR_LEVELS:
+            self.assertGreaterEqual(summary["tvar"][level], summary["var"][level])
+        self.assertEqual(summary["var"][0.99], float(np.sort(result.aggregate)[990]))
+        self.assertLessEqual(summary["pml"][100], summary["aggregate_pml"][100])
+
+    def test_seeded_blocks_are_reproducible(self):
+        """Test a fixed seed gives the same trials in one block, many blocks or a process pool"""
+        model = LossModel.fit(self.book, self.claims)
+        single = LossSimulation(self.book, model, trials=300, seed=9).run()
+        again = LossSimulation(self.book, model, trials=300, seed=9).run()
+        np.testing.assert_array_equal(single.by_type, again.by_type)
+
+        saved = LossSimulation.MAX_CLAIMS_PER_BLOCK
+        LossSimulation.MAX_CLAIMS_PER_BLOCK = 5000     # About ten trials per block
+        try:
+            simulation = LossSimulation(self.book, model, trials=300, seed=9)
+            self.assertGreater(len(simulation.blocks()), 10)
+            serial = simulation.run()
+            simulation.workers = 2
+            parallel = simulation.run()
+        finally:
+            LossSimulation.MAX_CLAIMS_PER_BLOCK = saved
+        np.testing.assert_array_equal(serial.by_type, parallel.by_type)
+        np.testing.assert_array_equal(serial.largest, parallel.largest)
+        self.assertNotEqual(LossSimulation(self.book, model, trials=300, seed=10).run().aggregate.sum(),
+                            single.aggregate.sum())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from payment_ledger import PaymentLedger
+from payment_storage_service import PaymentStorageService
+
+
+class TestPaymentLedger(unittest.TestCase):
+    def setUp(self):
+        """Temporary ledger with three payments on two policies and two dates"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.saved = (PaymentStorageService.LEDGER_FILE, PaymentStorageService.PAYMENTS_FILE,
+                      PaymentStorageService.BACKEND, PaymentStorageService._ledger, PaymentLedger.CHECKPOINT_EVERY)
+        PaymentStorageService.LEDGER_FILE = os.path.join(self.tmp_dir, "payment_ledger.jsonl")
+        PaymentStorageService.PAYMENTS_FILE = os.path.join(self.tmp_dir, "payments.json")
+        PaymentStorageService.BACKEND = None
+        PaymentStorageService._ledger = None
+        self.path = PaymentStorageService.LEDGER_FILE
+        self.ledger = PaymentLedger(self.path)
+        self.ledger.record([self._payment("PAY1", "POL001", "2025-01-02"),
+                            self._payment("PAY2", "POL001", "2025-01-05"),
+                            self._payment("PAY3", "POL002", "2025-01-05")])
+
+    def tearDown(self):
+        (PaymentStorageService.LEDGER_FILE, PaymentStorageService.PAYMENTS_FILE,
+         PaymentStorageService.BACKEND, PaymentStorageService._ledger, PaymentLedger.CHECKPOINT_EVERY) = self.saved
+        shutil.rmtree(self.tmp_dir)
+
+    @staticmethod
+    def _payment(payment_id, policy_id, day, status="PENDING"):
+        return {"payment_id": payment_id, "policy_id": policy_id, "amount": 100.0, "payment_date": day,
+                "payment_status": status, "payment_method": "CHECK", "transaction_id": ""}
+
+    def test_indexes_follow_changes(self):
+        """Test lookups by ID, policy, status and date range, and that a status change moves the payment"""
+        self.assertEqual(self.ledger.get("PAY2")["policy_id"], "POL001")
+        self.assertIsNone(self.ledger.get("PAY9"))
+        self.assertEqual(list(self.ledger.by_policy("POL001")), ["PAY1", "PAY2"])
+        self.assertEqual(list(self.ledger.by_date("2025-01-03", "2025-01-31")), ["PAY2", "PAY3"])
+        self.assertEqual(list(self.ledger.by_date("2025-01-02")), ["PAY1"])
+
+        self.ledger.record([self._payment("PAY2", "POL001", "2025-01-05", "COMPLETED")], "processed")
+        self.assertEqual(list(self.ledger.by_status("PENDING")), ["PAY1", "PAY3"])
+        self.assertEqual(list(self.ledger.by_status("COMPLETED")), ["PAY2"])
+        self.assertEqual([change["event"] for change in self.ledger.history("PAY2")], ["created", "processed"])
+
+    def test_checkpoint_and_other_writers(self):
+        """Test a restart from a checkpoint plus the journal tail matches a full replay and sees other writers"""
+        PaymentLedger.CHECKPOINT_EVERY = 2
+        self.ledger.record([self._payment("PAY1", "POL001", "2025-01-02", "COMPLETED")], "processed")
+        self.assertTrue(os.path.exists(self.ledger.checkpoint_path))
+
+        other = PaymentLedger(self.path)
+        self.assertGreater(other._end, 0)
+        other.record([self._payment("PAY1", "POL001", "2025-01-02", "REFUNDED")], "refunded")
+        self.assertEqual(self.ledger.get("PAY1")["payment_status"], "REFUNDED")
+        os.remove(self.ledger.checkpoint_path)
+        self.assertEqual(PaymentLedger(self.path).all(), self.ledger.all())
+
+    def test_append_after_torn_tail(self):
+        """Test a record appended after a crashed writer's partial line is kept"""
+        with open(self.path, 'ab') as f:
+            f.write(b'{"event": "created", "payment": {"payment_id": "PAY')
+        self.assertEqual(self.ledger.record([self._payment("PAY4", "POL002", "2025-01-06")]), ["PAY4"])
+        self.assertEqual(self.ledger.get("PAY4")["policy_id"], "POL002")
+        self.assertEqual(sorted(PaymentLedger(self.path).all()), ["PAY1", "PAY2", "PAY3", "PAY4"])
+
+    def test_storage_service_imports_old_payments(self):
+        """Test the service starts a ledger from the old payments file and stores changes in it"""
+        self.path = PaymentStorageService.LEDGER_FILE = os.path.join(self.tmp_dir, "new_ledger.jsonl")
+        with open(PaymentStorageService.PAYMENTS_FILE, 'w') as f:
+            json.dump({"PAY7": self._payment("PAY7", "POL003", "2024-12-30")}, f)
+        self.assertEqual(list(PaymentStorageService.load_payments("PENDING", policy_id="POL003")), ["PAY7"])
+
+        self.assertTrue(PaymentStorageService.save_payment(
+            self._payment("PAY7", "POL003", "2024-12-30", "COMPLETED"), "processed"))
+        self.assertEqual(PaymentStorageService.load_payment("PAY7")["payment_status"], "COMPLETED")
+        self.assertEqual(list(PaymentStorageService.load_payments_by_date("2024-12-01", "2024-12-31")), ["PAY7"])
+        self.assertEqual([change["event"] for change in PaymentLedger(self.path).history("PAY7")],
+                         ["imported", "processed"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+import unittest
+from payment_processor import GatewayError, PaymentProcessor, SimulatedGateway
+from payment_storage_service import PaymentStorageService
+
+
+class FlakyGateway(SimulatedGateway):
+    """Loses the response to the first call for every payment, after charging it"""
+
+    def __init__(self):
+        super().__init__(latency=0)
+        self.seen = set()
+
+    def charge(self, payment, idempotency_key):
+        transaction_id = super().charge(payment, idempotency_key)
+        with self._lock:
+            first = idempotency_key not in self.seen
+            self.seen.add(idempotency_key)
+        if first:
+            raise GatewayError("Connection lost after charge")
+        return transaction_id
+
+
+class TestPaymentProcessor(unittest.TestCase):
+    def setUp(self):
+        """Temporary payment ledger with 200 pending payments"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.saved = (PaymentStorageService.LEDGER_FILE, PaymentStorageService.PAYMENTS_FILE,
+                      PaymentStorageService.BACKEND, PaymentStorageService._ledger)
+        PaymentStorageService.LEDGER_FILE = os.path.join(self.tmp_dir, "payment_ledger.jsonl")
+        PaymentStorageService.PAYMENTS_FILE = os.path.join(self.tmp_dir, "payments.json")
+        PaymentStorageService.BACKEND = None
+        PaymentStorageService._ledger = None
+        self.payments = [{"payment_id": f"PAY_CLM{i:04d}", "policy_id": f"POL{i % 7:03d}", "amount": 10.0 + i,
+                          "payment_date": "2025-01-02", "payment_status": "PENDING",
+                          "payment_method": "BANK_TRANSFER", "transaction_id": ""} for i in range(200)]
+        PaymentStorageService.save_payments(self.payments)
+
+    def tearDown(self):
+        (PaymentStorageService.LEDGER_FILE, PaymentStorageService.PAYMENTS_FILE,
+         PaymentStorageService.BACKEND, PaymentStorageService._ledger) = self.saved
+        shutil.rmtree(self.tmp_dir)
+
+    def test_concurrent_run_with_failures(self):
+        """Test transient failures are retried without double charges and declines are marked FAILED"""
+        gateway = SimulatedGateway(latency=0.002, failure_rate=0.3, decline_rate=0.05, seed=7)
+        report = PaymentProcessor(gateway, max_workers=16, chunk_size=64, max_attempts=10, backoff_base=0).run()
+
+        self.assertEqual(report.selected, 200)
+        self.assertEqual(report.completed + len(report.declined) + len(report.retry_exhausted), 200)
+        self.assertGreater(len(report.declined), 0)
+        self.assertGreater(report.attempts, 200)
+        completed = PaymentStorageService.load_payments("COMPLETED")
+        self.assertEqual(len(completed), report.completed)
+        self.assertEqual(len(gateway.transactions), report.completed)
+        self.assertEqual(len({payment["transaction_id"] for payment in completed.values()}), report.completed)
+        self.assertEqual(sorted(PaymentStorageService.load_payments("FAILED")), sorted(report.declined))
+        self.assertEqual(round(report.total_charged, 2),
+                         round(sum(payment["amount"] for payment in completed.values()), 2))
+
+    def test_retry_after_lost_response(self):
+        """Test a retry after a lost response returns the original charge"""
+        gateway = FlakyGateway()
+        report = PaymentProcessor(gateway, max_workers=8, backoff_base=0).run()
+        self.assertEqual((report.completed, report.attempts), (200, 400))
+        self.assertEqual(len(gateway.transactions), 200)
+
+    def test_rerun_does_not_charge_twice(self):
+        """Test payments charged in a run whose results were lost are not charged again"""
+        gateway = SimulatedGateway(latency=0)
+        PaymentProcessor(gateway).run()
+        first = dict(gateway.transactions)
+        PaymentStorageService.save_payments(self.payments)   # As if the run crashed before storing results
+
+        report = PaymentProcessor(gateway).run()
+        self.assertEqual(report.completed, 200)
+        self.assertEqual(gateway.transactions, first)
+        self.assertEqual(PaymentStorageService.load_payment("PAY_CLM0001")["transaction_id"],
+                         first[PaymentProcessor.idempotency_key(self.payments[1])])
+
+    def test_invalid_and_exhausted(self):
+        """Test payments without a method are skipped and failing ones stay pending"""
+        PaymentStorageService.save_payment(dict(self.payments[0], payment_method=""))
+        gateway = SimulatedGateway(latency=0, failure_rate=1.0, seed=1)
+        report = PaymentProcessor(gateway, max_attempts=2, backoff_base=0).run()
+        self.assertEqual(report.invalid, ["PAY_CLM0000"])
+        self.assertEqual(len(report.retry_exhausted), 199)
+        self.assertEqual(len(PaymentStorageService.load_payments("PENDING")), 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
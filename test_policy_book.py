@@ -0,0 +1,57 @@
+import unittest
+import numpy as np
+from policy_enums import PolicyType, PolicyStatus
+from policy_book import PolicyBook
+
+
+def _customer(email, policies):
+    return email, {"customer_info": {"email": email}, "policies": policies}
+
+
+class TestPolicyBook(unittest.TestCase):
+    def setUp(self):
+        """Build a book from raw stored records"""
+        self.book = PolicyBook.from_records([
+            _customer("jane@gmail.com", {
+                "POL001": {"policy_id": "POL001", "customer_id": "jane@gmail.com", "policy_type": "LIFE",
+                           "coverage_amount": 1000.0, "premium": 10.0, "status": "PolicyStatus.ACTIVE",
+                           "start_date": "2025-01-01T00:00:00", "end_date": "2026-01-01T00:00:00",
+                           "beneficiary": "John", "death_benefit": 500.0},
+                "POL002": {"policy_id": "POL002", "customer_id": "jane@gmail.com", "policy_type": "CAR",
+                           "coverage_amount": 2000.0, "premium": 20.0, "status": "PENDING"},
+            }),
+            _customer("bob@gmail.com", {
+                "POL003": {"policy_id": "POL003", "customer_id": "bob@gmail.com", "policy_type": "LIFE",
+                           "coverage_amount": 4000.0, "premium": 40.0, "status": "PolicyStatus(4)",
+                           "start_date": "2025-06-01", "end_date": "2025-07-01"},
+            }),
+        ])
+
+    def test_columns(self):
+        """Test records become typed columns"""
+        self.assertEqual(len(self.book), 3)
+        self.assertEqual(self.book.type_code.dtype, np.int8)
+        self.assertEqual(list(self.book.status_code), [4, 1, 4])
+        self.assertTrue(np.isnat(self.book.start[1]))
+
+    def test_group_bys(self):
+        """Test sums by type, status and customer"""
+        self.assertEqual(self.book.total_by_type()["LIFE"], 5000.0)
+        self.assertEqual(self.book.total_by_status()["ACTIVE"], 50.0)
+        self.assertEqual(self.book.count_by_type(), {"LIFE": 2, "CAR": 1, "HEALTH": 0, "PROPERTY": 0})
+        self.assertEqual(self.book.total_by_customer(), {"jane@gmail.com": 30.0, "bob@gmail.com": 40.0})
+
+    def test_filters_and_objects(self):
+        """Test vectorised filters and on-demand policy objects"""
+        active = self.book.where(policy_type=PolicyType.LIFE, active_on="2025-06-15")
+        self.assertEqual(list(active.policy_ids), ["POL001", "POL003"])
+        self.assertFalse(self.book.mask(customer="nobody@gmail.com").any())
+
+        policies = self.book.to_policies(self.book.mask(status=PolicyStatus.ACTIVE, customer="jane@gmail.com"))
+        self.assertEqual(len(policies), 1)
+        self.assertEqual(policies[0].beneficiary, "John")
+        self.assertEqual(policies[0].get_status(), PolicyStatus.ACTIVE)
+
+
+if __name__ == '__main__':
+    unittest.main()
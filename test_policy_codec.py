@@ -0,0 +1,57 @@
+import unittest
+from datetime import datetime
+from policy import LifePolicy, CarPolicy, HealthPolicy, PropertyPolicy
+from policy_enums import PolicyStatus
+from policy_codec import PolicyCodec, parse_status
+
+
+class TestPolicyCodec(unittest.TestCase):
+    def setUp(self):
+        """Create one policy of each type with every field set"""
+        life = LifePolicy("POL001", "jane@gmail.com")
+        life.set_beneficiary("John")
+        life.set_death_benefit(50000.0)
+        car = CarPolicy("POL002", "jane@gmail.com")
+        car.set_vehicle_details("V1", True, 3, "Myvi", "QAA1234", "GOOD")
+        health = HealthPolicy("POL003", "jane@gmail.com")
+        health.set_health_details(500.0, True)
+        prop = PropertyPolicy("POL004", "jane@gmail.com")
+        prop.set_property_details("Kuching", "HOUSE")
+        self.policies = [life, car, health, prop]
+        for policy in self.policies:
+            policy.set_coverage_amount(10000.0)
+            policy.set_premium(120.5)
+            policy.set_dates(datetime(2025, 1, 1), datetime(2026, 1, 1))
+            policy.update_status(PolicyStatus.ACTIVE)
+
+    def test_encode_matches_to_dict(self):
+        """Test the compiled encoders produce the same dictionaries as to_dict"""
+        for policy in self.policies:
+            self.assertEqual(PolicyCodec.encode(policy), policy.to_dict())
+
+    def test_round_trip(self):
+        """Test decoding an encoded policy restores every field"""
+        for policy in self.policies:
+            decoded = PolicyCodec.decode(PolicyCodec.encode(policy))
+            self.assertIs(type(decoded), type(policy))
+            self.assertEqual(decoded.to_dict(), policy.to_dict())
+
+    def test_status_spellings(self):
+        """Test every stored status format resolves to the same member"""
+        for value in ("PolicyStatus.ACTIVE", "ACTIVE", "PolicyStatus(4)", "4", 4, "active"):
+            self.assertEqual(parse_status(value), PolicyStatus.ACTIVE)
+        self.assertIsNone(parse_status("UNKNOWN"))
+
+    def test_decode_many_skips_bad_entries(self):
+        """Test unknown types and malformed records are skipped"""
+        records = {
+            "POL001": PolicyCodec.encode(self.policies[0]),
+            "POL005": {"policy_type": "BOAT"},
+            "POL006": {"policy_type": "LIFE", "coverage_amount": "lots"},
+        }
+        decoded = PolicyCodec.decode_many(records, "jane@gmail.com")
+        self.assertEqual(list(decoded), ["POL001"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import random
+import unittest
+import numpy as np
+from calculations import PolicyCalculator
+from policy_enums import PolicyType
+
+
+class TestPremiumBatch(unittest.TestCase):
+    def setUp(self):
+        """Random policies of every type, including values that sit on rounding ties"""
+        rng = random.Random(42)
+        self.rows = []
+        for i in range(5000):
+            policy_type = rng.choice(list(PolicyType))
+            coverage = rng.choice([rng.uniform(-100, 1000000), round(rng.uniform(0, 100000), 2),
+                                   float(rng.randint(1, 2000) * 125), 0.0])
+            term = rng.choice([0, 1, 6, 12, 18, 24, 36, rng.randint(-3, 120)])
+            factors = {
+                'vehicle_age': rng.randint(0, 20),
+                'annual_mileage': rng.choice([5000, 15000, 15001, 20000, 20001, 30000]),
+                'driving_history': rng.choice(['CLEAN', 'minor_violations', 'Major_Violations', 'ACCIDENTS', 'OTHER']),
+                'parking_location': rng.choice(['GARAGE', 'driveway', 'STREET', 'public_parking', 'MOON']),
+                'age': rng.choice([18, 40, 41, 60, 61, 85]),
+                'pre_conditions': rng.randint(0, 5),
+                'location_risk': rng.choice(['LOW', 'medium', 'High', 'UNKNOWN']),
+            }
+            self.rows.append((policy_type, coverage, term, factors))
+
+    def _batch(self, rows):
+        columns = {key: [row[3][key] for row in rows] for key in rows[0][3]}
+        return PolicyCalculator.calculate_premiums_batch(
+            [row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows], columns)
+
+    def test_matches_scalar_path(self):
+        """Test every batch premium equals calculate_premium to the cent"""
+        expected = [PolicyCalculator.calculate_premium(*row) for row in self.rows]
+        self.assertEqual(self._batch(self.rows).tolist(), expected)
+
+    def test_type_spellings(self):
+        """Test types given as names or values price the same as PolicyType members"""
+        types = [row[0] for row in self.rows]
+        coverages = [row[1] for row in self.rows]
+        terms = [row[2] for row in self.rows]
+        by_member = PolicyCalculator.calculate_premiums_batch(types, coverages, terms)
+        by_name = PolicyCalculator.calculate_premiums_batch([t.name for t in types], coverages, terms)
+        by_value = PolicyCalculator.calculate_premiums_batch(np.array([t.value for t in types]), coverages, terms)
+        self.assertEqual(by_member.tolist(), by_name.tolist())
+        self.assertEqual(by_member.tolist(), by_value.tolist())
+
+    def test_missing_factors_use_defaults(self):
+        """Test missing columns and None entries take the scalar defaults"""
+        types = [PolicyType.CAR, PolicyType.LIFE, PolicyType.PROPERTY]
+        premiums = PolicyCalculator.calculate_premiums_batch(
+            types, [20000.0] * 3, [12] * 3, {'vehicle_age': [12, None, None], 'location_risk': [None, None, 'HIGH']})
+        expected = [
+            PolicyCalculator.calculate_premium(PolicyType.CAR, 20000.0, 12, {'vehicle_age': 12}),
+            PolicyCalculator.calculate_premium(PolicyType.LIFE, 20000.0, 12, {'age': 30}),
+            PolicyCalculator.calculate_premium(PolicyType.PROPERTY, 20000.0, 12, {'location_risk': 'HIGH'}),
+        ]
+        self.assertEqual(premiums.tolist(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+from policy_calculator import PolicyCalculator
+from policy_enums import PolicyType
+from quote_cache import QuoteCache, _MISSING
+from rating_engine import RatingEngine
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestQuoteCache(unittest.TestCase):
+    def setUp(self):
+        """Use a small private cache with a controllable clock"""
+        self.clock = FakeClock()
+        self.cache = QuoteCache(max_entries=3, ttl=60.0, clock=self.clock)
+        self.saved_shared = QuoteCache._shared
+        self.saved_engine = (RatingEngine._state, RatingEngine._source, RatingEngine.version)
+        QuoteCache._shared = self.cache
+
+    def tearDown(self):
+        QuoteCache._shared = self.saved_shared
+        RatingEngine._state, RatingEngine._source, RatingEngine.version = self.saved_engine
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted past max_entries"""
+        for key in ("a", "b", "c"):
+            self.cache.put(key, 1.0)
+        self.cache.get("a")
+        self.cache.put("d", 1.0)
+        self.assertIs(self.cache.get("b"), _MISSING)
+        self.assertEqual(self.cache.get("a"), 1.0)
+        self.assertEqual(self.cache.get_stats()["evictions"], 1)
+
+    def test_ttl_expiry(self):
+        """Test entries expire after the TTL"""
+        self.cache.put("a", 1.0)
+        self.clock.now = 59.0
+        self.assertEqual(self.cache.get("a"), 1.0)
+        self.clock.now = 61.0
+        self.assertIs(self.cache.get("a"), _MISSING)
+        self.assertEqual(self.cache.get_stats()["expirations"], 1)
+
+    def test_rate_table_change_expires_everything(self):
+        """Test a new rate table version empties the cache"""
+        version, tables, plans = RatingEngine._current()
+        self.cache.put("a", 1.0)
+        RatingEngine._swap(dict(tables, version=version + 1), plans, RatingEngine._source)
+        self.assertIs(self.cache.get("a"), _MISSING)
+        self.assertEqual(self.cache.get_stats()["entries"], 0)
+
+    def test_reload_during_compute_is_not_cached(self):
+        """Test a result priced under tables replaced while computing is returned but not stored"""
+        version, tables, plans = RatingEngine._current()
+
+        def compute():
+            RatingEngine._swap(dict(tables, version=version + 1), plans, RatingEngine._source)
+            return 1.0
+
+        self.assertEqual(self.cache.get_or_compute("a", compute), 1.0)
+        self.assertIs(self.cache.get("a"), _MISSING)
+        self.assertEqual(self.cache.get_or_compute("a", lambda: 2.0), 2.0)
+        self.assertEqual(self.cache.get("a"), 2.0)
+
+    def test_normalised_inputs_share_entries(self):
+        """Test equivalent premium requests hit the same entry"""
+        first = PolicyCalculator.calculate_premium(PolicyType.LIFE, 10000.0, 12, {"age": 40, "x": 1})
+        second = PolicyCalculator.calculate_premium(
+            policy_type=PolicyType.LIFE, coverage_amount=10000.001, term_months=12.0, risk_factors={"x": 1.0, "age": 40.0})
+        self.assertEqual(first, second)
+        stats = self.cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_cached_risk_scores_are_copies(self):
+        """Test callers cannot change a cached risk score"""
+        first = PolicyCalculator.calculate_car_risk_score(30, 0.2, [], 0.1)
+        first.add_factor("age", 99)
+        second = PolicyCalculator.calculate_car_risk_score(driver_age=30, vehicle_score=0.2,
+                                                           accident_history=[], location_risk=0.1)
+        self.assertEqual(second.factors["age"], 30)
+        self.assertEqual(self.cache.get_stats()["hits"], 1)
+
+    def test_errors_are_not_cached(self):
+        """Test invalid requests still raise every time"""
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                PolicyCalculator.calculate_premium(PolicyType.LIFE, -1.0, 12, {})
+        self.assertEqual(self.cache.get_stats()["entries"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from calculations import PolicyCalculator as Calculations
+from policy_calculator import PolicyCalculator
+from financial_calculator import FinancialCalculator
+from datetime import datetime
+from policy import LifePolicy
+from policy_enums import PolicyType
+from quote_cache import QuoteCache
+from rating_engine import RatingEngine, DEFAULT_RATE_TABLES, save_tables
+
+GOLDEN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden_premiums.json")
+
+
+class TestRatingEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Load the premiums each calculator produced before it was moved onto the engine"""
+        with open(GOLDEN_FILE, 'r') as f:
+            cls.golden = json.load(f)
+
+    def _check(self, cases, price):
+        for case in cases:
+            try:
+                premium = price(case)
+            except ValueError:
+                premium = "ValueError"
+            self.assertEqual(premium, case["premium"], case)
+
+    def test_calculations_adapter_matches_golden(self):
+        """Test calculations.PolicyCalculator still prices every golden case to the cent"""
+        self._check(self.golden["calculations"], lambda c: Calculations.calculate_premium(
+            PolicyType[c["policy_type"]], c["coverage"], c["term_months"], c["risk_factors"]))
+
+    def test_policy_calculator_adapter_matches_golden(self):
+        """Test policy_calculator.PolicyCalculator still prices every golden case to the cent"""
+        self._check(self.golden["policy_calculator"], lambda c: PolicyCalculator.calculate_premium(
+            PolicyType[c["policy_type"]], c["coverage"], c["term_months"], c["risk_factors"]))
+
+    def test_financial_adapter_matches_golden(self):
+        """Test FinancialCalculator still prices every golden case to the cent"""
+        self._check(self.golden["financial"], lambda c: FinancialCalculator.calculate_premium(
+            c["policy_type"], c["coverage"], c["risk_factors"]))
+
+    def test_batch_matches_scalar_for_every_profile(self):
+        """Test quote_batch agrees with quote for each profile's valid golden cases"""
+        for profile, cases in self.golden.items():
+            cases = [c for c in cases if c["premium"] != "ValueError" and c["policy_type"] in PolicyType.__members__]
+            # Rows without risk factors are unadjusted, so they are priced as a batch without columns
+            for with_factors in (False, True):
+                group = [c for c in cases if bool(c["risk_factors"]) == with_factors]
+                keys = sorted({key for c in group for key in c["risk_factors"]})
+                if profile == "financial":
+                    # "each" applies every supplied factor, so price rows with the same keys together
+                    group = [c for c in group if sorted(c["risk_factors"]) == keys]
+                columns = {key: [c["risk_factors"].get(key) for c in group] for key in keys}
+                batch = RatingEngine.quote_batch(profile, [c["policy_type"] for c in group],
+                                                 [c["coverage"] for c in group],
+                                                 [c.get("term_months") for c in group], columns)
+                expected = [RatingEngine.quote(profile, PolicyType[c["policy_type"]], c["coverage"],
+                                               c.get("term_months"), c["risk_factors"]) for c in group]
+                self.assertTrue(expected)
+                self.assertEqual(batch.tolist(), expected, profile)
+
+    def test_invalid_tables_rejected(self):
+        """Test malformed rate tables fail to compile"""
+        bad_bands = json.loads(json.dumps(DEFAULT_RATE_TABLES))
+        bad_bands["profiles"]["calculations"]["factors"]["LIFE"][0]["bands"]["up_to"] = [60, 40]
+        with self.assertRaises(ValueError):
+            RatingEngine.compile(bad_bands)
+        unknown_type = json.loads(json.dumps(DEFAULT_RATE_TABLES))
+        unknown_type["profiles"]["calculations"]["base_rates"]["BOAT"] = 0.1
+        with self.assertRaises(ValueError):
+            RatingEngine.compile(unknown_type)
+        with self.assertRaises(ValueError):
+            RatingEngine.compile(dict(DEFAULT_RATE_TABLES, version="2"))
+
+
+class TestRateTableReload(unittest.TestCase):
+    def setUp(self):
+        """Point the engine at a rate table file in a temporary directory"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.saved = (RatingEngine.RATE_TABLES_FILE, RatingEngine._state, RatingEngine._source,
+                      RatingEngine.version, RatingEngine.CHECK_INTERVAL)
+        RatingEngine.RATE_TABLES_FILE = os.path.join(self.tmp_dir, "rate_tables.json")
+        RatingEngine.CHECK_INTERVAL = 0.0
+        RatingEngine._state = RatingEngine._source = None
+
+    def tearDown(self):
+        (RatingEngine.RATE_TABLES_FILE, RatingEngine._state, RatingEngine._source,
+         RatingEngine.version, RatingEngine.CHECK_INTERVAL) = self.saved
+        RatingEngine._next_check = 0.0
+        shutil.rmtree(self.tmp_dir)
+
+    def _tables(self, version, life_rate):
+        tables = json.loads(json.dumps(DEFAULT_RATE_TABLES))
+        tables["version"] = version
+        tables["profiles"]["calculations"]["base_rates"]["LIFE"] = life_rate
+        return tables
+
+    def test_creates_file_and_ignores_compiled_cache(self):
+        """Test the default tables seed the file and a leftover compiled cache is never unpickled"""
+        with open(os.path.join(self.tmp_dir, "rate_tables.compiled"), 'wb') as f:
+            f.write(b"cos\nsystem\n(S'exit 1'\ntR.")   # Pickle that would run a shell command
+        self.assertEqual(RatingEngine.current_version(), 1)
+        self.assertTrue(os.path.exists(RatingEngine.RATE_TABLES_FILE))
+        self.assertTrue(RatingEngine.load())
+        self.assertEqual(RatingEngine.quote("calculations", PolicyType.LIFE, 10000.0, 12, {}), 50.0)
+
+    def test_changed_file_is_picked_up(self):
+        """Test running sessions price with a file changed on disk"""
+        self.assertEqual(RatingEngine.quote("calculations", PolicyType.LIFE, 10000.0, 12, {}), 50.0)
+        save_tables(RatingEngine.RATE_TABLES_FILE, self._tables(2, 0.01))
+        self.assertEqual(RatingEngine.quote("calculations", PolicyType.LIFE, 10000.0, 12, {}), 100.0)
+        self.assertEqual(RatingEngine.version, 2)
+
+    def test_invalid_file_keeps_live_tables(self):
+        """Test a broken file is rejected and the previous tables stay live"""
+        RatingEngine.current_version()
+        bad = self._tables(2, 0.01)
+        del bad["profiles"]["calculations"]["base_rates"]
+        bad["profiles"]["calculations"]["factors"]["CAR"][0]["bands"]["values"] = [1.0]
+        save_tables(RatingEngine.RATE_TABLES_FILE, bad)
+        self.assertEqual(RatingEngine.quote("calculations", PolicyType.LIFE, 10000.0, 12, {}), 50.0)
+        self.assertEqual(RatingEngine.version, 1)
+
+    def test_publish_requires_newer_version(self):
+        """Test publishing validates and only moves the version forward"""
+        RatingEngine.current_version()
+        self.assertFalse(RatingEngine.publish(self._tables(1, 0.01)))
+        self.assertTrue(RatingEngine.publish(self._tables(3, 0.01)))
+        self.assertEqual(RatingEngine.current_version(), 3)
+
+    def test_policy_version_matches_the_tables_that_priced_it(self):
+        """Test tables published while a policy is priced do not relabel its premium"""
+        QuoteCache.shared().clear()
+        plan = RatingEngine.plan("policy_calculator")
+        quote = plan.quote
+        newer = self._tables(2, 0.01)
+        newer["profiles"]["policy_calculator"]["base_rates"]["LIFE"] = 0.01
+
+        def publish_while_pricing(*args):
+            premium = quote(*args)
+            RatingEngine.publish(newer)
+            return premium
+
+        plan.quote = publish_while_pricing
+        policy = LifePolicy("POL001", "user@gmail.com")
+        policy.set_coverage_amount(10000.0)
+        policy.set_dates(datetime(2025, 1, 1), datetime(2026, 1, 1))
+        premium = policy.calculate_premium({})
+        self.assertEqual(RatingEngine.current_version(), 2)
+        self.assertEqual(policy.rate_table_version, 1)
+        self.assertEqual(premium, quote(PolicyType.LIFE, 10000.0, 12, {}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import csv
+import json
+import os
+import unittest
+from claims_storage_service import ClaimsStorageService
+from data_storage_service import DataStorageService
+from payment_storage_service import PaymentStorageService
+from reconciliation import ReconciliationEngine
+from sqlite_storage import SQLiteStorage
+from storage_fixtures import TemporaryStorageMixin, life_and_health_customer
+
+
+class TestReconciliation(TemporaryStorageMixin, unittest.TestCase):
+    def setUp(self):
+        """Temporary storage with a LIFE and a HEALTH policy, claims and payments with one problem each"""
+        super().setUp()
+        self.customer = life_and_health_customer()
+        DataStorageService.get_store().replace_all({"jane@gmail.com": self.customer})
+        self.claims = {
+            "CLM001": self._claim("CLM001", "POL001", "SETTLED", 300.0),     # Paid correctly
+            "CLM002": self._claim("CLM002", "POL002", "SETTLED", 1000.0),    # Paid without the deductible
+            "CLM003": self._claim("CLM003", "POL002", "SETTLED", 500.0),     # Never paid
+            "CLM004": self._claim("CLM004", "POL001", "PENDING", 50.0),      # Paid while pending
+            "CLM005": self._claim("CLM005", "POL001", "APPROVED", 900.0),    # Paid correctly, over coverage in total
+            "CLM006": self._claim("CLM006", "POL999", "APPROVED", 10.0),     # Unknown policy
+        }
+        self.payments = [
+            self._payment("PAY_CLM001", "POL001", 300.0, "TXN_1"),
+            self._payment("PAY_CLM002", "POL002", 1000.0, "TXN_2"),
+            self._payment("PAY_CLM004", "POL001", 50.0, "TXN_3"),
+            self._payment("PAY_CLM005", "POL001", 900.0, "TXN_4"),
+            self._payment("PAY_CLM006", "POL999", 10.0, "TXN_4"),            # Reused transaction
+            self._payment("PAY_CLM404", "POL002", 75.0, ""),                 # No such claim
+            dict(self._payment("PAY_CLM003", "POL002", 300.0, "TXN_5"), payment_status="REFUNDED"),
+        ]
+
+    @staticmethod
+    def _claim(claim_id, policy_id, status, amount):
+        return {"claim_id": claim_id, "policy_id": policy_id, "customer_id": "jane@gmail.com", "amount": amount,
+                "status": status, "description": "Claim", "evidence_documents": [], "date_filed": "2025-01-02"}
+
+    @staticmethod
+    def _payment(payment_id, policy_id, amount, transaction_id):
+        return {"payment_id": payment_id, "policy_id": policy_id, "amount": amount, "payment_date": "2025-01-31",
+                "payment_status": "COMPLETED", "payment_method": "BANK_TRANSFER", "transaction_id": transaction_id}
+
+    def _flags(self, path):
+        with open(path, newline='') as f:
+            return sorted((row["flag"], row["claim_id"]) for row in csv.DictReader(f))
+
+    def _check(self, report, path):
+        expected = [("AMOUNT_MISMATCH", "CLM002"), ("CLAIM_NOT_APPROVED", "CLM004"),
+                    ("DUPLICATE_TRANSACTION", "CLM006"), ("ORPHAN_PAYMENT", "CLM404"),
+                    ("OVER_COVERAGE", ""), ("UNKNOWN_POLICY", "CLM006"), ("UNPAID_CLAIM", "CLM003")]
+        self.assertEqual(self._flags(path), expected)
+        self.assertEqual((report.payments_read, report.claims_read, report.matched), (7, 6, 2))
+        self.assertEqual(report.findings(), len(expected))
+        self.assertEqual(report.total_paid, 300.0 + 1000.0 + 50.0 + 900.0 + 10.0 + 75.0)
+        self.assertEqual(report.total_expected, 300.0 + 800.0 + 300.0 + 900.0)
+        self.assertEqual(report.premiums_billed, 30.0)
+
+    def test_flags_problems_in_any_partitioning(self):
+        """Test every kind of finding is reported, whatever the number of partitions"""
+        for partitions in (1, 3, 64):
+            path = os.path.join(self.tmp_dir, f"report_{partitions}.csv")
+            report = ReconciliationEngine(partitions=partitions).run(path, self.payments, self.claims.values())
+            self._check(report, path)
+
+    def test_duplicate_payment(self):
+        """Test a claim paid by the same payment row twice is flagged once as a duplicate"""
+        path = os.path.join(self.tmp_dir, "report.csv")
+        payments = self.payments[:1] + [dict(self.payments[0], transaction_id="TXN_9")]
+        report = ReconciliationEngine(partitions=4).run(path, payments, [self.claims["CLM001"]])
+        self.assertEqual(self._flags(path), [("DUPLICATE_PAYMENT", "CLM001")])
+        self.assertEqual(report.matched, 1)
+
+    def test_premium_payments_match_billed_premiums(self):
+        """Test payments other than PAY_<claim ID> are matched against their policy's billed premium"""
+        path = os.path.join(self.tmp_dir, "report.csv")
+        payments = [self._payment("PREM_POL001_2025_01", "POL001", 10.0, "TXN_1"),
+                    self._payment("PREM_POL002_2025_01", "POL002", 5.0, "TXN_2"),
+                    self._payment("PREM_POL002_2025_01B", "POL002", 10.0, "TXN_3"),
+                    self._payment("PREM_POL999_2025_01", "POL999", 5.0, "TXN_4")]
+        report = ReconciliationEngine(partitions=4).run(path, payments, [])
+        self.assertEqual(self._flags(path), [("PREMIUM_MISMATCH", ""), ("UNKNOWN_POLICY", "")])
+        self.assertEqual((report.matched, report.policies_read), (1, 2))
+        self.assertEqual((report.premiums_paid, report.premiums_billed, report.total_paid), (30.0, 30.0, 0.0))
+
+    def test_streams_file_backends(self):
+        """Test claims and payments streamed from snapshot and journals equal their fully loaded state"""
+        with open(ClaimsStorageService.CLAIMS_FILE, 'w') as f:
+            json.dump(dict(self.claims, schema_version=2), f, indent=4)
+        self.assertTrue(ClaimsStorageService.update_claim_status("CLM004", "APPROVED"))
+        ClaimsStorageService.get_journal().upsert(self._claim("CLM007", "POL002", "PENDING", 20.0))
+        PaymentStorageService.save_payments(self.payments)
+        PaymentStorageService.save_payment(dict(self.payments[0], payment_status="REFUNDED"), "refunded")
+
+        engine = ReconciliationEngine(partitions=3)
+        claims = {claim["claim_id"]: claim for claim in engine.stored_claims(self.tmp_dir)}
+        self.assertEqual(claims, ClaimsStorageService.load_all_claims())
+        self.assertEqual(claims["CLM004"]["status"], "APPROVED")
+        payments = {payment["payment_id"]: payment for payment in engine.stored_payments(self.tmp_dir)}
+        self.assertEqual(payments, PaymentStorageService.load_payments())
+        self.assertEqual(payments["PAY_CLM001"]["payment_status"], "REFUNDED")
+
+    def test_stored_data(self):
+        """Test reconciling what is stored, from the ledger and claims file and from SQLite pages"""
+        PaymentStorageService.save_payments(self.payments)
+        with open(ClaimsStorageService.CLAIMS_FILE, 'w') as f:
+            json.dump(self.claims, f)
+        path = os.path.join(self.tmp_dir, "stored.csv")
+        self._check(ReconciliationEngine(partitions=8).run(path), path)
+
+        storage = SQLiteStorage(os.path.join(self.tmp_dir, "insurance.db"))
+        try:
+            ClaimsStorageService.BACKEND = PaymentStorageService.BACKEND = DataStorageService.BACKEND = storage
+            storage.save_customer(self.customer)
+            for claim in self.claims.values():
+                storage.save_claim(claim)
+            storage.save_payments(self.payments)
+            self.assertEqual(len(list(storage.iter_payments(page_size=2))), 7)
+            self._check(ReconciliationEngine(partitions=8).run(path), path)
+        finally:
+            ClaimsStorageService.BACKEND = PaymentStorageService.BACKEND = DataStorageService.BACKEND = None
+            storage.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import copy
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+from data_storage_service import DataStorageService
+from rating_engine import DEFAULT_RATE_TABLES
+from rerating_job import RerateJob
+
+
+def _policy(email, policy_id, policy_type, coverage, premium):
+    return {"policy_id": policy_id, "customer_id": email, "policy_type": policy_type,
+            "coverage_amount": coverage, "premium": premium, "status": "PolicyStatus.ACTIVE",
+            "start_date": "2025-01-01T00:00:00", "end_date": "2026-01-01T00:00:00"}
+
+
+class TestRerateJob(unittest.TestCase):
+    def setUp(self):
+        """Store 40 customers over 4 shards and raise the LIFE base rate by half"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.saved = (DataStorageService.CUSTOMER_STORE_DIR, DataStorageService.DATA_FILE,
+                      DataStorageService.SHARD_COUNT, DataStorageService.BACKEND, DataStorageService._store)
+        DataStorageService.CUSTOMER_STORE_DIR = os.path.join(self.tmp_dir, "customers")
+        DataStorageService.DATA_FILE = os.path.join(self.tmp_dir, "customer_data.json")
+        DataStorageService.SHARD_COUNT = 4
+        DataStorageService.BACKEND = None
+        store = DataStorageService.get_store()
+        self.customers = {}
+        for i in range(40):
+            email = f"user{i}@gmail.com"
+            self.customers[email] = {"customer_info": {"email": email}, "policies": {
+                f"POL{2 * i:03d}": _policy(email, f"POL{2 * i:03d}", "LIFE", 10000.0, 70.0 + i),
+                f"POL{2 * i + 1:03d}": _policy(email, f"POL{2 * i + 1:03d}", "CAR", 5000.0, 250.0),
+            }}
+        store.replace_all(self.customers)
+
+        self.current = copy.deepcopy(DEFAULT_RATE_TABLES)
+        self.current["version"] = 2
+        self.current["profiles"]["policy_calculator"]["base_rates"]["LIFE"] = 0.0075
+        self.report = os.path.join(self.tmp_dir, "report.csv")
+        self.checkpoint = os.path.join(self.tmp_dir, "checkpoint.json")
+
+    def tearDown(self):
+        (DataStorageService.CUSTOMER_STORE_DIR, DataStorageService.DATA_FILE,
+         DataStorageService.SHARD_COUNT, DataStorageService.BACKEND, DataStorageService._store) = self.saved
+        shutil.rmtree(self.tmp_dir)
+
+    def _job(self):
+        return RerateJob(DEFAULT_RATE_TABLES, self.current, workers=2, chunk_size=7,
+                         checkpoint_path=self.checkpoint, report_path=self.report)
+
+    def _stored(self):
+        return {pid: p for _, record in DataStorageService.get_store().iter_customers()
+                for pid, p in record["policies"].items()}
+
+    def _premiums(self):
+        return {pid: p["premium"] for _, record in DataStorageService.get_store().iter_customers()
+                for pid, p in record["policies"].items()}
+
+    def _check_result(self):
+        premiums = self._premiums()
+        for i in range(40):
+            self.assertEqual(premiums[f"POL{2 * i:03d}"], round((70.0 + i) * 1.5, 2))
+            self.assertEqual(premiums[f"POL{2 * i + 1:03d}"], 250.0)
+        with open(self.report, newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(sorted(row["policy_id"] for row in rows), sorted(premiums))
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_rerates_book(self):
+        """Test changed rates scale premiums and every policy is reported"""
+        summary = self._job().run()
+        self.assertEqual((summary["policies"], summary["changed"]), (80, 40))
+        self._check_result()
+        self.assertEqual(self._stored()["POL000"]["rate_table_version"], 2)
+
+    def test_skips_policies_quoted_with_current_tables(self):
+        """Test policies already priced with the current tables are reported unchanged"""
+        DataStorageService.update_policies({"user0@gmail.com": {"POL000": {"premium": 105.0, "rate_table_version": 2}}})
+        summary = self._job().run()
+        self.assertEqual((summary["policies"], summary["changed"]), (80, 39))
+        self._check_result()
+
+    def test_resumes_after_interruption(self):
+        """Test an interrupted job resumes without re-rating or re-reporting policies"""
+        job = self._job()
+        save_checkpoint = job._save_checkpoint
+        calls = []
+
+        def interrupt(checkpoint):
+            # Crash on the third unit after its write-back and report, before the checkpoint
+            calls.append(checkpoint["cursor"])
+            if len(calls) == 3:
+                raise KeyboardInterrupt
+            save_checkpoint(checkpoint)
+
+        job._save_checkpoint = interrupt
+        with self.assertRaises(KeyboardInterrupt):
+            job.run()
+        self.assertTrue(os.path.exists(self.checkpoint))
+        summary = self._job().run()
+        self.assertEqual(summary["policies"], 80)
+        self._check_result()
+
+    def test_dry_run_leaves_premiums(self):
+        """Test a dry run reports changes without writing them"""
+        before = self._premiums()
+        job = self._job()
+        job.dry_run = True
+        self.assertEqual(job.run()["changed"], 40)
+        self.assertEqual(self._premiums(), before)
+
+
+if __name__ == '__main__':
+    unittest.main()
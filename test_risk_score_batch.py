@@ -0,0 +1,80 @@
+import random
+import unittest
+from policy_calculator import PolicyCalculator
+
+
+class TestRiskScoreBatch(unittest.TestCase):
+    def setUp(self):
+        """Random applicants, including ages on every band edge"""
+        self.rng = random.Random(7)
+
+    def _assert_matches(self, batch, expected):
+        self.assertEqual(len(batch), len(expected))
+        self.assertEqual(batch.scores.tolist(), [score.base_score for score in expected])
+        self.assertEqual(batch.confidence.tolist(), [score.confidence for score in expected])
+        self.assertEqual(batch.factors.tolist(),
+                         [[float(score.factors[name]) for name in batch.factor_names] for score in expected])
+
+    def test_car_matches_scalar(self):
+        """Test car scores and factors equal calculate_car_risk_score"""
+        rng = self.rng
+        rows = [(rng.choice([18, 24, 25, 29, 30, 45, 60, 61, 70, 71, 90]), rng.uniform(0, 0.5),
+                 ["accident"] * rng.randint(0, 4), rng.uniform(0, 0.5)) for _ in range(3000)]
+        expected = [PolicyCalculator.calculate_car_risk_score.uncached(*row) for row in rows]
+        batch = PolicyCalculator.calculate_car_risk_scores(
+            [r[0] for r in rows], [r[1] for r in rows], [len(r[2]) for r in rows], [r[3] for r in rows])
+        self._assert_matches(batch, expected)
+
+    def test_health_matches_scalar(self):
+        """Test health scores equal calculate_health_risk_score, with current_health missing for some"""
+        rng = self.rng
+        rows = [(rng.randint(18, 90), rng.choice([{}, {"current_health": rng.uniform(0, 1)}]),
+                 rng.uniform(0, 1), rng.uniform(0, 1)) for _ in range(3000)]
+        expected = [PolicyCalculator.calculate_health_risk_score.uncached(*row) for row in rows]
+        batch = PolicyCalculator.calculate_health_risk_scores(
+            [r[0] for r in rows], [r[1].get("current_health") for r in rows],
+            [r[2] for r in rows], [r[3] for r in rows])
+        self._assert_matches(batch, expected)
+
+    def test_property_matches_scalar(self):
+        """Test property scores equal calculate_property_risk_score, including clipping at 0 and 1"""
+        rng = self.rng
+        rows = []
+        for _ in range(3000):
+            location = {"natural_disaster": rng.uniform(0, 0.6), "crime_rate": rng.uniform(0, 0.6)}
+            details = {key: rng.uniform(0, 1) for key in ("construction_quality", "maintenance")}
+            rows.append((location, details, rng.uniform(0, 1.5), rng.randint(0, 80)))
+        expected = [PolicyCalculator.calculate_property_risk_score.uncached(*row) for row in rows]
+        batch = PolicyCalculator.calculate_property_risk_scores(
+            {key: [r[0][key] for r in rows] for key in ("natural_disaster", "crime_rate")},
+            {key: [r[1][key] for r in rows] for key in ("construction_quality", "maintenance")},
+            [r[2] for r in rows], [r[3] for r in rows])
+        self._assert_matches(batch, expected)
+
+    def test_life_matches_scalar(self):
+        """Test life scores and confidence equal calculate_life_risk_score"""
+        rng = self.rng
+        rows = []
+        for _ in range(3000):
+            lifestyle = {name: rng.uniform(0, 0.3) for name in ("smoking", "alcohol", "exercise")
+                         if rng.random() < 0.5}
+            rows.append((rng.randint(18, 90), rng.uniform(0, 1), lifestyle,
+                         ["condition"] * rng.randint(0, 3)))
+        expected = [PolicyCalculator.calculate_life_risk_score.uncached(*row) for row in rows]
+        batch = PolicyCalculator.calculate_life_risk_scores(
+            [r[0] for r in rows], [r[1] for r in rows],
+            [sum(r[2].values()) if r[2] else None for r in rows], [len(r[3]) for r in rows])
+        self._assert_matches(batch, expected)
+
+    def test_to_risk_score(self):
+        """Test a single row can be turned back into a RiskScore"""
+        batch = PolicyCalculator.calculate_car_risk_scores([22], [0.25], [1], [0.1])
+        risk_score = batch.to_risk_score(0)
+        expected = PolicyCalculator.calculate_car_risk_score.uncached(22, 0.25, ["accident"], 0.1)
+        self.assertEqual(risk_score.base_score, expected.base_score)
+        self.assertEqual(risk_score.factors, expected.factors)
+        self.assertEqual(batch.factor("accidents").tolist(), [1.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import copy
+import itertools
+import random
+import unittest
+from datetime import date, timedelta
+import numpy as np
+from policy_book import PolicyBook
+from policy_enums import PolicyType, PolicyStatus
+from rating_engine import DEFAULT_RATE_TABLES, RatePlan
+from rerating_job import _term_months
+from scenario_engine import ScenarioEngine, Perturbation
+
+
+class TestScenarioEngine(unittest.TestCase):
+    def setUp(self):
+        """A book of random policies, some with stored risk factors and some not quotable"""
+        rng = random.Random(11)
+        customers = {}
+        for c in range(60):
+            policies = {}
+            for p in range(rng.randint(1, 6)):
+                start = date(2024, 1, 1) + timedelta(days=rng.randint(0, 400))
+                record = {
+                    "policy_type": rng.choice([t.name for t in PolicyType]),
+                    "status": f"PolicyStatus.{rng.choice([s.name for s in PolicyStatus])}",
+                    "coverage_amount": rng.choice([0.0, rng.uniform(1000, 500000)]),
+                    "premium": round(rng.uniform(50, 5000), 2),
+                    "start_date": start.isoformat(),
+                    "end_date": (start + timedelta(days=rng.choice([-5, 20, 365, 800]))).isoformat(),
+                }
+                if rng.random() < 0.7:
+                    record["parking_location"] = rng.choice(["GARAGE", "street", "PUBLIC_PARKING", "MOON"])
+                    record["vehicle_age"] = rng.randint(0, 15)
+                    record["location_risk"] = rng.choice(["LOW", "HIGH"])
+                    record["base_score"] = rng.uniform(0, 1)
+                policies[f"POL{c:03d}{p}"] = record
+            customers[f"c{c}@example.com"] = {"policies": policies}
+        self.customers = customers
+        self.book = PolicyBook.from_records(customers.items())
+
+    def _expected(self, profile, tables):
+        """Totals by type from scalar quotes, projected the way the re-rating job does"""
+        baseline = RatePlan(profile, DEFAULT_RATE_TABLES["profiles"][profile])
+        scenario = RatePlan(profile, tables["profiles"][profile])
+        keys = {factor.key for factors in baseline.factors.values() for factor in factors}
+        totals = dict.fromkeys([t.name for t in PolicyType], 0.0)
+        for record in (r for customer in self.customers.values() for r in customer["policies"].values()):
+            premium = record["premium"]
+            term = _term_months(record)
+            if record["coverage_amount"] > 0 and term > 0:
+                factors = {key: record[key] for key in keys if key in record}
+                old = baseline.quote(record["policy_type"], record["coverage_amount"], term, factors)
+                new = scenario.quote(record["policy_type"], record["coverage_amount"], term, factors)
+                premium = round(premium * (new / old), 2) if old > 0 else premium
+            totals[record["policy_type"]] += premium
+        return totals
+
+    def test_grid_matches_scalar_quotes(self):
+        """Test every scenario of a grid equals requoting the book with the changed tables"""
+        engine = ScenarioEngine(self.book, "calculations", DEFAULT_RATE_TABLES)
+        axes = [Perturbation("CAR", [0.9, 1.0, 1.1]),
+                Perturbation("CAR", [1.3, 1.4], key="parking_location", entry="STREET", mode="set"),
+                Perturbation("CAR", [1.0, 1.25], key="vehicle_age", entry=1)]
+        result = engine.evaluate(axes)
+        self.assertEqual(len(result), 12)
+
+        for s, (rate, street, band) in enumerate(itertools.product([0.9, 1.0, 1.1], [1.3, 1.4], [1.0, 1.25])):
+            tables = copy.deepcopy(DEFAULT_RATE_TABLES)
+            profile = tables["profiles"]["calculations"]
+            profile["base_rates"]["CAR"] = profile["base_rates"]["CAR"] * rate
+            factors = {spec["key"]: spec for spec in profile["factors"]["CAR"]}
+            factors["parking_location"]["table"]["STREET"] = street
+            factors["vehicle_age"]["bands"]["values"][1] = factors["vehicle_age"]["bands"]["values"][1] * band
+            expected = self._expected("calculations", tables)
+            for j, policy_type in enumerate(PolicyType):
+                self.assertAlmostEqual(result.by_type[s, j], expected[policy_type.name], places=6)
+
+    def test_sum_profile_and_status_totals(self):
+        """Test a sum-combined profile, and that status totals add up to type totals"""
+        for customer in self.customers.values():
+            for record in customer["policies"].values():
+                record.pop("location_risk", None)  # A table name in "calculations", a number here
+        self.book = PolicyBook.from_records(self.customers.items())
+        engine = ScenarioEngine(self.book, "policy_calculator", DEFAULT_RATE_TABLES)
+        result = engine.evaluate([Perturbation("LIFE", [0.008], mode="set"),
+                                  Perturbation("CAR", [1.0, 2.0], key="base_score")])
+        tables = copy.deepcopy(DEFAULT_RATE_TABLES)
+        tables["profiles"]["policy_calculator"]["base_rates"]["LIFE"] = 0.008
+        tables["profiles"]["policy_calculator"]["factors"]["CAR"][0]["linear"]["scale"] = 2.0
+        expected = self._expected("policy_calculator", tables)
+        for j, policy_type in enumerate(PolicyType):
+            self.assertAlmostEqual(result.by_type[1, j], expected[policy_type.name], places=6)
+        np.testing.assert_allclose(result.by_status.sum(axis=1), result.totals)
+
+    def test_no_change_keeps_book(self):
+        """Test an identity scenario reproduces the stored premiums"""
+        engine = ScenarioEngine(self.book, "calculations", DEFAULT_RATE_TABLES)
+        result = engine.evaluate([Perturbation("HEALTH", [1.0])])
+        np.testing.assert_allclose(result.by_type[0], list(self.book.total_by_type("premium").values()))
+        np.testing.assert_allclose(result.by_status[0], list(self.book.total_by_status("premium").values()))
+        self.assertEqual(result.to_rows()[0]["change"], 0.0)
+
+    def test_invalid_axes_rejected(self):
+        """Test perturbations of unknown factors or entries raise ValueError"""
+        engine = ScenarioEngine(self.book, "calculations", DEFAULT_RATE_TABLES)
+        with self.assertRaises(ValueError):
+            engine.evaluate([Perturbation("CAR", [1.0], key="annual_income")])
+        with self.assertRaises(ValueError):
+            engine.evaluate([Perturbation("CAR", [1.5], key="parking_location", entry="ROOF", mode="set")])
+        with self.assertRaises(ValueError):
+            Perturbation("BOAT", [1.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from schema_migrations import iter_json_object, read_schema_version, SCHEMA_VERSION_KEY, CURRENT_SCHEMA_VERSION
+from schema_migrator import SchemaMigrator
+from claims_journal import ClaimsJournal
+from claims_storage_service import ClaimsStorageService
+from data_storage_service import DataStorageService
+from file_lock import FileLock
+
+
+class TestSchemaMigrations(unittest.TestCase):
+    def setUp(self):
+        """Create a version 1 data directory with mixed status spellings and point storage at it"""
+        self.data_dir = tempfile.mkdtemp()
+        self.saved = (ClaimsStorageService.CLAIMS_FILE, ClaimsStorageService.JOURNAL_FILE,
+                      ClaimsStorageService.BACKGROUND_COMPACTION, ClaimsStorageService.BACKEND,
+                      ClaimsStorageService._journal, ClaimsJournal.LOCK_TIMEOUT,
+                      DataStorageService.CUSTOMER_STORE_DIR, DataStorageService.DATA_FILE,
+                      DataStorageService.BACKEND, DataStorageService._store)
+        ClaimsStorageService.CLAIMS_FILE = os.path.join(self.data_dir, "claims_data.json")
+        ClaimsStorageService.JOURNAL_FILE = os.path.join(self.data_dir, "claims_journal.jsonl")
+        ClaimsStorageService.BACKGROUND_COMPACTION = False
+        ClaimsStorageService.BACKEND = None
+        ClaimsStorageService._journal = None
+        DataStorageService.CUSTOMER_STORE_DIR = os.path.join(self.data_dir, "customers")
+        DataStorageService.DATA_FILE = os.path.join(self.data_dir, "customer_data.json")
+        DataStorageService.BACKEND = None
+        policies = {
+            f"POL00{i}": {"policy_id": f"POL00{i}", "policy_type": "LIFE", "status": status}
+            for i, status in enumerate(["PolicyStatus.ACTIVE", "PolicyStatus(4)", "4", "ACTIVE", 4])
+        }
+        self._write("customer_data.json", {
+            "jane@gmail.com": {"customer_info": {"email": "jane@gmail.com"}, "policies": policies}
+        })
+        self._write("claims_data.json", {
+            "CLM001": {"claim_id": "CLM001", "status": "APPROVE"},
+            "CLM002": {"claim_id": "CLM002", "status": "review"},
+            "CLM003": {"claim_id": "CLM003", "status": "PENDING"},
+        })
+        with open(os.path.join(self.data_dir, "claims_journal.jsonl"), 'w') as f:
+            f.write(json.dumps({"op": "status", "claim_id": "CLM003", "status": "REJECT", "prev": -1}) + "\n")
+
+    def tearDown(self):
+        (ClaimsStorageService.CLAIMS_FILE, ClaimsStorageService.JOURNAL_FILE,
+         ClaimsStorageService.BACKGROUND_COMPACTION, ClaimsStorageService.BACKEND,
+         ClaimsStorageService._journal, ClaimsJournal.LOCK_TIMEOUT,
+         DataStorageService.CUSTOMER_STORE_DIR, DataStorageService.DATA_FILE,
+         DataStorageService.BACKEND, DataStorageService._store) = self.saved
+        shutil.rmtree(self.data_dir)
+
+    def _write(self, name, data):
+        with open(os.path.join(self.data_dir, name), 'w') as f:
+            json.dump(data, f, indent=4)
+
+    def _read(self, name):
+        with open(os.path.join(self.data_dir, name)) as f:
+            return json.load(f)
+
+    def test_streaming_reader_matches_json_load(self):
+        """Test the incremental reader handles values split across tiny chunks"""
+        data = {"a": {"x": [1, 2.5, "s"]}, "b": 12345678, "c": "t\"x", "d": None, "e": {}}
+        pairs = list(iter_json_object(io.StringIO(json.dumps(data, indent=2)), chunk_size=3))
+        self.assertEqual(dict(pairs), data)
+        self.assertEqual(list(iter_json_object(io.StringIO(" { } "))), [])
+
+    def test_migrate_all_canonicalises_statuses(self):
+        """Test old files are rewritten once with canonical statuses and a version"""
+        migrated = SchemaMigrator.migrate_all()
+        self.assertEqual(len(migrated), 3)
+
+        customers = self._read("customer_data.json")
+        self.assertEqual(next(iter(customers)), SCHEMA_VERSION_KEY)
+        statuses = {p["status"] for p in customers["jane@gmail.com"]["policies"].values()}
+        self.assertEqual(statuses, {"PolicyStatus.ACTIVE"})
+
+        claims = ClaimsJournal(os.path.join(self.data_dir, "claims_data.json")).load_all()
+        self.assertEqual({k: c["status"] for k, c in claims.items()},
+                         {"CLM001": "APPROVED", "CLM002": "REVIEWING", "CLM003": "REJECTED"})
+
+        # A second run finds every file current and rewrites nothing
+        self.assertEqual(read_schema_version(os.path.join(self.data_dir, "claims_data.json")),
+                         CURRENT_SCHEMA_VERSION)
+        self.assertEqual(SchemaMigrator.migrate_all(), [])
+
+    def test_migrates_configured_shards_and_waits_for_claim_writers(self):
+        """Test customer shards are found through the store and claims wait for the journal lock"""
+        store = DataStorageService.get_store()
+        store.shard_count  # Import the legacy file into shards, with its old statuses
+        with open(store._shard_path(0)) as f:
+            shard = json.load(f)
+        del shard[SCHEMA_VERSION_KEY]
+        with open(store._shard_path(0), 'w') as f:
+            json.dump(shard, f)
+
+        ClaimsJournal.LOCK_TIMEOUT = 0.1
+        journal = ClaimsStorageService.get_journal()
+        with FileLock(journal.lock_path):
+            with self.assertRaises(TimeoutError):
+                SchemaMigrator.migrate_all()
+        self.assertEqual(self._read("claims_data.json")["CLM001"]["status"], "APPROVE")
+        self.assertEqual(SchemaMigrator.migrate_all(), [os.path.join(self.data_dir, "claims_data.json"),
+                                                        os.path.join(self.data_dir, "claims_journal.jsonl")])
+        self.assertEqual(read_schema_version(store._shard_path(0)), CURRENT_SCHEMA_VERSION)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import json
+import os
+import unittest
+from claims_storage_service import ClaimsStorageService
+from data_storage_service import DataStorageService
+from payment_storage_service import PaymentStorageService
+from settlement_job import SettlementJob
+from sqlite_storage import SQLiteStorage
+from storage_fixtures import TemporaryStorageMixin, life_and_health_customer
+
+
+class TestSettlementJob(TemporaryStorageMixin, unittest.TestCase):
+    def setUp(self):
+        """Temporary storage with a LIFE and a HEALTH policy and a mix of approved and open claims"""
+        super().setUp()
+        self.customers = {"jane@gmail.com": life_and_health_customer()}
+        DataStorageService.get_store().replace_all(self.customers)
+        self.claims = {
+            "CLM001": self._claim("CLM001", "POL001", "APPROVED", 300.0),
+            "CLM002": self._claim("CLM002", "POL002", "APPROVED", 1000.0),
+            "CLM003": self._claim("CLM003", "POL002", "APPROVED", 150.0),     # Within the deductible
+            "CLM004": self._claim("CLM004", "POL001", "APPROVED", 5000.0),    # Over the coverage
+            "CLM005": self._claim("CLM005", "POL999", "APPROVED", 10.0),      # Unknown policy
+            "CLM006": self._claim("CLM006", "POL001", "PENDING", 20.0),
+        }
+        with open(ClaimsStorageService.CLAIMS_FILE, 'w') as f:
+            json.dump(self.claims, f)
+
+    @staticmethod
+    def _claim(claim_id, policy_id, status, amount):
+        return {"claim_id": claim_id, "policy_id": policy_id, "customer_id": "jane@gmail.com", "amount": amount,
+                "status": status, "description": "Claim", "evidence_documents": [], "date_filed": "2025-01-02"}
+
+    def _statuses(self):
+        return {claim_id: claim["status"] for claim_id, claim in ClaimsStorageService.load_all_claims().items()}
+
+    def _check_settlement(self):
+        report = SettlementJob(chunk_size=2).run()
+        self.assertEqual((report.selected, report.chunks, report.settled), (5, 3, 4))
+        self.assertEqual((report.payments_created, report.zero_payout, report.skipped), (3, 1, ["CLM005"]))
+        self.assertEqual(report.total_paid, 300.0 + 800.0 + 1000.0)
+        payments = PaymentStorageService.load_payments()
+        self.assertEqual({payment_id: payment["amount"] for payment_id, payment in payments.items()},
+                         {"PAY_CLM001": 300.0, "PAY_CLM002": 800.0, "PAY_CLM004": 1000.0})
+        self.assertEqual(payments["PAY_CLM002"]["payment_status"], "PENDING")
+        self.assertEqual(self._statuses(), {"CLM001": "SETTLED", "CLM002": "SETTLED", "CLM003": "SETTLED",
+                                            "CLM004": "SETTLED", "CLM005": "APPROVED", "CLM006": "PENDING"})
+
+    def test_settles_approved_claims(self):
+        """Test approved claims are paid with coverage and deductible applied, then settled"""
+        self._check_settlement()
+
+    def test_sqlite_backend(self):
+        """Test the same run against the SQLite backend, with payments and statuses in transactions"""
+        storage = SQLiteStorage(os.path.join(self.tmp_dir, "insurance.db"))
+        try:
+            ClaimsStorageService.BACKEND = PaymentStorageService.BACKEND = DataStorageService.BACKEND = storage
+            storage.save_customer(self.customers["jane@gmail.com"])
+            for claim in self.claims.values():
+                storage.save_claim(claim)
+            self._check_settlement()
+        finally:
+            ClaimsStorageService.BACKEND = PaymentStorageService.BACKEND = DataStorageService.BACKEND = None
+            storage.close()
+
+    def test_unreadable_policy_is_skipped(self):
+        """Test a claim on a malformed policy is skipped without stopping the run"""
+        self.customers["jane@gmail.com"]["policies"]["POL003"] = {
+            "policy_id": "POL003", "policy_type": "HEALTH", "coverage_amount": 5000.0, "premium": 20.0,
+            "status": "PolicyStatus.ACTIVE", "deductible": "n/a", "includes_dental": False}
+        DataStorageService.get_store().replace_all(self.customers)
+        claims = {"CLM001": self.claims["CLM001"], "CLM007": self._claim("CLM007", "POL003", "APPROVED", 500.0)}
+        ClaimsStorageService.get_journal().upsert(claims["CLM007"])
+        report = SettlementJob().run(claims)
+        self.assertEqual((report.settled, report.payments_created, report.skipped), (1, 1, ["CLM007"]))
+
+    def test_idempotent_per_claim(self):
+        """Test a rerun pays nobody twice and finishes claims whose payment was stored before a crash"""
+        PaymentStorageService.save_payments([{"payment_id": "PAY_CLM002", "policy_id": "POL002", "amount": 800.0,
+                                              "payment_date": "2025-01-03", "payment_status": "PENDING",
+                                              "payment_method": "CHECK", "transaction_id": ""}])
+        report = SettlementJob().run()
+        self.assertEqual((report.payments_created, report.payments_reused, report.settled), (2, 1, 4))
+        self.assertEqual(PaymentStorageService.load_payment("PAY_CLM002")["payment_method"], "CHECK")
+
+        again = SettlementJob().run()
+        self.assertEqual((again.selected, again.payments_created, again.settled), (1, 0, 0))
+        self.assertEqual(len(PaymentStorageService.load_payments()), 3)
+
+
+    def test_claim_reopened_after_selection_is_not_paid(self):
+        """Test a claim moved out of APPROVED after selection is neither paid nor settled"""
+        claims = SettlementJob.select_claims()
+        self.assertTrue(ClaimsStorageService.update_claim_status("CLM001", "REVIEWING"))
+        report = SettlementJob().run(claims)
+        self.assertEqual((report.settled, report.changed), (3, ["CLM001"]))
+        self.assertIsNone(PaymentStorageService.load_payment("PAY_CLM001"))
+        self.assertEqual(self._statuses()["CLM001"], "REVIEWING")
+
+    def test_processed_payment_is_not_reset(self):
+        """Test a payment completed by another process during the run keeps its state"""
+        completed = {"payment_id": "PAY_CLM002", "policy_id": "POL002", "amount": 800.0,
+                     "payment_date": "2025-01-03", "payment_status": "COMPLETED",
+                     "payment_method": "BANK_TRANSFER", "transaction_id": "TXN_1"}
+
+        def other_process(claim_id, status, claim):
+            if claim_id == "CLM001":    # Settled in the first chunk, before CLM002 is paid
+                PaymentStorageService.save_payments([completed])
+        ClaimsStorageService.add_claim_listener(other_process)
+        report = SettlementJob(chunk_size=1).run()
+        self.assertEqual((report.payments_reused, report.settled), (1, 4))
+        self.assertEqual(PaymentStorageService.load_payment("PAY_CLM002"), completed)
+        self.assertEqual([change["event"] for change in PaymentStorageService.get_ledger().history("PAY_CLM002")],
+                         ["created"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,185 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from sqlite_storage import SQLiteStorage
+from agent import AgentCLI, Sale
+from auth import AuthenticationManager
+from data_storage import DataStorage
+from data_storage_service import DataStorageService
+from claims_storage_service import ClaimsStorageService
+from claim import Claim
+
+
+class TestSQLiteStorage(unittest.TestCase):
+    def setUp(self):
+        """Create a temporary data directory with JSON files to migrate"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.tmp_dir, "data")
+        os.makedirs(self.data_dir)
+        self._write("users.json", {
+            "admin@gmail.com": {"email": "admin@gmail.com", "password": "admin", "role": "admin", "name": ""}
+        })
+        self._write("customer_data.json", {
+            "jane@gmail.com": {
+                "customer_info": {
+                    "email": "jane@gmail.com", "name": "jane", "contact_number": "",
+                    "address": "", "birth_date": "1990-01-01", "credit_score": 0.0
+                },
+                "policies": {
+                    "POL007": {"policy_id": "POL007", "customer_id": "jane@gmail.com", "policy_type": "LIFE",
+                               "coverage_amount": 1000.0, "premium": 10.0, "status": "PolicyStatus.ACTIVE"}
+                }
+            }
+        })
+        self._write("claims_data.json", {
+            "CLM001": {"claim_id": "CLM001", "policy_id": "POL007", "customer_id": "jane@gmail.com",
+                       "amount": 50.0, "status": "PENDING", "description": "Test",
+                       "evidence_documents": [], "date_filed": "2025-01-02"}
+        })
+        self._write("sales.json", {
+            "SALE_1": {"sale_id": "SALE_1", "policy_id": "POL007", "customer_id": "jane@gmail.com",
+                       "amount": 10.0, "commission_earned": 0.0, "sale_date": "2025-01-02T01:42:33",
+                       "status": "PENDING"}
+        })
+        self.storage = SQLiteStorage(os.path.join(self.tmp_dir, "insurance.db"))
+        DataStorageService.BACKEND = self.storage
+        ClaimsStorageService.BACKEND = self.storage
+
+    def tearDown(self):
+        DataStorageService.BACKEND = None
+        ClaimsStorageService.BACKEND = None
+        self.storage.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def _write(self, filename, data):
+        with open(os.path.join(self.data_dir, filename), 'w') as f:
+            json.dump(data, f)
+
+    def test_migration_imports_json_files(self):
+        """Test migration imports every JSON data file"""
+        counts = self.storage.migrate_from_json(self.data_dir)
+        self.assertEqual(counts["users"], 1)
+        self.assertEqual(counts["customers"], 1)
+        self.assertEqual(counts["policies"], 1)
+        self.assertEqual(counts["claims"], 1)
+        self.assertEqual(counts["sales"], 1)
+        self.assertEqual(self.storage.load_sales()["SALE_1"]["amount"], 10.0)
+
+    def test_agent_sales_use_the_backend(self):
+        """Test the agent portal loads and saves sales through the backend, not the sales file"""
+        self.storage.migrate_from_json(self.data_dir)
+        saved = SQLiteStorage._shared, os.environ.get(SQLiteStorage.BACKEND_ENV_VAR)
+        SQLiteStorage._shared = self.storage
+        os.environ[SQLiteStorage.BACKEND_ENV_VAR] = "sqlite"
+        try:
+            cli = AgentCLI(AuthenticationManager())
+        finally:
+            SQLiteStorage._shared = saved[0]
+            if saved[1] is None:
+                del os.environ[SQLiteStorage.BACKEND_ENV_VAR]
+            else:
+                os.environ[SQLiteStorage.BACKEND_ENV_VAR] = saved[1]
+        cli.sales_data_file = os.path.join(self.tmp_dir, "sales.json")
+        self.assertEqual(list(cli.sales), ["SALE_1"])
+        cli.sales["SALE_2"] = Sale("SALE_2", "POL007", "jane@gmail.com", 20.0)
+        self.assertTrue(cli.save_data())
+        self.assertEqual(sorted(self.storage.load_sales()), ["SALE_1", "SALE_2"])
+        self.assertFalse(os.path.exists(cli.sales_data_file))
+
+    def test_data_storage_users(self):
+        """Test DataStorage reads and writes users through the backend"""
+        storage = DataStorage(self.data_dir, backend=self.storage)
+        users = {"a@gmail.com": {"email": "a@gmail.com", "password": "pw", "role": "agent", "name": "A"}}
+        self.assertTrue(storage.save_data("users", users))
+        self.assertEqual(storage.load_data("users"), users)
+
+    def test_customer_round_trip(self):
+        """Test customer records are merged or replaced per customer"""
+        self.storage.migrate_from_json(self.data_dir)
+        record = DataStorageService.load_customer_data("jane@gmail.com")
+        self.assertIn("POL007", record["policies"])
+
+        record["policies"] = {
+            "POL008": {"policy_id": "POL008", "customer_id": "jane@gmail.com", "policy_type": "CAR",
+                       "coverage_amount": 500.0, "premium": 5.0, "status": "PolicyStatus.PENDING"}
+        }
+        self.assertTrue(DataStorageService._write_customer(record))
+        merged = DataStorageService.load_customer_data("jane@gmail.com")
+        self.assertEqual(sorted(merged["policies"]), ["POL007", "POL008"])
+        self.assertEqual(DataStorageService.get_highest_policy_number(), 8)
+
+        self.assertTrue(DataStorageService._write_customer(record, replace_policies=True))
+        replaced = DataStorageService.load_customer_data("jane@gmail.com")
+        self.assertEqual(list(replaced["policies"]), ["POL008"])
+
+    def test_claims_by_status(self):
+        """Test claim saves and status updates touch a single row"""
+        self.storage.migrate_from_json(self.data_dir)
+        claim = Claim("CLM002", "POL007", "jane@gmail.com")
+        claim.set_amount(75.0)
+        claim.set_description("Second claim")
+        self.assertTrue(ClaimsStorageService.save_claim(claim))
+        self.assertEqual(sorted(ClaimsStorageService.get_pending_claims()), ["CLM001", "CLM002"])
+
+        self.assertTrue(ClaimsStorageService.update_claim_status("CLM001", "APPROVED"))
+        self.assertEqual(list(ClaimsStorageService.get_pending_claims()), ["CLM002"])
+        self.assertEqual(ClaimsStorageService.load_claim("CLM001")["status"], "APPROVED")
+        self.assertFalse(ClaimsStorageService.update_claim_status("CLM404", "APPROVED"))
+
+
+    def test_status_update_keeps_concurrent_save(self):
+        """Test a status update waiting on another writer applies to the claim that writer saved"""
+        self.storage.migrate_from_json(self.data_dir)
+        other = SQLiteStorage(self.storage.db_path)
+        conn = other._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        claim = dict(self.storage.load_claim("CLM001"), description="Amended")
+        conn.execute("UPDATE claims SET body = ? WHERE claim_id = ?", (json.dumps(claim), "CLM001"))
+        results = []
+        updaters = [
+            threading.Thread(target=lambda: results.append(self.storage.update_claim_status("CLM001", "APPROVED"))),
+            threading.Thread(target=lambda: results.append(self.storage.update_claim_statuses({"CLM001": "SETTLED"}))),
+        ]
+        updaters[0].start()
+        time.sleep(0.2)                     # Let the update reach the locked database
+        conn.commit()
+        updaters[0].join()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("UPDATE claims SET body = json_set(body, '$.amount', 60.0) WHERE claim_id = ?", ("CLM001",))
+        updaters[1].start()
+        time.sleep(0.2)
+        conn.commit()
+        updaters[1].join()
+        other.close()
+
+        self.assertEqual(results, [True, ["CLM001"]])
+        stored = self.storage.load_claim("CLM001")
+        self.assertEqual((stored["status"], stored["description"], stored["amount"]), ("SETTLED", "Amended", 60.0))
+
+
+    def test_status_check_inside_the_write(self):
+        """Test a move is checked against the status another writer committed while it waited"""
+        self.storage.migrate_from_json(self.data_dir)
+        other = SQLiteStorage(self.storage.db_path)
+        conn = other._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("UPDATE claims SET status = 'REJECTED', body = json_set(body, '$.status', 'REJECTED') "
+                     "WHERE claim_id = 'CLM001'")
+        results = []
+        adjuster = threading.Thread(
+            target=lambda: results.append(ClaimsStorageService.update_claim_status("CLM001", "APPROVED")))
+        adjuster.start()
+        time.sleep(0.2)                     # Let the move read the claim while the other writer holds it
+        conn.commit()
+        adjuster.join()
+        other.close()
+
+        self.assertEqual(results, [False])  # REJECTED -> APPROVED is not allowed
+        self.assertEqual(self.storage.load_claim("CLM001")["status"], "REJECTED")
+
+if __name__ == '__main__':
+    unittest.main()
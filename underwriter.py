@@ -7,8 +7,15 @@ from policy import Policy, LifePolicy, CarPolicy, HealthPolicy, PropertyPolicy
 from policy_enums import PolicyType, PolicyStatus
 from claim import Claim
 from payment import Payment
+from payment_storage_service import PaymentStorageService
+from payment_processor import PaymentProcessor
+from reconciliation import ReconciliationEngine
+from settlement_job import SettlementJob
 from financial_calculator import FinancialCalculator
+from scenario_engine import ScenarioEngine, Perturbation
 from policy_json_handler import PolicyJSONHandler
+from policy_codec import PolicyCodec
+from data_storage_service import DataStorageService
 from serialization_handler import SerializationHandler
 from customer import Customer  # Add this import
 
@@ -18,7 +25,6 @@ class UnderwriterCLI:
         self.current_user = None
         self.policies: Dict[str, Policy] = {}
         self.claims: Dict[str, Claim] = {}
-        self.payments: Dict[str, Payment] = {}
         self.calculator = FinancialCalculator()
 
     def display_menu(self):
@@ -197,102 +203,29 @@ class UnderwriterCLI:
     def load_customer_policies(self) -> bool:
         """Load policies from customer data file"""
         try:
-            loaded_data = SerializationHandler.load_from_json("customer_data.json")
+            loaded_data = DataStorageService.load_data()
             if not loaded_data:
                 print("No data found.")
                 return False
-                
-            if "policies" not in loaded_data:
-                print("No policies section found in data.")
-                return False
 
             # Clear existing policies before loading
             self.policies.clear()
 
-            # Get the policies dictionary from the nested structure
-            policies_data = loaded_data["policies"]
-            if not policies_data:
+            # Convert every customer's stored policies into Policy objects
+            for customer_data in loaded_data.values():
+                if isinstance(customer_data, dict):
+                    self.policies.update(PolicyCodec.decode_many(customer_data.get("policies", {})))
+
+            if not self.policies:
                 print("No policies found in data.")
                 return False
 
-            # Convert loaded policy data into Policy objects
-            for policy_id, policy_data in policies_data.items():
-                policy_type = policy_data.get("policy_type")
-                customer_id = policy_data.get("customer_id")
-
-                policy = None
-                if policy_type == "LIFE":
-                    policy = LifePolicy(policy_id, customer_id)
-                    if "beneficiary" in policy_data:
-                        policy.set_beneficiary(policy_data["beneficiary"])
-                    if "death_benefit" in policy_data:
-                        policy.set_death_benefit(float(policy_data["death_benefit"]))
-                        
-                elif policy_type == "CAR":
-                    policy = CarPolicy(policy_id, customer_id)
-                    if all(k in policy_data for k in ["vehicle_id", "is_comprehensive", "vehicle_age", 
-                                                    "vehicle_model", "vehicle_plate_number", "vehicle_condition"]):
-                        policy.set_vehicle_details(
-                            policy_data["vehicle_id"],
-                            policy_data["is_comprehensive"],
-                            policy_data["vehicle_age"],
-                            policy_data["vehicle_model"],
-                            policy_data["vehicle_plate_number"],
-                            policy_data["vehicle_condition"]
-                        )
-                        
-                elif policy_type == "HEALTH":
-                    policy = HealthPolicy(policy_id, customer_id)
-                    if "deductible" in policy_data and "includes_dental" in policy_data:
-                        policy.set_health_details(
-                            float(policy_data["deductible"]),
-                            policy_data["includes_dental"]
-                        )
-                        
-                elif policy_type == "PROPERTY":
-                    policy = PropertyPolicy(policy_id, customer_id)
-                    if "property_address" in policy_data and "property_type" in policy_data:
-                        policy.set_property_details(
-                            policy_data["property_address"],
-                            policy_data["property_type"]
-                        )
-
-                if policy:
-                    # Set common policy attributes
-                    if "coverage_amount" in policy_data:
-                        policy.set_coverage_amount(float(policy_data["coverage_amount"]))
-                    if "premium" in policy_data:
-                        policy.set_premium(float(policy_data["premium"]))
-                    if "status" in policy_data:
-                        try:
-                            policy.update_status(PolicyStatus[policy_data["status"]])
-                        except (KeyError, ValueError):
-                            pass  # Keep default status if invalid
-
-                    # Store the policy
-                    self.policies[policy_id] = policy
-
             print(f"Successfully loaded {len(self.policies)} customer policies.")
             return True
         except Exception as e:
             print(f"Error loading customer policies: {str(e)}")
             return False
 
-    def load_policies(self):
-        """Load policies from the hardcoded customer_data.json file"""
-        try:
-            loaded_policies = PolicyJSONHandler.load_policies_from_json()
-            if "policies" in loaded_policies:
-                for policy_id, policy_data in loaded_policies["policies"].items():
-                    # Create and add policies to self.policies
-                    # Logic for initializing specific policies goes here
-                    print(f"Loaded policy {policy_id}")
-                print("Policies successfully loaded.")
-            else:
-                print("No policies found in customer_data.json.")
-        except Exception as e:
-            print(f"Error loading policies: {str(e)}")
-
     @staticmethod
     def save_policies_to_json(policies_dict: Dict) -> bool:
         """Save policies and customer data to the hardcoded JSON file"""
@@ -412,12 +345,13 @@ class UnderwriterCLI:
             policy.set_coverage_amount(coverage_amount)
 
             # Calculate premium using risk score
-            premium = self.calculator.calculate_premium(
+            premium, version = self.calculator.quote_premium(
                 PolicyType[policy_type_str],
                 coverage_amount,
                 risk_score
             )
             policy.set_premium(premium)
+            policy.set_rate_table_version(version)
 
             if policy.validate_policy():
                 self.policies[policy_id] = policy
@@ -462,52 +396,9 @@ class UnderwriterCLI:
             policies_data = loaded_data["policies"]
             
             print("\n=== Loading Policies ===")
-            for policy_id, policy_data in policies_data.items():
-                try:
-                    policy_type = policy_data.get("policy_type")
-                    customer_id = policy_data.get("customer_id")
-                    
-                    # Create appropriate policy object
-                    if policy_type == "LIFE":
-                        policy = LifePolicy(policy_id, customer_id)
-                        if "beneficiary" in policy_data:
-                            policy.set_beneficiary(policy_data["beneficiary"])
-                        if "death_benefit" in policy_data:
-                            policy.set_death_benefit(float(policy_data["death_benefit"]))
-                    elif policy_type == "CAR":
-                        policy = CarPolicy(policy_id, customer_id)
-                        # Set car-specific details
-                    elif policy_type == "HEALTH":
-                        policy = HealthPolicy(policy_id, customer_id)
-                        if "deductible" in policy_data and "includes_dental" in policy_data:
-                            policy.set_health_details(
-                                float(policy_data["deductible"]),
-                                policy_data["includes_dental"]
-                            )
-                    elif policy_type == "PROPERTY":
-                        policy = PropertyPolicy(policy_id, customer_id)
-                        if "property_address" in policy_data and "property_type" in policy_data:
-                            policy.set_property_details(
-                                policy_data["property_address"],
-                                policy_data["property_type"]
-                            )
-                    else:
-                        continue
-
-                    # Set common attributes
-                    if "coverage_amount" in policy_data:
-                        policy.set_coverage_amount(float(policy_data["coverage_amount"]))
-                    if "premium" in policy_data:
-                        policy.set_premium(float(policy_data["premium"]))
-                    if "status" in policy_data:
-                        policy.update_status(PolicyStatus[policy_data["status"]])
-
-                    self.policies[policy_id] = policy
-                    print(f"Loaded policy {policy_id} ({policy_type})")
-
-                except Exception as e:
-                    print(f"Error loading policy {policy_id}: {str(e)}")
-                    continue
+            for policy_id, policy in PolicyCodec.decode_many(policies_data).items():
+                self.policies[policy_id] = policy
+                print(f"Loaded policy {policy_id} ({policy.policy_type.name})")
 
             print(f"\nSuccessfully loaded {len(self.policies)} policies.")
             return True
@@ -661,7 +552,7 @@ class UnderwriterCLI:
             try:
                 risk_factors = self._get_risk_factors()
                 premium = policy.calculate_premium(risk_factors)
-                print(f"\nCalculated Premium: ${premium:,.2f}")
+                print(f"\nCalculated Premium: ${premium:,.2f} (rate tables v{policy.rate_table_version})")
             except Exception as e:
                 print(f"Error calculating premium: {str(e)}")
 
@@ -673,9 +564,11 @@ class UnderwriterCLI:
         print("2. Process Payment")
         print("3. Generate Payment Receipt")
         print("4. Handle Refund")
-        print("5. Back")
+        print("5. Settle Approved Claims")
+        print("6. Process All Pending Payments")
+        print("7. Back")
 
-        choice = input("\nEnter your choice (1-5): ").strip()
+        choice = input("\nEnter your choice (1-7): ").strip()
 
         if choice == "1":
             self.view_pending_payments()
@@ -685,10 +578,32 @@ class UnderwriterCLI:
             self.generate_receipt()
         elif choice == "4":
             self.handle_refund()
+        elif choice == "5":
+            self.settle_approved_claims()
+        elif choice == "6":
+            self.process_pending_payments()
+
+    def settle_approved_claims(self):
+        try:
+            chunk_size = input(f"Claims per batch (default {SettlementJob.DEFAULT_CHUNK_SIZE}): ").strip()
+            job = SettlementJob(chunk_size=int(chunk_size) if chunk_size else None)
+        except ValueError:
+            print("Invalid input. Please enter a whole number.")
+            return
+        job.run().print_report()
+
+    def process_pending_payments(self):
+        try:
+            workers = input(f"Concurrent gateway calls (default {PaymentProcessor.DEFAULT_WORKERS}): ").strip()
+            processor = PaymentProcessor(max_workers=int(workers) if workers else None)
+        except ValueError:
+            print("Invalid input. Please enter a whole number.")
+            return
+        processor.run().print_report()
 
     def view_pending_payments(self):
-        pending_payments = [payment for payment in self.payments.values() 
-                          if payment.get_status() == "PENDING"]
+        pending_payments = [Payment.from_dict(data)
+                            for data in PaymentStorageService.load_payments("PENDING").values()]
         
         if not pending_payments:
             print("No pending payments found.")
@@ -700,19 +615,31 @@ class UnderwriterCLI:
             print(f"Amount: ${payment.get_amount():,.2f}")
             print(f"Method: {payment.get_payment_method()}")
 
+    @staticmethod
+    def _load_payment(payment_id: str) -> Optional[Payment]:
+        data = PaymentStorageService.load_payment(payment_id)
+        return Payment.from_dict(data) if data else None
+
     def process_payment(self):
         payment_id = input("\nEnter Payment ID: ").strip()
-        payment = self.payments.get(payment_id)
+        payment = self._load_payment(payment_id)
         
         if not payment:
             print("Payment not found.")
             return
 
+        if payment.get_status() != "PENDING":
+            print(f"Only pending payments can be processed; this payment is {payment.get_status()}.")
+            return
+
         print(f"\nAmount: ${payment.get_amount():,.2f}")
         
         method = input("Enter payment method (BANK_TRANSFER/CREDIT_CARD/CHECK): ").strip().upper()
         if payment.set_payment_method(method):
             if payment.process_payment():
+                if not PaymentStorageService.save_payment(payment.to_dict(), "processed"):
+                    print("Failed to save processed payment.")
+                    return
                 print("Payment processed successfully.")
                 if payment.verify_payment():
                     print("Payment verified.")
@@ -725,7 +652,7 @@ class UnderwriterCLI:
 
     def generate_receipt(self):
         payment_id = input("\nEnter Payment ID: ").strip()
-        payment = self.payments.get(payment_id)
+        payment = self._load_payment(payment_id)
         
         if not payment:
             print("Payment not found.")
@@ -738,7 +665,7 @@ class UnderwriterCLI:
 
     def handle_refund(self):
         payment_id = input("\nEnter Payment ID: ").strip()
-        payment = self.payments.get(payment_id)
+        payment = self._load_payment(payment_id)
         
         if not payment:
             print("Payment not found.")
@@ -753,7 +680,7 @@ class UnderwriterCLI:
         
         confirm = input(f"\nRefund amount will be ${refund_amount:,.2f}. Proceed? (y/n): ").strip().lower()
         if confirm == 'y':
-            if payment.refund_payment():
+            if payment.refund_payment() and PaymentStorageService.save_payment(payment.to_dict(), "refunded"):
                 print("Refund processed successfully.")
             else:
                 print("Failed to process refund.")
@@ -762,14 +689,20 @@ class UnderwriterCLI:
         print("\n=== Financial Calculations ===")
         print("1. Calculate Premium")
         print("2. Validate Payment")
-        print("3. Back")
+        print("3. What-if Premium Scenarios")
+        print("4. Reconcile Payments")
+        print("5. Back")
 
-        choice = input("\nEnter your choice (1-3): ").strip()
+        choice = input("\nEnter your choice (1-5): ").strip()
 
         if choice == "1":
             self.calculate_premium()
         elif choice == "2":
             self.validate_payment()
+        elif choice == "3":
+            self.run_premium_scenarios()
+        elif choice == "4":
+            self.reconcile_payments()
 
     def calculate_premium(self):
         try:
@@ -781,15 +714,36 @@ class UnderwriterCLI:
             risk_factors['age'] = float(input("Age factor: "))
             risk_factors['health'] = float(input("Health factor: "))
 
-            premium = FinancialCalculator.calculate_premium(
+            premium, version = FinancialCalculator.quote_premium(
                 policy_type,
                 coverage_amount,
                 risk_factors
             )
-            print(f"\nCalculated Premium: ${premium:,.2f}")
+            print(f"\nCalculated Premium: ${premium:,.2f} (rate tables v{version})")
         except ValueError:
             print("Invalid input. Please enter numeric values for amounts and risk factors.")
 
+    def run_premium_scenarios(self):
+        """Reprice the stored book under every combination of base rate changes"""
+        try:
+            axes = []
+            print("\nEnter base rate multipliers per policy type, comma separated (e.g. 1.0,1.1); blank to skip:")
+            for policy_type in PolicyType:
+                values = input(f"{policy_type.name}: ").strip()
+                if values:
+                    axes.append(Perturbation(policy_type.name, [float(v) for v in values.split(",")]))
+            if not axes:
+                print("No scenarios entered.")
+                return
+            ScenarioEngine.from_storage().evaluate(axes).print_report()
+        except ValueError as e:
+            print(f"Invalid scenario: {e}")
+
+    def reconcile_payments(self):
+        """Match every payment to its claim and policy and write the findings to a CSV report"""
+        path = input(f"Report file (default {ReconciliationEngine.REPORT_FILE}): ").strip()
+        ReconciliationEngine().run(path or None).print_report()
+
     def validate_payment(self):
         try:
             payment_amount = float(input("Enter payment amount: "))
@@ -806,8 +760,9 @@ class UnderwriterCLI:
         payment_id = f"PAY_{claim.get_claim_id()}"
         payment = Payment(payment_id, claim.policy_id)
         
-        if payment.set_amount(claim.get_amount()):
-            self.payments[payment_id] = payment
+        if PaymentStorageService.load_payment(payment_id):
+            print(f"Payment already initiated. Payment ID: {payment_id}")
+        elif payment.set_amount(claim.get_amount()) and PaymentStorageService.save_payment(payment.to_dict(), "created"):
             print(f"Payment initiated. Payment ID: {payment_id}")
         else:
             print("Failed to initiate payment.")
\ No newline at end of file